@@ -0,0 +1,87 @@
+"""
+Compares throughput of downloads over one and several connections from a
+local http server, which throttles each connection like the DNB server,
+and checks, that all downloads are identical.
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from tempfile import TemporaryFile
+
+from dumpconverter.utils.SegmentedDownload import SegmentedDownload
+
+
+class ThrottledRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler serving random content with a limited rate per
+    connection. Supports range requests.
+    """
+    CHUNK_SIZE = 16384
+    RANGE_PATTERN = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+    def do_GET(self):
+        content = self.server.content
+        start, end = 0, len(content) - 1
+        range_match = self.RANGE_PATTERN.match(self.headers.getheader("Range", ""))
+        if range_match:
+            start = int(range_match.group(1))
+            if range_match.group(2):
+                end = int(range_match.group(2))
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes {0}-{1}/{2}".format(
+                start, end, len(content)))
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", '"benchmark"')
+        self.end_headers()
+
+        delay = float(self.CHUNK_SIZE) / self.server.rate
+        for position in xrange(start, end + 1, self.CHUNK_SIZE):
+            self.wfile.write(content[position:min(position + self.CHUNK_SIZE, end + 1)])
+            time.sleep(delay)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # The response of the probing request is closed early on purpose
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=16, help="size of the download in MB")
+    parser.add_argument("--rate", type=int, default=8, help="rate of a single connection in MB/s")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottledRequestHandler)
+    server.content = os.urandom(args.size * 1024 * 1024)
+    server.rate = args.rate * 1024 * 1024
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+    url = "http://127.0.0.1:{0}/dump".format(server.server_address[1])
+
+    try:
+        for connections in args.connections:
+            with TemporaryFile() as downloaded_file:
+                start = time.time()
+                SegmentedDownload.download_file(url, downloaded_file, connections, is_quiet=True)
+                seconds = time.time() - start
+                identical = downloaded_file.read() == server.content
+            print "{0} connections {1:>8.3f} s {2:>8.1f} MB/s identical: {3}".format(
+                connections, seconds, args.size / seconds, identical)
+    finally:
+        server.shutdown()
+        server.server_close()
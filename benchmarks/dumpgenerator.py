@@ -0,0 +1,228 @@
+"""Contains generator for synthetic GND dumps in MARC21 slim xml format."""
+import random
+
+
+RECORD_TYPES = ("p", "u", "g")
+
+FORENAMES = ("Douglas", "George", "Martha", "Johann Wolfgang", "Marie",
+             "Friedrich", "Ludwig", "Clara", "Hannah", "Albert")
+SURNAMES = ("Adams", "Washington", "Goethe", "Curie", "Schiller",
+            "Beethoven", "Schumann", "Arendt", "Einstein", "M\xc3\xbcller")
+PLACES = ("Berlin", "M\xc3\xbcnchen", "Frankfurt (Main)", "Cambridge",
+          "Santa Barbara, Calif.", "Wakefield", "Mount Vernon, Va.",
+          "K\xc3\xb6ln", "Wien", "Z\xc3\xbcrich")
+PROFESSIONS = ("Schriftsteller", "Komponist", "Physiker", "Politiker",
+               "Philosophin", "Malerin", "Architekt", "Verleger")
+# Fields of real records, that no mapping uses
+UNMAPPED_FIELDS = (
+    ("043", [("c", "XA-DE")]),
+    ("065", [("a", "12.2p"), ("2", "sswd")]),
+    ("670", [("a", "Wikipedia"), ("u", "http://de.wikipedia.org/")]),
+    ("667", [("a", "Historische SWD-Ansetzung")]),
+    ("678", [("b", "Deutscher Schriftsteller")]),
+    ("913", [("S", "swd"), ("i", "a"), ("a", "Adams, Douglas")])
+)
+TITLES = ("Briefe", "Gedichte", "Werke", "Tageb\xc3\xbccher", "Sinfonie",
+          "The Hitchhiker's Guide to the Galaxy", "Faust")
+
+
+def generate_dump(dump_file, records, type_mix=None, seed=42,
+                  unmapped_fields=0):
+    """
+    Writes synthetic dump with given number of records to file.
+    :param dump_file: File object, in which dump should be written.
+    :param records: Number of records.
+    :param type_mix: Dictionary of record types (field 079, subfield b)
+                     and their relative frequency.
+    :param seed: Seed of the random number generator.
+    :param unmapped_fields: Number of fields per record, that are not used
+                            by any mapping.
+    :return: Number of written records per type.
+    """
+    type_mix = type_mix or {"p": 1, "u": 1, "g": 1}
+    weighted_types = []
+    for record_type, weight in sorted(type_mix.iteritems()):
+        weighted_types += [record_type] * weight
+    generator = random.Random(seed)
+    counts = dict((record_type, 0) for record_type in type_mix)
+
+    dump_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    dump_file.write('<collection xmlns="http://www.loc.gov/MARC21/slim">\n')
+    for index in xrange(records):
+        record_type = generator.choice(weighted_types)
+        counts[record_type] += 1
+        dump_file.write(generate_record(generator, index, record_type,
+                                        unmapped_fields))
+    dump_file.write('</collection>\n')
+
+    return counts
+
+
+def parse_type_mix(text):
+    """
+    Parses record type mix given on the command line, e.g. "p=2,u=1,g=1".
+    :param text: Comma-separated record types and their relative frequency.
+    :return: Dictionary of record types and their relative frequency.
+    """
+    type_mix = {}
+    for item in text.split(","):
+        record_type, _, weight = item.partition("=")
+        if record_type not in RECORD_TYPES:
+            raise ValueError("Unknown record type '{0}'".format(record_type))
+        type_mix[record_type] = int(weight or 1)
+
+    return type_mix
+
+
+def generate_record(generator, index, record_type, unmapped_fields=0):
+    """
+    Generates single record of given type.
+    :param generator: Random number generator.
+    :param index: Index of the record, which is used for the identifier.
+    :param record_type: Type of the record (p, u or g).
+    :param unmapped_fields: Number of fields, that are not used by any
+                            mapping.
+    :return: Record as xml string.
+    """
+    gnd_id = "{0}-{1}".format(4000000 + index, index % 10)
+    fields = [
+        controlfield("001", gnd_id),
+        controlfield("003", "DE-101"),
+        datafield("024", [("a", "http://d-nb.info/gnd/" + gnd_id), ("2", "uri")], "7"),
+        datafield("035", [("a", "(DE-101)" + gnd_id)]),
+        datafield("035", [("a", "(DE-588)" + gnd_id)]),
+        datafield("040", [("a", "DE-101"), ("b", "ger")]),
+        datafield("079", [("a", "g"), ("b", record_type), ("c", "1")])
+    ]
+    if record_type == "p":
+        fields += generate_person_fields(generator)
+    elif record_type == "u":
+        fields += generate_work_fields(generator)
+    else:
+        fields += generate_place_fields(generator)
+    for field_index in xrange(unmapped_fields):
+        tag, subfields = UNMAPPED_FIELDS[field_index % len(UNMAPPED_FIELDS)]
+        fields.append(datafield(tag, subfields))
+
+    return '  <record type="Authority">\n{0}  </record>\n'.format("".join(fields))
+
+
+def generate_person_fields(generator):
+    """
+    Generates fields of a person record.
+    :param generator: Random number generator.
+    :return: List of fields as xml strings.
+    """
+    birth_year = generator.randint(1500, 1950)
+    death_year = birth_year + generator.randint(20, 90)
+    exact_dates = "{0:02d}.{1:02d}.{2}-{3:02d}.{4:02d}.{5}".format(
+        generator.randint(1, 28), generator.randint(1, 12), birth_year,
+        generator.randint(1, 28), generator.randint(1, 12), death_year)
+    fields = [
+        datafield("100", [("a", random_name(generator)),
+                          ("d", "{0}-{1}".format(birth_year, death_year))], "1"),
+        datafield("375", [("a", generator.choice(("0", "1"))), ("2", "iso5218")]),
+        datafield("400", [("a", random_name(generator))], "1"),
+        datafield("400", [("a", random_name(generator)),
+                          ("i", "Wirklicher Name")], "1"),
+        datafield("548", [("a", "{0}-{1}".format(birth_year, death_year)),
+                          ("9", "4:datl"), ("i", "Lebensdaten")]),
+        datafield("548", [("a", exact_dates), ("9", "4:datx"),
+                          ("i", "Exakte Lebensdaten")]),
+        datafield("550", [("a", generator.choice(PROFESSIONS)),
+                          ("9", "4:beru"), ("i", "Charakteristischer Beruf")]),
+        datafield("551", [("a", generator.choice(PLACES)), ("9", "4:ortg"),
+                          ("i", "Geburtsort")]),
+        datafield("551", [("a", generator.choice(PLACES)), ("9", "4:orts"),
+                          ("i", "Sterbeort")])
+    ]
+    for relation in ("v:Vater", "v:Mutter", "v:Ehefrau", "v:Sohn"):
+        if generator.random() < 0.3:
+            fields.append(datafield("500", [("a", random_name(generator)),
+                                            ("9", relation)], "1"))
+    if generator.random() < 0.1:
+        fields.append(datafield("500", [("a", generator.choice(FORENAMES)),
+                                        ("b", "II."), ("9", "v:Vater")], "0"))
+
+    return fields
+
+
+def generate_work_fields(generator):
+    """
+    Generates fields of a work record.
+    :param generator: Random number generator.
+    :return: List of fields as xml strings.
+    """
+    if generator.random() < 0.8:
+        author = datafield("100", [("a", random_name(generator)),
+                                   ("t", generator.choice(TITLES))], "1")
+    else:
+        author = datafield("100", [("a", generator.choice(FORENAMES)),
+                                   ("b", "II."),
+                                   ("t", generator.choice(TITLES))], "0")
+
+    return [
+        author,
+        datafield("380", [("a", "Werk")]),
+        datafield("400", [("a", random_name(generator)),
+                          ("t", generator.choice(TITLES))], "1")
+    ]
+
+
+def generate_place_fields(generator):
+    """
+    Generates fields of a geographic record.
+    :param generator: Random number generator.
+    :return: List of fields as xml strings.
+    """
+    longitude = generator.uniform(-180, 180)
+    latitude = generator.uniform(-90, 90)
+    return [
+        datafield("034", [("d", "E{0:011.6f}".format(longitude)),
+                          ("e", "E{0:011.6f}".format(longitude)),
+                          ("f", "N{0:010.6f}".format(latitude)),
+                          ("g", "N{0:010.6f}".format(latitude)),
+                          ("9", "A:dgx")]),
+        datafield("151", [("a", generator.choice(PLACES))]),
+        datafield("451", [("a", generator.choice(PLACES))]),
+        datafield("551", [("a", generator.choice(PLACES)),
+                          ("i", "Adminstrative \xc3\x9cbergeordnet")])
+    ]
+
+
+def random_name(generator):
+    """
+    Generates random name following the schema "Surname, Forename".
+    :param generator: Random number generator.
+    :return: Name.
+    """
+    return "{0}, {1}".format(generator.choice(SURNAMES),
+                             generator.choice(FORENAMES))
+
+
+def controlfield(tag, value):
+    """
+    Builds controlfield element.
+    :param tag: Tag of the field.
+    :param value: Value of the field.
+    :return: Field as xml string.
+    """
+    return '    <controlfield tag="{0}">{1}</controlfield>\n'.format(tag, value)
+
+
+def datafield(tag, subfields, ind1=" ", ind2=" "):
+    """
+    Builds datafield element.
+    :param tag: Tag of the field.
+    :param subfields: List of codes and values of subfields.
+    :param ind1: First indicator.
+    :param ind2: Second indicator.
+    :return: Field as xml string.
+    """
+    lines = ['    <datafield tag="{0}" ind1="{1}" ind2="{2}">\n'.format(tag, ind1, ind2)]
+    for code, value in subfields:
+        value = value.replace("&", "&amp;").replace("<", "&lt;")
+        lines.append('      <subfield code="{0}">{1}</subfield>\n'.format(code, value))
+    lines.append('    </datafield>\n')
+
+    return "".join(lines)
@@ -0,0 +1,73 @@
+"""
+Compares throughput of the XPath engine and the streaming engine of
+XmlDumpConverter on synthetic GND dumps with a growing number of fields,
+that no mapping uses, and checks, that both engines extract the same
+values.
+"""
+import argparse
+import time
+from StringIO import StringIO
+
+from dumpgenerator import generate_dump
+from dumpconverter.databaseconverters.gnd import propertymappings
+from dumpconverter.databaseconverters.gnd.GndDumpConverter import GndDumpConverter
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+
+
+def convert(dump, engine):
+    """
+    Extracts values from dump with the mapping of the GND.
+    :param dump: Dump content.
+    :param engine: Engine of XmlDumpConverter.
+    :return: List of triples of entity id, property id and external values.
+    """
+    xml_converter = XmlDumpConverter(GndDumpConverter.XML_ENTITIES_PATH,
+                                     GndDumpConverter.XML_ENTITY_ID_XPATH,
+                                     propertymappings.mapping,
+                                     GndDumpConverter.XML_NAMESPACES,
+                                     True,
+                                     propertymappings.discriminator_path,
+                                     engine=engine)
+
+    return list(xml_converter.process_dump(StringIO(dump)))
+
+
+def measure(dump, engine, repetitions):
+    """
+    Converts dump several times after an untimed run, which builds caches
+    shared by all converters of the process.
+    :param dump: Dump content.
+    :param engine: Engine of XmlDumpConverter.
+    :param repetitions: Number of runs.
+    :return: Seconds of the fastest run and result of the last run.
+    """
+    best_seconds = None
+    result = convert(dump, engine)
+    for _ in xrange(repetitions):
+        start = time.time()
+        result = convert(dump, engine)
+        seconds = time.time() - start
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+
+    return best_seconds, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000, help="number of records in the synthetic dump")
+    parser.add_argument("--unmapped-fields", type=int, nargs="+", default=[0, 10, 30], help="numbers of unmapped fields per record")
+    parser.add_argument("--repetitions", type=int, default=3, help="number of runs per engine, the fastest is reported")
+    args = parser.parse_args()
+
+    for unmapped_fields in args.unmapped_fields:
+        dump_file = StringIO()
+        generate_dump(dump_file, args.records, unmapped_fields=unmapped_fields)
+        dump = dump_file.getvalue()
+
+        xpath_seconds, xpath_result = measure(dump, "xpath", args.repetitions)
+        stream_seconds, stream_result = measure(dump, "stream", args.repetitions)
+        print "{0:>3} unmapped fields {1:>6.1f} MB | xpath {2:>8.0f} records/s | stream {3:>8.0f} records/s | {4:.2f}x identical: {5}".format(
+            unmapped_fields, len(dump) / 1024.0 / 1024.0,
+            args.records / xpath_seconds, args.records / stream_seconds,
+            xpath_seconds / stream_seconds, xpath_result == stream_result)
@@ -0,0 +1,88 @@
+"""
+Compares time spent in formatters while converting a synthetic person
+dump (Tpgesamt) with and without formatter caches and checks, that both
+produce identical output. Since no GND mapping is declared cacheable, all
+mappings with a formatter are made cacheable, the uncached run disables
+the caches by their size.
+"""
+import argparse
+import time
+from StringIO import StringIO
+
+from dumpgenerator import generate_dump
+from dumpconverter.databaseconverters.gnd import propertymappings
+from dumpconverter.databaseconverters.gnd.GndDumpConverter import GndDumpConverter
+from dumpconverter.dataformatconverters.FormatterCache import FormatterCache
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+
+
+def make_cacheable(mapping):
+    """
+    Copies property mapping and declares all entries with a formatter
+    cacheable.
+    :param mapping: Property mapping.
+    :return: Copy of the property mapping.
+    """
+    cacheable_mapping = {}
+    for property_id, entries in mapping.iteritems():
+        cacheable_mapping[property_id] = [dict(entry, cacheable="formatter" in entry)
+                                          for entry in entries]
+
+    return cacheable_mapping
+
+
+def run(dump, mapping, formatter_cache_size):
+    """
+    Converts dump and measures time spent in formatters.
+    :param dump: Dump content.
+    :param mapping: Property mapping.
+    :param formatter_cache_size: Maximal number of cached results per mapping.
+    :return: Total seconds, formatter seconds, external values and converter.
+    """
+    xml_converter = XmlDumpConverter(GndDumpConverter.XML_ENTITIES_PATH,
+                                     GndDumpConverter.XML_ENTITY_ID_XPATH,
+                                     mapping,
+                                     GndDumpConverter.XML_NAMESPACES,
+                                     True,
+                                     propertymappings.discriminator_path,
+                                     formatter_cache_size=formatter_cache_size)
+
+    formatter_seconds = [0.0]
+    run_formatter = xml_converter.run_formatter
+    def timed_run_formatter(*args):
+        start = time.time()
+        formatted_values = run_formatter(*args)
+        formatter_seconds[0] += time.time() - start
+        return formatted_values
+
+    xml_converter.run_formatter = timed_run_formatter
+    start = time.time()
+    values = list(xml_converter.process_dump(StringIO(dump)))
+    total_seconds = time.time() - start
+
+    return total_seconds, formatter_seconds[0], values, xml_converter
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000, help="number of person records in the synthetic dump")
+    parser.add_argument("--cache-size", type=int, default=FormatterCache.MAX_SIZE, help="maximal number of cached results per mapping")
+    args = parser.parse_args()
+
+    dump_file = StringIO()
+    generate_dump(dump_file, args.records, {"p": 1})
+    dump = dump_file.getvalue()
+    print "{0} records, {1:.1f} MB".format(args.records, len(dump) / 1024.0 / 1024.0)
+
+    mapping = make_cacheable(propertymappings.mapping)
+    uncached_seconds, uncached_formatter_seconds, uncached_values, _ = run(dump, mapping, 0)
+    cached_seconds, cached_formatter_seconds, cached_values, xml_converter = run(dump, mapping, args.cache_size)
+
+    print "uncached {0:>8.3f} s total {1:>8.3f} s formatters".format(uncached_seconds, uncached_formatter_seconds)
+    print "cached   {0:>8.3f} s total {1:>8.3f} s formatters".format(cached_seconds, cached_formatter_seconds)
+    counters = xml_converter.compiled_mapping.get_formatter_cache_counters()
+    for property_id, (hits, misses) in sorted(counters.iteritems()):
+        hit_rate = 100.0 * hits / (hits + misses) if hits + misses else 0.0
+        print "{0:<6} {1:>8} hits {2:>8} misses {3:>6.1f}% hit rate".format(
+            property_id, hits, misses, hit_rate)
+    print "identical output: {0}".format(uncached_values == cached_values)
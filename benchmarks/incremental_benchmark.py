@@ -0,0 +1,59 @@
+"""
+Compares throughput of a full conversion and an incremental conversion of
+a synthetic GND dump, in which some of the records changed since the
+previous conversion, and checks, that both produce identical output.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from StringIO import StringIO
+
+from dumpgenerator import generate_dump
+from dumpconverter.databaseconverters.gnd.GndDumpConverter import GndDumpConverter
+from dumpconverter.writer.ResultWriter import ResultWriter
+
+
+def run(dump, incremental_directory=None):
+    """
+    Converts dump.
+    :param dump: Dump content.
+    :param incremental_directory: Directory of the record index or None
+                                  for a full conversion.
+    :return: Seconds, external values and number of changed records.
+    """
+    gnd_converter = GndDumpConverter(True, incremental_directory=incremental_directory)
+    result_writer = ResultWriter(StringIO(), StringIO(), delta_file=StringIO())
+    start = time.time()
+    gnd_converter.write_external_data("GND-Tpgesamt", StringIO(dump), result_writer)
+    seconds = time.time() - start
+
+    return (seconds, result_writer.external_values_file.getvalue(),
+            result_writer.delta_file.getvalue().count("\n"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000, help="number of records in the synthetic dump")
+    args = parser.parse_args()
+
+    dump_file = StringIO()
+    generate_dump(dump_file, args.records)
+    previous_dump = dump_file.getvalue()
+    # Records with this place change their values
+    current_dump = previous_dump.replace(">Wakefield<", ">Wakefield, Yorkshire<")
+    print "{0} records, {1:.1f} MB".format(args.records, len(current_dump) / 1024.0 / 1024.0)
+
+    incremental_directory = tempfile.mkdtemp(prefix="dumpconverter")
+    try:
+        initial_seconds, _, _ = run(previous_dump, incremental_directory)
+        incremental_seconds, incremental_values, changes = run(current_dump, incremental_directory)
+    finally:
+        shutil.rmtree(incremental_directory)
+    full_seconds, full_values, _ = run(current_dump)
+
+    print "full        {0:>8.3f} s {1:>10.0f} records/s".format(full_seconds, args.records / full_seconds)
+    print "initial     {0:>8.3f} s {1:>10.0f} records/s".format(initial_seconds, args.records / initial_seconds)
+    print "incremental {0:>8.3f} s {1:>10.0f} records/s ({2} changed records)".format(
+        incremental_seconds, args.records / incremental_seconds, changes)
+    print "identical output: {0}".format(full_values == incremental_values)
@@ -0,0 +1,62 @@
+"""
+Compares throughput of splitting a dump into entities with and without
+tag-filtered iterparse. Mappings are not applied, so that only the cost
+of parsing and memory clean up is measured.
+"""
+import argparse
+import time
+from StringIO import StringIO
+
+from lxml import etree
+
+from dumpgenerator import generate_dump
+from dumpconverter.databaseconverters.gnd.GndDumpConverter import GndDumpConverter
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+
+
+def run(dump, filter_tags, repetitions):
+    """
+    Splits dump into entities and measures the best of several runs.
+    :param dump: Dump content.
+    :param filter_tags: Whether tag-filtered iterparse should be used.
+    :param repetitions: Number of runs.
+    :return: Seconds of the fastest run and number of entities.
+    """
+    xml_converter = XmlDumpConverter(GndDumpConverter.XML_ENTITIES_PATH,
+                                     GndDumpConverter.XML_ENTITY_ID_XPATH,
+                                     {},
+                                     GndDumpConverter.XML_NAMESPACES,
+                                     is_quiet=True,
+                                     filter_tags=filter_tags)
+    xml_converter.process_entity = lambda entity_element: [entity_element.tag]
+
+    best_time = None
+    entities = 0
+    for _ in xrange(repetitions):
+        start = time.time()
+        entities = sum(1 for _ in xml_converter.process_dump(StringIO(dump)))
+        elapsed = time.time() - start
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return best_time, entities
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000, help="number of records in the synthetic dump")
+    parser.add_argument("--repetitions", type=int, default=3, help="number of runs per mode")
+    args = parser.parse_args()
+
+    dump_file = StringIO()
+    generate_dump(dump_file, args.records)
+    dump = dump_file.getvalue()
+    elements = sum(1 for _ in etree.iterparse(StringIO(dump)))
+    print "{0} records, {1} elements, {2:.1f} MB".format(
+        args.records, elements, len(dump) / 1024.0 / 1024.0)
+
+    for mode, filter_tags in (("start/end tracking", False),
+                              ("tag-filtered", True)):
+        seconds, entities = run(dump, filter_tags, args.repetitions)
+        print "{0:<20} {1:>8.3f} s {2:>12.0f} events/s {3:>10.0f} records/s".format(
+            mode, seconds, elements / seconds, entities / seconds)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Compares throughput of normalizing values with TextNormalizer and with the
+former per-character category check on names, places and dates, as they
+occur in GND dumps, and checks, that both produce identical output.
+"""
+import argparse
+import time
+import unicodedata
+
+from dumpconverter.dataformatconverters.TextNormalizer import TextNormalizer
+
+
+# Values as returned by lxml: ASCII values as str, others as unicode
+VALUES = [
+    "Goethe, Johann Wolfgang von", "Frankfurt (Main)", "Weimar", "Berlin",
+    "11.03.1952", "1749-1832", "m", "Schriftsteller", "Journalist",
+    "gnd/4005728-8", "(DE-588)118540238", "N052.516667,E013.400000",
+    u"M\xfcller, Hans", u"K\xf6ln", u"M\xfcnchen", u"D\xfcsseldorf",
+    u"Schr\xf6dinger, Erwin", u"Stra\xdfburg", u"Dvor\xe1k, Anton\xedn",
+    u"López, José", u"Zürich", u"Ł\xf3dź",
+    u"Толстой, Лев",
+    u"\x98Die\x9c Leiden des jungen Werthers", u"Bad M\xfcnstereifel‎"
+]
+
+
+def normalize_per_character(value):
+    """
+    Normalizes value like the converter did before TextNormalizer.
+    :param value: Value as str or unicode.
+    :return: Normalized utf-8 encoded value.
+    """
+    if isinstance(value, str):
+        value = unicode(value, encoding="utf-8", errors="ignore")
+    value = unicodedata.normalize("NFC", value)
+    value = "".join(ch for ch in value if unicodedata.category(ch)[0] != "C")
+    return value.encode("utf-8", errors="ignore")
+
+
+def run(normalize, values):
+    """
+    Normalizes all values.
+    :param normalize: Normalization function.
+    :param values: List of values.
+    :return: Seconds and normalized values.
+    """
+    start = time.time()
+    normalized_values = map(normalize, values)
+
+    return time.time() - start, normalized_values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--values", type=int, default=1000000, help="number of values")
+    args = parser.parse_args()
+
+    values = (VALUES * (args.values // len(VALUES) + 1))[:args.values]
+    text_normalizer = TextNormalizer()
+    text_normalizer.get_unprintable_patterns()
+
+    old_seconds, old_values = run(normalize_per_character, values)
+    new_seconds, new_values = run(text_normalizer.normalize, values)
+
+    print "{0} values".format(args.values)
+    print "per character  {0:>8.3f} s {1:>10.0f} values/s".format(old_seconds, args.values / old_seconds)
+    print "TextNormalizer {0:>8.3f} s {1:>10.0f} values/s".format(new_seconds, args.values / new_seconds)
+    print "identical output: {0}".format(old_values == new_values)
@@ -0,0 +1,50 @@
+"""
+Measures throughput of converting a synthetic GND dump with different
+numbers of worker processes, that apply the mapping on entities.
+"""
+import argparse
+import multiprocessing
+import time
+from StringIO import StringIO
+
+from dumpgenerator import generate_dump
+from dumpconverter.databaseconverters.gnd.GndDumpConverter import GndDumpConverter
+
+
+def run(dump, workers):
+    """
+    Converts dump with given number of worker processes.
+    :param dump: Dump content.
+    :param workers: Number of worker processes.
+    :return: Seconds and number of external values.
+    """
+    xml_converter = GndDumpConverter(True, workers=workers).xml_dump_converter
+    start = time.time()
+    values = sum(1 for _ in xml_converter.process_dump(StringIO(dump)))
+
+    return time.time() - start, values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000, help="number of records in the synthetic dump")
+    parser.add_argument("--workers", type=int, nargs="+", help="numbers of worker processes to compare")
+    args = parser.parse_args()
+
+    workers_list = args.workers
+    if not workers_list:
+        cpu_count = multiprocessing.cpu_count()
+        workers_list = [1] + [count for count in (2, 4, 8, 16) if count <= cpu_count]
+
+    dump_file = StringIO()
+    generate_dump(dump_file, args.records)
+    dump = dump_file.getvalue()
+    print "{0} records, {1:.1f} MB".format(args.records, len(dump) / 1024.0 / 1024.0)
+
+    base_seconds = None
+    for workers in workers_list:
+        seconds, values = run(dump, workers)
+        if base_seconds is None:
+            base_seconds = seconds
+        print "{0:>2} workers {1:>8.3f} s {2:>10.0f} records/s {3:>6.2f}x ({4} values)".format(
+            workers, seconds, args.records / seconds, base_seconds / seconds, values)
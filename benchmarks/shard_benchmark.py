@@ -0,0 +1,76 @@
+"""
+Compares writing compressed external values to a single file with
+ResultWriter against writing them to several shards with
+ShardedResultWriter, whose shards are compressed by one thread each, and
+checks, that the shards contain the same rows.
+"""
+import argparse
+import csv
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+from writer_benchmark import generate_rows
+from dumpconverter.writer.ResultWriter import ResultWriter
+from dumpconverter.writer.ShardedResultWriter import ShardedResultWriter
+
+
+def write_entities(result_writer, rows):
+    """
+    Writes rows like converters do, i.e. all values of an entity at once,
+    and closes the writer.
+    :param result_writer: ResultWriter or ShardedResultWriter.
+    :param rows: Rows of external values.
+    :return: Seconds.
+    """
+    start = time.time()
+    for index in xrange(0, len(rows), 3):
+        result_writer.write_external_values(rows[index:index + 3])
+    result_writer.close()
+
+    return time.time() - start
+
+
+def read_rows(paths):
+    """
+    Reads rows of compressed csv files.
+    :param paths: Paths of the files.
+    :return: Sorted list of rows.
+    """
+    rows = []
+    for path in paths:
+        with gzip.open(path) as external_values_file:
+            rows.extend(map(tuple, csv.reader(external_values_file)))
+
+    return sorted(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000, help="number of rows")
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4, 8],
+                        help="numbers of shards")
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows)
+    directory = tempfile.mkdtemp()
+    try:
+        single_path = os.path.join(directory, "single.csv.gz")
+        single_seconds = write_entities(
+            ResultWriter(ResultWriter.open_file(single_path), tempfile.TemporaryFile()),
+            rows)
+        expected_rows = read_rows([single_path])
+        print "{0} rows, gzip".format(args.rows)
+        print "{0:<10} {1:>8.3f} s".format("single", single_seconds)
+
+        for shard_count in args.shards:
+            path = os.path.join(directory, "sharded{0}.csv.gz".format(shard_count))
+            result_writer = ShardedResultWriter(path, tempfile.TemporaryFile(), shard_count)
+            seconds = write_entities(result_writer, rows)
+            print "{0:<10} {1:>8.3f} s {2:>6.2f}x identical rows: {3}".format(
+                "{0} shards".format(shard_count), seconds, single_seconds / seconds,
+                read_rows(result_writer.shard_paths) == expected_rows)
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,92 @@
+"""
+Measures time and memory of writing external values in sorted order with
+SortingResultWriter for several memory budgets and checks, that the output
+is sorted and free of duplicates. Rows are generated in random order of
+entities with some duplicates, so that memory use does not depend on the
+number of rows except for the buffered ones.
+"""
+import argparse
+import csv
+import random
+import tempfile
+import time
+
+from dumpconverter.utils import memoryutils
+from dumpconverter.writer.ResultWriter import ResultWriter
+from dumpconverter.writer.SortingResultWriter import SortingResultWriter
+
+# Number of rows, after which the memory use is sampled
+SAMPLE_INTERVAL = 10000
+
+
+def generate_entities(count, seed=42):
+    """
+    Generates rows of external values of entities in random order, every
+    tenth entity is repeated.
+    :param count: Number of entities.
+    :param seed: Seed of the random order.
+    :return: Iterator of lists of rows per entity.
+    """
+    random_generator = random.Random(seed)
+    for _ in xrange(count):
+        entity_number = random_generator.randint(0, count - 1)
+        if entity_number % 10 == 0:
+            entity_number = 0
+        external_id = str(100000000 + entity_number)
+        yield [("GND-Tpgesamt", external_id, "P19", "Frankfurt (Main)"),
+               ("GND-Tpgesamt", external_id, "P21", "m\xc3\xa4nnlich"),
+               ("GND-Tpgesamt", external_id, "P106", "Schriftsteller, Journalist")]
+
+
+def write_sorted(entity_count, memory_budget):
+    """
+    Writes generated rows with SortingResultWriter to a temporary file.
+    :param entity_count: Number of generated entities.
+    :param memory_budget: Memory budget of the writer in bytes.
+    :return: Seconds, spilled runs, written rows, removed duplicates,
+             peak memory increase in bytes and whether the output is sorted.
+    """
+    with tempfile.NamedTemporaryFile() as external_values_file:
+        result_writer = SortingResultWriter(
+            ResultWriter(open(external_values_file.name, "wb"),
+                         tempfile.TemporaryFile()),
+            memory_budget)
+        base_rss = memoryutils.get_rss() or 0
+        peak_rss = base_rss
+        start = time.time()
+        for index, rows in enumerate(generate_entities(entity_count)):
+            result_writer.write_external_values(rows)
+            if index % SAMPLE_INTERVAL == 0:
+                peak_rss = max(peak_rss, memoryutils.get_rss() or 0)
+        result_writer.close()
+        seconds = time.time() - start
+
+        previous_row = None
+        is_sorted = True
+        with open(external_values_file.name, "rb") as sorted_file:
+            for row in csv.reader(sorted_file):
+                row = tuple(row)
+                if previous_row is not None and row <= previous_row:
+                    is_sorted = False
+                previous_row = row
+
+    return (seconds, result_writer.spilled_runs, result_writer.written_rows,
+            result_writer.duplicate_rows, peak_rss - base_rss, is_sorted)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=500000, help="number of entities")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[4, 16, 64, 1024],
+                        help="memory budgets in megabytes")
+    args = parser.parse_args()
+
+    print "{0} entities, {1} rows".format(args.entities, args.entities * 3)
+    print "{0:>8} {1:>9} {2:>6} {3:>9} {4:>11} {5:>10} {6}".format(
+        "budget", "seconds", "runs", "rows", "duplicates", "peak MB", "sorted")
+    for budget in args.budgets:
+        (seconds, runs, rows, duplicates, peak_memory,
+         is_sorted) = write_sorted(args.entities, budget * 1024 * 1024)
+        print "{0:>5} MB {1:>9.2f} {2:>6} {3:>9} {4:>11} {5:>10.1f} {6}".format(
+            budget, seconds, runs, rows, duplicates, peak_memory / 1024.0 / 1024.0,
+            is_sorted)
@@ -0,0 +1,136 @@
+"""
+Compares loading external values into SQLite directly with
+SqliteResultWriter against writing csv files with ResultWriter and
+importing them afterwards, and checks, that both databases contain the
+same rows. The import loads the csv files the same way as the writer
+loads partial results of parallel jobs, i.e. with batched inserts in
+large transactions and indexes built afterwards.
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from writer_benchmark import generate_rows
+from dumpconverter.writer.ResultWriter import ResultWriter
+from dumpconverter.writer.SqliteResultWriter import SqliteResultWriter
+
+
+def write_dump_information(result_writer):
+    """
+    Writes meta information of a dump like GndDumpConverter.
+    :param result_writer: ResultWriter or SqliteResultWriter.
+    """
+    result_writer.write_dump_information("GND-Tpgesamt", "Q36578", ["P227"], "de",
+                                         "http://example.org/dump.xml.gz",
+                                         1024, "Q6938433")
+
+
+def write_entities(result_writer, rows):
+    """
+    Writes rows like converters do, i.e. all values of an entity at once.
+    :param result_writer: ResultWriter or SqliteResultWriter.
+    :param rows: Rows of external values.
+    """
+    for index in xrange(0, len(rows), 3):
+        result_writer.write_external_values(rows[index:index + 3])
+    write_dump_information(result_writer)
+    result_writer.flush()
+
+
+def load_csv(rows, directory):
+    """
+    Writes rows to csv files and imports them into a SQLite database.
+    :param rows: Rows of external values.
+    :param directory: Directory for output files.
+    :return: Seconds of writing, seconds of importing and database path.
+    """
+    external_values_path = os.path.join(directory, "external_values.csv")
+    dump_information_path = os.path.join(directory, "dump_information.csv")
+    database_path = os.path.join(directory, "csv_import.sqlite")
+
+    start = time.time()
+    result_writer = ResultWriter(ResultWriter.open_file(external_values_path),
+                                 open(dump_information_path, "w+b"))
+    write_entities(result_writer, rows)
+    result_writer.close()
+    write_seconds = time.time() - start
+
+    start = time.time()
+    sqlite_writer = SqliteResultWriter(database_path)
+    with open(external_values_path, "rb") as external_values_file:
+        with open(dump_information_path, "rb") as dump_information_file:
+            sqlite_writer.merge(external_values_file, dump_information_file)
+    sqlite_writer.close()
+    import_seconds = time.time() - start
+
+    return write_seconds, import_seconds, database_path
+
+
+def load_sqlite(rows, directory, indexes_first=False):
+    """
+    Loads rows directly into a SQLite database.
+    :param rows: Rows of external values.
+    :param directory: Directory for output files.
+    :param indexes_first: If set to True, indexes are created before the
+                          rows are inserted.
+    :return: Seconds and database path.
+    """
+    database_path = os.path.join(directory, "direct.sqlite")
+    if os.path.exists(database_path):
+        os.remove(database_path)
+
+    start = time.time()
+    sqlite_writer = SqliteResultWriter(database_path)
+    if indexes_first:
+        sqlite_writer.create_indexes()
+    write_entities(sqlite_writer, rows)
+    sqlite_writer.close()
+
+    return time.time() - start, database_path
+
+
+def read_external_values(database_path):
+    """
+    Reads all external values of a database in insertion order.
+    :param database_path: Path of the database.
+    :return: List of rows.
+    """
+    connection = sqlite3.connect(database_path)
+    connection.text_factory = str
+    try:
+        return connection.execute(
+            "SELECT * FROM external_values ORDER BY rowid").fetchall()
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000, help="number of rows")
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows)
+    directory = tempfile.mkdtemp()
+    try:
+        write_seconds, import_seconds, csv_database_path = load_csv(rows, directory)
+        indexes_first_seconds, _ = load_sqlite(rows, directory, indexes_first=True)
+        direct_seconds, direct_database_path = load_sqlite(rows, directory)
+
+        csv_seconds = write_seconds + import_seconds
+        print "{0} rows".format(args.rows)
+        for name, seconds in (("csv write", write_seconds),
+                              ("csv import", import_seconds),
+                              ("csv + import", csv_seconds),
+                              ("sqlite, indexes first", indexes_first_seconds),
+                              ("sqlite", direct_seconds)):
+            print "{0:<22} {1:>8.3f} s {2:>10.0f} rows/s".format(
+                name, seconds, args.rows / seconds)
+        print "speedup over csv + import: {0:.2f}x".format(csv_seconds / direct_seconds)
+        print "identical rows: {0}".format(
+            read_external_values(csv_database_path) ==
+            read_external_values(direct_database_path))
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,301 @@
+"""
+Measures the throughput of each stage of a GND conversion on a synthetic
+dump: gzip decoding, iterparse, id extraction, evaluation of mapping
+XPaths, normalization, formatting and csv writing, as well as the whole
+conversion. Each stage is timed separately on the output of the previous
+one. Results are written as JSON, so that they can be compared across
+commits with --compare.
+"""
+import argparse
+import gzip
+import json
+import platform
+import subprocess
+import time
+from StringIO import StringIO
+
+from dumpgenerator import generate_dump, parse_type_mix
+from dumpconverter.databaseconverters.gnd import propertymappings
+from dumpconverter.databaseconverters.gnd.GndDumpConverter import GndDumpConverter
+from dumpconverter.dataformatconverters.TextNormalizer import TextNormalizer
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+from dumpconverter.writer.ResultWriter import ResultWriter
+
+
+STAGES = ("gzip_decode", "iterparse", "id_extraction", "xpath_evaluation",
+          "normalization", "formatting", "csv_writing", "total")
+DUMP_ID = "GND-Tpgesamt"
+
+
+class RawValues(TextNormalizer):
+    """
+    Normalizer, that keeps values as they are, so that values can be
+    extracted and normalized in separate stages.
+    """
+    def normalize(self, value):
+        return value
+
+
+def create_converter(text_normalizer=None):
+    """
+    Creates converter with the mapping of the GND.
+    :param text_normalizer: Normalizer applied on extracted values.
+    :return: XmlDumpConverter instance.
+    """
+    return XmlDumpConverter(GndDumpConverter.XML_ENTITIES_PATH,
+                            GndDumpConverter.XML_ENTITY_ID_XPATH,
+                            propertymappings.mapping,
+                            GndDumpConverter.XML_NAMESPACES,
+                            True,
+                            propertymappings.discriminator_path,
+                            text_normalizer=text_normalizer or TextNormalizer("NFC"))
+
+
+def measure(function, repetitions):
+    """
+    Runs a stage several times.
+    :param function: Function without arguments running the stage.
+    :param repetitions: Number of runs.
+    :return: Seconds of the fastest run and result of the last run.
+    """
+    best_seconds = None
+    result = None
+    for _ in xrange(repetitions):
+        start = time.time()
+        result = function()
+        seconds = time.time() - start
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+
+    return best_seconds, result
+
+
+def decode(compressed_dump):
+    """
+    Decodes gzip compressed dump.
+    :param compressed_dump: Compressed dump content.
+    :return: Dump content.
+    """
+    return open_compressed(compressed_dump).read()
+
+
+def open_compressed(compressed_dump):
+    """
+    Opens gzip compressed dump for reading.
+    :param compressed_dump: Compressed dump content.
+    :return: File object of the decoded dump.
+    """
+    return gzip.GzipFile(mode="rb", fileobj=StringIO(compressed_dump))
+
+
+def parse(dump):
+    """
+    Splits dump into entities the same way a conversion does.
+    :param dump: Dump content.
+    :return: Number of entities.
+    """
+    xml_converter = create_converter()
+    entities = 0
+    for entity_element in xml_converter.iterate_entities(StringIO(dump)):
+        xml_converter.detach_entity(entity_element)
+        xml_converter.clean_up_references(entity_element)
+        entities += 1
+
+    return entities
+
+
+def extract_ids(xml_converter, entity_elements):
+    """
+    Extracts ids of entities.
+    :param xml_converter: XmlDumpConverter instance.
+    :param entity_elements: List of xml elements of entities.
+    :return: List of entity ids.
+    """
+    return map(xml_converter.extract_entity_id, entity_elements)
+
+
+def evaluate_xpaths(xml_converter, entity_elements, entity_ids):
+    """
+    Evaluates XPaths of the mappings applicable to each entity without
+    normalizing the extracted values.
+    :param xml_converter: XmlDumpConverter instance with RawValues normalizer.
+    :param entity_elements: List of xml elements of entities.
+    :param entity_ids: List of entity ids.
+    :return: List of tuples of entity id, property id, mapping and values.
+    """
+    extracted_values = []
+    for entity_element, entity_id in zip(entity_elements, entity_ids):
+        if entity_id is None:
+            continue
+        properties = xml_converter.compiled_mapping.get_properties(entity_element)
+        path_results = {}
+        for property_id, mappings in properties:
+            for mapping in mappings:
+                values = xml_converter.get_affected_values(
+                    entity_element, mapping["value_paths"], path_results)
+                extracted_values.append((entity_id, property_id, mapping, values))
+
+    return extracted_values
+
+
+def normalize(extracted_values):
+    """
+    Normalizes extracted values.
+    :param extracted_values: Result of evaluate_xpaths.
+    :return: Extracted values with normalized values.
+    """
+    normalize_value = TextNormalizer("NFC").normalize
+    return [(entity_id, property_id, mapping,
+             [map(normalize_value, arguments) for arguments in values])
+            for entity_id, property_id, mapping, values in extracted_values]
+
+
+def format_values(xml_converter, extracted_values):
+    """
+    Runs formatters on normalized values and builds rows of the result.
+    :param xml_converter: XmlDumpConverter instance.
+    :param extracted_values: Result of normalize.
+    :return: List of rows.
+    """
+    rows = []
+    for entity_id, property_id, mapping, values in extracted_values:
+        if "formatter" in mapping:
+            external_values = xml_converter.run_formatter(property_id, entity_id,
+                                                          mapping, values)
+        else:
+            external_values = [value for arguments in values for value in arguments]
+        rows.extend((DUMP_ID, entity_id, property_id, external_value)
+                    for external_value in external_values)
+
+    return rows
+
+
+def write_rows(rows):
+    """
+    Writes rows as csv.
+    :param rows: List of rows.
+    :return: Size of the written csv in bytes.
+    """
+    result_writer = ResultWriter(StringIO(), StringIO())
+    result_writer.write_external_values(rows)
+    result_writer.flush()
+
+    return len(result_writer.external_values_file.getvalue())
+
+
+def convert(compressed_dump):
+    """
+    Converts compressed dump like GndDumpConverter.
+    :param compressed_dump: Compressed dump content.
+    :return: Size of the written csv in bytes.
+    """
+    gnd_converter = GndDumpConverter(True)
+    result_writer = ResultWriter(StringIO(), StringIO())
+    gnd_converter.write_external_data(DUMP_ID, open_compressed(compressed_dump),
+                                      result_writer)
+
+    return len(result_writer.external_values_file.getvalue())
+
+
+def run(dump, repetitions):
+    """
+    Measures all stages.
+    :param dump: Dump content.
+    :param repetitions: Number of runs per stage.
+    :return: Dictionary of stages and their seconds as well as counts of
+             entities and rows.
+    """
+    compressed_file = StringIO()
+    with gzip.GzipFile(mode="wb", fileobj=compressed_file) as gzip_file:
+        gzip_file.write(dump)
+    compressed_dump = compressed_file.getvalue()
+
+    # Entities are kept in memory, so that later stages can be run on them
+    entity_elements = []
+    for entity_element in create_converter().iterate_entities(StringIO(dump)):
+        XmlDumpConverter.detach_entity(entity_element)
+        entity_elements.append(entity_element)
+    raw_converter = create_converter(RawValues())
+
+    seconds = {}
+    seconds["gzip_decode"], _ = measure(lambda: decode(compressed_dump), repetitions)
+    seconds["iterparse"], entities = measure(lambda: parse(dump), repetitions)
+    seconds["id_extraction"], entity_ids = measure(
+        lambda: extract_ids(raw_converter, entity_elements), repetitions)
+    seconds["xpath_evaluation"], extracted_values = measure(
+        lambda: evaluate_xpaths(raw_converter, entity_elements, entity_ids), repetitions)
+    seconds["normalization"], normalized_values = measure(
+        lambda: normalize(extracted_values), repetitions)
+    # Formatter caches are filled by the first run, so each run gets a new converter
+    seconds["formatting"], rows = measure(
+        lambda: format_values(create_converter(), normalized_values), repetitions)
+    seconds["csv_writing"], csv_bytes = measure(lambda: write_rows(rows), repetitions)
+    seconds["total"], _ = measure(lambda: convert(compressed_dump), repetitions)
+
+    return {
+        "seconds": seconds,
+        "entities": entities,
+        "rows": len(rows),
+        "dump_bytes": len(dump),
+        "compressed_bytes": len(compressed_dump),
+        "csv_bytes": csv_bytes
+    }
+
+
+def get_commit():
+    """
+    Gets the current git commit.
+    :return: Hash of the commit or None if unknown.
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"]).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous_results=None):
+    """
+    Prints seconds and throughput of all stages.
+    :param results: Results of run.
+    :param previous_results: Results of a previous run to compare with.
+    """
+    print "{0} records, {1:.1f} MB, {2} rows".format(
+        results["entities"], results["dump_bytes"] / 1024.0 / 1024.0, results["rows"])
+    for stage in STAGES:
+        seconds = results["seconds"][stage]
+        line = "{0:<17} {1:>8.3f} s {2:>10.0f} records/s".format(
+            stage, seconds, results["entities"] / seconds)
+        if previous_results and stage in previous_results["seconds"]:
+            line += " {0:>6.2f}x".format(previous_results["seconds"][stage] / seconds)
+        print line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000, help="number of records in the synthetic dump")
+    parser.add_argument("--type-mix", type=parse_type_mix, default="p=1,u=1,g=1", help="relative frequency of record types (field 079), e.g. p=2,u=1,g=1")
+    parser.add_argument("--repetitions", type=int, default=3, help="number of runs per stage, the fastest is reported")
+    parser.add_argument("--output", help="JSON file, in which results should be written")
+    parser.add_argument("--compare", help="JSON file of a previous run, whose results are shown as speedup")
+    args = parser.parse_args()
+
+    dump_file = StringIO()
+    counts = generate_dump(dump_file, args.records, args.type_mix)
+    results = run(dump_file.getvalue(), args.repetitions)
+    results.update({
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "records": args.records,
+        "record_types": counts,
+        "repetitions": args.repetitions
+    })
+
+    previous_results = None
+    if args.compare:
+        with open(args.compare, "rb") as previous_file:
+            previous_results = json.load(previous_file)
+    print_results(results, previous_results)
+
+    if args.output:
+        with open(args.output, "wb") as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
@@ -0,0 +1,73 @@
+"""
+Compares throughput of writing external values row by row and in batches
+and checks, that both produce identical output.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from dumpconverter.writer.ResultWriter import ResultWriter
+
+
+def generate_rows(count):
+    """
+    Generates rows of external values similar to the ones of GND dumps.
+    :param count: Number of rows.
+    :return: List of rows.
+    """
+    properties = (("P19", "Frankfurt (Main)"), ("P21", "m\xc3\xa4nnlich"),
+                  ("P569", "11.03.1952"), ("P106", "Schriftsteller, Journalist"),
+                  ("P625", "N052.516667,E013.400000"))
+    rows = []
+    for index in xrange(count):
+        property_id, value = properties[index % len(properties)]
+        rows.append(("GND-Tpgesamt", str(100000000 + index // 3),
+                     property_id, value))
+
+    return rows
+
+
+def write_rows(rows, batched, flush_size):
+    """
+    Writes rows to a temporary file.
+    :param rows: Rows of external values.
+    :param batched: Whether batched API should be used.
+    :param flush_size: Flush size of the writer.
+    :return: Seconds and output.
+    """
+    with tempfile.TemporaryFile() as external_values_file:
+        with tempfile.TemporaryFile() as dump_information_file:
+            result_writer = ResultWriter(external_values_file,
+                                         dump_information_file, flush_size)
+            start = time.time()
+            if batched:
+                # Converters pass all values of a single entity at once
+                for index in xrange(0, len(rows), 3):
+                    result_writer.write_external_values(rows[index:index + 3])
+                result_writer.flush()
+            else:
+                for row in rows:
+                    result_writer.write_external_value(*row)
+            external_values_file.flush()
+            os.fsync(external_values_file.fileno())
+            seconds = time.time() - start
+
+            external_values_file.seek(0)
+            return seconds, external_values_file.read()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000, help="number of rows")
+    parser.add_argument("--flush-size", type=int, default=ResultWriter.FLUSH_SIZE, help="flush size of the batched writer")
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows)
+    single_seconds, single_output = write_rows(rows, False, args.flush_size)
+    batched_seconds, batched_output = write_rows(rows, True, args.flush_size)
+
+    print "{0} rows, {1:.1f} MB".format(args.rows, len(single_output) / 1024.0 / 1024.0)
+    print "row by row {0:>8.3f} s {1:>10.0f} rows/s".format(single_seconds, args.rows / single_seconds)
+    print "batched    {0:>8.3f} s {1:>10.0f} rows/s".format(batched_seconds, args.rows / batched_seconds)
+    print "identical output: {0}".format(single_output == batched_output)
@@ -1,28 +1,94 @@
 """Main script that executes dump converters depending on parameters"""
 import argparse
+import sys
 from tabulate import tabulate
 
 from dumpconverter.DumpConverter import DumpConverter
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+from dumpconverter.utils import compressionutils
+from dumpconverter.writer.ResultWriter import ResultWriter
+from dumpconverter.writer.ShardedResultWriter import ShardedResultWriter
+from dumpconverter.writer.SortingResultWriter import SortingResultWriter
+from dumpconverter.writer.SqliteResultWriter import SqliteResultWriter
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="This program downloads dumps from one or many databases and converts them into a format, that can be imported by WikibaseQualityExternalValidation extension.")
     parser.add_argument("--list-databases", help="list all available databases, that can be imported, and exit", action="store_true")
     parser.add_argument("--database", "-d", help="key of a specific database that should be imported.")
-    parser.add_argument("--external-values-file", help="CSV output file for data values of dumps.", default="external_values.csv")
+    parser.add_argument("--external-values-file", help="CSV output file for data values of dumps. Compressed, if the file extension is .gz, .bz2, .xz or .zst.", default="external_values.csv")
     parser.add_argument("--dump-information-file", help="CSV output file for meta informations of dumps.", default="dump_information.csv")
+    parser.add_argument("--writer", help="output of the results. csv writes the external values and dump information files, sqlite loads them into the tables external_values and dump_information of --sqlite-file.", choices=("csv", "sqlite"), default="csv")
+    parser.add_argument("--sqlite-file", help="SQLite database, into which results are loaded by --writer sqlite. Existing tables are replaced.", default="external_values.sqlite")
+    parser.add_argument("--shards", help="number of files, into which external values are partitioned by --shard-key for parallel loading. The files are named like --external-values-file with the shard number before the extension, a manifest lists them with their rows and sizes. Only applies to --writer csv.", type=int, default=1)
+    parser.add_argument("--shard-key", help="column, by whose hash external values are partitioned into --shards files.", choices=ShardedResultWriter.SHARD_KEYS, default="external_id")
+    parser.add_argument("--sort-output", help="write external values sorted by dump id, external id, property id and value without duplicate rows. Rows exceeding --sort-memory are spilled as sorted runs to temporary files, which are merged at the end.", action="store_true")
+    parser.add_argument("--sort-memory", help="memory budget in megabytes for rows buffered by --sort-output.", type=int, default=256)
+    parser.add_argument("--sort-directory", help="directory for temporary files of --sort-output. Defaults to the temporary directory of the system.")
+    parser.add_argument("--compress", help="compression of the output file for data values of dumps.", choices=compressionutils.get_available_compressions())
+    parser.add_argument("--compression-level", help="compression level of the output file for data values of dumps.", type=int)
     parser.add_argument("--quiet", "-q", help="suppress output", action="store_true")
+    parser.add_argument("--stream", help="process dumps while they are downloaded instead of downloading them to a temporary file first", action="store_true")
+    parser.add_argument("--cache-directory", help="directory, in which streamed dumps should be stored additionally.")
+    parser.add_argument("--dump-cache-directory", help="directory, in which downloaded dumps are kept between runs. Unchanged dumps are not downloaded again and interrupted downloads are resumed. Ignored in combination with --stream.")
+    parser.add_argument("--connections", help="number of concurrent connections, that download a single dump in byte ranges, if the server accepts range requests. Ignored in combination with --stream.", type=int, default=1)
+    parser.add_argument("--jobs", "-j", help="number of processes, that download and convert dumps in parallel.", type=int, default=1)
+    parser.add_argument("--workers", "-w", help="number of processes, that convert entities of a single dump in parallel. Ignored in combination with --jobs.", type=int, default=1)
+    parser.add_argument("--incremental-directory", help="directory, in which indexes of converted records are kept. If set, only records changed since the previous conversion are converted, rows of unchanged records are copied.")
+    parser.add_argument("--delta-file", help="CSV output file for records, that were added, changed or removed since the previous conversion. Only written in combination with --incremental-directory.", default="delta.csv")
+    parser.add_argument("--profile", help="measure time spent per stage, property and mapping entry and print a report at the end", action="store_true")
+    parser.add_argument("--profile-file", help="JSON output file for the profile. Only written in combination with --profile.", default="profile.json")
+    parser.add_argument("--engine", help="engine applying the mappings on records. stream evaluates simple mappings while the dump is parsed without building element trees and falls back to XPath for all others. Ignored for records of incremental conversions.", choices=XmlDumpConverter.ENGINES, default="xpath")
+    parser.add_argument("--strict", help="abort, if a formatter fails for a value, instead of counting the failure", action="store_true")
+    parser.add_argument("--lint-mapping", help="check the property mappings for paths, that never match or are expensive, evaluate them on sample records and exit. Exits with status 1, if errors are found.", action="store_true")
+    parser.add_argument("--lint-sample", help="dump file, from which sample records are taken by --lint-mapping. If not set, the first records of each dump are streamed.")
+    parser.add_argument("--lint-records", help="number of sample records per dump evaluated by --lint-mapping. 0 skips the evaluation.", type=int, default=1000)
     args = parser.parse_args()
 
     if args.list_databases:
         print tabulate(DumpConverter.get_available_databases(),
                        headers=["Key", "Description"])
+    elif args.lint_mapping:
+        if not DumpConverter.lint(args.database, args.lint_sample, args.lint_records):
+            sys.exit(1)
     else:
-        external_values_file = open(args.external_values_file, "w+b")
-        dump_information_file = open(args.dump_information_file, "w+b")
+        delta_file = None
+        if args.incremental_directory:
+            delta_file = open(args.delta_file, "w+b")
+        if args.writer == "sqlite":
+            result_writer = SqliteResultWriter(args.sqlite_file, delta_file)
+        elif args.shards > 1:
+            dump_information_file = open(args.dump_information_file, "w+b")
+            result_writer = ShardedResultWriter(args.external_values_file, dump_information_file,
+                                                args.shards, args.shard_key, args.compress,
+                                                args.compression_level, delta_file=delta_file)
+        else:
+            external_values_file = ResultWriter.open_file(args.external_values_file, args.compress,
+                                                          args.compression_level)
+            dump_information_file = open(args.dump_information_file, "w+b")
+            result_writer = ResultWriter(external_values_file, dump_information_file,
+                                         delta_file=delta_file)
+        if args.sort_output:
+            result_writer = SortingResultWriter(result_writer, args.sort_memory * 1024 * 1024,
+                                                args.sort_directory)
 
-        converter = DumpConverter(external_values_file, dump_information_file, args.database, args.quiet)
+        converter_options = {
+            "streaming": args.stream,
+            "cache_directory": args.cache_directory,
+            "jobs": args.jobs,
+            "workers": args.workers,
+            "strict": args.strict,
+            "incremental_directory": args.incremental_directory,
+            "dump_cache_directory": args.dump_cache_directory,
+            "connections": args.connections,
+            "profile_file": args.profile_file if args.profile else None,
+            "engine": args.engine
+        }
+        converter = DumpConverter(None, None, args.database, args.quiet,
+                                  converter_options, result_writer=result_writer)
         converter.execute()
 
-        external_values_file.close()
-        dump_information_file.close()
+        result_writer.close()
+        if args.sort_output and not args.quiet:
+            print "Sorted {0} rows from {1} spilled runs, removed {2} duplicate rows".format(
+                result_writer.written_rows, result_writer.spilled_runs, result_writer.duplicate_rows)
@@ -13,7 +13,8 @@ class DumpConverter:
         }
     }
 
-    def __init__(self, external_values_file, dump_information_file, database=None, is_quiet=False):
+    def __init__(self, external_values_file, dump_information_file, database=None, is_quiet=False,
+                 converter_options=None, delta_file=None, result_writer=None):
         """
         Creates new DumpConverter instance.
         :param database: Key of the database, that should be converted
@@ -21,10 +22,21 @@ class DumpConverter:
         :param external_values_file: File object for output of external values.
         :param dump_information_file: File object for output of metadata of the dump.
         :param is_quiet: If set to True, console output will be suppressed.
+        :param converter_options: Dictionary of additional keyword arguments
+                                  for the dump converters.
+        :param delta_file: File object for output of records, that changed
+                           since the previous incremental conversion.
+        :param result_writer: Writer for output of results, e.g. a
+                              SqliteResultWriter. If None, results are
+                              written as csv to the given files.
         """
         self.database = database
         self.is_quiet = is_quiet
-        self.result_writer = ResultWriter(external_values_file, dump_information_file)
+        self.converter_options = converter_options or {}
+        if result_writer is None:
+            result_writer = ResultWriter(external_values_file, dump_information_file,
+                                         delta_file=delta_file)
+        self.result_writer = result_writer
 
     def execute(self):
         """
@@ -39,6 +51,7 @@ class DumpConverter:
             for converter_key in self.DATABASES.iterkeys():
                 self.run_converter(converter_key)
 
+        self.result_writer.flush()
         return True
 
     def run_converter(self, converter_key):
@@ -46,9 +59,42 @@ class DumpConverter:
         Runs specific converter
         :param converter_key: Name of the converter.
         """
-        importer = self.DATABASES[converter_key]["converter"](self.is_quiet)
+        importer = self.DATABASES[converter_key]["converter"](self.is_quiet,
+                                                              **self.converter_options)
         importer.execute(self.result_writer)
 
+    @classmethod
+    def lint(cls, database=None, sample_path=None, sample_records=1000):
+        """
+        Checks the property mappings of converters for dead and expensive
+        paths and prints a report.
+        :param database: Key of the database, whose mapping should be
+                         checked or None to check all available databases.
+        :param sample_path: Path of a dump file, from which sample records
+                            are taken. If None, the first records of the
+                            dumps are streamed.
+        :param sample_records: Number of sample records per dump.
+        :return: False, if a converter is not found or a mapping has errors.
+        """
+        if database:
+            if database not in cls.DATABASES:
+                print "No converter with specified key found!"
+                return False
+            converter_keys = [database.lower()]
+        else:
+            converter_keys = sorted(cls.DATABASES.iterkeys())
+
+        is_valid = True
+        for converter_key in converter_keys:
+            importer = cls.DATABASES[converter_key]["converter"](True)
+            linter, issues = importer.lint_mapping(sample_path, sample_records)
+            print "Mapping of {0}:".format(converter_key)
+            linter.print_report(issues)
+            if any(severity == linter.ERROR for severity, _, _, _ in issues):
+                is_valid = False
+
+        return is_valid
+
     @staticmethod
     def get_available_databases():
         """
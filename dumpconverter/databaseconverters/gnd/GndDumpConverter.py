@@ -1,12 +1,26 @@
 """Contains dump converter for dumps of the Integrated Authority File."""
 import datetime
+import multiprocessing
+import os
+import shutil
+import tempfile
 from gzip import GzipFile
 from tempfile import TemporaryFile
 
 import propertymappings
+from dumpconverter.dataformatconverters.MappingLinter import MappingLinter
+from dumpconverter.dataformatconverters.TextNormalizer import TextNormalizer
+from dumpconverter.dataformatconverters.ProfilingXmlDumpConverter import ProfilingXmlDumpConverter
 from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
-from dumpconverter.utils import downloadutils
+from dumpconverter.utils import compressionutils, downloadutils
+from dumpconverter.utils.DumpCache import DumpCache
+from dumpconverter.utils.GzipStream import GzipStream
+from dumpconverter.utils.ProgressReporter import ProgressReporter
+from dumpconverter.utils.RecordIndex import RecordIndex
+from dumpconverter.utils.SegmentedDownload import SegmentedDownload
 from dumpconverter.exceptions.DownloadError import DownloadError
+from dumpconverter.writer.RecordIndexWriter import RecordIndexWriter
+from dumpconverter.writer.ResultWriter import ResultWriter
 
 
 class GndDumpConverter:
@@ -32,50 +46,283 @@ class GndDumpConverter:
     XML_NAMESPACES = {
         "ns": "http://www.loc.gov/MARC21/slim"
     }
+    # Types of records (field 079, subfield b) in the dumps of persons,
+    # geographic names and works
+    RECORD_TYPES = ("p", "g", "u")
 
-    def __init__(self, is_quiet=False):
+    def __init__(self, is_quiet=False, streaming=False, cache_directory=None,
+                 jobs=1, workers=1, strict=False, incremental_directory=None,
+                 dump_cache_directory=None, connections=1, profile_file=None,
+                 engine="xpath"):
         """
         Creates new GndDumpConverter instance.
         :param is_quiet: If set to True, console output will be suppressed.
+        :param streaming: If set to True, dumps are processed while they are
+                          downloaded instead of downloading them to a
+                          temporary file first.
+        :param cache_directory: Directory, in which streamed dumps should
+                                be stored additionally.
+        :param jobs: Number of processes, that download and convert dumps
+                     in parallel.
+        :param workers: Number of processes, that convert entities of a
+                        single dump in parallel. Not applicable in
+                        combination with jobs, since processes of jobs cannot
+                        have worker processes.
+        :param strict: If set to True, the conversion is aborted, when a
+                       formatter fails.
+        :param incremental_directory: Directory, in which indexes of the
+                                      converted records are kept. If set,
+                                      only records changed since the
+                                      previous conversion are converted.
+        :param dump_cache_directory: Directory, in which downloaded dumps
+                                     are kept. Dumps are downloaded again
+                                     only if they changed, interrupted
+                                     downloads are resumed. Not applicable
+                                     in combination with streaming.
+        :param connections: Number of concurrent connections, that download
+                            a dump in byte ranges, if the server accepts
+                            range requests. Not applicable in combination
+                            with streaming.
+        :param profile_file: Path of a JSON file, in which the time spent
+                             per stage, property and mapping entry should
+                             be written. If None, no profile is collected.
+        :param engine: Engine applying the mapping on records, either
+                       "xpath" or "stream". See XmlDumpConverter.
         """
         self.is_quiet = is_quiet
-        self.xml_dump_converter = XmlDumpConverter(self.XML_ENTITIES_PATH,
-                                                   self.XML_ENTITY_ID_XPATH,
-                                                   propertymappings.mapping,
-                                                   self.XML_NAMESPACES,
-                                                   is_quiet)
+        self.streaming = streaming
+        self.cache_directory = cache_directory
+        self.jobs = jobs
+        self.strict = strict
+        self.incremental_directory = incremental_directory
+        self.dump_cache_directory = dump_cache_directory
+        self.connections = connections
+        self.profile_file = profile_file
+        self.engine = engine
+        if profile_file:
+            converter_class = ProfilingXmlDumpConverter
+        else:
+            converter_class = XmlDumpConverter
+        self.xml_dump_converter = converter_class(self.XML_ENTITIES_PATH,
+                                                  self.XML_ENTITY_ID_XPATH,
+                                                  propertymappings.mapping,
+                                                  self.XML_NAMESPACES,
+                                                  is_quiet,
+                                                  propertymappings.discriminator_path,
+                                                  workers=workers,
+                                                  text_normalizer=TextNormalizer("NFC"),
+                                                  strict=strict,
+                                                  engine=engine)
 
     def execute(self, result_writer):
         """
         Starts whole convert process.
         :param result_writer: Writer for output of result.
         """
-        for dump_id, file_prefix in self.FILE_PREFIXES.iteritems():
-            if not self.is_quiet:
-                print "Start to convert '{0}'".format(file_prefix)
+        if self.jobs > 1:
+            self.execute_parallel(result_writer)
+        else:
+            for dump_id, file_prefix in self.FILE_PREFIXES.iteritems():
+                if not self.is_quiet:
+                    print "Start to convert '{0}'".format(file_prefix)
+
+                self.convert(dump_id, file_prefix, result_writer)
 
-            dump_file, dump_url, dump_size = self.download_dump(file_prefix)
+                if not self.is_quiet:
+                    print
 
-            uncompressed_dump_file = GzipFile(mode="rb", fileobj=dump_file)
+        self.write_profile()
+
+    def execute_parallel(self, result_writer):
+        """
+        Downloads and converts each dump in a separate process. Results are
+        written to partial files per dump, which are merged afterwards in
+        the same order as in a sequential run. Statistics of the processes
+        are added to the own ones and printed at the end.
+        :param result_writer: Writer for output of result.
+        """
+        partial_directory = tempfile.mkdtemp(prefix="dumpconverter")
+        pool = multiprocessing.Pool(min(self.jobs, len(self.FILE_PREFIXES)))
+        try:
+            results = []
+            for dump_id, file_prefix in self.FILE_PREFIXES.iteritems():
+                if not self.is_quiet:
+                    print "Start to convert '{0}'".format(file_prefix)
+                result = pool.apply_async(convert_partial, (
+                    dump_id,
+                    file_prefix,
+                    partial_directory,
+                    self.streaming,
+                    self.cache_directory,
+                    self.strict,
+                    self.incremental_directory,
+                    self.dump_cache_directory,
+                    self.connections,
+                    self.profile_file,
+                    self.engine
+                ))
+                results.append((file_prefix, result))
+            pool.close()
 
-            self.write_external_data(
-                dump_id,
-                uncompressed_dump_file,
-                result_writer)
-            result_writer.write_dump_information(
-                dump_id,
-                self.DATA_SOURCE_ITEM_ID,
-                [self.IDENTIFIER_PROPERTY_ID],
-                self.LANGUAGE,
-                dump_url,
-                dump_size,
-                self.LICENSE_ITEM_ID)
+            for file_prefix, result in results:
+                (external_values_path, dump_information_path, delta_path,
+                 statistics, timings) = result.get()
+                self.xml_dump_converter.add_statistics(statistics)
+                if timings is not None:
+                    self.xml_dump_converter.profile.add_timings(timings)
+                with open(external_values_path, "rb") as external_values_file:
+                    with open(dump_information_path, "rb") as dump_information_file:
+                        with open(delta_path, "rb") as delta_file:
+                            result_writer.merge(external_values_file,
+                                                dump_information_file,
+                                                delta_file)
+                if not self.is_quiet:
+                    print "Finished to convert '{0}'".format(file_prefix)
+            self.xml_dump_converter.print_statistics()
+        finally:
+            pool.terminate()
+            pool.join()
+            shutil.rmtree(partial_directory)
 
-            uncompressed_dump_file.close()
-            dump_file.close()
+    def write_profile(self):
+        """
+        Prints the profile of the conversion and writes it as JSON, if
+        profiling is enabled.
+        """
+        if not self.profile_file:
+            return
 
-            if not self.is_quiet:
-                print
+        profile = self.xml_dump_converter.profile
+        if not self.is_quiet:
+            profile.print_report()
+        profile.write_json(self.profile_file)
+
+    def convert(self, dump_id, file_prefix, result_writer):
+        """
+        Downloads and converts a single dump.
+        :param dump_id: Id of the dump.
+        :param file_prefix: Prefix of the dump file.
+        :param result_writer: Writer for output of result.
+        """
+        if self.streaming:
+            self.convert_dump_streaming(dump_id, file_prefix, result_writer)
+        else:
+            self.convert_dump(dump_id, file_prefix, result_writer)
+
+    def convert_dump(self, dump_id, file_prefix, result_writer):
+        """
+        Downloads a dump to a temporary file and converts it afterwards.
+        :param dump_id: Id of the dump.
+        :param file_prefix: Prefix of the dump file.
+        :param result_writer: Writer for output of result.
+        """
+        dump_file, dump_url, dump_size = self.download_dump(file_prefix)
+
+        uncompressed_dump_file = GzipFile(mode="rb", fileobj=dump_file)
+        # Progress is based on consumed bytes of the compressed dump
+        progress_reporter = ProgressReporter(
+            "Processing database dump...{0}",
+            dump_size,
+            position_function=dump_file.tell,
+            is_quiet=self.is_quiet,
+            check_interval=XmlDumpConverter.PROGRESS_CHECK_INTERVAL)
+
+        self.write_external_data(
+            dump_id,
+            uncompressed_dump_file,
+            result_writer,
+            progress_reporter)
+        self.write_dump_information(dump_id, dump_url, dump_size,
+                                    result_writer)
+
+        uncompressed_dump_file.close()
+        dump_file.close()
+
+    def convert_dump_streaming(self, dump_id, file_prefix, result_writer):
+        """
+        Converts a dump while it is downloaded. If a cache directory is set,
+        the downloaded dump is stored there as well.
+        :param dump_id: Id of the dump.
+        :param file_prefix: Prefix of the dump file.
+        :param result_writer: Writer for output of result.
+        """
+        cache_file = None
+        if self.cache_directory:
+            cache_path = os.path.join(self.cache_directory,
+                                      file_prefix + ".xml.gz")
+            cache_file = open(cache_path + ".part", "wb")
+
+        try:
+            dump_stream, dump_url = self.stream_dump(file_prefix, cache_file)
+            try:
+                progress_reporter = ProgressReporter(
+                    "Downloading and processing database dump...{0}",
+                    dump_stream.total_bytes,
+                    position_function=dump_stream.tell,
+                    is_quiet=self.is_quiet,
+                    check_interval=XmlDumpConverter.PROGRESS_CHECK_INTERVAL)
+
+                self.write_external_data(
+                    dump_id,
+                    GzipStream(dump_stream),
+                    result_writer,
+                    progress_reporter)
+                dump_size = dump_stream.finish()
+            finally:
+                dump_stream.close()
+        finally:
+            if cache_file is not None:
+                cache_file.close()
+
+        if cache_file is not None:
+            os.rename(cache_file.name, cache_path)
+        self.write_dump_information(dump_id, dump_url, dump_size,
+                                    result_writer)
+
+    def lint_mapping(self, sample_path=None, sample_records=1000):
+        """
+        Checks the property mapping for dead and expensive paths and
+        evaluates the paths on sample records.
+        :param sample_path: Path of a dump file, from which sample records
+                            are taken. If None, the first records of each
+                            dump are streamed instead.
+        :param sample_records: Number of sample records per dump.
+        :return: Tuple of MappingLinter and list of issues.
+        """
+        linter = MappingLinter(self.xml_dump_converter, self.RECORD_TYPES)
+        issues = linter.check()
+        if sample_records > 0:
+            if sample_path:
+                with compressionutils.open_decompressed_file(sample_path) as dump_file:
+                    linter.evaluate_sample(dump_file, sample_records)
+            else:
+                for file_prefix in sorted(self.FILE_PREFIXES.itervalues()):
+                    dump_stream, _ = self.stream_dump(file_prefix)
+                    try:
+                        linter.evaluate_sample(GzipStream(dump_stream), sample_records)
+                    finally:
+                        dump_stream.close()
+            issues += linter.check_sample()
+
+        return linter, issues
+
+    def write_dump_information(self, dump_id, dump_url, dump_size,
+                               result_writer):
+        """
+        Writes meta information of a dump.
+        :param dump_id: Id of the dump.
+        :param dump_url: Url of the dump.
+        :param dump_size: Size of the compressed dump in bytes.
+        :param result_writer: Writer for output of result.
+        """
+        result_writer.write_dump_information(
+            dump_id,
+            self.DATA_SOURCE_ITEM_ID,
+            [self.IDENTIFIER_PROPERTY_ID],
+            self.LANGUAGE,
+            dump_url,
+            dump_size,
+            self.LICENSE_ITEM_ID)
 
     def get_dump_url(self, file_prefix, fallback=False, date=datetime.date.today()):
         """
@@ -120,35 +367,200 @@ class GndDumpConverter:
     def download_dump(self, file_prefix):
         """
         Downloads a dump identified by file prefix to destination file.
+        If a dump cache directory is set, the dump is taken from the cache.
         :param file_prefix: Prefix of the dump file.
         :return: List of file object, url and size of downloaded file.
         """
+        if self.dump_cache_directory:
+            dump_cache = DumpCache(self.dump_cache_directory, self.is_quiet,
+                                   connections=self.connections)
+            def fetch(dump_url):
+                return dump_cache.fetch(dump_url, "Downloading database dump...{0}")
+            (dump_path, dump_size), dump_url = self.open_dump(file_prefix, fetch)
+
+            return open(dump_path, "rb"), dump_url, dump_size
+
         dump_file = TemporaryFile()
+        def download(dump_url):
+            if self.connections > 1:
+                return SegmentedDownload.download_file(
+                    dump_url, dump_file, self.connections, self.is_quiet,
+                    "Downloading database dump...{0}")
+            return downloadutils.download_file(dump_url, dump_file,
+                                               is_quiet=self.is_quiet,
+                                               progress_message="Downloading database dump...{0}")
+        dump_size, dump_url = self.open_dump(file_prefix, download)
+
+        return dump_file, dump_url, dump_size
+
+    def stream_dump(self, file_prefix, cache_file=None):
+        """
+        Starts download of a dump identified by file prefix, whose content
+        can be read while it is downloaded.
+        :param file_prefix: Prefix of the dump file.
+        :param cache_file: File, in which downloaded bytes should be written.
+        :return: List of DownloadStream and url of the dump.
+        """
+        def open_stream(dump_url):
+            return downloadutils.open_stream(dump_url, cache_file)
+
+        return self.open_dump(file_prefix, open_stream)
+
+    def open_dump(self, file_prefix, open_function):
+        """
+        Opens the latest dump identified by file prefix. If the latest dump
+        was not published yet, the previous one is opened.
+        :param file_prefix: Prefix of the dump file.
+        :param open_function: Function, that opens the dump of a given url.
+        :return: List of result of open function and url of the dump.
+        """
         dump_url = self.get_dump_url(file_prefix)
         try:
-            dump_size = downloadutils.download_file(dump_url, dump_file,
-                                                    is_quiet=self.is_quiet,
-                                                    progress_message="Downloading database dump...{0}")
+            result = open_function(dump_url)
         except DownloadError as e:
             if e.status_code == 400 or e.status_code == 500:
                 dump_url = self.get_dump_url(file_prefix, fallback=True)
-                dump_size = downloadutils.download_file(dump_url, dump_file,
-                                                        is_quiet=self.is_quiet,
-                                                        progress_message="Downloading database dump...{0}")
+                result = open_function(dump_url)
             else:
                 raise
 
-        return dump_file, dump_url, dump_size
+        return result, dump_url
 
-    def write_external_data(self, dump_id, dump_file, result_writer):
+    def write_external_data(self, dump_id, dump_file, result_writer,
+                            progress_reporter=None):
         """
         Processes dump and writes external values to file.
         :param dump_id: Id of the processing dump.
         :param dump_file: File object of the dump.
         :param result_writer: Current result writer.
+        :param progress_reporter: Reporter for progress output.
         """
-        external_data = self.xml_dump_converter.process_dump(dump_file)
+        if self.incremental_directory:
+            self.write_external_data_incremental(dump_id, dump_file,
+                                                 result_writer,
+                                                 progress_reporter)
+            return
+
+        external_data = self.xml_dump_converter.process_dump(dump_file,
+                                                             progress_reporter)
         for external_id, property_id, external_values in external_data:
-            for external_value in external_values:
-                result_writer.write_external_value(dump_id, external_id,
-                                                   property_id, external_value)
+            result_writer.write_external_values(
+                (dump_id, external_id, property_id, external_value)
+                for external_value in external_values)
+        result_writer.flush()
+
+    def write_external_data_incremental(self, dump_id, dump_file,
+                                        result_writer, progress_reporter=None):
+        """
+        Processes dump and writes external values to file. Rows of records,
+        that are unchanged since the previous conversion, are copied from
+        its index. Added, changed and removed records are written to the
+        delta file. The index is replaced by one for the current dump.
+        :param dump_id: Id of the processing dump.
+        :param dump_file: File object of the dump.
+        :param result_writer: Current result writer.
+        :param progress_reporter: Reporter for progress output.
+        """
+        if not os.path.isdir(self.incremental_directory):
+            os.makedirs(self.incremental_directory)
+        index_path = os.path.join(self.incremental_directory, dump_id + ".index")
+        data_path = os.path.join(self.incremental_directory, dump_id + ".rows")
+        fingerprint = self.xml_dump_converter.compiled_mapping.fingerprint
+        previous_index = RecordIndex.open(index_path, data_path, fingerprint)
+        index_writer = RecordIndexWriter(index_path, data_path, fingerprint)
+        try:
+            external_data = self.xml_dump_converter.process_dump_incremental(
+                dump_file, previous_index, progress_reporter)
+            for external_id, content_hash, slot, external_values in external_data:
+                if external_id is None:
+                    continue
+                if isinstance(external_id, unicode):
+                    external_id = external_id.encode("utf-8")
+
+                if external_values is None:
+                    serialized_rows = previous_index.read_rows(slot)
+                else:
+                    serialized_rows = ResultWriter.serialize_external_values(
+                        (dump_id, external_id, property_id, external_value)
+                        for property_id, values in external_values
+                        for external_value in values)
+                    if slot is None:
+                        result_writer.write_delta(dump_id, external_id, "added")
+                    elif serialized_rows != previous_index.read_rows(slot):
+                        result_writer.write_delta(dump_id, external_id, "changed")
+
+                result_writer.write_serialized_external_values(serialized_rows)
+                index_writer.add(external_id, content_hash, serialized_rows)
+
+            if previous_index is not None:
+                for external_id in previous_index.get_unseen_ids():
+                    result_writer.write_delta(dump_id, external_id, "removed")
+        except Exception:
+            index_writer.discard()
+            raise
+        finally:
+            if previous_index is not None:
+                previous_index.close()
+        index_writer.close()
+        result_writer.flush()
+
+
+def convert_partial(dump_id, file_prefix, partial_directory, streaming=False,
+                    cache_directory=None, strict=False,
+                    incremental_directory=None, dump_cache_directory=None,
+                    connections=1, profile_file=None, engine="xpath"):
+    """
+    Downloads and converts a single dump into partial result files.
+    Runs in a worker process of GndDumpConverter.execute_parallel.
+    :param dump_id: Id of the dump.
+    :param file_prefix: Prefix of the dump file.
+    :param partial_directory: Directory for the partial result files.
+    :param streaming: If set to True, the dump is processed while it is
+                      downloaded.
+    :param cache_directory: Directory, in which streamed dumps should be
+                            stored additionally.
+    :param strict: If set to True, the conversion is aborted, when a
+                   formatter fails.
+    :param incremental_directory: Directory, in which indexes of the
+                                  converted records are kept.
+    :param dump_cache_directory: Directory, in which downloaded dumps are
+                                 kept.
+    :param connections: Number of concurrent connections, that download
+                        the dump.
+    :param profile_file: Path of the JSON file of the profile. If set, the
+                         time spent per stage, property and mapping entry
+                         is measured and returned to the parent process,
+                         which writes the file.
+    :param engine: Engine applying the mapping on records.
+    :return: Paths of partial files of external values, dump information
+             and changes of records, statistics of the converter, i.e.
+             formatter cache counters, formatter errors and counters of
+             value path evaluations, and timings of the profile or None.
+    """
+    external_values_path = os.path.join(partial_directory,
+                                        file_prefix + "_external_values.csv")
+    dump_information_path = os.path.join(partial_directory,
+                                         file_prefix + "_dump_information.csv")
+    delta_path = os.path.join(partial_directory, file_prefix + "_delta.csv")
+    converter = GndDumpConverter(True, streaming, cache_directory,
+                                 strict=strict,
+                                 incremental_directory=incremental_directory,
+                                 dump_cache_directory=dump_cache_directory,
+                                 connections=connections,
+                                 profile_file=profile_file,
+                                 engine=engine)
+    with open(external_values_path, "wb") as external_values_file:
+        with open(dump_information_path, "wb") as dump_information_file:
+            with open(delta_path, "wb") as delta_file:
+                result_writer = ResultWriter(external_values_file,
+                                             dump_information_file,
+                                             delta_file=delta_file)
+                converter.convert(dump_id, file_prefix, result_writer)
+
+    statistics = converter.xml_dump_converter.pop_statistics()
+    timings = None
+    if profile_file:
+        timings = converter.xml_dump_converter.profile.pop_timings()
+
+    return (external_values_path, dump_information_path, delta_path,
+            statistics, timings)
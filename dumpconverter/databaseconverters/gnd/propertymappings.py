@@ -2,140 +2,167 @@
 from valueformatters import *
 
 
+# Mappings may be declared as "cacheable" to memoize results of a pure
+# formatter. None of the mappings below are, since their formatters are
+# cheaper than a cache lookup, so that caching them gives no measurable
+# gain despite high hit rates (see benchmarks/formatter_benchmark.py).
+
+# Type of a record (field 079, subfield b), that decides which of the
+# mappings below apply. Mappings declare the type via "discriminator".
+discriminator_path = "ns:datafield[@tag='079']/ns:subfield[@code='b']/text()"
+
 mapping = {
     # Properties for Persons (Tpgesamt)
     'P19': [
         {
             "value_paths": [
-                "ns:datafield[@tag='551' and ns:subfield[@code='i']='Geburtsort' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
-            ]
+                "ns:datafield[@tag='551' and ns:subfield[@code='i']='Geburtsort']/ns:subfield[@code='a']/text()"
+            ],
+            "discriminator": "p"
         }
     ],
     'P20': [
         {
             "value_paths": [
-                "ns:datafield[@tag='551' and ns:subfield[@code='i']='Sterbeort' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
-            ]
+                "ns:datafield[@tag='551' and ns:subfield[@code='i']='Sterbeort']/ns:subfield[@code='a']/text()"
+            ],
+            "discriminator": "p"
         }
     ],
     'P21': [
         {
             "value_paths": [
-                "ns:datafield[@tag='375' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='375']/ns:subfield[@code='a']/text()"
             ],
-            "formatter": gender_formatter
+            "formatter": gender_formatter,
+            "discriminator": "p"
         }
     ],
     'P22': [
         {
             "value_paths": [
-                "ns:datafield[@tag='500' and @ind1='1' and ns:subfield[@code='9']='v:Vater' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='500' and @ind1='1' and ns:subfield[@code='9']='v:Vater']/ns:subfield[@code='a']/text()"
             ],
-            "formatter": basic_name_formatter
+            "formatter": basic_name_formatter,
+            "discriminator": "p"
         },
         {
             "value_paths": [
-                "ns:datafield[@tag='500' and @ind1='0' and ns:subfield[@code='9']='v:Vater' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()",
-                "ns:datafield[@tag='500' and @ind1='0' and ns:subfield[@code='9']='v:Vater' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='b']/text()"
+                "ns:datafield[@tag='500' and @ind1='0' and ns:subfield[@code='9']='v:Vater']/ns:subfield[@code='a']/text()",
+                "ns:datafield[@tag='500' and @ind1='0' and ns:subfield[@code='9']='v:Vater']/ns:subfield[@code='b']/text()"
             ],
-            "formatter": personal_name_formatter
+            "formatter": personal_name_formatter,
+            "discriminator": "p"
         }
     ],
     'P25': [
         {
             "value_paths": [
-                "ns:datafield[@tag='500' and @ind1='1' and ns:subfield[@code='9']='v:Mutter' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='500' and @ind1='1' and ns:subfield[@code='9']='v:Mutter']/ns:subfield[@code='a']/text()"
             ],
-            "formatter": basic_name_formatter
+            "formatter": basic_name_formatter,
+            "discriminator": "p"
         },
         {
             "value_paths": [
-                "ns:datafield[@tag='500' and @ind1='0' and ns:subfield[@code='9']='v:Mutter' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()",
-                "ns:datafield[@tag='500' and @ind1='0' and ns:subfield[@code='9']='v:Mutter' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='b']/text()"
+                "ns:datafield[@tag='500' and @ind1='0' and ns:subfield[@code='9']='v:Mutter']/ns:subfield[@code='a']/text()",
+                "ns:datafield[@tag='500' and @ind1='0' and ns:subfield[@code='9']='v:Mutter']/ns:subfield[@code='b']/text()"
             ],
-            "formatter": personal_name_formatter
+            "formatter": personal_name_formatter,
+            "discriminator": "p"
         }
     ],
     'P26': [
         {
             "value_paths": [
-                "ns:datafield[@tag='500' and @ind1='1' and (ns:subfield[@code='9']='v:Ehemann' or ns:subfield[@code='9']='v:Ehefrau') and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='500' and @ind1='1' and (ns:subfield[@code='9']='v:Ehemann' or ns:subfield[@code='9']='v:Ehefrau')]/ns:subfield[@code='a']/text()"
             ],
-            "formatter": basic_name_formatter
+            "formatter": basic_name_formatter,
+            "discriminator": "p"
         },
         {
             "value_paths": [
-                "ns:datafield[@tag='500' and @ind1='0' and (ns:subfield[@code='9']='v:Ehemann' or ns:subfield[@code='9']='v:Ehefrau') and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()",
-                "ns:datafield[@tag='500' and @ind1='0' and (ns:subfield[@code='9']='v:Ehemann' or ns:subfield[@code='9']='v:Ehefrau') and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='b']/text()"
+                "ns:datafield[@tag='500' and @ind1='0' and (ns:subfield[@code='9']='v:Ehemann' or ns:subfield[@code='9']='v:Ehefrau')]/ns:subfield[@code='a']/text()",
+                "ns:datafield[@tag='500' and @ind1='0' and (ns:subfield[@code='9']='v:Ehemann' or ns:subfield[@code='9']='v:Ehefrau')]/ns:subfield[@code='b']/text()"
             ],
-            "formatter": personal_name_formatter
+            "formatter": personal_name_formatter,
+            "discriminator": "p"
         }
     ],
     'P39': [
         {
             "value_paths": [
-                "ns:datafield[@tag='550' and subfield[@code='i']='Funktion' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/subfield[@code='a']/text()"
-            ]
+                "ns:datafield[@tag='550' and subfield[@code='i']='Funktion']/subfield[@code='a']/text()"
+            ],
+            "discriminator": "p"
         }
     ],
     'P40': [
         {
             "value_paths": [
-                "ns:datafield[@tag='500' and @ind1='1' and (ns:subfield[@code='9']='v:Sohn' or ns:subfield[@code='9']='v:Tochter') and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='500' and @ind1='1' and (ns:subfield[@code='9']='v:Sohn' or ns:subfield[@code='9']='v:Tochter')]/ns:subfield[@code='a']/text()"
             ],
-            "formatter": basic_name_formatter
+            "formatter": basic_name_formatter,
+            "discriminator": "p"
         },
         {
             "value_paths": [
-                "ns:datafield[@tag='500' and @ind1='0' and (ns:subfield[@code='9']='v:Sohn' or ns:subfield[@code='9']='v:Tochter') and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()",
-                "ns:datafield[@tag='500' and @ind1='0' and (ns:subfield[@code='9']='v:Sohn' or ns:subfield[@code='9']='v:Tochter') and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='b']/text()"
+                "ns:datafield[@tag='500' and @ind1='0' and (ns:subfield[@code='9']='v:Sohn' or ns:subfield[@code='9']='v:Tochter')]/ns:subfield[@code='a']/text()",
+                "ns:datafield[@tag='500' and @ind1='0' and (ns:subfield[@code='9']='v:Sohn' or ns:subfield[@code='9']='v:Tochter')]/ns:subfield[@code='b']/text()"
             ],
-            "formatter": personal_name_formatter
+            "formatter": personal_name_formatter,
+            "discriminator": "p"
         }
     ],
     'P106': [
         {
             "value_paths": [
-                "ns:datafield[@tag='550' and (subfield[@code='i']='Charakteristischer Beruf' or subfield[@code='i']='Beruf') and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/subfield[@code='a']/text()"
-            ]
+                "ns:datafield[@tag='550' and (subfield[@code='i']='Charakteristischer Beruf' or subfield[@code='i']='Beruf')]/subfield[@code='a']/text()"
+            ],
+            "discriminator": "p"
         }
     ],
     'P410': [
         {
             "value_paths": [
-                "ns:datafield[@tag='550' and subfield[@code='i']='Funktion' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/subfield[@code='a']/text()"
-            ]
+                "ns:datafield[@tag='550' and subfield[@code='i']='Funktion']/subfield[@code='a']/text()"
+            ],
+            "discriminator": "p"
         }
     ],
     'P569': [
         {
             "value_paths": [
-                "ns:datafield[@tag='548' and ns:subfield[@code='i']='Exakte Lebensdaten' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='548' and ns:subfield[@code='i']='Exakte Lebensdaten']/ns:subfield[@code='a']/text()"
             ],
-            "formatter": start_date_formatter
+            "formatter": start_date_formatter,
+            "discriminator": "p"
         }
     ],
     'P570': [
         {
             "value_paths": [
-                "ns:datafield[@tag='548' and ns:subfield[@code='i']='Exakte Lebensdaten' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='548' and ns:subfield[@code='i']='Exakte Lebensdaten']/ns:subfield[@code='a']/text()"
             ],
-            "formatter": end_date_formatter
+            "formatter": end_date_formatter,
+            "discriminator": "p"
         }
     ],
     'P1477': [
         {
             "value_paths": [
-                "ns:datafield[@tag='400' and @ind1='1' and ns:subfield[@code='i']='Wirklicher Name' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='400' and @ind1='1' and ns:subfield[@code='i']='Wirklicher Name']/ns:subfield[@code='a']/text()"
             ],
-            "formatter": basic_name_formatter
+            "formatter": basic_name_formatter,
+            "discriminator": "p"
         },
         {
             "value_paths": [
-                "ns:datafield[@tag='400' and @ind1='0' and ns:subfield[@code='i']='Wirklicher Name' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='a']/text()",
-                "ns:datafield[@tag='400' and @ind1='0' and ns:subfield[@code='i']='Wirklicher Name' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='p']/ns:subfield[@code='b']/text()"
+                "ns:datafield[@tag='400' and @ind1='0' and ns:subfield[@code='i']='Wirklicher Name']/ns:subfield[@code='a']/text()",
+                "ns:datafield[@tag='400' and @ind1='0' and ns:subfield[@code='i']='Wirklicher Name']/ns:subfield[@code='b']/text()"
             ],
-            "formatter": personal_name_formatter
+            "formatter": personal_name_formatter,
+            "discriminator": "p"
         }
     ],
 
@@ -143,16 +170,18 @@ mapping = {
     'P50': [
         {
             "value_paths": [
-                "ns:datafield[@tag='100' and @ind1='1' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='u']/ns:subfield[@code='a']/text()"
+                "ns:datafield[@tag='100' and @ind1='1']/ns:subfield[@code='a']/text()"
             ],
-            "formatter": basic_name_formatter
+            "formatter": basic_name_formatter,
+            "discriminator": "u"
         },
         {
             "value_paths": [
-                "ns:datafield[@tag='100' and @ind1='0' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='u']/ns:subfield[@code='a']/text()",
-                "ns:datafield[@tag='100' and @ind1='0' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='u']/ns:subfield[@code='b']/text()"
+                "ns:datafield[@tag='100' and @ind1='0']/ns:subfield[@code='a']/text()",
+                "ns:datafield[@tag='100' and @ind1='0']/ns:subfield[@code='b']/text()"
             ],
-            "formatter": personal_name_formatter
+            "formatter": personal_name_formatter,
+            "discriminator": "u"
         }
     ],
 
@@ -160,10 +189,11 @@ mapping = {
     'P625': [
         {
             "value_paths": [
-                "ns:datafield[@tag='034' and ns:subfield[@code='9']='A:dgx' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='g']/ns:subfield[@code='f']/text()",
-                "ns:datafield[@tag='034' and ns:subfield[@code='9']='A:dgx' and //ns:datafield[@tag='079']/ns:subfield[@code='b']='g']/ns:subfield[@code='d']/text()"
+                "ns:datafield[@tag='034' and ns:subfield[@code='9']='A:dgx']/ns:subfield[@code='f']/text()",
+                "ns:datafield[@tag='034' and ns:subfield[@code='9']='A:dgx']/ns:subfield[@code='d']/text()"
             ],
-            "formatter": geo_coordinate_formatter
+            "formatter": geo_coordinate_formatter,
+            "discriminator": "g"
         }
     ]
 }
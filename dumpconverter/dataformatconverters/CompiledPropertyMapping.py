@@ -0,0 +1,264 @@
+"""Contains class for property mappings with precompiled XPath expressions."""
+import hashlib
+import inspect
+import re
+from lxml import etree
+
+from dumpconverter.dataformatconverters.FormatterCache import FormatterCache
+
+
+class CompiledPropertyMapping:
+    """
+    Property mapping, whose XPath expressions are compiled once at
+    construction, so that they do not have to be parsed again for every
+    single entity of a dump.
+    If a discriminator path is given, mappings are grouped by the value of
+    their "discriminator" key, so that only the mappings matching the type
+    of an entity have to be evaluated. Mappings without discriminator apply
+    to all entities.
+    """
+    # Matches "//" at the beginning of a location path, which selects
+    # descendants of the document root instead of the current entity
+    GLOBAL_DESCENDANTS_PATTERN = re.compile(
+        r"(^|[\[(|,=!<>]|\band\b|\bor\b)(\s*)//")
+    # Matches string literals, in which "//" is not a path
+    STRING_LITERAL_PATTERN = re.compile(r"('[^']*'|\"[^\"]*\")")
+    # Topmost ancestor, which is the entity itself once it is detached
+    # from the dump and the document root otherwise
+    ENTITY_ROOT_STEP = "ancestor-or-self::node()[last()]"
+
+    def __init__(self, property_mapping, namespaces=None,
+                 discriminator_path=None,
+                 formatter_cache_size=FormatterCache.MAX_SIZE):
+        """
+        Creates new CompiledPropertyMapping instance.
+        :param property_mapping: Property mapping from data source to Wikidata.
+        :param namespaces: XML namespace mapping.
+        :param discriminator_path: XPath to retrieve the type of an entity.
+        :param formatter_cache_size: Maximal number of results cached per
+                                     cacheable mapping. If 0, results are
+                                     not cached.
+        """
+        self.namespaces = namespaces or {}
+        self.formatter_cache_size = formatter_cache_size
+        self.xpaths = {}
+        self.formatter_caches = []
+        self.properties = []
+        if property_mapping:
+            for property_id, mappings in property_mapping.iteritems():
+                compiled_mappings = []
+                for mapping in mappings:
+                    compiled_mapping = self.compile_mapping(mapping)
+                    if "formatter_cache" in compiled_mapping:
+                        self.formatter_caches.append(
+                            (property_id, compiled_mapping["formatter_cache"]))
+                    compiled_mappings.append(compiled_mapping)
+                self.properties.append((property_id, compiled_mappings))
+
+        self.discriminator_path = discriminator_path
+        if discriminator_path:
+            self.discriminator_xpath = self.compile_xpath(discriminator_path)
+        else:
+            self.discriminator_xpath = None
+        self.groups = {}
+        self.default_group = self.build_group(())
+        self.fingerprint = self.get_fingerprint(property_mapping,
+                                                discriminator_path)
+
+    def compile_xpath(self, path):
+        """
+        Compiles given XPath expression. Identical expressions are compiled
+        only once and share the same XPath object.
+        :param path: XPath expression.
+        :return: Compiled XPath object.
+        """
+        xpath = self.xpaths.get(path)
+        if xpath is None:
+            xpath = etree.XPath(self.scope_to_entity(path),
+                                namespaces=self.namespaces)
+            self.xpaths[path] = xpath
+
+        return xpath
+
+    def scope_to_entity(self, path):
+        """
+        Rewrites document-global descendant paths (e.g. "//foo") of given
+        XPath expression, so that they are relative to the root of the
+        current entity. Evaluated on a detached entity, the result of the
+        expression does not depend on other parts of the dump, that are
+        still in memory.
+        :param path: XPath expression.
+        :return: XPath expression without document-global paths.
+        """
+        # Odd parts are string literals, which are kept as they are
+        parts = self.STRING_LITERAL_PATTERN.split(path)
+        for index in xrange(0, len(parts), 2):
+            parts[index] = self.GLOBAL_DESCENDANTS_PATTERN.sub(
+                lambda match: self.scope_match(match, index == 0), parts[index])
+
+        return "".join(parts)
+
+    def scope_match(self, match, is_start):
+        """
+        Prepends the root of the entity to a match of a document-global
+        descendant path.
+        :param match: Match of GLOBAL_DESCENDANTS_PATTERN.
+        :param is_start: Whether the matched part is at the start of the
+                         expression. Otherwise it follows a string literal
+                         and a match at its start is no location path.
+        :return: Replacement of the match.
+        """
+        if match.start() == 0 and not match.group(1) and not is_start:
+            return match.group(0)
+
+        return "{0}{1}{2}//".format(match.group(1), match.group(2),
+                                    self.ENTITY_ROOT_STEP)
+
+    def compile_mapping(self, mapping):
+        """
+        Compiles value paths of a single mapping entry, determines the
+        number of required arguments of its formatter and wraps the
+        formatter in a cache, if the entry is cacheable.
+        :param mapping: Mapping entry containing value paths and formatter.
+        :return: Copy of the mapping entry with compiled value paths.
+        """
+        compiled_mapping = dict(mapping)
+        compiled_mapping["value_paths"] = map(self.compile_xpath,
+                                              mapping["value_paths"])
+        if "formatter" in mapping:
+            compiled_mapping["formatter_arguments"] = \
+                self.get_required_arguments(mapping["formatter"])
+        if (mapping.get("cacheable") and "formatter" in mapping and
+                self.formatter_cache_size > 0):
+            formatter_cache = FormatterCache(mapping["formatter"],
+                                             self.formatter_cache_size)
+            compiled_mapping["formatter_cache"] = formatter_cache
+            compiled_mapping["formatter"] = formatter_cache.format
+
+        return compiled_mapping
+
+    @staticmethod
+    def get_fingerprint(property_mapping, discriminator_path=None):
+        """
+        Gets fingerprint of a property mapping, which changes, if value
+        paths, formatters or discriminators of the mapping change.
+        :param property_mapping: Property mapping from data source to Wikidata.
+        :param discriminator_path: XPath to retrieve the type of an entity.
+        :return: Fingerprint as string of 8 bytes.
+        """
+        description = [discriminator_path]
+        for property_id, mappings in sorted((property_mapping or {}).iteritems()):
+            for mapping in mappings:
+                formatter = mapping.get("formatter")
+                formatter_code = getattr(formatter, "func_code", None)
+                description.append((
+                    property_id,
+                    tuple(mapping["value_paths"]),
+                    mapping.get("discriminator"),
+                    getattr(formatter, "__name__", None),
+                    getattr(formatter_code, "co_code", None),
+                    getattr(formatter_code, "co_consts", None)
+                ))
+
+        return hashlib.sha1(repr(description)).digest()[:8]
+
+    @staticmethod
+    def get_required_arguments(formatter):
+        """
+        Gets number of arguments, that have to be passed to given formatter.
+        :param formatter: Formatter function.
+        :return: Number of arguments without default value.
+        """
+        try:
+            arguments, _, _, defaults = inspect.getargspec(formatter)
+        except TypeError:
+            return 0
+
+        required_arguments = len(arguments) - len(defaults or ())
+        if inspect.ismethod(formatter) and formatter.__self__ is not None:
+            required_arguments -= 1
+
+        return required_arguments
+
+    def build_group(self, discriminator_values):
+        """
+        Builds list of properties and mappings that apply to entities with
+        given discriminator values.
+        :param discriminator_values: Discriminator values of an entity.
+        :return: List of property ids and their applicable mappings.
+        """
+        group = []
+        for property_id, mappings in self.properties:
+            applicable_mappings = [
+                mapping for mapping in mappings
+                if mapping.get("discriminator") is None or
+                mapping["discriminator"] in discriminator_values
+            ]
+            if applicable_mappings:
+                group.append((property_id, applicable_mappings))
+
+        return group
+
+    def get_properties(self, entity_element):
+        """
+        Gets properties and mappings that apply to given entity. The
+        discriminator is evaluated only once per entity.
+        :param entity_element: Xml element of a single entity.
+        :return: List of property ids and their applicable mappings.
+        """
+        if self.discriminator_xpath is None:
+            return self.properties
+
+        return self.get_group(self.discriminator_xpath(entity_element))
+
+    def get_group(self, discriminator_values):
+        """
+        Gets properties and mappings that apply to entities with given
+        result of the discriminator path.
+        :param discriminator_values: Result of the discriminator path.
+        :return: List of property ids and their applicable mappings.
+        """
+        if isinstance(discriminator_values, basestring):
+            discriminator_values = (discriminator_values,)
+        elif not discriminator_values:
+            return self.default_group
+        key = frozenset(unicode(value) for value in discriminator_values)
+
+        group = self.groups.get(key)
+        if group is None:
+            group = self.build_group(key)
+            self.groups[key] = group
+
+        return group
+
+    def get_formatter_cache_counters(self):
+        """
+        Gets numbers of hits and misses of formatter caches per property.
+        :return: Dictionary of property ids and lists of hits and misses.
+        """
+        counters = {}
+        for property_id, formatter_cache in self.formatter_caches:
+            property_counters = counters.setdefault(property_id, [0, 0])
+            property_counters[0] += formatter_cache.hits
+            property_counters[1] += formatter_cache.misses
+
+        return counters
+
+    def pop_formatter_cache_counters(self):
+        """
+        Gets numbers of hits and misses of all formatter caches and resets
+        them.
+        :return: List of tuples of hits and misses in the order of caches.
+        """
+        return [formatter_cache.pop_counters()
+                for _, formatter_cache in self.formatter_caches]
+
+    def add_formatter_cache_counters(self, cache_counters):
+        """
+        Adds numbers of hits and misses, that were popped from a copy of
+        this mapping, to the formatter caches.
+        :param cache_counters: List of tuples of hits and misses.
+        """
+        for (_, formatter_cache), (hits, misses) in zip(self.formatter_caches,
+                                                        cache_counters):
+            formatter_cache.add_counters(hits, misses)
@@ -0,0 +1,94 @@
+"""Contains class for collecting timings of a conversion."""
+import json
+
+
+class ConversionProfile:
+    """
+    Accumulates wall time and number of calls of the stages of a
+    conversion, of properties and of single mapping entries. Timings are
+    grouped in categories and can be merged with those of worker processes.
+    """
+    CATEGORIES = ("stages", "properties", "mappings")
+
+    def __init__(self):
+        """
+        Creates new ConversionProfile instance.
+        """
+        self.timings = dict((category, {}) for category in self.CATEGORIES)
+
+    def add(self, category, key, seconds, calls=1):
+        """
+        Adds time spent in a stage, property or mapping entry.
+        :param category: Category of the key, e.g. stages.
+        :param key: Name of the stage, property id or key of mapping entry.
+        :param seconds: Spent wall time in seconds.
+        :param calls: Number of calls, that took the given time.
+        """
+        timing = self.timings[category].get(key)
+        if timing is None:
+            self.timings[category][key] = [seconds, calls]
+        else:
+            timing[0] += seconds
+            timing[1] += calls
+
+    def pop_timings(self):
+        """
+        Gets timings and resets them.
+        :return: Dictionary of categories and their timings.
+        """
+        timings = self.timings
+        self.timings = dict((category, {}) for category in self.CATEGORIES)
+
+        return timings
+
+    def add_timings(self, timings):
+        """
+        Adds timings, that were popped from another profile, e.g. of a
+        worker process.
+        :param timings: Dictionary of categories and their timings.
+        """
+        for category, category_timings in timings.iteritems():
+            for key, (seconds, calls) in category_timings.iteritems():
+                self.add(category, key, seconds, calls)
+
+    def get_total_seconds(self):
+        """
+        Gets wall time of the whole conversion.
+        :return: Seconds or None, if the total was not measured.
+        """
+        total = self.timings["stages"].get("total")
+        if total is not None:
+            return total[0]
+
+    def print_report(self, limit=20):
+        """
+        Prints timings of each category sorted by the spent time.
+        :param limit: Number of entries printed at most per category.
+        """
+        total_seconds = self.get_total_seconds()
+        for category in self.CATEGORIES:
+            category_timings = sorted(self.timings[category].iteritems(),
+                                      key=lambda (key, timing): -timing[0])
+            if not category_timings:
+                continue
+
+            print "Profile of {0}:".format(category)
+            for key, (seconds, calls) in category_timings[:limit]:
+                line = "  {0:<24} {1:>10.3f} s {2:>10} calls".format(key, seconds, calls)
+                if total_seconds:
+                    line += " {0:>6.1f}%".format(100 * seconds / total_seconds)
+                print line
+
+    def write_json(self, path):
+        """
+        Writes timings as JSON.
+        :param path: Path of the JSON file.
+        """
+        report = {}
+        for category, category_timings in self.timings.iteritems():
+            report[category] = dict(
+                (key, {"seconds": seconds, "calls": calls})
+                for key, (seconds, calls) in category_timings.iteritems())
+
+        with open(path, "wb") as json_file:
+            json.dump(report, json_file, indent=2, sort_keys=True)
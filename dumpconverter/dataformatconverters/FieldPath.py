@@ -0,0 +1,157 @@
+"""Contains class for simple value paths, that are evaluated without element tree."""
+
+
+class FieldPath(object):
+    """
+    Value path of the form "field[condition]/child[condition]/text()",
+    which selects text of a field of an entity or of one of its children,
+    e.g. a subfield of a MARC datafield. It is evaluated on elements
+    collected by the streaming engine instead of an element tree.
+    Compiled by FieldPathParser out of XPath expressions.
+    """
+    def __init__(self, path, field_tag, field_condition=None, value_tag=None,
+                 value_condition=None, selects_text=True, prefix=None):
+        """
+        Creates new FieldPath instance.
+        :param path: XPath expression, the field path was compiled from.
+        :param field_tag: Tag of the field in Clark notation.
+        :param field_condition: Condition of the field as syntax tree.
+        :param value_tag: Tag of the children of the field, whose values
+                          are selected. If None, values of the field are
+                          selected.
+        :param value_condition: Condition of the children as syntax tree.
+        :param selects_text: If set to True, text nodes of the selected
+                             elements are selected instead of their string
+                             values.
+        :param prefix: If set, the path is wrapped in substring-after with
+                       given prefix and the result is a single string.
+        """
+        self.path = path
+        self.field_tag = field_tag
+        self.field_condition = field_condition
+        self.value_tag = value_tag
+        self.value_condition = value_condition
+        self.selects_text = selects_text
+        self.prefix = prefix
+        self.field_predicate = self.compile_condition(field_condition)
+        self.value_predicate = self.compile_condition(value_condition)
+
+    def __repr__(self):
+        return "FieldPath({0!r})".format(self.path)
+
+    def get_key(self):
+        """
+        Gets an attribute, whose value every matching field must have, so
+        that fields can be looked up by it.
+        :return: Tuple of attribute name and value or None.
+        """
+        condition = self.field_condition
+        if condition is not None and condition[0] == "and":
+            conditions = condition[1]
+        else:
+            conditions = [condition]
+        for condition in conditions:
+            if condition is not None and condition[0] == "attribute":
+                return condition[1], condition[2]
+
+        return None
+
+    @classmethod
+    def compile_condition(cls, condition):
+        """
+        Compiles syntax tree of a condition into a function.
+        :param condition: Tuple of type and arguments of the condition or
+                          None.
+        :return: Function checking a StreamedElement or None.
+        """
+        if condition is None:
+            return None
+
+        condition_type = condition[0]
+        if condition_type == "attribute":
+            _, name, value = condition
+            return lambda element: element.attrib.get(name) == value
+        elif condition_type == "starts-with":
+            value = condition[1]
+            return lambda element: (element.texts[0] if element.texts
+                                    else u"").startswith(value)
+        elif condition_type == "child":
+            _, tag, child_condition, value = condition
+            child_predicate = cls.compile_condition(child_condition)
+            def check_children(element):
+                for child in element.children:
+                    if (child.tag == tag and
+                            (child_predicate is None or child_predicate(child)) and
+                            child.get_string() == value):
+                        return True
+                return False
+            return check_children
+        elif condition_type == "and":
+            # Attributes are compared in a single loop, as most conditions
+            # of fields consist of them
+            attributes = []
+            predicates = []
+            for operand in condition[1]:
+                if operand[0] == "attribute":
+                    attributes.append(operand[1:])
+                else:
+                    predicates.append(cls.compile_condition(operand))
+            def check_all(element):
+                attrib = element.attrib
+                for name, value in attributes:
+                    if attrib.get(name) != value:
+                        return False
+                for predicate in predicates:
+                    if not predicate(element):
+                        return False
+                return True
+            return check_all
+        elif condition_type == "or":
+            predicates = map(cls.compile_condition, condition[1])
+            def check_any(element):
+                for predicate in predicates:
+                    if predicate(element):
+                        return True
+                return False
+            return check_any
+
+        raise ValueError("Unknown condition {0}".format(condition_type))
+
+    def select(self, field, values):
+        """
+        Adds values selected from a field to given list, if the field
+        matches this path. The tag of the field has to be checked before.
+        :param field: StreamedElement of the field.
+        :param values: List of values selected so far.
+        """
+        if self.field_predicate is not None and not self.field_predicate(field):
+            return
+
+        if self.value_tag is None:
+            elements = (field,)
+        else:
+            elements = [child for child in field.children
+                        if child.tag == self.value_tag and
+                        (self.value_predicate is None or self.value_predicate(child))]
+
+        for element in elements:
+            if self.selects_text:
+                values.extend(element.texts)
+            else:
+                values.append(element.get_string())
+
+    def get_result(self, values):
+        """
+        Gets result of this path like XPath would return it.
+        :param values: Values selected from all fields of an entity.
+        :return: List of values or a single string, if the path is wrapped
+                 in substring-after.
+        """
+        if self.prefix is None:
+            return values
+
+        value = values[0] if values else ""
+        if not self.prefix:
+            return value
+
+        return value.partition(self.prefix)[2]
@@ -0,0 +1,265 @@
+"""Contains parser compiling simple XPath expressions into field paths."""
+import re
+
+from dumpconverter.dataformatconverters.FieldPath import FieldPath
+
+
+class FieldPathParser:
+    """
+    Parses the subset of XPath, that FieldPath can evaluate:
+
+        field[condition]/child[condition]/text()
+        substring-after(field[condition]/child[condition], 'prefix')
+
+    Conditions are attribute comparisons (@tag='100'), comparisons of the
+    string value of children of a field (subfield[@code='i']='Beruf'),
+    starts-with(text(), 'prefix') and any combination of them with "and",
+    "or" and parentheses. Everything else, e.g. positions, other axes and
+    functions, raises a ValueError.
+    """
+    TOKEN_PATTERN = re.compile(r"""\s*(?:
+        (?P<literal>'[^']*'|"[^"]*")|
+        (?P<name>[A-Za-z_][\w.-]*(?::[A-Za-z_][\w.-]*)?)|
+        (?P<symbol>\(\)|[/\[\]()=,@.])
+    )""", re.VERBOSE)
+
+    def __init__(self, namespaces=None):
+        """
+        Creates new FieldPathParser instance.
+        :param namespaces: XML namespace mapping.
+        """
+        self.namespaces = namespaces or {}
+        self.tokens = []
+        self.position = 0
+
+    def compile(self, path):
+        """
+        Compiles given XPath expression into a field path.
+        :param path: XPath expression.
+        :return: FieldPath instance or None, if the expression is not
+                 supported.
+        """
+        try:
+            return self.parse(path)
+        except ValueError:
+            return None
+
+    def parse(self, path):
+        """
+        Parses given XPath expression.
+        :param path: XPath expression.
+        :return: FieldPath instance.
+        """
+        self.tokens = self.tokenize(path)
+        self.position = 0
+
+        prefix = None
+        if self.peek() == ("name", "substring-after"):
+            self.position += 1
+            self.expect("symbol", "(")
+            location = self.parse_location()
+            self.expect("symbol", ",")
+            prefix = self.expect("literal")
+            self.expect("symbol", ")")
+        else:
+            location = self.parse_location()
+            if not location["selects_text"]:
+                raise ValueError("Path does not select text")
+        if self.peek() is not None:
+            raise ValueError("Unexpected {0}".format(self.peek()[1]))
+
+        return FieldPath(path, prefix=prefix, **location)
+
+    def tokenize(self, path):
+        """
+        Splits XPath expression into tokens.
+        :param path: XPath expression.
+        :return: List of tuples of token type and value.
+        """
+        tokens = []
+        position = 0
+        path = path.rstrip()
+        while position < len(path):
+            match = self.TOKEN_PATTERN.match(path, position)
+            if match is None:
+                raise ValueError("Unsupported syntax at {0}".format(path[position:]))
+            token_type = match.lastgroup
+            value = match.group(token_type)
+            if token_type == "literal":
+                value = value[1:-1]
+                if isinstance(value, str):
+                    value = value.decode("utf-8")
+            tokens.append((token_type, value))
+            position = match.end()
+
+        return tokens
+
+    def peek(self, offset=0):
+        """
+        Gets a token without consuming it.
+        :param offset: Offset of the token from the current one.
+        :return: Tuple of token type and value or None at the end.
+        """
+        if self.position + offset < len(self.tokens):
+            return self.tokens[self.position + offset]
+
+    def accept(self, token_type, value=None):
+        """
+        Consumes current token, if it has given type and value.
+        :param token_type: Expected type of the token.
+        :param value: Expected value of the token or None for any value.
+        :return: Value of the consumed token or None.
+        """
+        token = self.peek()
+        if token is None or token[0] != token_type:
+            return None
+        if value is not None and token[1] != value:
+            return None
+        self.position += 1
+
+        return token[1]
+
+    def expect(self, token_type, value=None):
+        """
+        Consumes current token, which must have given type and value.
+        :param token_type: Expected type of the token.
+        :param value: Expected value of the token or None for any value.
+        :return: Value of the consumed token.
+        """
+        token_value = self.accept(token_type, value)
+        if token_value is None:
+            raise ValueError("Expected {0}".format(value or token_type))
+
+        return token_value
+
+    def accept_text(self):
+        """
+        Consumes text() node test, if it is the current token.
+        :return: True, if text() was consumed.
+        """
+        if self.peek() == ("name", "text") and self.peek(1) == ("symbol", "()"):
+            self.position += 2
+            return True
+
+        return False
+
+    def parse_location(self):
+        """
+        Parses location path consisting of a field, an optional child and
+        an optional text() node test.
+        :return: Dictionary of arguments of FieldPath.
+        """
+        field_tag, field_condition = self.parse_step(allow_children=True)
+        location = {
+            "field_tag": field_tag,
+            "field_condition": field_condition,
+            "selects_text": False
+        }
+        if self.accept("symbol", "/"):
+            if self.accept_text():
+                location["selects_text"] = True
+            else:
+                value_tag, value_condition = self.parse_step(allow_children=False)
+                location["value_tag"] = value_tag
+                location["value_condition"] = value_condition
+                if self.accept("symbol", "/"):
+                    if not self.accept_text():
+                        raise ValueError("Path is deeper than a field and its children")
+                    location["selects_text"] = True
+
+        return location
+
+    def parse_step(self, allow_children):
+        """
+        Parses a step of a location path with an optional condition.
+        :param allow_children: If set to True, the condition may compare
+                               children of the element.
+        :return: Tuple of tag in Clark notation and condition.
+        """
+        tag = self.parse_tag()
+        condition = None
+        if self.accept("symbol", "["):
+            condition = self.parse_or(allow_children)
+            self.expect("symbol", "]")
+
+        return tag, condition
+
+    def parse_tag(self):
+        """
+        Parses name of an element and resolves its namespace prefix.
+        :return: Tag in Clark notation.
+        """
+        name = self.expect("name")
+        if self.peek() == ("symbol", "()"):
+            raise ValueError("Unsupported node test {0}()".format(name))
+        prefix, _, local_name = name.rpartition(":")
+        if not prefix:
+            return local_name
+        if prefix not in self.namespaces:
+            raise ValueError("Unknown namespace prefix {0}".format(prefix))
+
+        return "{{{0}}}{1}".format(self.namespaces[prefix], local_name)
+
+    def parse_or(self, allow_children):
+        """
+        Parses conditions combined by "or".
+        :param allow_children: If set to True, conditions may compare
+                               children of the element.
+        :return: Syntax tree of the condition.
+        """
+        conditions = [self.parse_and(allow_children)]
+        while self.accept("name", "or"):
+            conditions.append(self.parse_and(allow_children))
+
+        return conditions[0] if len(conditions) == 1 else ("or", conditions)
+
+    def parse_and(self, allow_children):
+        """
+        Parses conditions combined by "and".
+        :param allow_children: If set to True, conditions may compare
+                               children of the element.
+        :return: Syntax tree of the condition.
+        """
+        conditions = [self.parse_condition(allow_children)]
+        while self.accept("name", "and"):
+            conditions.append(self.parse_condition(allow_children))
+
+        return conditions[0] if len(conditions) == 1 else ("and", conditions)
+
+    def parse_condition(self, allow_children):
+        """
+        Parses a single condition or a parenthesized combination of them.
+        :param allow_children: If set to True, the condition may compare
+                               children of the element.
+        :return: Syntax tree of the condition.
+        """
+        if self.accept("symbol", "("):
+            condition = self.parse_or(allow_children)
+            self.expect("symbol", ")")
+            return condition
+
+        if self.accept("symbol", "@"):
+            name = self.expect("name")
+            if ":" in name:
+                raise ValueError("Unsupported namespaced attribute {0}".format(name))
+            self.expect("symbol", "=")
+            return "attribute", name, self.expect("literal")
+
+        if self.peek() == ("name", "starts-with"):
+            self.position += 1
+            self.expect("symbol", "(")
+            if self.accept("symbol", "."):
+                self.expect("symbol", "/")
+            if not self.accept_text():
+                raise ValueError("Expected text()")
+            self.expect("symbol", ",")
+            value = self.expect("literal")
+            self.expect("symbol", ")")
+            return "starts-with", value
+
+        if not allow_children:
+            raise ValueError("Unsupported condition on children of a child")
+        tag, child_condition = self.parse_step(allow_children=False)
+        self.expect("symbol", "=")
+
+        return "child", tag, child_condition, self.expect("literal")
@@ -0,0 +1,91 @@
+"""Contains class for memoizing results of formatters."""
+
+
+class FormatterCache:
+    """
+    Wrapper around a formatter, that memoizes its results, so that
+    repeated values (e.g. gender codes, places or dates) are formatted only
+    once. Must only be used for pure formatters, whose result depends on
+    their arguments alone.
+
+    The cache is bounded and evicts least recently used results in
+    generations: results are stored in the current generation, and once it
+    is full, it replaces the previous one. Results found in the previous
+    generation are moved to the current one. That way a lookup costs a
+    single dictionary access in most cases. The bound method format is
+    used in place of the formatter.
+    """
+    # Maximal number of cached results
+    MAX_SIZE = 10000
+
+    def __init__(self, formatter, max_size=MAX_SIZE):
+        """
+        Creates new FormatterCache instance.
+        :param formatter: Pure formatter function.
+        :param max_size: Maximal number of cached results.
+        """
+        self.formatter = formatter
+        self.generation_size = max(max_size // 2, 1)
+        self.current_generation = {}
+        self.previous_generation = {}
+        self.hits = 0
+        self.misses = 0
+
+    def format(self, *values):
+        """
+        Gets result of the formatter for given values.
+        :param values: Arguments of the formatter.
+        :return: Result of formatter execution.
+        """
+        try:
+            result = self.current_generation[values]
+        except KeyError:
+            return self.format_uncached(values)
+
+        self.hits += 1
+        return result
+
+    def format_uncached(self, values):
+        """
+        Gets result for given values, that are not in the current
+        generation, from the previous generation or the formatter.
+        :param values: Tuple of arguments of the formatter.
+        :return: Result of formatter execution.
+        """
+        if values in self.previous_generation:
+            result = self.previous_generation.pop(values)
+            self.hits += 1
+        else:
+            result = self.formatter(*values)
+            self.misses += 1
+
+        if len(self.current_generation) >= self.generation_size:
+            self.previous_generation = self.current_generation
+            self.current_generation = {}
+        self.current_generation[values] = result
+
+        return result
+
+    def __len__(self):
+        return len(self.current_generation) + len(self.previous_generation)
+
+    def pop_counters(self):
+        """
+        Gets numbers of hits and misses and resets them.
+        :return: Tuple of hits and misses.
+        """
+        counters = self.hits, self.misses
+        self.hits = 0
+        self.misses = 0
+
+        return counters
+
+    def add_counters(self, hits, misses):
+        """
+        Adds numbers of hits and misses, e.g. of a copy of this cache in
+        another process.
+        :param hits: Number of hits.
+        :param misses: Number of misses.
+        """
+        self.hits += hits
+        self.misses += misses
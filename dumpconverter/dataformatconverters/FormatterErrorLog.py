@@ -0,0 +1,78 @@
+"""Contains class for collecting errors of formatters."""
+from dumpconverter.exceptions.FormatterError import FormatterError
+
+
+class FormatterErrorLog:
+    """
+    Counts errors raised by formatters per property and keeps a sample of
+    them, which is printed at the end of a run. In strict mode, the first
+    error aborts the conversion.
+    """
+    # Maximal number of errors kept per property
+    SAMPLE_SIZE = 5
+
+    def __init__(self, strict=False, sample_size=SAMPLE_SIZE):
+        """
+        Creates new FormatterErrorLog instance.
+        :param strict: If set to True, a FormatterError is raised for the
+                       first error.
+        :param sample_size: Maximal number of errors kept per property.
+        """
+        self.strict = strict
+        self.sample_size = sample_size
+        self.counts = {}
+        self.samples = {}
+
+    def add_error(self, property_id, entity_id, values, exception):
+        """
+        Adds error of a formatter.
+        :param property_id: Id of the property, whose formatter failed.
+        :param entity_id: Id of the entity, whose values were formatted.
+        :param values: Arguments of the formatter.
+        :param exception: Exception raised by the formatter.
+        """
+        message = "{0}: {1}".format(type(exception).__name__, exception)
+        if self.strict:
+            raise FormatterError(
+                "Formatter of {0} failed for entity {1} with values {2}: {3}".format(
+                    property_id, entity_id, values, message),
+                property_id, entity_id)
+
+        self.counts[property_id] = self.counts.get(property_id, 0) + 1
+        samples = self.samples.setdefault(property_id, [])
+        if len(samples) < self.sample_size:
+            samples.append((entity_id, tuple(values), message))
+
+    def pop_errors(self):
+        """
+        Gets counts and samples of errors and resets them.
+        :return: Tuple of dictionaries of counts and samples per property.
+        """
+        errors = self.counts, self.samples
+        self.counts = {}
+        self.samples = {}
+
+        return errors
+
+    def add_errors(self, counts, samples):
+        """
+        Adds errors, that were popped from another error log, e.g. of a
+        worker process.
+        :param counts: Dictionary of numbers of errors per property.
+        :param samples: Dictionary of sampled errors per property.
+        """
+        for property_id, count in counts.iteritems():
+            self.counts[property_id] = self.counts.get(property_id, 0) + count
+        for property_id, property_samples in samples.iteritems():
+            own_samples = self.samples.setdefault(property_id, [])
+            free_slots = max(self.sample_size - len(own_samples), 0)
+            own_samples += property_samples[:free_slots]
+
+    def print_errors(self):
+        """
+        Prints number of errors and sampled errors per property.
+        """
+        for property_id, count in sorted(self.counts.iteritems()):
+            print "Formatter of {0} failed {1} times, e.g.:".format(property_id, count)
+            for entity_id, values, message in self.samples.get(property_id, []):
+                print "  {0} {1}: {2}".format(entity_id, list(values), message)
@@ -0,0 +1,388 @@
+"""Contains linter finding dead and expensive paths of property mappings."""
+import re
+from timeit import default_timer
+
+from lxml import etree
+
+from dumpconverter.dataformatconverters.CompiledPropertyMapping import CompiledPropertyMapping
+
+
+class MappingLinter:
+    """
+    Checks the property mapping of an XmlDumpConverter for value paths,
+    that can never match or are needlessly expensive, so that they are
+    found before a conversion of several hours.
+
+    Static checks look at the paths alone: Element names without
+    namespace prefix never match in dumps with namespaces, document-global
+    "//" paths scan all descendants of a record, identical paths and
+    mapping entries are reported and discriminators, that no record type
+    of the dumps has, make mappings unreachable. Afterwards the paths can
+    be evaluated on sample records to measure how often they match and
+    how long they take.
+    """
+    ERROR = "error"
+    WARNING = "warning"
+    INFO = "info"
+    SEVERITIES = (ERROR, WARNING, INFO)
+
+    # Labels of paths, that do not belong to a property
+    ENTITY_ID = "entity id"
+    DISCRIMINATOR = "discriminator"
+
+    TOKEN_PATTERN = re.compile(r"""\s*(?:
+        (?P<literal>'[^']*'|"[^"]*")|
+        (?P<number>\d+(?:\.\d*)?|\.\d+)|
+        (?P<name>[A-Za-z_][\w.-]*(?::[A-Za-z_][\w.-]*|:\*)?)|
+        (?P<symbol>::|//|!=|<=|>=|\.\.|\S)
+    )""", re.VERBOSE)
+    # Names, that are operators instead of element names, if they follow
+    # an operand
+    OPERATOR_NAMES = ("and", "or", "div", "mod")
+    # Tokens after which an operator name is an operand
+    OPERAND_ENDS = ("literal", "number", "name", ")", "]", ".", "..", "*")
+    # Axes, whose node tests are names of attributes or namespaces
+    NON_ELEMENT_AXES = ("attribute", "namespace")
+
+    def __init__(self, xml_converter, record_types=None):
+        """
+        Creates new MappingLinter instance.
+        :param xml_converter: XmlDumpConverter, whose mapping is checked.
+        :param record_types: Values of the discriminator path, that records
+                             of the dumps can have. If None, discriminators
+                             are not checked statically.
+        """
+        self.xml_converter = xml_converter
+        self.compiled_mapping = xml_converter.compiled_mapping
+        self.property_mapping = xml_converter.property_mapping or {}
+        self.namespaces = xml_converter.namespaces
+        self.record_types = record_types
+        # Raw paths of the compiled XPath objects
+        self.raw_paths = dict((xpath, path) for path, xpath
+                              in self.compiled_mapping.xpaths.iteritems())
+        self.sample_records = 0
+        self.sample_record_types = {}
+        # Numbers of records, matches and seconds of evaluation per path
+        self.path_statistics = {}
+
+    def get_labeled_paths(self):
+        """
+        Gets all paths of the mapping together with the property or
+        purpose they are used for.
+        :return: List of tuples of label and raw path.
+        """
+        labeled_paths = []
+        if self.xml_converter.entity_id_path:
+            labeled_paths.append((self.ENTITY_ID, self.xml_converter.entity_id_path))
+        if self.compiled_mapping.discriminator_path:
+            labeled_paths.append((self.DISCRIMINATOR,
+                                  self.compiled_mapping.discriminator_path))
+        for property_id, mappings in sorted(self.property_mapping.iteritems()):
+            for mapping in mappings:
+                for path in mapping["value_paths"]:
+                    labeled_paths.append((property_id, path))
+
+        return labeled_paths
+
+    def get_labels_by_path(self):
+        """
+        Gets the properties or purposes, each distinct path is used for.
+        :return: Dictionary of raw paths and lists of labels.
+        """
+        labels_by_path = {}
+        for label, path in self.get_labeled_paths():
+            labels = labels_by_path.setdefault(path, [])
+            if label not in labels:
+                labels.append(label)
+
+        return labels_by_path
+
+    def check(self):
+        """
+        Checks paths, mapping entries and discriminators of the mapping
+        without evaluating them.
+        :return: List of issues as tuples of severity, label, path and
+                 message.
+        """
+        issues = []
+        for path, labels in sorted(self.get_labels_by_path().iteritems()):
+            label = ", ".join(labels)
+            issues += [(severity, label, path, message) for severity, message
+                       in self.check_path(path)]
+            if len(labels) > 1:
+                issues.append((self.INFO, label, path, "Shared by several "
+                               "properties and evaluated once per record"))
+
+        for property_id, mappings in sorted(self.property_mapping.iteritems()):
+            issues += [(severity, property_id, path, message) for severity, path, message
+                       in self.check_mappings(mappings)]
+
+        return sorted(issues, key=self.get_issue_order)
+
+    def check_path(self, path):
+        """
+        Checks a single path.
+        :param path: XPath expression.
+        :return: List of tuples of severity and message.
+        """
+        try:
+            etree.XPath(path, namespaces=self.namespaces)
+        except etree.XPathError as e:
+            return [(self.ERROR, "Invalid XPath: {0}".format(e))]
+
+        unknown_prefixes = self.get_unknown_prefixes(path)
+        if unknown_prefixes:
+            return [(self.ERROR, "Unknown namespace prefix: {0}".format(
+                ", ".join(unknown_prefixes)))]
+
+        issues = []
+        if self.namespaces:
+            unnamespaced_names = self.get_unnamespaced_names(path)
+            if unnamespaced_names:
+                issues.append((self.ERROR, "Element names without namespace "
+                               "prefix never match: {0}".format(
+                                   ", ".join(unnamespaced_names))))
+        if CompiledPropertyMapping.GLOBAL_DESCENDANTS_PATTERN.search(path):
+            issues.append((self.WARNING, "Document-global // scans all "
+                           "descendants of a record"))
+
+        return issues
+
+    def check_mappings(self, mappings):
+        """
+        Checks the mapping entries of a single property.
+        :param mappings: List of mapping entries.
+        :return: List of tuples of severity, path and message.
+        """
+        issues = []
+        entries = []
+        for mapping in mappings:
+            value_paths = mapping["value_paths"]
+            path = " | ".join(value_paths)
+            entry = (tuple(value_paths), mapping.get("formatter"),
+                     mapping.get("discriminator"))
+            if entry in entries:
+                issues.append((self.WARNING, path, "Duplicate mapping entry"))
+            entries.append(entry)
+
+            for value_path in set(value_paths):
+                if value_paths.count(value_path) > 1:
+                    issues.append((self.WARNING, value_path,
+                                   "Path is used several times by the same mapping entry"))
+
+            discriminator = mapping.get("discriminator")
+            if discriminator is None:
+                continue
+            if not self.compiled_mapping.discriminator_path:
+                issues.append((self.WARNING, path, "Discriminator '{0}' is ignored "
+                               "without discriminator path".format(discriminator)))
+            elif (self.record_types is not None and
+                    discriminator not in self.record_types):
+                issues.append((self.ERROR, path, "Unreachable: no records of "
+                               "type '{0}' in the dumps".format(discriminator)))
+
+        return issues
+
+    def tokenize(self, path):
+        """
+        Splits XPath expression into tokens. Symbols are their own type.
+        :param path: XPath expression.
+        :return: List of tuples of token type and value.
+        """
+        tokens = []
+        position = 0
+        path = path.rstrip()
+        while position < len(path):
+            match = self.TOKEN_PATTERN.match(path, position)
+            token_type = match.lastgroup
+            if token_type == "symbol":
+                tokens.append((match.group(token_type), None))
+            else:
+                tokens.append((token_type, match.group(token_type)))
+            position = match.end()
+
+        return tokens
+
+    def get_element_names(self, path):
+        """
+        Gets names of elements, that are selected by a path, as they are
+        written in the path.
+        :param path: XPath expression.
+        :return: List of element names.
+        """
+        tokens = self.tokenize(path)
+        names = []
+        for index, (token_type, value) in enumerate(tokens):
+            if token_type != "name":
+                continue
+            previous = tokens[index - 1] if index > 0 else (None, None)
+            following = tokens[index + 1] if index + 1 < len(tokens) else (None, None)
+            if value in self.OPERATOR_NAMES and previous[0] in self.OPERAND_ENDS:
+                continue
+            if previous[0] in ("@", "$") or following[0] in ("(", "::"):
+                continue
+            if (previous[0] == "::" and index > 1 and
+                    tokens[index - 2][1] in self.NON_ELEMENT_AXES):
+                continue
+            if value not in names:
+                names.append(value)
+
+        return names
+
+    def get_unnamespaced_names(self, path):
+        """
+        Gets names of elements, that are selected by a path without
+        namespace prefix.
+        :param path: XPath expression.
+        :return: List of element names.
+        """
+        return [name for name in self.get_element_names(path) if ":" not in name]
+
+    def get_unknown_prefixes(self, path):
+        """
+        Gets namespace prefixes of element names of a path, that are not
+        defined. XPath fails on them only when it is evaluated.
+        :param path: XPath expression.
+        :return: List of namespace prefixes.
+        """
+        prefixes = []
+        for name in self.get_element_names(path):
+            prefix = name.partition(":")[0] if ":" in name else None
+            if (prefix is not None and prefix not in self.namespaces and
+                    prefix not in prefixes):
+                prefixes.append(prefix)
+
+        return prefixes
+
+    def evaluate_sample(self, dump_file, max_records):
+        """
+        Evaluates all paths, that apply to a record, on the first records
+        of a dump and accumulates how often they match and how long they
+        take. Can be called for several dumps.
+        :param dump_file: File object of the dump.
+        :param max_records: Maximal number of records evaluated.
+        """
+        xml_converter = self.xml_converter
+        compiled_mapping = self.compiled_mapping
+        records = 0
+        for entity_element in xml_converter.iterate_entities(dump_file):
+            if records >= max_records:
+                break
+            xml_converter.detach_entity(entity_element)
+
+            xpaths = []
+            if xml_converter.entity_id_xpath is not None:
+                xpaths.append(xml_converter.entity_id_xpath)
+            if compiled_mapping.discriminator_xpath is None:
+                properties = compiled_mapping.properties
+            else:
+                xpaths.append(compiled_mapping.discriminator_xpath)
+                record_types = compiled_mapping.discriminator_xpath(entity_element)
+                if isinstance(record_types, basestring):
+                    record_types = [record_types]
+                for record_type in set(record_types):
+                    self.sample_record_types[record_type] = \
+                        self.sample_record_types.get(record_type, 0) + 1
+                properties = compiled_mapping.get_group(record_types)
+            for _, mappings in properties:
+                for mapping in mappings:
+                    xpaths += mapping["value_paths"]
+
+            evaluated_xpaths = set()
+            for xpath in xpaths:
+                if xpath in evaluated_xpaths:
+                    continue
+                evaluated_xpaths.add(xpath)
+                start = default_timer()
+                result = xpath(entity_element)
+                seconds = default_timer() - start
+                statistics = self.path_statistics.setdefault(
+                    self.raw_paths[xpath], [0, 0, 0.0])
+                statistics[0] += 1
+                if result:
+                    statistics[1] += 1
+                statistics[2] += seconds
+
+            xml_converter.clean_up_references(entity_element)
+            records += 1
+
+        self.sample_records += records
+
+    def check_sample(self):
+        """
+        Checks the results of the evaluation of sample records.
+        :return: List of issues as tuples of severity, label, path and
+                 message.
+        """
+        if not self.sample_records:
+            return []
+
+        issues = []
+        for path, labels in sorted(self.get_labels_by_path().iteritems()):
+            records, matches, _ = self.path_statistics.get(path, (0, 0, 0.0))
+            if records and not matches:
+                issues.append((self.WARNING, ", ".join(labels), path,
+                               "Never matched in {0} sample records".format(records)))
+
+        for property_id, mappings in sorted(self.property_mapping.iteritems()):
+            for mapping in mappings:
+                discriminator = mapping.get("discriminator")
+                if (discriminator is not None and
+                        self.compiled_mapping.discriminator_path and
+                        discriminator not in self.sample_record_types):
+                    issues.append((self.INFO, property_id,
+                                   " | ".join(mapping["value_paths"]),
+                                   "No sample records of type '{0}'".format(discriminator)))
+
+        return sorted(issues, key=self.get_issue_order)
+
+    def get_sample_statistics(self):
+        """
+        Gets match rate and average evaluation time of all evaluated paths
+        sorted by the total time spent on them.
+        :return: List of tuples of labels, path, number of records,
+                 number of matches and average seconds per record.
+        """
+        labels_by_path = self.get_labels_by_path()
+        rows = []
+        for path, (records, matches, seconds) in sorted(
+                self.path_statistics.iteritems(),
+                key=lambda (path, statistics): -statistics[2]):
+            rows.append((", ".join(labels_by_path[path]), path, records, matches,
+                         seconds / records))
+
+        return rows
+
+    def get_issue_order(self, issue):
+        """
+        Gets key to sort issues by severity, label and path.
+        :param issue: Tuple of severity, label, path and message.
+        :return: Sort key.
+        """
+        severity, label, path, message = issue
+        return self.SEVERITIES.index(severity), label, path, message
+
+    def print_report(self, issues):
+        """
+        Prints issues and, if records were sampled, match rate and average
+        evaluation time of each path.
+        :param issues: List of issues as tuples of severity, label, path
+                       and message.
+        """
+        if issues:
+            print "Issues:"
+            for severity, label, path, message in issues:
+                print "  {0:<8} {1:<16} {2}".format(severity, label, message)
+                print "           {0}".format(path)
+        else:
+            print "No issues found."
+
+        if self.sample_records:
+            print "Paths evaluated on {0} sample records:".format(self.sample_records)
+            print "  {0:<16} {1:>8} {2:>8} {3:>7} {4:>9}".format(
+                "Property", "Records", "Matches", "Rate", "Avg time")
+            for label, path, records, matches, seconds in self.get_sample_statistics():
+                print "  {0:<16} {1:>8} {2:>8} {3:>6.1f}% {4:>7.1f} us".format(
+                    label, records, matches, 100.0 * matches / records,
+                    1e6 * seconds)
+                print "    {0}".format(path)
@@ -0,0 +1,125 @@
+"""Contains xml dump converter, that measures where time is spent."""
+from timeit import default_timer
+
+from dumpconverter.dataformatconverters.ConversionProfile import ConversionProfile
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+
+
+class ProfilingXmlDumpConverter(XmlDumpConverter):
+    """
+    XmlDumpConverter, that accumulates wall time and calls per property,
+    per mapping entry and per stage (parsing, clean up of references, id
+    extraction, formatting and writing) in a ConversionProfile.
+
+    Profiling is implemented by overriding the methods of the converter,
+    so that conversions without profiling do not pay for it. Writing is
+    the time the consumer of process_dump spends between two results.
+    With worker processes, timings of properties and mappings are summed
+    up over all workers and can exceed the total wall time. The stream
+    engine parses while it applies the mapping, so that its profile has
+    timings of properties, mappings and formatting, but parsing and id
+    extraction are only part of the total.
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        Creates new ProfilingXmlDumpConverter instance. Takes the same
+        arguments as XmlDumpConverter.
+        """
+        XmlDumpConverter.__init__(self, *args, **kwargs)
+        self.profile = ConversionProfile()
+        self.mapping_keys = {}
+        for property_id, mappings in self.compiled_mapping.properties:
+            for index, mapping in enumerate(mappings):
+                self.mapping_keys[id(mapping)] = "{0}[{1}]".format(property_id, index)
+
+    def process_dump(self, dump_file, progress_reporter=None):
+        return self.profile_consumer(
+            XmlDumpConverter.process_dump(self, dump_file, progress_reporter))
+
+    def process_dump_incremental(self, dump_file, record_index,
+                                 progress_reporter=None):
+        return self.profile_consumer(
+            XmlDumpConverter.process_dump_incremental(self, dump_file, record_index,
+                                                      progress_reporter))
+
+    def profile_consumer(self, results):
+        """
+        Generator that passes results through and measures the time spent
+        by the consumer on each result as well as the total time.
+        :param results: Results of processing a dump.
+        :return: Results.
+        """
+        start = default_timer()
+        for result in results:
+            consumer_start = default_timer()
+            yield result
+            self.profile.add("stages", "writing", default_timer() - consumer_start)
+        self.profile.add("stages", "total", default_timer() - start)
+
+    def iterate_entities(self, dump_file):
+        entity_elements = XmlDumpConverter.iterate_entities(self, dump_file)
+        while True:
+            start = default_timer()
+            try:
+                entity_element = next(entity_elements)
+            except StopIteration:
+                return
+            finally:
+                self.profile.add("stages", "parsing", default_timer() - start)
+
+            yield entity_element
+
+    def clean_up_references(self, element):
+        start = default_timer()
+        XmlDumpConverter.clean_up_references(element)
+        self.profile.add("stages", "clean_up_references", default_timer() - start)
+
+    def extract_entity_id(self, entity_element):
+        start = default_timer()
+        entity_id = XmlDumpConverter.extract_entity_id(self, entity_element)
+        self.profile.add("stages", "id_extraction", default_timer() - start)
+
+        return entity_id
+
+    def run_formatter(self, property_id, entity_id, mapping, values):
+        start = default_timer()
+        formatted_values = XmlDumpConverter.run_formatter(self, property_id, entity_id,
+                                                          mapping, values)
+        self.profile.add("stages", "formatting", default_timer() - start)
+
+        return formatted_values
+
+    def apply_property(self, property_id, entity_id, mappings, get_values):
+        start = default_timer()
+        external_values = XmlDumpConverter.apply_property(self, property_id, entity_id,
+                                                          mappings, get_values)
+        self.profile.add("properties", property_id, default_timer() - start)
+
+        return external_values
+
+    def apply_mapping(self, property_id, entity_id, mapping, get_values):
+        start = default_timer()
+        external_values = XmlDumpConverter.apply_mapping(self, property_id, entity_id,
+                                                         mapping, get_values)
+        self.profile.add("mappings", self.mapping_keys[id(mapping)],
+                         default_timer() - start)
+
+        return external_values
+
+    def pop_statistics(self):
+        """
+        Gets formatter cache counters, formatter errors, path counters and
+        timings and resets them.
+        :return: Tuple of cache counters, errors, path counters and timings.
+        """
+        return XmlDumpConverter.pop_statistics(self) + (self.profile.pop_timings(),)
+
+    def add_statistics(self, statistics):
+        """
+        Adds statistics, that were popped from a copy of this converter in
+        a worker process.
+        :param statistics: Tuple of cache counters, errors, path counters
+                           and timings.
+        """
+        XmlDumpConverter.add_statistics(self, statistics[:3])
+        self.profile.add_timings(statistics[3])
@@ -0,0 +1,33 @@
+"""Contains class for xml elements collected by the streaming engine."""
+
+
+class StreamedElement(object):
+    """
+    Lightweight copy of an xml element, which is built from parser events
+    instead of an element tree. It keeps the text nodes of the element,
+    its string value and its child elements, which is all that simple
+    value paths need.
+    """
+    __slots__ = ("tag", "attrib", "texts", "parts", "children")
+
+    def __init__(self, tag, attrib):
+        """
+        Creates new StreamedElement instance.
+        :param tag: Tag of the element in Clark notation.
+        :param attrib: Dictionary of attributes of the element.
+        """
+        self.tag = tag
+        self.attrib = attrib
+        # Text nodes directly contained in the element
+        self.texts = []
+        # Pieces of text of the element and all its descendants
+        self.parts = []
+        self.children = []
+
+    def get_string(self):
+        """
+        Gets string value of the element, which is the concatenated text
+        of the element and all its descendants.
+        :return: String value.
+        """
+        return u"".join(self.parts)
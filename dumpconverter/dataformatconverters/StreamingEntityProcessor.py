@@ -0,0 +1,410 @@
+"""Contains engine applying property mappings on parser events."""
+from lxml import etree
+
+from dumpconverter.dataformatconverters.FieldPathParser import FieldPathParser
+from dumpconverter.dataformatconverters.StreamedElement import StreamedElement
+
+
+class StreamingEntityProcessor(object):
+    """
+    Alternative engine of XmlDumpConverter, which applies the mapping
+    while the dump is parsed instead of building an element tree of each
+    entity and evaluating XPath expressions on it.
+
+    Value paths, entity id path and discriminator path are compiled into
+    field paths, which select text of fields of an entity and their
+    children. The processor is the target of an lxml parser: Fields, that
+    may match a path, are looked up by tag and key attribute, when they
+    start, and only those are collected. All other elements are skipped.
+    Once an entity ends, the field paths are evaluated on the collected
+    fields and the results are passed to the mappings.
+
+    Paths, that cannot be compiled, are evaluated by XPath. If there is
+    any, an element tree of each entity is built in addition.
+    """
+    # Number of bytes fed to the parser at once
+    CHUNK_SIZE = 65536
+
+    def __init__(self, xml_converter):
+        """
+        Creates new StreamingEntityProcessor instance.
+        :param xml_converter: XmlDumpConverter, whose mapping is applied.
+        """
+        self.xml_converter = xml_converter
+        self.compiled_mapping = xml_converter.compiled_mapping
+        self.entity_tags = xml_converter.entity_tags
+        self.field_paths = {}
+        self.needs_element = False
+        self.parser = FieldPathParser(xml_converter.namespaces)
+
+        self.entity_id_path = self.compile_xpath(xml_converter.entity_id_xpath)
+        self.discriminator_path = self.compile_xpath(
+            self.compiled_mapping.discriminator_xpath)
+        self.mapping_paths = {}
+        for _, mappings in self.compiled_mapping.properties:
+            for mapping in mappings:
+                field_paths = map(self.compile_xpath, mapping["value_paths"])
+                if None in field_paths:
+                    self.mapping_paths[id(mapping)] = None
+                else:
+                    self.mapping_paths[id(mapping)] = field_paths
+        self.field_index = self.build_field_index(self.field_paths.values())
+        # Text directly in fields and string values of fields are only
+        # collected, if a path needs them
+        self.needs_field_text = any(
+            field_path.value_tag is None or
+            self.uses_field_text(field_path.field_condition)
+            for field_path in self.field_paths.itervalues())
+
+        self.path = []
+        self.level = -1
+        self.fields = []
+        self.field = None
+        self.child = None
+        self.text = []
+        self.collects_text = False
+        self.tree_builder = None
+        self.results = []
+
+    def compile_xpath(self, xpath):
+        """
+        Compiles XPath object into a field path. Identical paths share the
+        same field path, so that they are evaluated only once per entity.
+        :param xpath: Compiled XPath object or None.
+        :return: FieldPath instance or None, if the path is evaluated by
+                 XPath.
+        """
+        if xpath is None:
+            return None
+
+        field_path = self.field_paths.get(xpath.path)
+        if field_path is None:
+            field_path = self.parser.compile(xpath.path)
+            if field_path is None:
+                self.needs_element = True
+                return None
+            self.field_paths[xpath.path] = field_path
+
+        return field_path
+
+    @classmethod
+    def uses_field_text(cls, condition):
+        """
+        Checks, whether a condition of a field depends on text directly in
+        the field.
+        :param condition: Syntax tree of the condition.
+        :return: True, if text of the field is needed.
+        """
+        if condition is None:
+            return False
+        elif condition[0] == "starts-with":
+            return True
+        elif condition[0] in ("and", "or"):
+            return any(map(cls.uses_field_text, condition[1]))
+
+        return False
+
+    @staticmethod
+    def build_field_index(field_paths):
+        """
+        Builds index of field paths by tag and the value of a key attribute
+        of the fields they select. Per tag, the attribute is chosen, that
+        most paths require to have a certain value.
+        :param field_paths: List of FieldPath instances.
+        :return: Dictionary of tags and tuples of key attribute, dictionary
+                 of attribute values and paths and paths matching fields
+                 with any value of the attribute.
+        """
+        paths_by_tag = {}
+        for field_path in field_paths:
+            paths_by_tag.setdefault(field_path.field_tag, []).append(field_path)
+
+        field_index = {}
+        for tag, tag_paths in paths_by_tag.iteritems():
+            keys = [field_path.get_key() for field_path in tag_paths]
+            key_attributes = [key[0] for key in keys if key is not None]
+            if not key_attributes:
+                field_index[tag] = (None, {}, tag_paths)
+                continue
+
+            key_attribute = max(set(key_attributes), key=key_attributes.count)
+            keyed_paths = {}
+            unkeyed_paths = []
+            for field_path, key in zip(tag_paths, keys):
+                if key is not None and key[0] == key_attribute:
+                    keyed_paths.setdefault(key[1], []).append(field_path)
+                else:
+                    unkeyed_paths.append(field_path)
+            for paths in keyed_paths.itervalues():
+                paths.extend(unkeyed_paths)
+            field_index[tag] = (key_attribute, keyed_paths, unkeyed_paths)
+
+        return field_index
+
+    def process_dump(self, dump_file, progress_reporter):
+        """
+        Generator that parses given file and extracts values from the
+        entities in it.
+        :param dump_file: File object of the dump.
+        :param progress_reporter: Reporter for progress output.
+        :return: Triples of entity id, property id and external values
+        """
+        self.path = []
+        self.level = -1
+        self.results = []
+        parser = etree.XMLParser(target=self)
+        while True:
+            chunk = dump_file.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for external_values in self.pop_results():
+                for external_value in external_values:
+                    yield external_value
+                progress_reporter.advance(records=1)
+        parser.close()
+
+    def pop_results(self):
+        """
+        Gets results of the entities, that were parsed completely since
+        the last call.
+        :return: List of lists of external values per entity.
+        """
+        results = self.results
+        self.results = []
+
+        return results
+
+    def start(self, tag, attrib):
+        """
+        Handles start of an element. Called by the parser.
+        :param tag: Tag of the element in Clark notation.
+        :param attrib: Attributes of the element.
+        """
+        if self.tree_builder is not None:
+            self.tree_builder.start(tag, attrib)
+
+        # Levels are relative to the entity and checked by frequency
+        level = self.level = self.level + 1
+        if level == 2:
+            if self.field is not None:
+                if self.text:
+                    self.flush_text(1)
+                self.child = StreamedElement(tag, attrib)
+                self.field.children.append(self.child)
+                self.collects_text = True
+        elif level == 1:
+            self.field = self.find_field(tag, attrib)
+            self.collects_text = (self.field is not None and
+                                  self.needs_field_text)
+        elif level == 0:
+            if (tag == self.entity_tags[-1] and
+                    self.path == self.entity_tags[:-1]):
+                self.start_entity(attrib)
+            else:
+                self.path.append(tag)
+                self.level = -1
+        elif self.text:
+            self.flush_text(level - 1)
+
+    def end(self, tag):
+        """
+        Handles end of an element. Called by the parser.
+        :param tag: Tag of the element in Clark notation.
+        """
+        level = self.level
+        if level < 0:
+            self.path.pop()
+            return
+
+        if self.tree_builder is not None and level > 0:
+            self.tree_builder.end(tag)
+        if self.text:
+            self.flush_text(level)
+        if level == 2:
+            if self.child is not None:
+                self.child = None
+                self.collects_text = self.needs_field_text
+        elif level == 1:
+            self.field = None
+            self.collects_text = False
+        elif level == 0:
+            self.end_entity()
+        self.level = level - 1
+
+    def data(self, data):
+        """
+        Handles text. Called by the parser.
+        :param data: Text as unicode.
+        """
+        if self.collects_text:
+            self.text.append(data)
+        if self.tree_builder is not None:
+            self.tree_builder.data(data)
+
+    def comment(self, text):
+        """
+        Handles comments, which separate text nodes. Called by the parser.
+        :param text: Text of the comment.
+        """
+        if self.tree_builder is not None:
+            self.tree_builder.comment(text)
+        if self.text:
+            self.flush_text(self.level)
+
+    def pi(self, target, data=None):
+        """
+        Handles processing instructions, which separate text nodes. Called
+        by the parser.
+        :param target: Target of the processing instruction.
+        :param data: Content of the processing instruction.
+        """
+        if self.tree_builder is not None:
+            self.tree_builder.pi(target, data)
+        if self.text:
+            self.flush_text(self.level)
+
+    def close(self):
+        """
+        Called by the parser at the end of the document.
+        """
+        pass
+
+    def find_field(self, tag, attrib):
+        """
+        Looks up field paths, that may match a field, and starts
+        collecting the field, if there are any.
+        :param tag: Tag of the field in Clark notation.
+        :param attrib: Attributes of the field.
+        :return: StreamedElement of the field or None.
+        """
+        index_entry = self.field_index.get(tag)
+        if index_entry is None:
+            return None
+
+        key_attribute, keyed_paths, unkeyed_paths = index_entry
+        if key_attribute is None:
+            field_paths = unkeyed_paths
+        else:
+            field_paths = keyed_paths.get(attrib.get(key_attribute), unkeyed_paths)
+        if not field_paths:
+            return None
+
+        field = StreamedElement(tag, attrib)
+        self.fields.append((field, field_paths))
+
+        return field
+
+    def flush_text(self, level):
+        """
+        Adds text collected since the last element, comment or processing
+        instruction as a text node to the element at given level and to
+        the string values of its ancestors within the field.
+        :param level: Level of the element relative to the entity.
+        """
+        text = u"".join(self.text)
+        self.text = []
+        try:
+            # Like lxml, ASCII text is passed as str
+            text = text.encode("ascii")
+        except UnicodeEncodeError:
+            pass
+
+        if level == 1:
+            self.field.texts.append(text)
+        else:
+            if level == 2:
+                self.child.texts.append(text)
+            self.child.parts.append(text)
+        if self.needs_field_text:
+            self.field.parts.append(text)
+
+    def start_entity(self, attrib):
+        """
+        Starts collecting fields of an entity.
+        :param attrib: Attributes of the entity.
+        """
+        self.level = 0
+        self.fields = []
+        if self.needs_element:
+            self.tree_builder = etree.TreeBuilder()
+            self.tree_builder.start(self.entity_tags[-1], attrib)
+
+    def end_entity(self):
+        """
+        Evaluates field paths on the collected fields of an entity and
+        applies the mapping.
+        """
+        field_values = {}
+        for field, field_paths in self.fields:
+            for field_path in field_paths:
+                field_path.select(field, field_values.setdefault(field_path, []))
+        self.fields = []
+
+        entity_element = None
+        if self.tree_builder is not None:
+            self.tree_builder.end(self.entity_tags[-1])
+            entity_element = self.tree_builder.close()
+            self.tree_builder = None
+
+        self.results.append(list(self.process_entity(field_values,
+                                                     entity_element)))
+
+    def process_entity(self, field_values, entity_element):
+        """
+        Generator that extracts values from an entity by applying mapping.
+        :param field_values: Dictionary of field paths and their values.
+        :param entity_element: Xml element of the entity or None, if all
+                               paths are field paths.
+        :return: Triples of entity id, property id and external values
+        """
+        xml_converter = self.xml_converter
+        entity_id = self.get_entity_id(field_values, entity_element)
+        if entity_id is None:
+            return
+
+        if self.compiled_mapping.discriminator_xpath is None:
+            properties = self.compiled_mapping.properties
+        elif self.discriminator_path is None:
+            properties = self.compiled_mapping.get_properties(entity_element)
+        else:
+            properties = self.compiled_mapping.get_group(
+                self.discriminator_path.get_result(
+                    field_values.get(self.discriminator_path, [])))
+
+        path_results = {}
+
+        def get_values(mapping):
+            field_paths = self.mapping_paths[id(mapping)]
+            if field_paths is None:
+                return xml_converter.get_affected_values(
+                    entity_element, mapping["value_paths"], path_results)
+
+            return xml_converter.group_values([
+                field_path.get_result(field_values.get(field_path, []))
+                for field_path in field_paths])
+
+        # Mappings are applied by the converter, so that subclasses like
+        # ProfilingXmlDumpConverter see them like with the XPath engine
+        for property_id, mappings in properties:
+            external_values = xml_converter.apply_property(property_id, entity_id,
+                                                           mappings, get_values)
+            if external_values:
+                yield entity_id, property_id, external_values
+
+    def get_entity_id(self, field_values, entity_element):
+        """
+        Gets id of an entity like XmlDumpConverter.extract_entity_id.
+        :param field_values: Dictionary of field paths and their values.
+        :param entity_element: Xml element of the entity or None.
+        :return: Id of the entity or None.
+        """
+        if self.entity_id_path is None:
+            return self.xml_converter.extract_entity_id(entity_element)
+
+        entity_id = self.entity_id_path.get_result(
+            field_values.get(self.entity_id_path, []))
+        if isinstance(entity_id, basestring):
+            return entity_id
+        elif entity_id:
+            return entity_id[0]
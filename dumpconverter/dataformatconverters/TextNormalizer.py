@@ -0,0 +1,130 @@
+"""Contains class for normalizing text values extracted from dumps."""
+import re
+import sys
+import unicodedata
+
+
+class TextNormalizer:
+    """
+    Normalizes values extracted from dumps. Values are brought into a
+    unicode normalization form and unprintable characters, i.e. characters
+    of the unicode category C, are removed. Results are utf-8 encoded.
+
+    Pure ASCII values are handled without decoding them, and unicode
+    normalization is skipped for values, that cannot be affected by it.
+    Data sources can pass a subclass or differently configured instance
+    to XmlDumpConverter.
+    """
+    # Matches ASCII values, that do not have to be changed
+    PRINTABLE_ASCII_PATTERN = re.compile(r"^[\x20-\x7e]*\Z")
+    # Matches ASCII values, which may contain control characters
+    ASCII_PATTERN = re.compile(r"^[\x00-\x7f]*\Z")
+    # ASCII control characters
+    ASCII_CONTROL_CHARACTERS = "".join(map(chr, range(0x20) + [0x7f]))
+    # Matches characters, that can be affected by NFC. Values consisting
+    # of characters below U+0300 only are always in NFC.
+    NFC_CANDIDATE_PATTERN = re.compile(u"[^\\x00-\\u02ff]")
+
+    # Values with characters below this code point only are checked fast
+    COMMON_CHARACTERS_LIMIT = 0x800
+
+    # Patterns matching unprintable characters. They take a scan of all
+    # code points to build, which XmlDumpConverter does on creation.
+    unprintable_patterns = None
+
+    def __init__(self, normalization_form="NFC"):
+        """
+        Creates new TextNormalizer instance.
+        :param normalization_form: Unicode normalization form applied on
+                                   values or None to keep them as they are.
+        """
+        self.normalization_form = normalization_form
+
+    def normalize(self, value):
+        """
+        Normalizes given value.
+        :param value: Value as unicode or utf-8 encoded string.
+        :return: Normalized and utf-8 encoded value.
+        """
+        if isinstance(value, str):
+            if self.PRINTABLE_ASCII_PATTERN.match(value):
+                return value
+            elif self.ASCII_PATTERN.match(value):
+                return value.translate(None, self.ASCII_CONTROL_CHARACTERS)
+            value = unicode(value, encoding="utf-8", errors="ignore")
+
+        if self.needs_normalization(value):
+            value = unicodedata.normalize(self.normalization_form, value)
+        uncommon_pattern, unprintable_pattern = self.get_unprintable_patterns()
+        if uncommon_pattern.search(value):
+            value = unprintable_pattern.sub(u"", value)
+
+        return value.encode("utf-8", errors="ignore")
+
+    def needs_normalization(self, value):
+        """
+        Checks, whether normalization could change given value.
+        :param value: Unicode value.
+        :return: True, if value has to be normalized.
+        """
+        if self.normalization_form == "NFC":
+            return self.NFC_CANDIDATE_PATTERN.search(value) is not None
+        else:
+            return self.normalization_form is not None
+
+    @classmethod
+    def get_unprintable_patterns(cls):
+        """
+        Gets patterns matching characters of the unicode category C. As
+        checking all ranges of these characters is slow, values are first
+        checked with a pattern that matches unprintable characters below
+        COMMON_CHARACTERS_LIMIT and all characters above.
+        The patterns are built once.
+        :return: Tuple of pattern for unprintable or uncommon characters
+                 and pattern for unprintable characters.
+        """
+        if TextNormalizer.unprintable_patterns is None:
+            ranges = cls.get_unprintable_ranges()
+            common_ranges = [(start, min(end, cls.COMMON_CHARACTERS_LIMIT - 1))
+                             for start, end in ranges
+                             if start < cls.COMMON_CHARACTERS_LIMIT]
+            common_ranges.append((cls.COMMON_CHARACTERS_LIMIT, sys.maxunicode))
+            TextNormalizer.unprintable_patterns = (
+                cls.compile_ranges(common_ranges), cls.compile_ranges(ranges))
+
+        return TextNormalizer.unprintable_patterns
+
+    @staticmethod
+    def compile_ranges(ranges):
+        """
+        Compiles pattern matching sequences of characters within given ranges.
+        :param ranges: List of tuples of first and last code point of a range.
+        :return: Compiled regular expression.
+        """
+        characters = []
+        for start, end in ranges:
+            characters.append(re.escape(unichr(start)))
+            if start != end:
+                characters.append(u"-" + re.escape(unichr(end)))
+
+        return re.compile(u"[{0}]+".format(u"".join(characters)))
+
+    @staticmethod
+    def get_unprintable_ranges():
+        """
+        Gets ranges of code points of the unicode category C.
+        :return: List of tuples of first and last code point of a range.
+        """
+        ranges = []
+        start = None
+        for code_point in xrange(sys.maxunicode + 1):
+            if unicodedata.category(unichr(code_point))[0] == "C":
+                if start is None:
+                    start = code_point
+            elif start is not None:
+                ranges.append((start, code_point - 1))
+                start = None
+        if start is not None:
+            ranges.append((start, sys.maxunicode))
+
+        return ranges
@@ -1,17 +1,40 @@
 """Contains dump converter class for processing xml dumps."""
-import unicodedata
+import collections
+import hashlib
+import multiprocessing
 from lxml import etree
 
-from dumpconverter.utils import consoleutils
+from dumpconverter.dataformatconverters.CompiledPropertyMapping import CompiledPropertyMapping
+from dumpconverter.dataformatconverters.FormatterCache import FormatterCache
+from dumpconverter.dataformatconverters.FormatterErrorLog import FormatterErrorLog
+from dumpconverter.dataformatconverters.StreamingEntityProcessor import StreamingEntityProcessor
+from dumpconverter.dataformatconverters.TextNormalizer import TextNormalizer
+from dumpconverter.utils import consoleutils, memoryutils
+from dumpconverter.utils.ProgressReporter import ProgressReporter
 
 
 class XmlDumpConverter:
     """
     Dump converter for dumps in xml format. Is responsible for splitting dump
     into single entities and process them by applying given property mapping.
+
+    While parsing, all elements preceding the current entity or one of its
+    ancestors are deleted, so that the parsed part of the document takes
+    memory of a single entity regardless of the size of the dump.
     """
+    # Number of entities between two checks, whether progress should be shown
+    PROGRESS_CHECK_INTERVAL = 100
+    # Number of entities, that are sent to a worker process at once
+    BATCH_SIZE = 500
+    # Engines applying the mapping on the dump
+    ENGINES = ("xpath", "stream")
+
     def __init__(self, entities_path, entity_id_path, property_mapping,
-                 namespaces=None, is_quiet=False):
+                 namespaces=None, is_quiet=False, discriminator_path=None,
+                 filter_tags=True, workers=1, batch_size=BATCH_SIZE,
+                 text_normalizer=None,
+                 formatter_cache_size=FormatterCache.MAX_SIZE, strict=False,
+                 engine="xpath"):
         """
         Creates new XmlDumpConverter instance
         :param entities_path: XPath to retrieve entities out of the dump.
@@ -19,12 +42,69 @@ class XmlDumpConverter:
         :param property_mapping: Property mapping from data source to Wikidata.
         :param namespaces: XML namespace mapping.
         :param is_quiet: If set to True, console output will be suppressed.
+        :param discriminator_path: XPath to retrieve the type of an entity,
+                                   which decides the applicable mappings.
+        :param filter_tags: If set to True, the parser reports only elements
+                            with the tag of entities instead of tracking the
+                            path of every single element.
+        :param workers: Number of worker processes, that apply the mapping
+                        on entities while the dump is parsed.
+        :param batch_size: Number of entities sent to a worker at once.
+        :param text_normalizer: Normalizer applied on extracted values. If
+                                None, values are normalized to NFC and
+                                unprintable characters are removed.
+        :param formatter_cache_size: Maximal number of formatter results
+                                     cached per cacheable mapping. If 0,
+                                     results are not cached.
+        :param strict: If set to True, the conversion is aborted with a
+                       FormatterError, when a formatter fails. Otherwise
+                       failures are counted and printed at the end.
+        :param engine: Engine applying the mapping. "xpath" evaluates
+                       XPath expressions on an element tree of each entity.
+                       "stream" evaluates simple paths on parser events
+                       without element trees and falls back to XPath for
+                       all other paths. It always runs in this process and
+                       is not used by incremental conversions.
         """
+        if engine not in self.ENGINES:
+            raise ValueError("Unknown engine '{0}'".format(engine))
         self.entity_id_path = entity_id_path
         self.property_mapping = property_mapping
         self.namespaces = namespaces or {}
         self.is_quiet = is_quiet
+        self.filter_tags = filter_tags
+        self.workers = workers
+        self.batch_size = batch_size
+        self.text_normalizer = text_normalizer or TextNormalizer()
+        # Patterns are built once per process and before worker processes
+        # are forked, so that processing of entities does not pay for it
+        self.text_normalizer.get_unprintable_patterns()
+        self.formatter_error_log = FormatterErrorLog(strict)
+        # Numbers of value paths evaluated and of evaluations saved, because
+        # an identical path was already evaluated on the same entity
+        self.path_evaluations = 0
+        self.saved_path_evaluations = 0
         self.entities_path = self.apply_namespaces(entities_path)
+        if entities_path:
+            self.entity_tags = map(self.apply_namespaces,
+                                   entities_path.split("/"))
+        else:
+            self.entity_tags = []
+        self.compiled_mapping = CompiledPropertyMapping(property_mapping,
+                                                        self.namespaces,
+                                                        discriminator_path,
+                                                        formatter_cache_size)
+        if entity_id_path:
+            self.entity_id_xpath = self.compiled_mapping.compile_xpath(
+                entity_id_path)
+        else:
+            self.entity_id_xpath = None
+        # Root of the document, that is currently parsed
+        self.document_root = None
+        if engine == "stream":
+            self.streaming_processor = StreamingEntityProcessor(self)
+        else:
+            self.streaming_processor = None
 
     def apply_namespaces(self, element_path):
         """
@@ -45,35 +125,306 @@ class XmlDumpConverter:
         else:
             return element_path
 
-    def process_dump(self, dump_file):
+    def process_dump(self, dump_file, progress_reporter=None):
         """
         Generator that iterates through xml elements of given file and
         extracts values from the ones that matches entity_path.
         :param dump_file: File object of the dump.
+        :param progress_reporter: Reporter for progress output. If None,
+                                  progress is based on the position in
+                                  the given file.
         :return: Triples of entity id, property id and external values
         """
+        if progress_reporter is None:
+            progress_reporter = self.create_progress_reporter(dump_file)
+        progress_reporter.add_details(self.get_memory_status)
+
+        if self.streaming_processor is not None:
+            external_values = self.streaming_processor.process_dump(
+                dump_file, progress_reporter)
+            for external_value in external_values:
+                yield external_value
+            progress_reporter.finish()
+            self.print_statistics()
+            return
+
+        entity_elements = self.iterate_entities(dump_file)
+        if self.workers > 1:
+            external_values = self.process_entities_parallel(entity_elements,
+                                                             progress_reporter)
+            for external_value in external_values:
+                yield external_value
+            progress_reporter.finish()
+            self.print_statistics()
+            return
+
+        for entity_element in entity_elements:
+            self.detach_entity(entity_element)
+            for external_value in self.process_entity(entity_element):
+                if external_value is not None:
+                    yield external_value
+            self.clean_up_references(entity_element)
+            progress_reporter.advance(records=1)
+
+        progress_reporter.finish()
+        self.print_statistics()
+
+    def process_dump_incremental(self, dump_file, record_index,
+                                 progress_reporter=None):
+        """
+        Generator that iterates through entities of given file like
+        process_dump, but applies the mapping only on entities, that
+        changed since a previous conversion. Entities are looked up by
+        their id in the index of the previous conversion and compared by a
+        hash of their serialized content. Found entities are marked as
+        seen. Entities are always processed in this process, even if
+        workers are set.
+        :param dump_file: File object of the dump.
+        :param record_index: RecordIndex of the previous conversion or None.
+        :param progress_reporter: Reporter for progress output. If None,
+                                  progress is based on the position in
+                                  the given file.
+        :return: Tuples of entity id, content hash, slot of the entity in
+                 the index or None and list of property ids and external
+                 values or None, if the entity is unchanged
+        """
+        if progress_reporter is None:
+            progress_reporter = self.create_progress_reporter(dump_file)
+        progress_reporter.add_details(self.get_memory_status)
+
+        for entity_element in self.iterate_entities(dump_file):
+            self.detach_entity(entity_element)
+            entity_id = self.extract_entity_id(entity_element)
+            content_hash = self.get_content_hash(entity_element)
+            slot = None
+            if entity_id is not None and record_index is not None:
+                slot = record_index.find(entity_id)
+
+            if slot is not None:
+                record_index.mark_seen(slot)
+            if (slot is not None and
+                    record_index.get_content_hash(slot) == content_hash):
+                external_values = None
+            else:
+                external_values = [
+                    (property_id, values)
+                    for _, property_id, values in self.process_entity(entity_element)
+                ]
+            yield entity_id, content_hash, slot, external_values
+            self.clean_up_references(entity_element)
+            progress_reporter.advance(records=1)
+
+        progress_reporter.finish()
+        self.print_statistics()
+
+    def create_progress_reporter(self, dump_file):
+        """
+        Creates reporter, whose progress is based on the position in given
+        file.
+        :param dump_file: File object of the dump.
+        :return: ProgressReporter instance.
+        """
+        return ProgressReporter(
+            "Processing database dump...{0}",
+            position_function=dump_file.tell,
+            is_quiet=self.is_quiet,
+            check_interval=self.PROGRESS_CHECK_INTERVAL)
+
+    def iterate_entities(self, dump_file):
+        """
+        Iterates through xml elements of entities of given file.
+        :param dump_file: File object of the dump.
+        :return: Xml elements of entities.
+        """
+        self.document_root = None
+        if self.filter_tags:
+            return self.iterate_entities_filtered(dump_file)
+        else:
+            return self.iterate_entities_tracked(dump_file)
+
+    @staticmethod
+    def get_content_hash(entity_element):
+        """
+        Gets hash of the serialized content of given entity.
+        :param entity_element: Xml element of a single entity.
+        :return: Hash as string of 8 bytes.
+        """
+        return hashlib.sha1(etree.tostring(entity_element)).digest()[:8]
+
+    def process_entities_parallel(self, entity_elements, progress_reporter):
+        """
+        Generator that serializes entities into batches and lets a pool of
+        worker processes apply the mapping on them. Results are yielded in
+        the order of the dump. The number of pending batches is limited, so
+        that memory usage stays bounded, if workers are slower than the
+        parser. Workers are forked and inherit this converter, so that the
+        mapping does not need to be pickled.
+        :param entity_elements: Xml elements of entities.
+        :param progress_reporter: Reporter for progress output.
+        :return: Triples of entity id, property id and external values
+        """
+        global worker_converter
+        worker_converter = self
+        pool = multiprocessing.Pool(self.workers, reset_worker_statistics)
+        try:
+            pending_batches = collections.deque()
+            for batch in self.serialize_batches(entity_elements,
+                                                progress_reporter):
+                pending_batches.append(pool.apply_async(process_batch, (batch,)))
+                if len(pending_batches) >= 2 * self.workers:
+                    for external_value in self.get_batch_results(
+                            pending_batches.popleft()):
+                        yield external_value
+
+            while pending_batches:
+                for external_value in self.get_batch_results(
+                        pending_batches.popleft()):
+                    yield external_value
+        finally:
+            pool.terminate()
+            pool.join()
+            worker_converter = None
+
+    def get_batch_results(self, pending_batch):
+        """
+        Waits for the results of a batch processed by a worker process and
+        adds the statistics of the worker to the own ones.
+        :param pending_batch: Asynchronous result of process_batch.
+        :return: List of triples of entity id, property id and external values
+        """
+        results, statistics = pending_batch.get()
+        self.add_statistics(statistics)
+
+        return results
+
+    def pop_statistics(self):
+        """
+        Gets formatter cache counters, formatter errors and counters of
+        value path evaluations and resets them.
+        :return: Tuple of cache counters, errors and path counters.
+        """
+        path_counters = (self.path_evaluations, self.saved_path_evaluations)
+        self.path_evaluations = 0
+        self.saved_path_evaluations = 0
+
+        return (self.compiled_mapping.pop_formatter_cache_counters(),
+                self.formatter_error_log.pop_errors(),
+                path_counters)
+
+    def add_statistics(self, statistics):
+        """
+        Adds statistics, that were popped from a copy of this converter in
+        a worker process.
+        :param statistics: Tuple of cache counters, errors and path counters.
+        """
+        cache_counters, errors, path_counters = statistics
+        self.compiled_mapping.add_formatter_cache_counters(cache_counters)
+        self.formatter_error_log.add_errors(*errors)
+        self.path_evaluations += path_counters[0]
+        self.saved_path_evaluations += path_counters[1]
+
+    def serialize_batches(self, entity_elements, progress_reporter):
+        """
+        Generator that serializes entities and groups them into batches.
+        :param entity_elements: Xml elements of entities.
+        :param progress_reporter: Reporter for progress output.
+        :return: Lists of serialized entities.
+        """
+        batch = []
+        for entity_element in entity_elements:
+            self.detach_entity(entity_element)
+            batch.append(etree.tostring(entity_element))
+            self.clean_up_references(entity_element)
+            progress_reporter.advance(records=1)
+
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def process_serialized_entities(self, serialized_entities):
+        """
+        Applies mapping on serialized entities.
+        :param serialized_entities: List of entities as xml strings.
+        :return: List of triples of entity id, property id and external values
+        """
+        results = []
+        for serialized_entity in serialized_entities:
+            entity_element = etree.fromstring(serialized_entity)
+            for external_value in self.process_entity(entity_element):
+                if external_value is not None:
+                    results.append(external_value)
+
+        return results
+
+    def iterate_entities_tracked(self, dump_file):
+        """
+        Generator that iterates through all xml elements of given file by
+        tracking the path of each element and yields the ones that matches
+        entity_path.
+        :param dump_file: File object of the dump.
+        :return: Xml elements of entities.
+        """
         node_path = []
         for event, element in etree.iterparse(dump_file, events=("start", "end")):
             if event == "start":
                 node_path.append(element.tag)
             if event == "end":
                 if "/".join(node_path) == self.entities_path:
-                    for external_value in self.process_entity(element):
-                        if external_value is not None:
-                            yield external_value
-                    self.clean_up_references(element)
+                    if self.document_root is None:
+                        self.document_root = element.getroottree().getroot()
+                    self.release_preceding_elements(element)
+                    yield element
 
                 elif not "/".join(node_path).startswith(self.entities_path):
                     self.clean_up_references(element)
 
                 del node_path[-1]
-                if not self.is_quiet:
-                    message = "Processing database dump...{0}"
-                    consoleutils.print_progress(message, dump_file.tell())
 
-        # Write new line to console to overwrite progress
-        if not self.is_quiet:
-            print
+    def iterate_entities_filtered(self, dump_file):
+        """
+        Generator that lets the parser report only xml elements with the tag
+        of entities and yields the ones that matches entity_path.
+        Other elements preceding an entity are cleaned up.
+        :param dump_file: File object of the dump.
+        :return: Xml elements of entities.
+        """
+        entity_tag = self.entity_tags[-1]
+        for event, element in etree.iterparse(dump_file, events=("end",),
+                                               tag=entity_tag):
+            if self.is_entity_element(element):
+                # The root is only known to iterparse after parsing
+                if self.document_root is None:
+                    self.document_root = element.getroottree().getroot()
+                self.release_preceding_elements(element)
+
+                yield element
+
+    def is_entity_element(self, element):
+        """
+        Checks whether path of given xml element matches entity_path.
+        :param element: Xml element.
+        :return: True, if element is an entity.
+        """
+        for tag in reversed(self.entity_tags):
+            if element is None or element.tag != tag:
+                return False
+            element = element.getparent()
+
+        return element is None
+
+    @staticmethod
+    def detach_entity(entity_element):
+        """
+        Detaches given entity from its parent, so that mappings are evaluated
+        against the entity alone instead of whatever is left of the document.
+        :param entity_element: Xml element of a single entity.
+        """
+        parent = entity_element.getparent()
+        if parent is not None:
+            parent.remove(entity_element)
 
     @staticmethod
     def clean_up_references(element):
@@ -85,8 +436,57 @@ class XmlDumpConverter:
         # Clean up unneeded references
         # http://www.ibm.com/developerworks/xml/library/x-hiperfparse/
         element.clear()
-        if element.getparent() is not None:
-            del element.getparent()[0]
+        XmlDumpConverter.release_preceding_elements(element)
+        # Afterwards the element is the first child of its parent
+        parent = element.getparent()
+        if parent is not None:
+            del parent[0]
+
+    @staticmethod
+    def release_preceding_elements(element):
+        """
+        Deletes all siblings preceding given xml element and each of its
+        ancestors, including comments and processing instructions, which
+        are never reported by the parser. They are parsed completely, so
+        that they are not needed anymore.
+        :param element: Xml element.
+        """
+        parent = element.getparent()
+        while parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+            element = parent
+            parent = element.getparent()
+
+    def count_live_elements(self):
+        """
+        Counts nodes directly below the root of the currently parsed
+        document, that are still in memory. These are the nodes, that pile
+        up, if preceding records are not released. Nested nodes are not
+        counted, since this is called on every progress report. Entities
+        are detached and not counted.
+        :return: Number of nodes or None, if no document is parsed.
+        """
+        if self.document_root is None:
+            return None
+
+        return len(self.document_root)
+
+    def get_memory_status(self):
+        """
+        Builds status text containing the resident set size of this process
+        and the number of xml nodes in memory.
+        :return: Status text.
+        """
+        status = []
+        rss = memoryutils.get_rss()
+        if rss is not None:
+            status.append("RSS {0}".format(consoleutils.format_bytes(rss)))
+        live_elements = self.count_live_elements()
+        if live_elements is not None:
+            status.append("{0} live elements".format(live_elements))
+
+        return " | ".join(status)
 
     def process_entity(self, entity_element):
         """
@@ -96,21 +496,51 @@ class XmlDumpConverter:
         """
         entity_id = self.extract_entity_id(entity_element)
         if entity_id is not None:
-            for property_id, mappings in self.property_mapping.iteritems():
-                external_values = []
-                for mapping in mappings:
-                    value_paths = mapping["value_paths"]
-                    values = self.get_affected_values(entity_element, value_paths)
-
-                    if "formatter" in mapping:
-                        formatter = mapping["formatter"]
-                        external_values += self.run_formatter(formatter, values)
-                    else:
-                        for value in values:
-                            external_values += value
+            properties = self.compiled_mapping.get_properties(entity_element)
+            # Identical value paths of different mappings share the same
+            # XPath object and are evaluated only once per entity
+            path_results = {}
+
+            def get_values(mapping):
+                return self.get_affected_values(entity_element, mapping["value_paths"],
+                                                path_results)
 
+            for property_id, mappings in properties:
+                external_values = self.apply_property(property_id, entity_id,
+                                                      mappings, get_values)
                 if external_values:
-                    yield entity_id, property_id, list(set(external_values))
+                    yield entity_id, property_id, external_values
+
+    def apply_property(self, property_id, entity_id, mappings, get_values):
+        """
+        Applies all mapping entries of a property on an entity.
+        :param property_id: Id of the property.
+        :param entity_id: Id of the entity.
+        :param mappings: List of compiled mapping entries of the property.
+        :param get_values: Function, that extracts the values of a mapping
+                           entry from the entity.
+        :return: List of distinct external values.
+        """
+        external_values = []
+        for mapping in mappings:
+            external_values += self.apply_mapping(property_id, entity_id,
+                                                  mapping, get_values)
+
+        return list(set(external_values))
+
+    def apply_mapping(self, property_id, entity_id, mapping, get_values):
+        """
+        Applies a single mapping entry on an entity.
+        :param property_id: Id of the property.
+        :param entity_id: Id of the entity.
+        :param mapping: Compiled mapping entry.
+        :param get_values: Function, that extracts the values of a mapping
+                           entry from the entity.
+        :return: List of external values.
+        """
+        values = get_values(mapping)
+
+        return self.format_values(property_id, entity_id, mapping, values)
 
     def extract_entity_id(self, entity_element):
         """
@@ -118,8 +548,7 @@ class XmlDumpConverter:
         :param entity_element: Xml element of a single entity.
         :return: Id of the given entity.
         """
-        entity_id = entity_element.xpath(self.entity_id_path,
-                                         namespaces=self.namespaces)
+        entity_id = self.entity_id_xpath(entity_element)
 
         if isinstance(entity_id, basestring):
             return entity_id
@@ -129,34 +558,54 @@ class XmlDumpConverter:
             except IndexError:
                 pass
 
-    def get_affected_values(self, entity_element, value_paths):
+    def get_affected_values(self, entity_element, value_paths, path_results=None):
         """
         Extracts values affected by xpaths from given entity.
         :param entity_element: Xml element of a single entity.
-        :param value_paths: List of XPaths to extract values from xml element.
+        :param value_paths: List of compiled XPaths to extract values from xml element.
+        :param path_results: Dictionary of XPaths, that were already
+                             evaluated on the entity, and their results.
+                             If given, it is used and filled instead of
+                             evaluating the XPaths again.
         :return: Values that are affected by given mapping.
         """
-        elements = []
+        if path_results is None:
+            return self.group_values([value_path(entity_element)
+                                      for value_path in value_paths])
+
+        results = []
         for value_path in value_paths:
-            result = entity_element.xpath(value_path,
-                                          namespaces=self.namespaces)
+            result = path_results.get(value_path)
+            if result is None:
+                result = value_path(entity_element)
+                path_results[value_path] = result
+                self.path_evaluations += 1
+            else:
+                self.saved_path_evaluations += 1
+            results.append(result)
 
+        return self.group_values(results)
+
+    def group_values(self, results):
+        """
+        Normalizes values of the results of value paths and groups the
+        values at the same position, so that they can be passed to a
+        formatter together.
+        :param results: List of results of the value paths of a mapping.
+        :return: Values that are affected by given mapping.
+        """
+        elements = []
+        for result in results:
             for i in range(0, len(result)):
                 raw_value = result[i]
                 if isinstance(raw_value, etree._Element):
-                    value = unicode(raw_value.text, encoding="utf-8",
-                                    errors='ignore')
-                elif isinstance(raw_value, str):
-                    value = unicode(raw_value, encoding="utf-8",
-                                    errors='ignore')
-                elif isinstance(raw_value, unicode):
+                    value = raw_value.text
+                elif isinstance(raw_value, basestring):
                     value = raw_value
                 else:
                     continue
 
-                value = unicodedata.normalize("NFC", value)
-                value = self.remove_unprintable_characters(value)
-                value = value.encode("utf-8", errors='ignore')
+                value = self.text_normalizer.normalize(value)
 
                 if i >= len(elements):
                     elements.append([])
@@ -164,41 +613,96 @@ class XmlDumpConverter:
 
         return elements
 
-    @staticmethod
-    def remove_unprintable_characters(value):
+    def print_statistics(self):
         """
-        Removes all unprintable unicode characters from a given string.
-        :param value: String value
-        :return: String without unprintable unicode characters.
+        Prints numbers of hits and misses of formatter caches and errors
+        of formatters per property.
         """
-        return "".join(ch for ch in value if unicodedata.category(ch)[0] != "C")
+        if self.is_quiet:
+            return
 
-    @staticmethod
-    def run_formatter(formatter, values):
+        counters = self.compiled_mapping.get_formatter_cache_counters()
+        for property_id, (hits, misses) in sorted(counters.iteritems()):
+            if hits + misses > 0:
+                print "Formatter cache of {0}: {1} hits, {2} misses ({3:.1f}% hit rate)".format(
+                    property_id, hits, misses, 100.0 * hits / (hits + misses))
+        if self.saved_path_evaluations > 0:
+            total = self.path_evaluations + self.saved_path_evaluations
+            print "Shared value paths: {0} of {1} evaluations saved ({2:.1f}%)".format(
+                self.saved_path_evaluations, total,
+                100.0 * self.saved_path_evaluations / total)
+        self.formatter_error_log.print_errors()
+
+    def format_values(self, property_id, entity_id, mapping, values):
         """
-        Runs specified formatter on given values.
-        :param formatter: Formatter function
-        :param values: List of values from dump.
+        Gets external values of a mapping entry by running its formatter or
+        taking the values as they are, if it has none.
+        :param property_id: Id of the property.
+        :param entity_id: Id of the entity.
+        :param mapping: Compiled mapping entry.
+        :param values: List of argument lists from dump.
+        :return: List of external values.
+        """
+        if "formatter" in mapping:
+            return self.run_formatter(property_id, entity_id, mapping, values)
+
+        external_values = []
+        for value in values:
+            external_values += value
+
+        return external_values
+
+    def run_formatter(self, property_id, entity_id, mapping, values):
+        """
+        Runs formatter of given mapping on given values. Values with less
+        arguments than the formatter requires have no formatted value.
+        Errors of the formatter are added to the formatter error log.
+        :param property_id: Id of the property.
+        :param entity_id: Id of the entity.
+        :param mapping: Compiled mapping entry containing the formatter.
+        :param values: List of argument lists from dump.
         :return: List of formatted values.
         """
+        formatter = mapping["formatter"]
+        required_arguments = mapping.get("formatter_arguments", 0)
         formatted_values = []
-        for value in values:
-            formatted_value = XmlDumpConverter.formatter_wrapper(formatter, value)
+        for arguments in values:
+            if len(arguments) < required_arguments:
+                continue
+
+            try:
+                formatted_value = formatter(*arguments)
+            except Exception as exception:
+                self.formatter_error_log.add_error(property_id, entity_id,
+                                                   arguments, exception)
+                continue
+
             if formatted_value:
                 formatted_values.append(formatted_value)
 
         return formatted_values
 
-    @staticmethod
-    def formatter_wrapper(formatter, values):
-        """
-        Wrapper for formatters that takes list of arguments and passes them
-        to specified formatter function.
-        :param formatter: Formatter function.
-        :param values: List of arguments for formatter.
-        :return: Result of formatter execution.
-        """
-        try:
-            return formatter(*values)
-        except:
-            pass
+
+# Converter used by worker processes, which is inherited when they are forked
+worker_converter = None
+
+
+def reset_worker_statistics():
+    """
+    Discards statistics, that a worker process inherited from its parent,
+    so that they are not added to the ones of the parent again.
+    """
+    worker_converter.pop_statistics()
+
+
+def process_batch(serialized_entities):
+    """
+    Applies mapping of the inherited converter on serialized entities.
+    Runs in a worker process of XmlDumpConverter.process_entities_parallel.
+    :param serialized_entities: List of entities as xml strings.
+    :return: List of triples of entity id, property id and external values
+             and statistics of the batch
+    """
+    results = worker_converter.process_serialized_entities(serialized_entities)
+
+    return results, worker_converter.pop_statistics()
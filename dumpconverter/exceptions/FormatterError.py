@@ -0,0 +1,9 @@
+"""Contains exceptions appearing while formatting values."""
+
+
+class FormatterError(Exception):
+    """Exception that is raised in strict mode, when a formatter fails."""
+    def __init__(self, message=None, property_id=None, entity_id=None):
+        super(FormatterError, self).__init__(message)
+        self.property_id = property_id
+        self.entity_id = entity_id
@@ -0,0 +1,118 @@
+"""Contains file-like class for reading downloads while they are running."""
+import Queue
+import threading
+
+from dumpconverter.exceptions.DownloadError import DownloadError
+from dumpconverter.utils.ReadBuffer import ReadBuffer
+
+
+class DownloadStream:
+    """
+    Read-only file-like object for the body of an http response. A reader
+    thread fetches chunks of the response into a bounded buffer, so that
+    downloading and processing the data run concurrently without storing
+    the whole download. Raw bytes can optionally be written to a cache file.
+    """
+    CHUNK_SIZE = 65536
+    MAX_BUFFERED_CHUNKS = 64
+
+    def __init__(self, response, total_bytes=None, cache_file=None,
+                 chunk_size=CHUNK_SIZE, max_buffered_chunks=MAX_BUFFERED_CHUNKS):
+        """
+        Creates new DownloadStream instance and starts reading the response.
+        :param response: Response object of the download.
+        :param total_bytes: Content length of the response or None if unknown.
+        :param cache_file: File, in which raw bytes should be written.
+        :param chunk_size: Number of bytes read from the response at once.
+        :param max_buffered_chunks: Number of chunks that are buffered at most.
+        """
+        self.response = response
+        self.total_bytes = total_bytes
+        self.cache_file = cache_file
+        self.chunk_size = chunk_size
+        self.chunks = Queue.Queue(max_buffered_chunks)
+        self.buffer = ReadBuffer()
+        self.position = 0
+        self.is_eof = False
+        self.is_closed = False
+
+        self.reader_thread = threading.Thread(target=self.fetch_chunks)
+        self.reader_thread.daemon = True
+        self.reader_thread.start()
+
+    def fetch_chunks(self):
+        """
+        Reads response chunk by chunk and puts the chunks into the buffer.
+        An empty chunk marks the end of the response, errors are passed
+        to the consumer.
+        """
+        try:
+            while True:
+                chunk = self.response.read(self.chunk_size)
+                if chunk and self.cache_file is not None:
+                    self.cache_file.write(chunk)
+                if not self.put_chunk(chunk) or not chunk:
+                    break
+        except Exception as exception:
+            self.put_chunk(exception)
+
+    def put_chunk(self, chunk):
+        """
+        Puts chunk into the buffer and waits, while the buffer is full.
+        :param chunk: Chunk of the response.
+        :return: False, if the stream was closed meanwhile.
+        """
+        while not self.is_closed:
+            try:
+                self.chunks.put(chunk, timeout=0.1)
+                return True
+            except Queue.Full:
+                pass
+
+        return False
+
+    def read(self, size=-1):
+        """
+        Reads bytes from the response.
+        :param size: Maximum number of bytes or -1 to read until the end.
+        :return: Read bytes.
+        """
+        while not self.is_eof and (size < 0 or len(self.buffer) < size):
+            chunk = self.chunks.get()
+            if isinstance(chunk, Exception):
+                self.is_eof = True
+                raise DownloadError(message=str(chunk))
+            if not chunk:
+                self.is_eof = True
+            self.buffer.append(chunk)
+
+        data = self.buffer.read(size)
+        self.position += len(data)
+
+        return data
+
+    def tell(self):
+        """
+        Gets number of bytes consumed so far.
+        :return: Number of consumed bytes.
+        """
+        return self.position
+
+    def finish(self):
+        """
+        Consumes the rest of the response and waits for the reader thread.
+        :return: Total number of bytes of the response.
+        """
+        while self.read(self.chunk_size):
+            pass
+        self.reader_thread.join()
+
+        return self.position
+
+    def close(self):
+        """
+        Stops reading the response and closes it.
+        """
+        self.is_closed = True
+        self.reader_thread.join()
+        self.response.close()
@@ -0,0 +1,244 @@
+"""Contains class for keeping downloaded dumps between conversions."""
+import hashlib
+import json
+import os
+
+from dumpconverter.exceptions.DownloadError import DownloadError
+from dumpconverter.utils import downloadutils
+from dumpconverter.utils.ProgressReporter import ProgressReporter
+from dumpconverter.utils.SegmentedDownload import SegmentedDownload
+
+
+class DumpCache:
+    """
+    Directory, in which downloaded dumps are kept between conversions.
+    Files are named by the SHA-1 hash of the url of a dump and accompanied
+    by a metadata file, which stores the validators (ETag and
+    Last-Modified) of the response.
+
+    A cached dump is validated with a conditional request and downloaded
+    again only if it changed. Interrupted downloads are kept as partial
+    files and resumed with range requests, as long as the validators of
+    the dump do not change. Failed attempts are retried with exponential
+    backoff.
+
+    If multiple connections are allowed and the server accepts range
+    requests, dumps are downloaded in segments. The remaining segments of
+    an interrupted segmented download are stored in the metadata.
+    """
+    def __init__(self, directory, is_quiet=False,
+                 max_attempts=downloadutils.MAX_ATTEMPTS,
+                 backoff_seconds=downloadutils.BACKOFF_SECONDS, connections=1):
+        """
+        Creates new DumpCache instance.
+        :param directory: Directory, in which dumps are stored. It is
+                          created, if it does not exist.
+        :param is_quiet: If set to True, console output will be suppressed.
+        :param max_attempts: Number of attempts of a download, before it is
+                             aborted.
+        :param backoff_seconds: Delay before the first retry in seconds.
+        :param connections: Number of connections used at most to download
+                            a dump.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.is_quiet = is_quiet
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.connections = connections
+
+    def get_path(self, url, extension):
+        """
+        Gets path of a file belonging to the dump of given url.
+        :param url: Url of the dump.
+        :param extension: Extension of the file, e.g. .dump or .json.
+        :return: File path.
+        """
+        key = hashlib.sha1(url).hexdigest()
+        return os.path.join(self.directory, key + extension)
+
+    def read_metadata(self, url):
+        """
+        Reads metadata of the cached dump of given url.
+        :param url: Url of the dump.
+        :return: Dictionary of metadata, which is empty, if the dump is
+                 not cached.
+        """
+        try:
+            with open(self.get_path(url, ".json"), "rb") as metadata_file:
+                metadata = json.load(metadata_file)
+        except (IOError, ValueError):
+            return {}
+
+        if metadata.get("url") != url:
+            return {}
+
+        return metadata
+
+    def write_metadata(self, url, metadata):
+        """
+        Replaces metadata of the cached dump of given url.
+        :param url: Url of the dump.
+        :param metadata: Dictionary of metadata.
+        """
+        metadata_path = self.get_path(url, ".json")
+        with open(metadata_path + ".part", "wb") as metadata_file:
+            json.dump(metadata, metadata_file)
+        os.rename(metadata_path + ".part", metadata_path)
+
+    def fetch(self, url, progress_message="Downloading...{0}"):
+        """
+        Gets dump of given url. It is downloaded, if it is not cached yet
+        or was changed since it was cached.
+        :param url: Url of the dump.
+        :param progress_message: Message that shown on progress updates.
+        :return: Tuple of path and size of the cached dump.
+        """
+        return downloadutils.retry(lambda: self.download(url, progress_message),
+                                   self.max_attempts, self.backoff_seconds,
+                                   self.is_quiet)
+
+    def download(self, url, progress_message):
+        """
+        Makes a single attempt to bring the cached dump of given url up to
+        date. A partial download of a previous attempt is resumed.
+        :param url: Url of the dump.
+        :param progress_message: Message that shown on progress updates.
+        :return: Tuple of path and size of the cached dump.
+        """
+        metadata = self.read_metadata(url)
+        dump_path = self.get_path(url, ".dump")
+        part_path = self.get_path(url, ".part")
+        validator = metadata.get("etag") or metadata.get("last_modified")
+
+        headers = {}
+        offset = 0
+        if metadata.get("complete") and os.path.exists(dump_path):
+            if metadata.get("etag"):
+                headers["If-None-Match"] = metadata["etag"]
+            if metadata.get("last_modified"):
+                headers["If-Modified-Since"] = metadata["last_modified"]
+        elif validator and os.path.exists(part_path):
+            if metadata.get("segments"):
+                offset = metadata["segments"][0][0]
+            else:
+                offset = os.path.getsize(part_path)
+            headers["Range"] = "bytes={0}-".format(offset)
+            headers["If-Range"] = validator
+
+        try:
+            response = downloadutils.open_url(url, headers, (200, 206))
+        except DownloadError as e:
+            if e.status_code == 304:
+                if not self.is_quiet:
+                    print "Dump was not modified, using cached file"
+                return dump_path, os.path.getsize(dump_path)
+            elif e.status_code == 416 and offset > 0:
+                # Partial file does not match the dump, start from scratch
+                os.remove(part_path)
+                raise DownloadError(message="Partial download is invalid")
+            raise
+
+        try:
+            if response.getcode() == 206:
+                content_range = downloadutils.get_content_range(response)
+                if content_range is None or content_range[0] != offset:
+                    os.remove(part_path)
+                    raise DownloadError(message="Unexpected content range of resumed download")
+                total_bytes = content_range[2]
+            else:
+                offset = 0
+                total_bytes = downloadutils.get_content_length(response)
+                metadata = {
+                    "url": url,
+                    "etag": response.info().getheader("ETag"),
+                    "last_modified": response.info().getheader("Last-Modified"),
+                    "complete": False
+                }
+                if (self.connections > 1 and total_bytes and
+                        downloadutils.get_validator(response) and
+                        downloadutils.supports_ranges(response)):
+                    segments = SegmentedDownload.split(total_bytes, self.connections)
+                    if len(segments) > 1:
+                        metadata["segments"] = segments
+                self.write_metadata(url, metadata)
+                with open(part_path, "wb") as part_file:
+                    if metadata.get("segments"):
+                        part_file.truncate(total_bytes)
+
+            if metadata.get("segments"):
+                response.close()
+                size = self.download_segments(url, part_path, total_bytes,
+                                              metadata, progress_message)
+            else:
+                with open(part_path, "ab") as part_file:
+                    size = self.copy_response(response, part_file, offset,
+                                              total_bytes, progress_message)
+        finally:
+            response.close()
+
+        if total_bytes is not None and size != total_bytes:
+            raise DownloadError(message="Download ended after {0} of {1} bytes".format(
+                size, total_bytes))
+
+        os.rename(part_path, dump_path)
+        metadata.pop("segments", None)
+        metadata["complete"] = True
+        self.write_metadata(url, metadata)
+
+        return dump_path, size
+
+    def copy_response(self, response, part_file, offset, total_bytes,
+                      progress_message):
+        """
+        Appends body of a response to the partial file.
+        :param response: Response object.
+        :param part_file: Partial file positioned at given offset.
+        :param offset: Number of bytes, that were already downloaded.
+        :param total_bytes: Total length of the dump or None if unknown.
+        :param progress_message: Message that shown on progress updates.
+        :return: Size of the partial file.
+        """
+        progress_reporter = ProgressReporter(progress_message, total_bytes,
+                                             is_quiet=self.is_quiet,
+                                             start_position=offset)
+        size = offset
+        while True:
+            download_buffer = response.read(downloadutils.DOWNLOAD_BUFFER_SIZE)
+            if not download_buffer:
+                break
+
+            part_file.write(download_buffer)
+            size += len(download_buffer)
+            progress_reporter.advance(bytes_count=len(download_buffer))
+        progress_reporter.finish()
+
+        return size
+
+    def download_segments(self, url, part_path, total_bytes, metadata,
+                          progress_message):
+        """
+        Downloads remaining segments of a dump over concurrent connections.
+        Segments, that are still missing after a failure, are stored in the
+        metadata.
+        :param url: Url of the dump.
+        :param part_path: Path of the preallocated partial file.
+        :param total_bytes: Size of the dump.
+        :param metadata: Dictionary of metadata containing the segments.
+        :param progress_message: Message that shown on progress updates.
+        :return: Size of the partial file.
+        """
+        with open(part_path, "r+b") as part_file:
+            segmented_download = SegmentedDownload(
+                url, part_file, total_bytes, metadata["segments"],
+                metadata.get("etag") or metadata.get("last_modified"),
+                self.is_quiet, progress_message, self.max_attempts,
+                self.backoff_seconds)
+            try:
+                segmented_download.run()
+            finally:
+                metadata["segments"] = segmented_download.get_remaining_segments()
+                self.write_metadata(url, metadata)
+
+            return part_file.tell()
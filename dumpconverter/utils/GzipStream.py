@@ -0,0 +1,74 @@
+"""Contains file-like class for decompressing gzip streams."""
+import zlib
+
+from dumpconverter.utils.ReadBuffer import ReadBuffer
+
+
+class GzipStream:
+    """
+    Read-only file-like object, that decompresses gzip data from another
+    file object. Unlike GzipFile, the underlying file object does not need
+    to be seekable, so that it can be used for data that is still being
+    downloaded. Files with multiple gzip members are supported.
+    """
+    CHUNK_SIZE = 65536
+    GZIP_MAGIC = "\037\213"
+
+    def __init__(self, fileobj, chunk_size=CHUNK_SIZE):
+        """
+        Creates new GzipStream instance.
+        :param fileobj: File object containing gzip compressed data.
+        :param chunk_size: Number of compressed bytes read at once.
+        """
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.decompressor = self.create_decompressor()
+        self.buffer = ReadBuffer()
+        self.is_eof = False
+
+    @staticmethod
+    def create_decompressor():
+        """
+        Creates decompressor for a single gzip member.
+        :return: Decompressor object.
+        """
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decompress(self, data):
+        """
+        Decompresses given data, that may span multiple gzip members.
+        :param data: Compressed data.
+        :return: Decompressed data.
+        """
+        result = self.decompressor.decompress(data)
+        while self.decompressor.unused_data:
+            unused_data = self.decompressor.unused_data
+            if not unused_data.startswith(self.GZIP_MAGIC[:len(unused_data)]):
+                # Ignore trailing garbage like zero padding
+                break
+            self.decompressor = self.create_decompressor()
+            result += self.decompressor.decompress(unused_data)
+
+        return result
+
+    def read(self, size=-1):
+        """
+        Reads decompressed bytes.
+        :param size: Maximum number of bytes or -1 to read until the end.
+        :return: Decompressed bytes.
+        """
+        while not self.is_eof and (size < 0 or len(self.buffer) < size):
+            data = self.fileobj.read(self.chunk_size)
+            if data:
+                self.buffer.append(self.decompress(data))
+            else:
+                self.buffer.append(self.decompressor.flush())
+                self.is_eof = True
+
+        return self.buffer.read(size)
+
+    def close(self):
+        """
+        Closes the underlying file object.
+        """
+        self.fileobj.close()
@@ -0,0 +1,133 @@
+"""Contains class for throttled progress output of long running processes."""
+import time
+
+from dumpconverter.utils import consoleutils
+
+
+class ProgressReporter:
+    """
+    Reports progress of an I/O process to the console. Updates are
+    throttled by count and time, so that frequent calls of advance are
+    cheap and do not slow down the process.
+    """
+    def __init__(self, message, total_bytes=None, position_function=None,
+                 is_quiet=False, min_interval=0.5, check_interval=1,
+                 clock=time.time, start_position=0):
+        """
+        Creates new ProgressReporter instance.
+        :param message: Message that shown on progress updates.
+        :param total_bytes: Number of total bytes or None if unknown.
+        :param position_function: Function returning the number of processed
+                                  bytes. If None, bytes passed to advance
+                                  are counted instead.
+        :param is_quiet: If set to True, console output will be suppressed.
+        :param min_interval: Minimum number of seconds between two updates.
+        :param check_interval: Number of calls of advance between two checks
+                               of the clock.
+        :param clock: Function returning the current time in seconds.
+        :param start_position: Number of bytes, that were processed before,
+                               e.g. by an interrupted download. They count
+                               towards the progress, but not the rate.
+        """
+        self.message = message
+        self.total_bytes = total_bytes
+        self.position_function = position_function
+        self.is_quiet = is_quiet
+        self.min_interval = min_interval
+        self.check_interval = check_interval
+        self.clock = clock
+        self.start_position = start_position
+        self.details_functions = []
+
+        self.records = 0
+        self.bytes = 0
+        self.pending_calls = 0
+        self.start_time = clock()
+        self.last_report_time = self.start_time
+
+    def add_details(self, details_function):
+        """
+        Adds function, whose result is appended to each status, e.g. to
+        show memory usage. It is only called, when the status is built.
+        :param details_function: Function returning a text or None.
+        """
+        self.details_functions.append(details_function)
+
+    def advance(self, records=0, bytes_count=0):
+        """
+        Adds processed records and bytes and updates console output, if
+        the last update is long enough ago.
+        :param records: Number of processed records.
+        :param bytes_count: Number of processed bytes.
+        """
+        self.records += records
+        self.bytes += bytes_count
+        self.pending_calls += 1
+        if self.pending_calls < self.check_interval:
+            return
+        self.pending_calls = 0
+
+        now = self.clock()
+        if now - self.last_report_time >= self.min_interval:
+            self.last_report_time = now
+            self.report(now)
+
+    def get_position(self):
+        """
+        Gets number of processed bytes.
+        :return: Number of processed bytes.
+        """
+        if self.position_function is not None:
+            return self.position_function()
+
+        return self.start_position + self.bytes
+
+    def get_status(self, now=None):
+        """
+        Builds status text containing progress, rates and estimated time
+        of arrival.
+        :param now: Current time in seconds.
+        :return: Status text.
+        """
+        if now is None:
+            now = self.clock()
+        elapsed = now - self.start_time
+        position = self.get_position()
+
+        if self.total_bytes:
+            progress = float(position) / self.total_bytes * 100
+            status = [self.message.format(str(round(progress, 2)) + "%")]
+        else:
+            status = [self.message.format(consoleutils.format_bytes(position))]
+
+        if elapsed > 0:
+            if self.records:
+                status.append("{0:.0f} records/s".format(self.records / elapsed))
+            byte_rate = (position - self.start_position) / elapsed
+            status.append("{0}/s".format(consoleutils.format_bytes(byte_rate)))
+            if self.total_bytes and byte_rate > 0:
+                remaining = max(self.total_bytes - position, 0) / byte_rate
+                status.append("ETA {0}".format(consoleutils.format_duration(remaining)))
+
+        for details_function in self.details_functions:
+            details = details_function()
+            if details:
+                status.append(details)
+
+        return " | ".join(status)
+
+    def report(self, now=None):
+        """
+        Writes current status to console.
+        :param now: Current time in seconds.
+        """
+        if not self.is_quiet:
+            consoleutils.print_status(self.get_status(now))
+
+    def finish(self):
+        """
+        Writes final status to console and moves to next line.
+        """
+        if not self.is_quiet:
+            self.report()
+            print
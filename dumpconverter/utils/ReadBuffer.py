@@ -0,0 +1,55 @@
+"""Contains class for buffering bytes between producer and reader."""
+
+
+class ReadBuffer:
+    """
+    Buffer of bytes, that are appended in chunks and read in arbitrary
+    sizes. Bytes are kept in a bytearray with a read position instead of
+    being copied on every read, consumed bytes are only removed once the
+    read position passes the middle of the buffer. Thus appending and
+    reading take time linear in the number of bytes regardless of the
+    sizes of chunks and reads.
+    """
+
+    def __init__(self):
+        """
+        Creates new empty ReadBuffer instance.
+        """
+        self.data = bytearray()
+        self.offset = 0
+
+    def __len__(self):
+        """
+        Gets number of bytes, that were not read yet.
+        :return: Number of unread bytes.
+        """
+        return len(self.data) - self.offset
+
+    def append(self, chunk):
+        """
+        Appends bytes to the end of the buffer.
+        :param chunk: Bytes to append.
+        """
+        self.data += chunk
+
+    def read(self, size=-1):
+        """
+        Reads bytes from the start of the buffer.
+        :param size: Maximum number of bytes or -1 to read all bytes.
+        :return: Read bytes.
+        """
+        if size < 0:
+            end = len(self.data)
+        else:
+            end = min(self.offset + size, len(self.data))
+        data = str(self.data[self.offset:end])
+        self.offset = end
+
+        if self.offset == len(self.data):
+            self.data = bytearray()
+            self.offset = 0
+        elif self.offset > len(self.data) // 2:
+            del self.data[:self.offset]
+            self.offset = 0
+
+        return data
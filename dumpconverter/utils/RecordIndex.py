@@ -0,0 +1,172 @@
+"""Contains class for looking up records of a previous conversion."""
+import hashlib
+import mmap
+import os
+import struct
+
+
+class RecordIndex:
+    """
+    Index of the records of a previous conversion, which maps the id of a
+    record to the hash of its content and the rows, that were written for
+    it. The index is a hash table with open addressing in a file, which is
+    memory-mapped instead of being loaded, so that lookups do not require
+    memory proportional to the number of records.
+
+    The index file starts with a header, followed by slots of fixed size.
+    Each slot contains the first bytes of the SHA-1 hash of a record id,
+    the content hash of the record and the position of the record in the
+    data file. The data file contains the record id followed by the rows
+    of the record. Empty slots have an id length of zero.
+    """
+    # Magic number, number of slots and fingerprint of the mapping
+    HEADER_FORMAT = "<4sQ8s"
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    MAGIC = "DCRI"
+    # Id key, content hash, offset in data file, id length and rows length
+    SLOT_FORMAT = "<8s8sQHI"
+    SLOT_SIZE = struct.calcsize(SLOT_FORMAT)
+
+    def __init__(self, index_path, data_path, fingerprint):
+        """
+        Opens index of a previous conversion.
+        :param index_path: Path of the index file.
+        :param data_path: Path of the data file.
+        :param fingerprint: Fingerprint of the mapping, which the index must
+                            have been created with.
+        """
+        self.index_file = open(index_path, "rb")
+        self.data_file = open(data_path, "rb")
+        self.data = ""
+        self.index = mmap.mmap(self.index_file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+        magic, self.slot_count, index_fingerprint = struct.unpack_from(
+            self.HEADER_FORMAT, self.index)
+        if magic != self.MAGIC:
+            self.close()
+            raise ValueError("'{0}' is not a record index".format(index_path))
+        self.is_compatible = index_fingerprint == fingerprint
+
+        if os.fstat(self.data_file.fileno()).st_size > 0:
+            self.data = mmap.mmap(self.data_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        self.seen_slots = bytearray(self.slot_count)
+
+    @classmethod
+    def open(cls, index_path, data_path, fingerprint):
+        """
+        Opens index of a previous conversion, if it exists and was created
+        with the same mapping.
+        :param index_path: Path of the index file.
+        :param data_path: Path of the data file.
+        :param fingerprint: Fingerprint of the current mapping.
+        :return: RecordIndex instance or None.
+        """
+        if not os.path.exists(index_path) or not os.path.exists(data_path):
+            return None
+
+        record_index = cls(index_path, data_path, fingerprint)
+        if not record_index.is_compatible:
+            record_index.close()
+            return None
+
+        return record_index
+
+    @staticmethod
+    def get_id_key(record_id):
+        """
+        Gets key of a record id, which determines its slot.
+        :param record_id: Id of the record.
+        :return: Key as string of 8 bytes.
+        """
+        return hashlib.sha1(record_id).digest()[:8]
+
+    @staticmethod
+    def get_start_slot(id_key, slot_count):
+        """
+        Gets first slot, in which a key is searched.
+        :param id_key: Key of a record id.
+        :param slot_count: Number of slots, which is a power of two.
+        :return: Index of the slot.
+        """
+        return struct.unpack("<Q", id_key)[0] & (slot_count - 1)
+
+    def find(self, record_id):
+        """
+        Finds slot of a record.
+        :param record_id: Id of the record.
+        :return: Index of the slot or None, if the record is not indexed.
+        """
+        if self.slot_count == 0:
+            return None
+
+        id_key = self.get_id_key(record_id)
+        slot = self.get_start_slot(id_key, self.slot_count)
+        for _ in xrange(self.slot_count):
+            slot_key, _, offset, id_length, _ = self.read_slot(slot)
+            if id_length == 0:
+                return None
+            if (slot_key == id_key and
+                    self.data[offset:offset + id_length] == record_id):
+                return slot
+            slot = (slot + 1) & (self.slot_count - 1)
+
+        return None
+
+    def read_slot(self, slot):
+        """
+        Reads content of a slot.
+        :param slot: Index of the slot.
+        :return: Tuple of id key, content hash, offset, id length and
+                 rows length.
+        """
+        return struct.unpack_from(self.SLOT_FORMAT, self.index,
+                                  self.HEADER_SIZE + slot * self.SLOT_SIZE)
+
+    def get_content_hash(self, slot):
+        """
+        Gets content hash of the record in given slot.
+        :param slot: Index of the slot.
+        :return: Content hash.
+        """
+        return self.read_slot(slot)[1]
+
+    def read_rows(self, slot):
+        """
+        Reads rows, that were written for the record in given slot.
+        :param slot: Index of the slot.
+        :return: Rows as serialized csv.
+        """
+        _, _, offset, id_length, rows_length = self.read_slot(slot)
+        rows_offset = offset + id_length
+
+        return self.data[rows_offset:rows_offset + rows_length]
+
+    def mark_seen(self, slot):
+        """
+        Marks record in given slot as seen in the current dump.
+        :param slot: Index of the slot.
+        """
+        self.seen_slots[slot] = 1
+
+    def get_unseen_ids(self):
+        """
+        Generator that yields ids of records, which were not marked as seen,
+        i.e. records removed since the previous conversion.
+        :return: Record ids.
+        """
+        for slot in xrange(self.slot_count):
+            if not self.seen_slots[slot]:
+                _, _, offset, id_length, _ = self.read_slot(slot)
+                if id_length > 0:
+                    yield self.data[offset:offset + id_length]
+
+    def close(self):
+        """
+        Closes index and data file.
+        """
+        if hasattr(self.data, "close"):
+            self.data.close()
+        self.index.close()
+        self.data_file.close()
+        self.index_file.close()
@@ -0,0 +1,189 @@
+"""Contains class for downloading files over several connections."""
+import threading
+
+from dumpconverter.exceptions.DownloadError import DownloadError
+from dumpconverter.utils import downloadutils
+from dumpconverter.utils.ProgressReporter import ProgressReporter
+
+
+class SegmentedDownload:
+    """
+    Downloads a file in byte ranges over concurrent connections, which
+    speeds up downloads from servers throttling single connections. Each
+    thread requests one segment and writes it to its position in the
+    preallocated destination file. Failed segments are retried from their
+    last written byte.
+
+    Segments are lists of the next byte to download and the end of the
+    segment, so that the remaining segments of an interrupted download can
+    be stored and resumed later.
+    """
+    CHUNK_SIZE = 65536
+    # Files are not split into segments smaller than this
+    MIN_SEGMENT_SIZE = 1024 * 1024
+
+    def __init__(self, url, destination_file, total_bytes, segments,
+                 validator=None, is_quiet=False,
+                 progress_message="Downloading...{0}",
+                 max_attempts=downloadutils.MAX_ATTEMPTS,
+                 backoff_seconds=downloadutils.BACKOFF_SECONDS):
+        """
+        Creates new SegmentedDownload instance.
+        :param url: Url of the file that should be downloaded.
+        :param destination_file: Seekable file, in which downloaded file
+                                 should be written. Must already have the
+                                 size of the downloaded file.
+        :param total_bytes: Size of the downloaded file.
+        :param segments: List of segments, that should be downloaded.
+        :param validator: ETag or Last-Modified header of the file. If set,
+                          the download fails, when the file is changed.
+        :param is_quiet: If set to True, console output will be suppressed.
+        :param progress_message: Message that shown on progress updates.
+        :param max_attempts: Number of attempts of a segment, before the
+                             download is aborted.
+        :param backoff_seconds: Delay before the first retry in seconds.
+        """
+        self.url = url
+        self.destination_file = destination_file
+        self.total_bytes = total_bytes
+        self.segments = [list(segment) for segment in segments]
+        self.validator = validator
+        self.is_quiet = is_quiet
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lock = threading.Lock()
+        self.errors = []
+
+        remaining_bytes = sum(end - position for position, end in self.segments)
+        self.progress_reporter = ProgressReporter(
+            "{0} | {1} connections".format(progress_message, len(self.segments)),
+            total_bytes,
+            is_quiet=is_quiet,
+            start_position=total_bytes - remaining_bytes)
+
+    @classmethod
+    def split(cls, total_bytes, connections):
+        """
+        Splits a file into segments of equal size.
+        :param total_bytes: Size of the file.
+        :param connections: Number of segments, that should be created at
+                            most.
+        :return: List of segments.
+        """
+        count = max(1, min(connections, total_bytes // cls.MIN_SEGMENT_SIZE))
+        bounds = [total_bytes * index // count for index in xrange(count + 1)]
+
+        return [[bounds[index], bounds[index + 1]] for index in xrange(count)]
+
+    @classmethod
+    def download_file(cls, url, destination_file, connections, is_quiet=False,
+                      progress_message="Downloading...{0}"):
+        """
+        Downloads file specified by url to given file object over several
+        connections. If the server does not accept range requests or the
+        file is too small, it is downloaded over a single connection.
+        :param url: Url of the file that should be downloaded.
+        :param destination_file: File, in which downloaded file should be written.
+        :param connections: Number of connections used at most.
+        :param is_quiet: If set to True, console output will be suppressed.
+        :param progress_message: Message that shown on progress updates.
+        :return: Size of downloaded file.
+        """
+        response = downloadutils.open_url(url)
+        total_bytes = downloadutils.get_content_length(response)
+        if not total_bytes or not downloadutils.supports_ranges(response):
+            return downloadutils.write_response(response, destination_file,
+                                                is_quiet, progress_message)
+
+        segments = cls.split(total_bytes, connections)
+        if len(segments) < 2:
+            return downloadutils.write_response(response, destination_file,
+                                                is_quiet, progress_message)
+
+        validator = downloadutils.get_validator(response)
+        response.close()
+
+        destination_file.truncate(total_bytes)
+        segmented_download = cls(url, destination_file, total_bytes, segments,
+                                 validator, is_quiet, progress_message)
+        segmented_download.run()
+        destination_file.flush()
+        destination_file.seek(0)
+
+        return total_bytes
+
+    def run(self):
+        """
+        Downloads all segments concurrently and waits until they are
+        complete. Afterwards the size of the file is verified.
+        """
+        threads = []
+        for segment in self.get_remaining_segments():
+            thread = threading.Thread(target=self.download_segment,
+                                      args=(segment,))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        if self.errors:
+            raise self.errors[0]
+        self.progress_reporter.finish()
+
+        missing_bytes = sum(end - position for position, end
+                            in self.get_remaining_segments())
+        self.destination_file.seek(0, 2)
+        if missing_bytes > 0 or self.destination_file.tell() != self.total_bytes:
+            raise DownloadError(message="Download has {0} of {1} bytes".format(
+                self.destination_file.tell() - missing_bytes, self.total_bytes))
+
+    def download_segment(self, segment):
+        """
+        Downloads a segment, retrying failed attempts. Errors are collected
+        and raised by run.
+        :param segment: Segment, that should be downloaded.
+        """
+        try:
+            downloadutils.retry(lambda: self.fetch_segment(segment),
+                                self.max_attempts, self.backoff_seconds,
+                                self.is_quiet)
+        except Exception as exception:
+            self.errors.append(exception)
+
+    def fetch_segment(self, segment):
+        """
+        Makes a single attempt to download the remainder of a segment.
+        :param segment: Segment, that should be downloaded.
+        """
+        position, end = segment
+        headers = {"Range": "bytes={0}-{1}".format(position, end - 1)}
+        if self.validator:
+            headers["If-Range"] = self.validator
+        response = downloadutils.open_url(self.url, headers, (206,))
+
+        try:
+            content_range = downloadutils.get_content_range(response)
+            if content_range is None or content_range[0] != position:
+                raise DownloadError(206, "Unexpected content range of segment")
+
+            while segment[0] < end:
+                chunk = response.read(min(self.CHUNK_SIZE, end - segment[0]))
+                if not chunk:
+                    raise DownloadError(message="Segment ended at byte {0} instead of {1}".format(
+                        segment[0], end))
+
+                with self.lock:
+                    self.destination_file.seek(segment[0])
+                    self.destination_file.write(chunk)
+                    segment[0] += len(chunk)
+                    self.progress_reporter.advance(bytes_count=len(chunk))
+        finally:
+            response.close()
+
+    def get_remaining_segments(self):
+        """
+        Gets segments, that were not downloaded completely.
+        :return: List of segments.
+        """
+        return [segment for segment in self.segments if segment[0] < segment[1]]
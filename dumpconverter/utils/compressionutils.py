@@ -0,0 +1,105 @@
+"""Contains helper methods for writing compressed files."""
+import bz2
+import gzip
+import os
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# File extensions and the compressions, they stand for
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd"
+}
+# Compression levels used, if none is specified
+DEFAULT_COMPRESSION_LEVELS = {
+    "gzip": 6,
+    "bz2": 9,
+    "xz": 6,
+    "zstd": 3
+}
+
+
+def get_available_compressions():
+    """
+    Gets compressions, that are supported by the installed modules.
+    :return: List of names of compressions.
+    """
+    compressions = ["gzip", "bz2"]
+    if lzma is not None:
+        compressions.append("xz")
+    if zstandard is not None:
+        compressions.append("zstd")
+
+    return compressions
+
+
+def get_compression(path):
+    """
+    Gets compression indicated by the extension of a given file path.
+    :param path: File path.
+    :return: Name of compression or None, if file is not compressed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    return COMPRESSION_EXTENSIONS.get(extension)
+
+
+def open_compressed_file(path, compression, level=None):
+    """
+    Opens file, whose content is compressed while it is written.
+    :param path: File path.
+    :param compression: Name of compression.
+    :param level: Compression level or None for the default level.
+    :return: Writable file object.
+    """
+    if compression not in get_available_compressions():
+        raise ValueError("Compression '{0}' is not available".format(compression))
+    if level is None:
+        level = DEFAULT_COMPRESSION_LEVELS[compression]
+
+    if compression == "gzip":
+        return gzip.GzipFile(path, "wb", level)
+    elif compression == "bz2":
+        return bz2.BZ2File(path, "wb", compresslevel=level)
+    elif compression == "xz":
+        return lzma.LZMAFile(path, "wb", preset=level)
+    else:
+        compressor = zstandard.ZstdCompressor(level=level)
+        return compressor.stream_writer(open(path, "wb"))
+
+
+def open_decompressed_file(path):
+    """
+    Opens file for reading and decompresses its content according to the
+    extension of the path.
+    :param path: File path.
+    :return: Readable file object.
+    """
+    compression = get_compression(path)
+    if compression is not None and compression not in get_available_compressions():
+        raise ValueError("Compression '{0}' is not available".format(compression))
+
+    if compression == "gzip":
+        return gzip.GzipFile(path, "rb")
+    elif compression == "bz2":
+        return bz2.BZ2File(path, "rb")
+    elif compression == "xz":
+        return lzma.LZMAFile(path, "rb")
+    elif compression == "zstd":
+        decompressor = zstandard.ZstdDecompressor()
+        return decompressor.stream_reader(open(path, "rb"))
+    else:
+        return open(path, "rb")
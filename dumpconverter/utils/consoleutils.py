@@ -16,6 +16,14 @@ def print_progress(message, current_bytes, total_bytes=None):
     else:
         message = message.format(format_bytes(current_bytes))
 
+    print_status(message)
+
+
+def print_status(message):
+    """
+    Overwrites current console line with given message.
+    :param message: Message that should be shown.
+    """
     sys.stdout.write("\r\033[K")
     sys.stdout.write(message)
     sys.stdout.flush()
@@ -30,10 +38,22 @@ def format_bytes(bytes_count, precision=2):
     """
     if bytes_count > 0:
         units = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
-        exponent = int(math.floor(math.log(bytes_count, 1024)))
+        exponent = max(int(math.floor(math.log(bytes_count, 1024))), 0)
         power = math.pow(1024, exponent)
         converted = round(bytes_count / power, precision)
         if converted > 0:
             return '%s %s' % (converted, units[exponent])
 
     return '0 B'
+
+
+def format_duration(seconds):
+    """
+    Formats number of seconds to string following the schema "h:mm:ss".
+    :param seconds: Number of seconds.
+    :return: Formatted string.
+    """
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    return "{0}:{1:02d}:{2:02d}".format(hours, minutes, seconds)
@@ -1,11 +1,22 @@
 """Contains helper methods for downloading files."""
+import httplib
+import re
+import socket
+import time
 import urllib2
 
 from dumpconverter.exceptions import DownloadError
-from dumpconverter.utils import consoleutils
+from dumpconverter.utils.DownloadStream import DownloadStream
+from dumpconverter.utils.ProgressReporter import ProgressReporter
 
 DOWNLOAD_TIMEOUT = 10
 DOWNLOAD_BUFFER_SIZE = 8192
+# Number of attempts and delay before the first retry of failed downloads
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 1
+# Status codes of errors, that are likely temporary
+RETRYABLE_STATUS_CODES = (408, 429, 502, 503, 504)
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
 
 
 def download_file(url, destination_file,
@@ -18,40 +29,78 @@ def download_file(url, destination_file,
     :param progress_message: Message that shown on progress updates.
     :return: Size of downloaded file.
     """
-    try:
-        response = urllib2.urlopen(url, timeout=DOWNLOAD_TIMEOUT)
-    except urllib2.URLError as exception:
-        raise DownloadError.DownloadError(message=exception.reason)
+    return write_response(open_url(url), destination_file, is_quiet,
+                          progress_message)
 
-    status_code = response.getcode()
-    if status_code == 200:
-        downloaded_bytes = 0
-        total_bytes = get_content_length(response)
 
-        while True:
-            download_buffer = response.read(DOWNLOAD_BUFFER_SIZE)
-            if not download_buffer:
-                break
+def write_response(response, destination_file,
+                   is_quiet=False, progress_message="Downloading...{0}"):
+    """
+    Writes body of a response to given file object.
+    :param response: Response object.
+    :param destination_file: File, in which downloaded file should be written.
+    :param is_quiet: If set to True, console output will be suppressed.
+    :param progress_message: Message that shown on progress updates.
+    :return: Size of downloaded file.
+    """
+    downloaded_bytes = 0
+    total_bytes = get_content_length(response)
+    progress_reporter = ProgressReporter(progress_message, total_bytes,
+                                         is_quiet=is_quiet)
 
-            downloaded_bytes += len(download_buffer)
-            destination_file.write(download_buffer)
+    while True:
+        download_buffer = response.read(DOWNLOAD_BUFFER_SIZE)
+        if not download_buffer:
+            break
 
-            if not is_quiet:
-                consoleutils.print_progress(progress_message,
-                                            downloaded_bytes, total_bytes)
+        downloaded_bytes += len(download_buffer)
+        destination_file.write(download_buffer)
+        progress_reporter.advance(bytes_count=len(download_buffer))
 
-        destination_file.flush()
-        destination_file.seek(0)
+    destination_file.flush()
+    destination_file.seek(0)
+    progress_reporter.finish()
 
-        # Write new line to console to overwrite progress
-        if not is_quiet:
-            print
+    return downloaded_bytes
 
-        return downloaded_bytes
-    else:
+
+def open_stream(url, cache_file=None):
+    """
+    Starts download of file specified by url, whose content can be read
+    while it is downloaded.
+    :param url: Url of the file that should be downloaded.
+    :param cache_file: File, in which downloaded bytes should be written.
+    :return: DownloadStream of the file.
+    """
+    response = open_url(url)
+    return DownloadStream(response, get_content_length(response), cache_file)
+
+
+def open_url(url, headers=None, accepted_status_codes=(200,)):
+    """
+    Opens given url and checks status code of the response.
+    :param url: Url that should be opened.
+    :param headers: Dictionary of additional request headers.
+    :param accepted_status_codes: Status codes of successful responses.
+    :return: Response object.
+    """
+    request = urllib2.Request(url, headers=headers or {})
+    try:
+        response = urllib2.urlopen(request, timeout=DOWNLOAD_TIMEOUT)
+    except urllib2.HTTPError as exception:
+        message = "HTTP response returned status code " + str(exception.code)
+        raise DownloadError.DownloadError(exception.code, message)
+    except urllib2.URLError as exception:
+        raise DownloadError.DownloadError(message=exception.reason)
+
+    status_code = response.getcode()
+    if status_code not in accepted_status_codes:
+        response.close()
         message = "HTTP response returned status code " + str(status_code)
         raise DownloadError.DownloadError(status_code, message)
 
+    return response
+
 
 def get_content_length(response):
     """
@@ -63,3 +112,90 @@ def get_content_length(response):
     content_length = meta.getheaders("Content-Length")
     if len(content_length) > 0:
         return int(content_length[0])
+
+
+def supports_ranges(response):
+    """
+    Checks, whether the server of a given response accepts range requests.
+    :param response: Response object.
+    :return: True, if byte ranges can be requested.
+    """
+    accept_ranges = response.info().getheader("Accept-Ranges", "")
+    return "bytes" in accept_ranges.lower().split(",")
+
+
+def get_validator(response):
+    """
+    Gets validator of a given response, which identifies the version of
+    the requested file, for conditional requests.
+    :param response: Response object.
+    :return: ETag or Last-Modified header or None if not present.
+    """
+    meta = response.info()
+    return meta.getheader("ETag") or meta.getheader("Last-Modified")
+
+
+def get_content_range(response):
+    """
+    Extracts the content range of a given partial response.
+    :param response: Response object.
+    :return: Tuple of first byte, last byte and total length, which is None
+             if unknown, or None if the response has no valid content range.
+    """
+    content_range = response.info().getheader("Content-Range", "")
+    match = CONTENT_RANGE_PATTERN.match(content_range.strip())
+    if match is None:
+        return None
+
+    first_byte, last_byte, total_bytes = match.groups()
+    if total_bytes == "*":
+        total_bytes = None
+    else:
+        total_bytes = int(total_bytes)
+
+    return int(first_byte), int(last_byte), total_bytes
+
+
+def is_retryable(exception):
+    """
+    Checks, whether a failed download is worth another attempt, i.e.
+    whether it failed because of network problems or a temporary server
+    error.
+    :param exception: Exception raised by the download.
+    :return: True, if the download should be retried.
+    """
+    if isinstance(exception, DownloadError.DownloadError):
+        return (exception.status_code is None or
+                exception.status_code in RETRYABLE_STATUS_CODES)
+
+    return isinstance(exception, (socket.error, httplib.HTTPException))
+
+
+def retry(function, max_attempts=MAX_ATTEMPTS, backoff_seconds=BACKOFF_SECONDS,
+          is_quiet=False, sleep=time.sleep):
+    """
+    Calls a download function until it succeeds. Attempts, that failed
+    because of retryable errors, are repeated with exponentially growing
+    delays.
+    :param function: Function without arguments, that downloads something.
+    :param max_attempts: Number of attempts, before the error is raised.
+    :param backoff_seconds: Delay before the first retry in seconds.
+    :param is_quiet: If set to True, console output will be suppressed.
+    :param sleep: Function waiting for a given number of seconds.
+    :return: Result of the function.
+    """
+    attempt = 1
+    while True:
+        try:
+            return function()
+        except (DownloadError.DownloadError, socket.error,
+                httplib.HTTPException) as exception:
+            if attempt >= max_attempts or not is_retryable(exception):
+                raise
+
+            delay = backoff_seconds * 2 ** (attempt - 1)
+            if not is_quiet:
+                print "Download failed ({0}), retrying in {1} s".format(
+                    str(exception) or type(exception).__name__, delay)
+            sleep(delay)
+            attempt += 1
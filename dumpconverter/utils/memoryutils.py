@@ -0,0 +1,44 @@
+"""Contains helper methods for measuring memory usage."""
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# File of the proc filesystem containing memory usage of the own process
+STATM_PATH = "/proc/self/statm"
+
+
+def get_rss():
+    """
+    Gets current resident set size of this process. If it cannot be read
+    from the proc filesystem, the peak resident set size is used instead.
+    :return: Size in bytes or None if it is unknown.
+    """
+    if resource is None:
+        return None
+
+    try:
+        with open(STATM_PATH, "rb") as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+        return resident_pages * resource.getpagesize()
+    except (IOError, ValueError, IndexError):
+        return get_peak_rss()
+
+
+def get_peak_rss():
+    """
+    Gets the highest resident set size of this process so far.
+    :return: Size in bytes or None if it is unknown.
+    """
+    if resource is None:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, OS X bytes
+    if sys.platform == "darwin":
+        return peak_rss
+
+    return peak_rss * 1024
@@ -0,0 +1,119 @@
+"""Contains class for writing compressed files in a background thread."""
+import Queue
+import threading
+
+from dumpconverter.utils import compressionutils
+
+
+class CompressedFileWriter:
+    """
+    Writable file-like object, that compresses its content in a background
+    thread, so that the producer of the data is not blocked by the
+    compressor. Written data is collected into larger chunks, which are
+    passed to the thread through a bounded queue.
+    """
+    CHUNK_SIZE = 1024 * 1024
+    MAX_PENDING_CHUNKS = 16
+
+    def __init__(self, path, compression, level=None,
+                 chunk_size=CHUNK_SIZE, max_pending_chunks=MAX_PENDING_CHUNKS):
+        """
+        Creates new CompressedFileWriter instance.
+        :param path: Path of the output file.
+        :param compression: Name of compression, e.g. gzip.
+        :param level: Compression level or None for the default level.
+        :param chunk_size: Number of bytes collected before they are passed
+                           to the compression thread.
+        :param max_pending_chunks: Number of chunks waiting for compression
+                                   at most.
+        """
+        self.name = path
+        self.compressed_file = compressionutils.open_compressed_file(
+            path, compression, level)
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.chunks = Queue.Queue(max_pending_chunks)
+        self.error = None
+        self.is_closed = False
+
+        self.compression_thread = threading.Thread(target=self.compress_chunks)
+        self.compression_thread.daemon = True
+        self.compression_thread.start()
+
+    def compress_chunks(self):
+        """
+        Compresses chunks from the queue until None is received. After an
+        error, remaining chunks are discarded and the error is raised in
+        the producing thread.
+        """
+        while True:
+            chunk = self.chunks.get()
+            try:
+                if chunk is not None and self.error is None:
+                    self.compressed_file.write(chunk)
+            except Exception as exception:
+                self.error = exception
+            finally:
+                self.chunks.task_done()
+
+            if chunk is None:
+                break
+
+    def write(self, data):
+        """
+        Writes data to the file.
+        :param data: String that should be written.
+        """
+        self.buffer.append(data)
+        self.buffered_bytes += len(data)
+        if self.buffered_bytes >= self.chunk_size:
+            self.flush_buffer()
+
+    def flush_buffer(self):
+        """
+        Passes collected data to the compression thread.
+        """
+        self.raise_error()
+        if self.buffer:
+            self.chunks.put("".join(self.buffer))
+            self.buffer = []
+            self.buffered_bytes = 0
+
+    def flush(self):
+        """
+        Waits until all written data is compressed.
+        """
+        self.flush_buffer()
+        self.chunks.join()
+        self.raise_error()
+
+    def raise_error(self):
+        """
+        Raises error that occurred in the compression thread.
+        """
+        if self.error is not None:
+            raise IOError("Compression of '{0}' failed: {1}".format(
+                self.name, self.error))
+
+    def close(self):
+        """
+        Compresses remaining data and closes the file.
+        """
+        if self.is_closed:
+            return
+        self.is_closed = True
+
+        try:
+            self.flush_buffer()
+        finally:
+            self.chunks.put(None)
+            self.compression_thread.join()
+            self.compressed_file.close()
+        self.raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
@@ -0,0 +1,127 @@
+"""Contains class for writing indexes of converted records."""
+import mmap
+import os
+import struct
+from tempfile import TemporaryFile
+
+from dumpconverter.utils.RecordIndex import RecordIndex
+
+
+class RecordIndexWriter:
+    """
+    Writes index of converted records, which can be read by RecordIndex in
+    the next conversion. Records are appended to the data file, while
+    their slots are collected in a temporary file and inserted into the
+    hash table, once the number of records is known. Both files are
+    written under temporary names and renamed, when the index is closed.
+    """
+    # Maximal ratio of used slots of the hash table
+    MAX_LOAD_FACTOR = 0.75
+
+    def __init__(self, index_path, data_path, fingerprint):
+        """
+        Creates new RecordIndexWriter instance.
+        :param index_path: Path of the index file.
+        :param data_path: Path of the data file.
+        :param fingerprint: Fingerprint of the mapping, with which the
+                            records were converted.
+        """
+        self.index_path = index_path
+        self.data_path = data_path
+        self.fingerprint = fingerprint
+        self.data_file = open(data_path + ".part", "wb")
+        self.slots_file = TemporaryFile()
+        self.offset = 0
+        self.record_count = 0
+
+    def add(self, record_id, content_hash, rows_data):
+        """
+        Adds record to the index.
+        :param record_id: Id of the record.
+        :param content_hash: Hash of the content of the record.
+        :param rows_data: Rows, that were written for the record, as
+                          serialized csv.
+        """
+        self.data_file.write(record_id)
+        self.data_file.write(rows_data)
+        self.slots_file.write(struct.pack(RecordIndex.SLOT_FORMAT,
+                                          RecordIndex.get_id_key(record_id),
+                                          content_hash,
+                                          self.offset,
+                                          len(record_id),
+                                          len(rows_data)))
+        self.offset += len(record_id) + len(rows_data)
+        self.record_count += 1
+
+    def get_slot_count(self):
+        """
+        Gets number of slots of the hash table, which is a power of two.
+        :return: Number of slots.
+        """
+        if self.record_count == 0:
+            return 0
+
+        slot_count = 1
+        while slot_count * self.MAX_LOAD_FACTOR < self.record_count:
+            slot_count *= 2
+
+        return slot_count
+
+    def close(self):
+        """
+        Builds hash table of the collected records and renames index and
+        data file to their final names.
+        """
+        self.data_file.close()
+        slot_count = self.get_slot_count()
+        with open(self.index_path + ".part", "w+b") as index_file:
+            index_file.write(struct.pack(RecordIndex.HEADER_FORMAT,
+                                         RecordIndex.MAGIC, slot_count,
+                                         self.fingerprint))
+            if slot_count > 0:
+                index_file.truncate(RecordIndex.HEADER_SIZE +
+                                    slot_count * RecordIndex.SLOT_SIZE)
+                index_file.flush()
+                index = mmap.mmap(index_file.fileno(), 0)
+                try:
+                    self.insert_slots(index, slot_count)
+                finally:
+                    index.close()
+        self.slots_file.close()
+
+        os.rename(self.data_path + ".part", self.data_path)
+        os.rename(self.index_path + ".part", self.index_path)
+
+    def discard(self):
+        """
+        Closes the index without replacing the previous one.
+        """
+        self.data_file.close()
+        self.slots_file.close()
+        os.remove(self.data_path + ".part")
+
+    def insert_slots(self, index, slot_count):
+        """
+        Inserts collected slots into the hash table. Slots of records,
+        whose id was already inserted, are skipped.
+        :param index: Memory-mapped index file.
+        :param slot_count: Number of slots of the hash table.
+        """
+        self.slots_file.seek(0)
+        while True:
+            packed_slot = self.slots_file.read(RecordIndex.SLOT_SIZE)
+            if not packed_slot:
+                break
+
+            id_key = packed_slot[:8]
+            slot = RecordIndex.get_start_slot(id_key, slot_count)
+            while True:
+                position = RecordIndex.HEADER_SIZE + slot * RecordIndex.SLOT_SIZE
+                slot_key, _, _, id_length, _ = struct.unpack_from(
+                    RecordIndex.SLOT_FORMAT, index, position)
+                if id_length == 0:
+                    index[position:position + RecordIndex.SLOT_SIZE] = packed_slot
+                    break
+                if slot_key == id_key:
+                    break
+                slot = (slot + 1) & (slot_count - 1)
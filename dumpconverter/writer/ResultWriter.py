@@ -2,21 +2,46 @@
 import csv
 from datetime import datetime
 import json
+import shutil
+from StringIO import StringIO
+
+from dumpconverter.utils import compressionutils
+from dumpconverter.writer.CompressedFileWriter import CompressedFileWriter
 
 
 class ResultWriter:
     """
-    Contains writer for writing conversion result to csv files.
+    Contains writer for writing conversion result to csv files. This is
+    the default output and defines the interface of result writers, see
+    SqliteResultWriter for a writer loading results into a database.
     """
+    # Number of buffered external values, after which they are written
+    FLUSH_SIZE = 10000
+    # Buffer size of uncompressed output files in bytes
+    WRITE_BUFFER_SIZE = 1024 * 1024
 
-    def __init__(self, external_values_file, dump_information_file):
+    def __init__(self, external_values_file, dump_information_file,
+                 flush_size=FLUSH_SIZE, delta_file=None):
         """
         Creates new ResultWriter instance.
         :param external_values_file: File for output of external values.
         :param dump_information_file: File for output of metadata of the dump.
+        :param flush_size: Number of buffered external values, after which
+                           they are written to file.
+        :param delta_file: File for output of records, that were added,
+                           changed or removed since the previous conversion.
         """
+        self.external_values_file = external_values_file
+        self.dump_information_file = dump_information_file
+        self.delta_file = delta_file
         self.external_data_writer = csv.writer(external_values_file)
         self.dump_information_writer = csv.writer(dump_information_file)
+        if delta_file is not None:
+            self.delta_writer = csv.writer(delta_file)
+        else:
+            self.delta_writer = None
+        self.flush_size = flush_size
+        self.pending_rows = []
 
     def write_external_value(self, dump_id, external_id,
                              property_id, value):
@@ -33,8 +58,61 @@ class ResultWriter:
             property_id,
             value
         )
+        self.flush()
         self.external_data_writer.writerow(row)
 
+    def write_external_values(self, rows):
+        """
+        Writes multiple external values. Rows are buffered and written in
+        batches, call flush to write remaining rows.
+        :param rows: Iterable of tuples of dump id, external id, property id
+                     and value.
+        """
+        self.pending_rows.extend(rows)
+        if len(self.pending_rows) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes buffered external values to file.
+        """
+        if self.pending_rows:
+            self.external_data_writer.writerows(self.pending_rows)
+            self.pending_rows = []
+
+    @staticmethod
+    def serialize_external_values(rows):
+        """
+        Serializes external values in the same format, in which they are
+        written to file.
+        :param rows: Iterable of tuples of dump id, external id, property id
+                     and value.
+        :return: Rows as csv string.
+        """
+        serialized_rows = StringIO()
+        csv.writer(serialized_rows).writerows(rows)
+
+        return serialized_rows.getvalue()
+
+    def write_serialized_external_values(self, serialized_rows):
+        """
+        Writes external values, that were already serialized, e.g. rows
+        copied from a previous conversion.
+        :param serialized_rows: Rows as csv string.
+        """
+        self.flush()
+        self.external_values_file.write(serialized_rows)
+
+    def write_delta(self, dump_id, external_id, change):
+        """
+        Writes change of a record since the previous conversion.
+        :param dump_id: Id of the current dump.
+        :param external_id: Id of the external entity.
+        :param change: Kind of change (added, changed or removed).
+        """
+        if self.delta_writer is not None:
+            self.delta_writer.writerow((dump_id, external_id, change))
+
     def write_dump_information(self, dump_id, data_source_item_id,
                                identifier_property_ids, language,
                                source_url, size, license_item_id):
@@ -49,7 +127,29 @@ class ResultWriter:
         :param license_item_id: Id of the Wikidata item of the license.
         :return:
         """
-        row = (
+        row = self.create_dump_information_row(
+            dump_id, data_source_item_id, identifier_property_ids, language,
+            source_url, size, license_item_id)
+        self.dump_information_writer.writerow(row)
+
+    @staticmethod
+    def create_dump_information_row(dump_id, data_source_item_id,
+                                    identifier_property_ids, language,
+                                    source_url, size, license_item_id):
+        """
+        Creates row of meta information about a single dump, that is
+        written at the current time.
+        :param dump_id: Id of the dump.
+        :param data_source_item_id: Id of the Wikidata item of the data source.
+        :param identifier_property_ids: Ids of Wikidata properties for identifiers of the data source.
+        :param language: Language code.
+        :param source_url: Source url.
+        :param size: File size in bytes.
+        :param license_item_id: Id of the Wikidata item of the license.
+        :return: Tuple of dump id, data source, identifier properties as
+                 JSON, import date, language, source url, size and license.
+        """
+        return (
             dump_id,
             data_source_item_id,
             json.dumps(identifier_property_ids),
@@ -59,4 +159,44 @@ class ResultWriter:
             size,
             license_item_id
         )
-        self.dump_information_writer.writerow(row)
+
+    def merge(self, external_values_file, dump_information_file,
+              delta_file=None):
+        """
+        Appends results of another ResultWriter, e.g. partial results of a
+        single dump written in a separate process.
+        :param external_values_file: File containing external values.
+        :param dump_information_file: File containing metadata of dumps.
+        :param delta_file: File containing changes of records.
+        """
+        self.flush()
+        shutil.copyfileobj(external_values_file, self.external_values_file)
+        shutil.copyfileobj(dump_information_file, self.dump_information_file)
+        if delta_file is not None and self.delta_file is not None:
+            shutil.copyfileobj(delta_file, self.delta_file)
+
+    def close(self):
+        """
+        Writes buffered external values and closes all output files.
+        """
+        self.flush()
+        self.external_values_file.close()
+        self.dump_information_file.close()
+        if self.delta_file is not None:
+            self.delta_file.close()
+
+    @staticmethod
+    def open_file(path, compression=None, compression_level=None):
+        """
+        Opens output file, which is compressed in a background thread, if
+        a compression is given or indicated by the file extension.
+        :param path: Path of the output file.
+        :param compression: Name of compression, e.g. gzip.
+        :param compression_level: Compression level.
+        :return: Writable file object.
+        """
+        compression = compression or compressionutils.get_compression(path)
+        if compression:
+            return CompressedFileWriter(path, compression, compression_level)
+
+        return open(path, "w+b", ResultWriter.WRITE_BUFFER_SIZE)
@@ -0,0 +1,282 @@
+"""Contains class for writing conversion results to several shard files."""
+import csv
+import json
+import os
+import shutil
+import zlib
+from StringIO import StringIO
+
+from dumpconverter.utils import compressionutils
+from dumpconverter.writer.ResultWriter import ResultWriter
+
+
+class ShardedResultWriter:
+    """
+    Result writer with the interface of ResultWriter, that partitions
+    external values into a fixed number of csv files by a stable hash of
+    the external id or the property id, so that they can be loaded by
+    several loaders in parallel. All values of an entity (or a property)
+    end up in the same shard.
+
+    Each shard has its own file and buffer. Compressed shards are
+    compressed by their own background thread, so that shards are
+    compressed concurrently without sharing a lock or a queue. After all
+    shards are closed, a manifest listing the shards with their number of
+    rows and size in bytes is written next to them. Meta information of
+    dumps and changes of records are not sharded.
+    """
+    # Columns of external values, by which rows can be sharded
+    SHARD_KEYS = ("external_id", "property_id")
+    # Index of the column of each shard key in a row
+    SHARD_KEY_COLUMNS = {
+        "external_id": 1,
+        "property_id": 2
+    }
+    # Number of buffered external values, after which they are written
+    FLUSH_SIZE = ResultWriter.FLUSH_SIZE
+
+    def __init__(self, external_values_path, dump_information_file,
+                 shard_count, shard_key="external_id", compression=None,
+                 compression_level=None, flush_size=FLUSH_SIZE,
+                 delta_file=None):
+        """
+        Creates new ShardedResultWriter instance and opens the shard files.
+        :param external_values_path: Path of the monolithic output file of
+                                     external values, from which the paths
+                                     of shards and manifest are derived.
+        :param dump_information_file: File for output of metadata of the dump.
+        :param shard_count: Number of shard files.
+        :param shard_key: Column, by which rows are partitioned, either
+                          "external_id" or "property_id".
+        :param compression: Name of compression of the shards, e.g. gzip.
+                            If None, it is indicated by the file extension.
+        :param compression_level: Compression level.
+        :param flush_size: Number of buffered external values, after which
+                           they are written to the shards.
+        :param delta_file: File for output of records, that were added,
+                           changed or removed since the previous conversion.
+        """
+        if shard_count < 1:
+            raise ValueError("Number of shards must be positive")
+        if shard_key not in self.SHARD_KEYS:
+            raise ValueError("Unknown shard key '{0}'".format(shard_key))
+
+        self.shard_count = shard_count
+        self.shard_key = shard_key
+        self.key_column = self.SHARD_KEY_COLUMNS[shard_key]
+        self.compression = (compression or
+                            compressionutils.get_compression(external_values_path))
+        self.shard_paths = self.get_shard_paths(external_values_path, shard_count)
+        self.manifest_path = self.get_manifest_path(external_values_path)
+        self.dump_information_file = dump_information_file
+        self.dump_information_writer = csv.writer(dump_information_file)
+        self.delta_file = delta_file
+        if delta_file is not None:
+            self.delta_writer = csv.writer(delta_file)
+        else:
+            self.delta_writer = None
+        self.flush_size = flush_size
+
+        self.shard_files = []
+        self.shard_writers = []
+        try:
+            for shard_path in self.shard_paths:
+                shard_file = ResultWriter.open_file(shard_path, self.compression,
+                                                    compression_level)
+                self.shard_files.append(shard_file)
+                self.shard_writers.append(csv.writer(shard_file))
+        except Exception:
+            for shard_file in self.shard_files:
+                shard_file.close()
+            raise
+        self.pending_rows = [[] for _ in xrange(shard_count)]
+        self.pending_count = 0
+        self.row_counts = [0] * shard_count
+
+    @staticmethod
+    def split_path(path):
+        """
+        Splits path of an output file into the part before its extensions
+        and its extensions including the one of the compression.
+        :param path: File path, e.g. external_values.csv.gz.
+        :return: Tuple of root and extensions, e.g. external_values and
+                 .csv.gz.
+        """
+        root, extension = os.path.splitext(path)
+        if extension.lower() in compressionutils.COMPRESSION_EXTENSIONS:
+            root, data_extension = os.path.splitext(root)
+            extension = data_extension + extension
+
+        return root, extension
+
+    @classmethod
+    def get_shard_paths(cls, path, shard_count):
+        """
+        Gets paths of the shard files of an output file.
+        :param path: Path of the monolithic output file.
+        :param shard_count: Number of shards.
+        :return: List of paths, e.g. external_values.000.csv.
+        """
+        root, extension = cls.split_path(path)
+
+        return ["{0}.{1:03d}{2}".format(root, index, extension)
+                for index in xrange(shard_count)]
+
+    @classmethod
+    def get_manifest_path(cls, path):
+        """
+        Gets path of the manifest of an output file.
+        :param path: Path of the monolithic output file.
+        :return: Path, e.g. external_values.manifest.json.
+        """
+        return cls.split_path(path)[0] + ".manifest.json"
+
+    def get_shard(self, row):
+        """
+        Gets shard of a row by a hash of its shard key, that is the same on
+        every platform and in every run.
+        :param row: Tuple of dump id, external id, property id and value.
+        :return: Index of the shard.
+        """
+        key = row[self.key_column]
+        if isinstance(key, unicode):
+            key = key.encode("utf-8")
+
+        return (zlib.crc32(key) & 0xffffffff) % self.shard_count
+
+    def write_external_value(self, dump_id, external_id,
+                             property_id, value):
+        """
+        Writes single external value to its shard.
+        :param dump_id: Id of the current dump.
+        :param external_id: Id of the external entity.
+        :param property_id: Id of the Wikidata property.
+        :param value: Data value of external entity for the Wikidata property.
+        """
+        self.write_external_values([(dump_id, external_id, property_id, value)])
+
+    def write_external_values(self, rows):
+        """
+        Writes multiple external values to their shards. Rows are buffered
+        and written in batches, call flush to write remaining rows.
+        :param rows: Iterable of tuples of dump id, external id, property id
+                     and value.
+        """
+        pending_rows = self.pending_rows
+        get_shard = self.get_shard
+        for row in rows:
+            pending_rows[get_shard(row)].append(row)
+            self.pending_count += 1
+            if self.pending_count >= self.flush_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Writes buffered external values to their shards.
+        """
+        if not self.pending_count:
+            return
+
+        for shard, rows in enumerate(self.pending_rows):
+            if rows:
+                self.shard_writers[shard].writerows(rows)
+                self.row_counts[shard] += len(rows)
+                self.pending_rows[shard] = []
+        self.pending_count = 0
+
+    def write_serialized_external_values(self, serialized_rows):
+        """
+        Writes external values, that were already serialized as csv, e.g.
+        rows copied from a previous conversion.
+        :param serialized_rows: Rows as csv string.
+        """
+        self.write_external_values(csv.reader(StringIO(serialized_rows)))
+
+    def write_delta(self, dump_id, external_id, change):
+        """
+        Writes change of a record since the previous conversion.
+        :param dump_id: Id of the current dump.
+        :param external_id: Id of the external entity.
+        :param change: Kind of change (added, changed or removed).
+        """
+        if self.delta_writer is not None:
+            self.delta_writer.writerow((dump_id, external_id, change))
+
+    def write_dump_information(self, dump_id, data_source_item_id,
+                               identifier_property_ids, language,
+                               source_url, size, license_item_id):
+        """
+        Writes meta information about a single dump to file.
+        :param dump_id: Id of the dump.
+        :param data_source_item_id: Id of the Wikidata item of the data source.
+        :param identifier_property_ids: Ids of Wikidata properties for identifiers of the data source.
+        :param language: Language code.
+        :param source_url: Source url.
+        :param size: File size in bytes.
+        :param license_item_id: Id of the Wikidata item of the license.
+        """
+        row = ResultWriter.create_dump_information_row(
+            dump_id, data_source_item_id, identifier_property_ids, language,
+            source_url, size, license_item_id)
+        self.dump_information_writer.writerow(row)
+
+    def merge(self, external_values_file, dump_information_file,
+              delta_file=None):
+        """
+        Distributes results of another ResultWriter to the shards, e.g.
+        partial results of a single dump written in a separate process.
+        :param external_values_file: File containing external values.
+        :param dump_information_file: File containing metadata of dumps.
+        :param delta_file: File containing changes of records.
+        """
+        self.write_external_values(csv.reader(external_values_file))
+        self.flush()
+        shutil.copyfileobj(dump_information_file, self.dump_information_file)
+        if delta_file is not None and self.delta_file is not None:
+            shutil.copyfileobj(delta_file, self.delta_file)
+
+    def get_manifest(self):
+        """
+        Gets manifest of the closed shards.
+        :return: Dictionary with shard key, compression and a list of
+                 shards with their file name, number of rows and size.
+        """
+        shards = []
+        for shard, shard_path in enumerate(self.shard_paths):
+            shards.append({
+                "path": os.path.basename(shard_path),
+                "rows": self.row_counts[shard],
+                "bytes": os.path.getsize(shard_path)
+            })
+
+        return {
+            "shard_key": self.shard_key,
+            "compression": self.compression,
+            "rows": sum(self.row_counts),
+            "shards": shards
+        }
+
+    def write_manifest(self):
+        """
+        Writes manifest of the closed shards. It is renamed into place once
+        it is complete, so that loaders never see a partial manifest.
+        """
+        temporary_path = self.manifest_path + ".tmp"
+        with open(temporary_path, "wb") as manifest_file:
+            json.dump(self.get_manifest(), manifest_file, indent=2, sort_keys=True)
+        os.rename(temporary_path, self.manifest_path)
+
+    def close(self):
+        """
+        Writes buffered external values, closes all output files and writes
+        the manifest.
+        """
+        try:
+            self.flush()
+        finally:
+            for shard_file in self.shard_files:
+                shard_file.close()
+            self.dump_information_file.close()
+            if self.delta_file is not None:
+                self.delta_file.close()
+        self.write_manifest()
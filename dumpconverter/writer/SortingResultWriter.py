@@ -0,0 +1,240 @@
+"""Contains class for writing conversion results in sorted order."""
+import csv
+import heapq
+import itertools
+import tempfile
+from StringIO import StringIO
+
+
+class SortingResultWriter:
+    """
+    Result writer with the interface of ResultWriter, that passes external
+    values sorted by dump id, external id, property id and value to another
+    result writer and removes duplicate rows across the whole output.
+
+    Rows are buffered until their estimated size exceeds the memory budget.
+    Then they are sorted and spilled as run to a temporary file. On close
+    all runs are merged and the merged rows are written to the wrapped
+    writer. If there are more runs than files merged at once, runs are
+    merged in several passes, so memory use is bounded by the budget and
+    the buffers of the merged files regardless of the size of the dumps.
+    Meta information of dumps and changes of records are written
+    immediately.
+    """
+    # Default memory budget for buffered rows in bytes
+    MEMORY_BUDGET = 256 * 1024 * 1024
+    # Estimated memory of a buffered row without its strings in bytes, i.e.
+    # tuple, reference in the buffer and headers of four string objects
+    ROW_OVERHEAD = 250
+    # Maximum number of runs merged at once
+    MERGE_FAN_IN = 64
+    # Buffer size of temporary files of runs in bytes
+    RUN_BUFFER_SIZE = 64 * 1024
+    # Number of merged rows, that are passed to the wrapped writer at once
+    WRITE_BATCH_SIZE = 10000
+
+    def __init__(self, result_writer, memory_budget=MEMORY_BUDGET,
+                 temp_directory=None, merge_fan_in=MERGE_FAN_IN):
+        """
+        Creates new SortingResultWriter instance.
+        :param result_writer: Writer, to which sorted results are written,
+                              e.g. a ResultWriter.
+        :param memory_budget: Estimated memory in bytes, that buffered rows
+                              may use, before they are spilled.
+        :param temp_directory: Directory for temporary files of runs. If
+                               None, the default temporary directory is used.
+        :param merge_fan_in: Maximum number of runs merged at once.
+        """
+        self.result_writer = result_writer
+        self.memory_budget = memory_budget
+        self.temp_directory = temp_directory
+        self.merge_fan_in = max(2, merge_fan_in)
+        self.pending_rows = []
+        self.pending_size = 0
+        self.runs = []
+        self.spilled_runs = 0
+        self.written_rows = 0
+        self.duplicate_rows = 0
+
+    def write_external_value(self, dump_id, external_id,
+                             property_id, value):
+        """
+        Writes single external value.
+        :param dump_id: Id of the current dump.
+        :param external_id: Id of the external entity.
+        :param property_id: Id of the Wikidata property.
+        :param value: Data value of external entity for the Wikidata property.
+        """
+        self.write_external_values([(dump_id, external_id, property_id, value)])
+
+    def write_external_values(self, rows):
+        """
+        Writes multiple external values. Rows are buffered and spilled as
+        sorted run, once they exceed the memory budget.
+        :param rows: Iterable of tuples of dump id, external id, property id
+                     and value.
+        """
+        for row in rows:
+            # Rows read from csv are lists, which do not compare with tuples
+            row = tuple(row)
+            self.pending_rows.append(row)
+            self.pending_size += self.ROW_OVERHEAD + sum(map(len, row))
+            if self.pending_size >= self.memory_budget:
+                self.spill()
+
+    def flush(self):
+        """
+        Does nothing, since external values can only be written in sorted
+        order, once all of them are known. They are written by close.
+        """
+        pass
+
+    def write_serialized_external_values(self, serialized_rows):
+        """
+        Writes external values, that were already serialized as csv, e.g.
+        rows copied from a previous conversion.
+        :param serialized_rows: Rows as csv string.
+        """
+        self.write_external_values(csv.reader(StringIO(serialized_rows)))
+
+    def write_delta(self, dump_id, external_id, change):
+        """
+        Writes change of a record since the previous conversion.
+        :param dump_id: Id of the current dump.
+        :param external_id: Id of the external entity.
+        :param change: Kind of change (added, changed or removed).
+        """
+        self.result_writer.write_delta(dump_id, external_id, change)
+
+    def write_dump_information(self, dump_id, data_source_item_id,
+                               identifier_property_ids, language,
+                               source_url, size, license_item_id):
+        """
+        Writes meta information about a single dump.
+        :param dump_id: Id of the dump.
+        :param data_source_item_id: Id of the Wikidata item of the data source.
+        :param identifier_property_ids: Ids of Wikidata properties for identifiers of the data source.
+        :param language: Language code.
+        :param source_url: Source url.
+        :param size: File size in bytes.
+        :param license_item_id: Id of the Wikidata item of the license.
+        """
+        self.result_writer.write_dump_information(
+            dump_id, data_source_item_id, identifier_property_ids, language,
+            source_url, size, license_item_id)
+
+    def merge(self, external_values_file, dump_information_file,
+              delta_file=None):
+        """
+        Adds results of another ResultWriter, e.g. partial results of a
+        single dump written in a separate process. External values are
+        sorted with all others, the remaining files are merged into the
+        wrapped writer.
+        :param external_values_file: File containing external values.
+        :param dump_information_file: File containing metadata of dumps.
+        :param delta_file: File containing changes of records.
+        """
+        self.write_external_values(csv.reader(external_values_file))
+        self.result_writer.merge(StringIO(), dump_information_file, delta_file)
+
+    def spill(self):
+        """
+        Sorts buffered rows and writes them without duplicates as run to a
+        temporary file.
+        """
+        if not self.pending_rows:
+            return
+
+        self.pending_rows.sort()
+        run_file = self.create_run(self.remove_duplicates(self.pending_rows))
+        self.runs.append(run_file)
+        self.spilled_runs += 1
+        self.pending_rows = []
+        self.pending_size = 0
+
+    def create_run(self, sorted_rows):
+        """
+        Writes sorted rows to a temporary file.
+        :param sorted_rows: Iterable of sorted rows.
+        :return: Temporary file positioned at its start.
+        """
+        run_file = tempfile.TemporaryFile(bufsize=self.RUN_BUFFER_SIZE,
+                                          prefix="dumpconverter_run",
+                                          dir=self.temp_directory)
+        csv.writer(run_file).writerows(sorted_rows)
+        run_file.seek(0)
+
+        return run_file
+
+    def read_run(self, run_file):
+        """
+        Reads rows of a run.
+        :param run_file: Temporary file of the run.
+        :return: Iterator of rows as tuples.
+        """
+        return itertools.imap(tuple, csv.reader(run_file))
+
+    def merge_runs(self, run_files):
+        """
+        Merges sorted runs into a single run and closes them.
+        :param run_files: Temporary files of the runs.
+        :return: Temporary file of the merged run.
+        """
+        try:
+            merged_rows = heapq.merge(*[self.read_run(run_file)
+                                        for run_file in run_files])
+            return self.create_run(self.remove_duplicates(merged_rows))
+        finally:
+            for run_file in run_files:
+                run_file.close()
+
+    def remove_duplicates(self, sorted_rows):
+        """
+        Skips rows equal to their predecessor and counts them.
+        :param sorted_rows: Iterable of sorted rows.
+        :return: Iterator of distinct rows.
+        """
+        previous_row = None
+        for row in sorted_rows:
+            if row == previous_row:
+                self.duplicate_rows += 1
+                continue
+            previous_row = row
+            yield row
+
+    def get_sorted_rows(self):
+        """
+        Merges spilled runs and buffered rows. Runs are merged in several
+        passes, if there are more than the fan-in.
+        :return: Iterator of sorted rows without duplicates.
+        """
+        self.pending_rows.sort()
+        while len(self.runs) >= self.merge_fan_in:
+            run_files = self.runs[:self.merge_fan_in]
+            self.runs = self.runs[self.merge_fan_in:] + [self.merge_runs(run_files)]
+
+        sources = [self.read_run(run_file) for run_file in self.runs]
+        sources.append(iter(self.pending_rows))
+
+        return self.remove_duplicates(heapq.merge(*sources))
+
+    def close(self):
+        """
+        Writes all external values in sorted order to the wrapped writer,
+        removes the runs and closes the wrapped writer.
+        """
+        try:
+            sorted_rows = self.get_sorted_rows()
+            while True:
+                rows = list(itertools.islice(sorted_rows, self.WRITE_BATCH_SIZE))
+                if not rows:
+                    break
+                self.result_writer.write_external_values(rows)
+                self.written_rows += len(rows)
+        finally:
+            for run_file in self.runs:
+                run_file.close()
+            self.runs = []
+            self.pending_rows = []
+            self.pending_size = 0
+        self.result_writer.close()
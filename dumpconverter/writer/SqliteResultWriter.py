@@ -0,0 +1,228 @@
+"""Contains class for loading conversion results into a SQLite database."""
+import csv
+import sqlite3
+from StringIO import StringIO
+
+from dumpconverter.writer.ResultWriter import ResultWriter
+
+
+class SqliteResultWriter:
+    """
+    Result writer with the interface of ResultWriter, that loads external
+    values and meta information of dumps directly into the tables of a
+    SQLite database instead of writing csv files, that have to be imported
+    in a separate step.
+
+    Tables are recreated, when the writer is created. Rows are inserted
+    with prepared executemany batches in large transactions and indexes
+    are only built by close, after all rows are loaded. Since the
+    database is rebuilt by every conversion, it is written without
+    journal and without waiting for the disk.
+    """
+    # Number of buffered external values, after which they are inserted
+    FLUSH_SIZE = ResultWriter.FLUSH_SIZE
+    # Number of inserted rows, after which the transaction is committed
+    TRANSACTION_SIZE = 500000
+
+    SCHEMA = (
+        """CREATE TABLE external_values (
+            dump_id TEXT NOT NULL,
+            external_id TEXT NOT NULL,
+            property_id TEXT NOT NULL,
+            value TEXT NOT NULL
+        )""",
+        """CREATE TABLE dump_information (
+            dump_id TEXT NOT NULL,
+            data_source_item_id TEXT NOT NULL,
+            identifier_property_ids TEXT NOT NULL,
+            import_date TEXT NOT NULL,
+            language TEXT NOT NULL,
+            source_url TEXT NOT NULL,
+            size INTEGER,
+            license_item_id TEXT NOT NULL
+        )"""
+    )
+    INDEXES = (
+        "CREATE INDEX IF NOT EXISTS external_values_entity ON external_values "
+        "(dump_id, external_id, property_id)",
+        "CREATE INDEX IF NOT EXISTS dump_information_dump ON dump_information (dump_id)"
+    )
+    INSERT_EXTERNAL_VALUES = "INSERT INTO external_values VALUES (?, ?, ?, ?)"
+    INSERT_DUMP_INFORMATION = "INSERT INTO dump_information VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+    def __init__(self, path, delta_file=None, flush_size=FLUSH_SIZE,
+                 transaction_size=TRANSACTION_SIZE):
+        """
+        Creates new SqliteResultWriter instance and (re)creates the tables.
+        :param path: Path of the SQLite database file.
+        :param delta_file: File for output of records, that were added,
+                           changed or removed since the previous conversion.
+        :param flush_size: Number of buffered external values, after which
+                           they are inserted.
+        :param transaction_size: Number of inserted rows, after which the
+                                 transaction is committed.
+        """
+        self.path = path
+        self.delta_file = delta_file
+        if delta_file is not None:
+            self.delta_writer = csv.writer(delta_file)
+        else:
+            self.delta_writer = None
+        self.flush_size = flush_size
+        self.transaction_size = transaction_size
+        self.pending_rows = []
+        self.uncommitted_rows = 0
+
+        self.connection = sqlite3.connect(path)
+        # Values are utf-8 encoded and stored as they are
+        self.connection.text_factory = str
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.create_tables()
+
+    def create_tables(self):
+        """
+        Drops tables of a previous conversion and creates them without
+        indexes.
+        """
+        self.connection.execute("DROP TABLE IF EXISTS external_values")
+        self.connection.execute("DROP TABLE IF EXISTS dump_information")
+        for statement in self.SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def write_external_value(self, dump_id, external_id,
+                             property_id, value):
+        """
+        Writes single external value.
+        :param dump_id: Id of the current dump.
+        :param external_id: Id of the external entity.
+        :param property_id: Id of the Wikidata property.
+        :param value: Data value of external entity for the Wikidata property.
+        """
+        self.write_external_values([(dump_id, external_id, property_id, value)])
+
+    def write_external_values(self, rows):
+        """
+        Writes multiple external values. Rows are buffered and inserted in
+        batches, call flush to insert remaining rows.
+        :param rows: Iterable of tuples of dump id, external id, property id
+                     and value.
+        """
+        self.pending_rows.extend(rows)
+        if len(self.pending_rows) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Inserts buffered external values. The transaction is committed, once
+        it contains enough rows.
+        """
+        if self.pending_rows:
+            self.insert(self.INSERT_EXTERNAL_VALUES, self.pending_rows)
+            self.pending_rows = []
+
+    def insert(self, statement, rows):
+        """
+        Inserts rows in the current transaction and commits it, once it
+        contains enough rows.
+        :param statement: Prepared insert statement.
+        :param rows: List of rows.
+        """
+        self.connection.executemany(statement, rows)
+        self.uncommitted_rows += len(rows)
+        if self.uncommitted_rows >= self.transaction_size:
+            self.connection.commit()
+            self.uncommitted_rows = 0
+
+    def write_serialized_external_values(self, serialized_rows):
+        """
+        Writes external values, that were already serialized as csv, e.g.
+        rows copied from a previous conversion.
+        :param serialized_rows: Rows as csv string.
+        """
+        self.write_external_values(csv.reader(StringIO(serialized_rows)))
+
+    def write_delta(self, dump_id, external_id, change):
+        """
+        Writes change of a record since the previous conversion.
+        :param dump_id: Id of the current dump.
+        :param external_id: Id of the external entity.
+        :param change: Kind of change (added, changed or removed).
+        """
+        if self.delta_writer is not None:
+            self.delta_writer.writerow((dump_id, external_id, change))
+
+    def write_dump_information(self, dump_id, data_source_item_id,
+                               identifier_property_ids, language,
+                               source_url, size, license_item_id):
+        """
+        Writes meta information about a single dump.
+        :param dump_id: Id of the dump.
+        :param data_source_item_id: Id of the Wikidata item of the data source.
+        :param identifier_property_ids: Ids of Wikidata properties for identifiers of the data source.
+        :param language: Language code.
+        :param source_url: Source url.
+        :param size: File size in bytes.
+        :param license_item_id: Id of the Wikidata item of the license.
+        """
+        row = ResultWriter.create_dump_information_row(
+            dump_id, data_source_item_id, identifier_property_ids, language,
+            source_url, size, license_item_id)
+        self.insert(self.INSERT_DUMP_INFORMATION, [row])
+
+    def merge(self, external_values_file, dump_information_file,
+              delta_file=None):
+        """
+        Loads results, that another ResultWriter wrote to csv files, e.g.
+        partial results of a single dump written in a separate process.
+        :param external_values_file: File containing external values.
+        :param dump_information_file: File containing metadata of dumps.
+        :param delta_file: File containing changes of records.
+        """
+        self.flush()
+        rows = []
+        for row in csv.reader(external_values_file):
+            rows.append(row)
+            if len(rows) >= self.flush_size:
+                self.insert(self.INSERT_EXTERNAL_VALUES, rows)
+                rows = []
+        if rows:
+            self.insert(self.INSERT_EXTERNAL_VALUES, rows)
+        self.insert(self.INSERT_DUMP_INFORMATION,
+                    [self.parse_dump_information_row(row)
+                     for row in csv.reader(dump_information_file)])
+        if delta_file is not None and self.delta_writer is not None:
+            self.delta_writer.writerows(csv.reader(delta_file))
+
+    @staticmethod
+    def parse_dump_information_row(row):
+        """
+        Converts row of meta information read from csv into the types of
+        the table.
+        :param row: List of strings.
+        :return: Row with size as integer.
+        """
+        row = list(row)
+        row[6] = int(row[6]) if row[6] else None
+
+        return row
+
+    def create_indexes(self):
+        """
+        Builds indexes of the tables.
+        """
+        for statement in self.INDEXES:
+            self.connection.execute(statement)
+
+    def close(self):
+        """
+        Inserts buffered external values, builds the indexes, commits and
+        closes the database.
+        """
+        self.flush()
+        self.create_indexes()
+        self.connection.commit()
+        self.connection.close()
+        if self.delta_file is not None:
+            self.delta_file.close()
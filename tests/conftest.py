@@ -0,0 +1,142 @@
+"""Contains fixtures shared by several tests"""
+import os
+import re
+import threading
+import posixpath
+import urllib
+import urlparse
+from BaseHTTPServer import HTTPServer
+from SimpleHTTPServer import SimpleHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+from StringIO import StringIO
+
+import pytest
+
+
+TESTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestDataRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Request handler serving files of the tests directory. Supports
+    conditional and range requests, unless the query parameter ranges=0 is
+    given. Unreliable servers are simulated by
+    query parameters: fail=N lets the first N requests of a url fail with
+    status 503 and truncate=N breaks off responses, which start before byte N
+    of the file, at that byte.
+    """
+    RANGE_PATTERN = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+    def translate_path(self, path):
+        path = posixpath.normpath(urllib.unquote(path.split("?", 1)[0]))
+        parts = [part for part in path.split("/") if part not in ("", ".", "..")]
+        return os.path.join(TESTS_DIRECTORY, *parts)
+
+    def send_head(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404, "File not found")
+            return None
+
+        query = urlparse.parse_qs(urlparse.urlsplit(self.path).query)
+        request_count = sum(1 for request_path, _ in self.server.requests
+                            if request_path == self.path)
+        if request_count <= int(query.get("fail", [0])[0]):
+            self.send_error(503, "Service unavailable")
+            return None
+
+        with open(path, "rb") as served_file:
+            content = served_file.read()
+        modification_time = int(os.path.getmtime(path))
+        etag = '"{0:x}-{1:x}"'.format(modification_time, len(content))
+        last_modified = self.date_time_string(modification_time)
+
+        if (self.headers.getheader("If-None-Match") == etag or
+                self.headers.getheader("If-Modified-Since") == last_modified):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+
+        status_code = 200
+        start, end = 0, len(content) - 1
+        accepts_ranges = query.get("ranges", ["1"])[0] != "0"
+        range_match = self.RANGE_PATTERN.match(self.headers.getheader("Range", ""))
+        if (accepts_ranges and range_match and self.headers.getheader("If-Range", etag)
+                in (etag, last_modified)):
+            start = int(range_match.group(1))
+            if range_match.group(2):
+                end = min(int(range_match.group(2)), end)
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", "bytes */{0}".format(len(content)))
+                self.end_headers()
+                return None
+            status_code = 206
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        if accepts_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        if status_code == 206:
+            self.send_header("Content-Range", "bytes {0}-{1}/{2}".format(
+                start, end, len(content)))
+        self.end_headers()
+
+        truncate = int(query.get("truncate", [0])[0])
+        if start < truncate:
+            end = min(end, truncate - 1)
+        return StringIO(content[start:end + 1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def http_server_instance(request):
+    """
+    Starts local http server serving files of the tests directory.
+    :param request: Request of the fixture.
+    :return: Server instance.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TestDataRequestHandler)
+    server.requests = []
+    server_thread = threading.Thread(target=server.serve_forever,
+                                     kwargs={"poll_interval": 0.01})
+    server_thread.daemon = True
+    server_thread.start()
+
+    def stop_server():
+        server.shutdown()
+        server.server_close()
+    request.addfinalizer(stop_server)
+
+    return server
+
+
+@pytest.fixture
+def http_server(http_server_instance):
+    """
+    Gets base url of the local http server.
+    :param http_server_instance: Server instance.
+    :return: Base url of the server.
+    """
+    return "http://127.0.0.1:{0}".format(http_server_instance.server_address[1])
+
+
+@pytest.fixture
+def http_requests(http_server_instance):
+    """
+    Gets requests received by the local http server.
+    :param http_server_instance: Server instance.
+    :return: List of tuples of path and headers with lowercase names.
+    """
+    return http_server_instance.requests
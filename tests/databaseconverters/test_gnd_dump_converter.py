@@ -1,20 +1,29 @@
 """Contains test for GndDumpConverter class"""
+import csv
+import gzip
+import json
 import os
+import re
 import datetime
+import sqlite3
 
 import pytest
 from mock import patch
 from StringIO import StringIO
 
 from dumpconverter.exceptions.DownloadError import DownloadError
+from dumpconverter.databaseconverters.gnd import propertymappings
 from dumpconverter.writer.ResultWriter import ResultWriter
+from dumpconverter.writer.SqliteResultWriter import SqliteResultWriter
+from dumpconverter.writer.ShardedResultWriter import ShardedResultWriter
+from dumpconverter.writer.SortingResultWriter import SortingResultWriter
 from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
 from dumpconverter.databaseconverters.gnd.GndDumpConverter import GndDumpConverter
 
 
 @patch.object(ResultWriter, "write_dump_information")
-@patch.object(ResultWriter, "write_external_value")
-def test_execute(write_external_value_mock, write_dump_information_mock):
+@patch.object(ResultWriter, "write_external_values")
+def test_execute(write_external_values_mock, write_dump_information_mock):
     script_dir = os.path.dirname(__file__)
     dump_file_path = os.path.join(script_dir, "testdata/gnd_dump.xml.gz")
     gnd_converter = GndDumpConverter(True)
@@ -25,10 +34,419 @@ def test_execute(write_external_value_mock, write_dump_information_mock):
     gnd_converter.execute(ResultWriter(StringIO(), StringIO()))
 
     number_of_dumps = len(gnd_converter.FILE_PREFIXES)
-    assert write_external_value_mock.call_count == 11 * number_of_dumps
+    written_rows = [row for args, kwargs in write_external_values_mock.call_args_list
+                    for row in args[0]]
+    assert len(written_rows) == 11 * number_of_dumps
     assert write_dump_information_mock.call_count == number_of_dumps
 
 
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_execute_streaming(http_server, tmpdir, use_cache):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    cache_directory = str(tmpdir) if use_cache else None
+    gnd_converter = GndDumpConverter(True, streaming=True,
+                                     cache_directory=cache_directory)
+    gnd_converter.get_dump_url = lambda file_prefix, fallback=False: dump_url
+    external_values_file = StringIO()
+    dump_information_file = StringIO()
+    gnd_converter.execute(ResultWriter(external_values_file, dump_information_file))
+
+    expected_dump_size = os.path.getsize(get_test_file_path("testdata/gnd_dump.xml.gz"))
+    number_of_dumps = len(gnd_converter.FILE_PREFIXES)
+    assert 11 * number_of_dumps == len(external_values_file.getvalue().splitlines())
+    dump_information = list(csv.reader(StringIO(dump_information_file.getvalue())))
+    assert number_of_dumps == len(dump_information)
+    for row in dump_information:
+        assert dump_url == row[5]
+        assert str(expected_dump_size) == row[6]
+    if use_cache:
+        expected_files = sorted(file_prefix + ".xml.gz" for file_prefix
+                                in gnd_converter.FILE_PREFIXES.itervalues())
+        assert expected_files == sorted(os.listdir(cache_directory))
+        for file_name in expected_files:
+            assert expected_dump_size == os.path.getsize(os.path.join(cache_directory, file_name))
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_execute_parallel(http_server, streaming):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    results = []
+    for jobs in (1, 3):
+        gnd_converter = GndDumpConverter(True, streaming=streaming, jobs=jobs)
+        external_values_file = StringIO()
+        dump_information_file = StringIO()
+        # Patch class, so that worker processes inherit the mock
+        with patch.object(GndDumpConverter, "get_dump_url",
+                          lambda self, file_prefix, fallback=False: dump_url):
+            gnd_converter.execute(ResultWriter(external_values_file, dump_information_file))
+        dump_information = [row[:3] + row[4:] for row in
+                            csv.reader(StringIO(dump_information_file.getvalue()))]
+        results.append((external_values_file.getvalue(), dump_information))
+
+    sequential_result, parallel_result = results
+    assert 11 * len(GndDumpConverter.FILE_PREFIXES) == len(parallel_result[0].splitlines())
+    assert sequential_result == parallel_result
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_execute_sqlite(http_server, tmpdir, jobs):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    external_values_file = StringIO()
+    database_path = str(tmpdir.join("external_values.sqlite"))
+    with patch.object(GndDumpConverter, "get_dump_url",
+                      lambda self, file_prefix, fallback=False: dump_url):
+        GndDumpConverter(True).execute(ResultWriter(external_values_file, StringIO()))
+        result_writer = SqliteResultWriter(database_path)
+        GndDumpConverter(True, jobs=jobs).execute(result_writer)
+        result_writer.close()
+
+    connection = sqlite3.connect(database_path)
+    connection.text_factory = str
+    actual_rows = connection.execute("SELECT * FROM external_values").fetchall()
+    dump_ids = connection.execute("SELECT dump_id FROM dump_information").fetchall()
+    connection.close()
+
+    expected_rows = map(tuple, csv.reader(StringIO(external_values_file.getvalue())))
+    assert 11 * len(GndDumpConverter.FILE_PREFIXES) == len(actual_rows)
+    assert sorted(expected_rows) == sorted(actual_rows)
+    assert sorted(GndDumpConverter.FILE_PREFIXES) == sorted(row[0] for row in dump_ids)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_execute_sharded(http_server, tmpdir, jobs):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    external_values_file = StringIO()
+    external_values_path = str(tmpdir.join("external_values.csv"))
+    with patch.object(GndDumpConverter, "get_dump_url",
+                      lambda self, file_prefix, fallback=False: dump_url):
+        GndDumpConverter(True).execute(ResultWriter(external_values_file, StringIO()))
+        result_writer = ShardedResultWriter(external_values_path, StringIO(), 4)
+        GndDumpConverter(True, jobs=jobs).execute(result_writer)
+        result_writer.close()
+
+    with open(str(tmpdir.join("external_values.manifest.json"))) as manifest_file:
+        manifest = json.load(manifest_file)
+    actual_rows = []
+    for shard_index, shard in enumerate(manifest["shards"]):
+        with open(str(tmpdir.join(shard["path"])), "rb") as shard_file:
+            rows = map(tuple, csv.reader(shard_file))
+        assert len(rows) == shard["rows"]
+        assert all(shard_index == result_writer.get_shard(row) for row in rows)
+        actual_rows.extend(rows)
+    expected_rows = map(tuple, csv.reader(StringIO(external_values_file.getvalue())))
+    assert 4 == len(manifest["shards"])
+    assert 11 * len(GndDumpConverter.FILE_PREFIXES) == manifest["rows"]
+    assert sorted(expected_rows) == sorted(actual_rows)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_execute_sorted(http_server, tmpdir, jobs):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    external_values_file = StringIO()
+    sorted_path = str(tmpdir.join("external_values.csv"))
+    with patch.object(GndDumpConverter, "get_dump_url",
+                      lambda self, file_prefix, fallback=False: dump_url):
+        GndDumpConverter(True).execute(ResultWriter(external_values_file, StringIO()))
+        result_writer = SortingResultWriter(
+            ResultWriter(open(sorted_path, "wb"), StringIO()),
+            memory_budget=2000, temp_directory=str(tmpdir), merge_fan_in=3)
+        GndDumpConverter(True, jobs=jobs).execute(result_writer)
+        result_writer.close()
+
+    with open(sorted_path, "rb") as sorted_file:
+        actual_rows = map(tuple, csv.reader(sorted_file))
+    expected_rows = map(tuple, csv.reader(StringIO(external_values_file.getvalue())))
+    assert result_writer.spilled_runs > 3
+    assert sorted(set(expected_rows)) == actual_rows
+    assert len(expected_rows) - len(actual_rows) == result_writer.duplicate_rows
+
+
+@pytest.mark.parametrize(["jobs", "engine"], [
+    (1, "xpath"),
+    (3, "xpath"),
+    (1, "stream"),
+    (3, "stream")
+])
+def test_execute_profile(http_server, tmpdir, jobs, engine):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    profile_path = str(tmpdir.join("profile.json"))
+    gnd_converter = GndDumpConverter(True, jobs=jobs, profile_file=profile_path,
+                                     engine=engine)
+    external_values_file = StringIO()
+    with patch.object(GndDumpConverter, "get_dump_url",
+                      lambda self, file_prefix, fallback=False: dump_url):
+        gnd_converter.execute(ResultWriter(external_values_file, StringIO()))
+
+    with open(profile_path) as profile_file:
+        profile = json.load(profile_file)
+    number_of_dumps = len(GndDumpConverter.FILE_PREFIXES)
+    assert 11 * number_of_dumps == len(external_values_file.getvalue().splitlines())
+    assert number_of_dumps == profile["stages"]["total"]["calls"]
+    assert "P227" not in profile["properties"]
+    assert number_of_dumps * 2 == profile["properties"]["P1477"]["calls"]
+    assert "P1477[0]" in profile["mappings"]
+    assert 0 < profile["stages"]["formatting"]["calls"]
+
+
+def test_execute_parallel_formatter_errors(http_server, capsys):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    def failing_formatter(*arguments):
+        raise ValueError("broken")
+    failing_mapping = dict(propertymappings.mapping)
+    failing_mapping["P26"] = [dict(entry, formatter=failing_formatter)
+                                for entry in propertymappings.mapping["P26"]]
+    error_logs = []
+    # Patch module and class, so that worker processes inherit the mocks
+    with patch.object(propertymappings, "mapping", failing_mapping):
+        with patch.object(GndDumpConverter, "get_dump_url",
+                          lambda self, file_prefix, fallback=False: dump_url):
+            for jobs in (1, 2):
+                gnd_converter = GndDumpConverter(True, jobs=jobs)
+                gnd_converter.execute(ResultWriter(StringIO(), StringIO()))
+                error_logs.append(gnd_converter.xml_dump_converter.formatter_error_log)
+            capsys.readouterr()
+            GndDumpConverter(jobs=2).execute(ResultWriter(StringIO(), StringIO()))
+    out, _ = capsys.readouterr()
+
+    sequential_log, parallel_log = error_logs
+    assert 0 < sequential_log.counts["P26"]
+    assert sequential_log.counts == parallel_log.counts
+    assert (sorted(sequential_log.samples["P26"]) ==
+            sorted(parallel_log.samples["P26"]))
+    assert "Formatter of P26 failed {0} times".format(
+        parallel_log.counts["P26"]) in out
+
+
+def test_execute_parallel_cache_counters(http_server, capsys):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    counters = []
+    # Patch module and class, so that worker processes inherit the mocks
+    with patch.object(propertymappings, "mapping", get_cacheable_mapping()):
+        with patch.object(GndDumpConverter, "get_dump_url",
+                          lambda self, file_prefix, fallback=False: dump_url):
+            for jobs in (1, 2):
+                gnd_converter = GndDumpConverter(True, jobs=jobs)
+                gnd_converter.execute(ResultWriter(StringIO(), StringIO()))
+                compiled_mapping = gnd_converter.xml_dump_converter.compiled_mapping
+                counters.append(compiled_mapping.get_formatter_cache_counters())
+            capsys.readouterr()
+            GndDumpConverter(jobs=2).execute(ResultWriter(StringIO(), StringIO()))
+    out, _ = capsys.readouterr()
+
+    sequential_counters, parallel_counters = counters
+    assert 0 < sum(parallel_counters["P26"])
+    # Each process has its own caches, so only the number of lookups is
+    # independent of the distribution of dumps
+    assert ({property_id: sum(counter) for property_id, counter in sequential_counters.iteritems()} ==
+            {property_id: sum(counter) for property_id, counter in parallel_counters.iteritems()})
+    assert "Formatter cache of P26: " in out
+
+
+def test_execute_parallel_shared_paths(http_server, capsys):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    counters = []
+    # Patch class, so that worker processes inherit the mock
+    with patch.object(GndDumpConverter, "get_dump_url",
+                      lambda self, file_prefix, fallback=False: dump_url):
+        for jobs in (1, 2):
+            gnd_converter = GndDumpConverter(True, jobs=jobs)
+            gnd_converter.execute(ResultWriter(StringIO(), StringIO()))
+            xml_dump_converter = gnd_converter.xml_dump_converter
+            counters.append((xml_dump_converter.path_evaluations,
+                             xml_dump_converter.saved_path_evaluations))
+        capsys.readouterr()
+        GndDumpConverter(jobs=2).execute(ResultWriter(StringIO(), StringIO()))
+    out, _ = capsys.readouterr()
+
+    sequential_counters, parallel_counters = counters
+    assert 0 < parallel_counters[1]
+    assert sequential_counters == parallel_counters
+    assert "Shared value paths: {0} of {1} evaluations saved".format(
+        parallel_counters[1], sum(parallel_counters)) in out
+
+
+def test_stream_dump_fallback():
+    gnd_converter = GndDumpConverter(True, streaming=True)
+    fallback_url = "fallback"
+    def get_dump_url_mock(file_prefix, fallback=False):
+        return fallback_url if fallback else "latest"
+    gnd_converter.get_dump_url = get_dump_url_mock
+    def open_stream_mock(dump_url, cache_file=None):
+        if dump_url != fallback_url:
+            raise DownloadError(500)
+        return "stream"
+
+    with patch("dumpconverter.utils.downloadutils.open_stream", open_stream_mock):
+        dump_stream, dump_url = gnd_converter.stream_dump("foobar")
+
+    assert "stream" == dump_stream
+    assert fallback_url == dump_url
+
+
+def test_process_mixed_dump():
+    gnd_converter = GndDumpConverter(True)
+    with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+        actual_values = process_dump(gnd_converter.xml_dump_converter, dump_file)
+
+    assert [
+        ("11876439X", "P21", "m\xc3\xa4nnlich"),
+        ("11876439X", "P26", "Martha Washington"),
+        ("11876439X", "P569", "22.02.1732"),
+        ("11876439X", "P570", "14.12.1799"),
+        ("119033364", "P19", "Cambridge"),
+        ("119033364", "P21", "m\xc3\xa4nnlich"),
+        ("119033364", "P569", "11.03.1952"),
+        ("119033364", "P570", "11.05.2001"),
+        ("4000001-0", "P50", "Douglas Adams"),
+        ("4000002-9", "P50", "Ludwig II."),
+        ("4007879-2", "P625", "N 052 31 00,E 013 24 00"),
+        ("4007879-2", "P625", "N052.516667,E013.400000")
+    ] == actual_values
+
+
+@pytest.mark.parametrize("file_path", [
+    "testdata/gnd_dump.xml.gz",
+    "testdata/gnd_dump_mixed.xml"
+])
+def test_process_dump_stream_engine(file_path):
+    gnd_converter = GndDumpConverter(True)
+    with open_dump_file(file_path) as dump_file:
+        expected_values = process_dump(gnd_converter.xml_dump_converter, dump_file)
+
+    gnd_converter = GndDumpConverter(True, engine="stream")
+    with open_dump_file(file_path) as dump_file:
+        actual_values = process_dump(gnd_converter.xml_dump_converter, dump_file)
+
+    assert expected_values
+    assert expected_values == actual_values
+
+
+@pytest.mark.parametrize(["workers", "batch_size"], [
+    (2, 1),
+    (2, 4),
+    (3, 500)
+])
+def test_process_mixed_dump_parallel(workers, batch_size):
+    with patch.object(propertymappings, "mapping", get_cacheable_mapping()):
+        gnd_converter = GndDumpConverter(True)
+        with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+            expected_values = list(gnd_converter.xml_dump_converter.process_dump(dump_file))
+        compiled_mapping = gnd_converter.xml_dump_converter.compiled_mapping
+        expected_counters = compiled_mapping.get_formatter_cache_counters()
+
+        gnd_converter = GndDumpConverter(True, workers=workers)
+        gnd_converter.xml_dump_converter.batch_size = batch_size
+        with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+            actual_values = list(gnd_converter.xml_dump_converter.process_dump(dump_file))
+        compiled_mapping = gnd_converter.xml_dump_converter.compiled_mapping
+        actual_counters = compiled_mapping.get_formatter_cache_counters()
+
+    assert expected_values == actual_values
+    assert [0, 2] == expected_counters["P50"]
+    # Each worker has its own caches, so only the number of lookups is
+    # independent of the distribution of records
+    assert ({property_id: sum(counters) for property_id, counters in expected_counters.iteritems()} ==
+            {property_id: sum(counters) for property_id, counters in actual_counters.iteritems()})
+
+
+def test_process_mixed_dump_shared_paths():
+    gnd_converter = GndDumpConverter(True)
+    with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+        list(gnd_converter.xml_dump_converter.process_dump(dump_file))
+    xml_dump_converter = gnd_converter.xml_dump_converter
+    expected_counters = (xml_dump_converter.path_evaluations,
+                         xml_dump_converter.saved_path_evaluations)
+
+    gnd_converter = GndDumpConverter(True, workers=2)
+    gnd_converter.xml_dump_converter.batch_size = 1
+    with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+        list(gnd_converter.xml_dump_converter.process_dump(dump_file))
+    xml_dump_converter = gnd_converter.xml_dump_converter
+    actual_counters = (xml_dump_converter.path_evaluations,
+                       xml_dump_converter.saved_path_evaluations)
+
+    # P569 and P570 share their path on both persons
+    assert expected_counters[1] >= 2
+    assert expected_counters == actual_counters
+
+
+def test_process_mixed_dump_parallel_repeated():
+    with patch.object(propertymappings, "mapping", get_cacheable_mapping()):
+        gnd_converter = GndDumpConverter(True)
+        with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+            list(gnd_converter.xml_dump_converter.process_dump(dump_file))
+        compiled_mapping = gnd_converter.xml_dump_converter.compiled_mapping
+        counters = compiled_mapping.get_formatter_cache_counters()
+
+        # Workers must not add statistics of previous dumps, that they
+        # inherited from the parent, again
+        gnd_converter = GndDumpConverter(True, workers=2)
+        for _ in xrange(2):
+            with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+                list(gnd_converter.xml_dump_converter.process_dump(dump_file))
+        compiled_mapping = gnd_converter.xml_dump_converter.compiled_mapping
+        actual_counters = compiled_mapping.get_formatter_cache_counters()
+
+    assert sum(map(sum, counters.values())) * 2 == sum(map(sum, actual_counters.values()))
+
+
+def test_process_mixed_dump_record_scoped():
+    # Mapping in the former style, that checks the record type by a
+    # document-global predicate instead of a declared discriminator
+    predicate = " and //ns:datafield[@tag='079']/ns:subfield[@code='b']='{0}']/"
+    global_mapping = {}
+    for property_id, mappings in propertymappings.mapping.iteritems():
+        global_mapping[property_id] = []
+        for mapping in mappings:
+            global_predicate = predicate.format(mapping["discriminator"])
+            global_mapping_entry = dict(mapping, value_paths=[
+                value_path.replace("]/", global_predicate, 1)
+                for value_path in mapping["value_paths"]
+            ])
+            del global_mapping_entry["discriminator"]
+            global_mapping[property_id].append(global_mapping_entry)
+    global_converter = XmlDumpConverter(GndDumpConverter.XML_ENTITIES_PATH,
+                                        GndDumpConverter.XML_ENTITY_ID_XPATH,
+                                        global_mapping,
+                                        GndDumpConverter.XML_NAMESPACES,
+                                        True)
+    processed_ids = []
+    leftover_ids = []
+    visible_nodes = []
+    process_entity = global_converter.process_entity
+    extract_entity_id = global_converter.extract_entity_id
+    count_scoped_nodes = global_converter.compiled_mapping.compile_xpath("count(//node())")
+    def process_entity_spy(entity_element):
+        assert entity_element.getparent() is None
+        root = entity_element.getroottree().getroot()
+        remaining_ids = [extract_entity_id(element) for element in root]
+        leftover_ids.extend(set(remaining_ids) & set(processed_ids))
+        processed_ids.append(extract_entity_id(entity_element))
+        visible_nodes.append((count_scoped_nodes(entity_element),
+                              entity_element.xpath("count(descendant::node())"),
+                              entity_element.xpath("count(//node())")))
+        return process_entity(entity_element)
+    global_converter.process_entity = process_entity_spy
+
+    gnd_converter = GndDumpConverter(True)
+    with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+        expected_values = process_dump(gnd_converter.xml_dump_converter, dump_file)
+    with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+        actual_values = process_dump(global_converter, dump_file)
+
+    assert expected_values == actual_values
+    # Records are evaluated on their own and no processed records are left
+    # in the tree, regardless of their position in the dump
+    assert 6 == len(processed_ids)
+    assert [] == leftover_ids
+    # A scoped // path visits the nodes of the record only, for the first
+    # record as well as for the last one. Unscoped, the first record
+    # also sees the records, that the parser has read ahead.
+    for scoped_nodes, record_nodes, _ in visible_nodes:
+        assert record_nodes == scoped_nodes
+    assert visible_nodes[0][2] > visible_nodes[0][1]
+
+
 @pytest.mark.parametrize(["prefix", "date", "fallback", "expected_url"], [
     # No fallback
     (
@@ -124,23 +542,203 @@ def test_download_dump_error(download_file_mock):
         gnd_converter.download_dump("foobar")
 
 
+def test_download_dump_cached(http_server, http_requests, tmpdir):
+    dump_url = http_server + "/databaseconverters/testdata/gnd_dump.xml.gz"
+    expected_size = os.path.getsize(get_test_file_path("testdata/gnd_dump.xml.gz"))
+    gnd_converter = GndDumpConverter(True, dump_cache_directory=str(tmpdir))
+    gnd_converter.get_dump_url = lambda file_prefix, fallback=False: dump_url
+
+    for _ in xrange(2):
+        dump_file, actual_url, actual_size = gnd_converter.download_dump("foobar")
+        dump_file.close()
+
+        assert dump_url == actual_url
+        assert expected_size == actual_size
+    assert 2 == len(http_requests)
+    assert "if-none-match" in http_requests[1][1]
+
+
 def test_write_external_data():
     expected_dump_id = "foobar"
     expected_value_triple = ("foobar", "P42", ["foobar"])
 
     gnd_converter = GndDumpConverter(False)
     xml_dump_converter_mock = XmlDumpConverter(None, None, None)
-    def process_dump_mock(dump_file):
+    def process_dump_mock(dump_file, progress_reporter=None):
         yield expected_value_triple
     xml_dump_converter_mock.process_dump = process_dump_mock
     gnd_converter.xml_dump_converter = xml_dump_converter_mock
     result_mock = ResultWriter(StringIO(), StringIO())
-    def write_external_value_mock(dump_id, external_id,
-                                  property_id, external_value):
-        assert expected_dump_id == dump_id
-        assert expected_value_triple[0] == external_id
-        assert expected_value_triple[1] == property_id
-        assert external_value in expected_value_triple[2]
-    result_mock.write_external_value = write_external_value_mock
+    written_rows = []
+    def write_external_values_mock(rows):
+        for dump_id, external_id, property_id, external_value in rows:
+            assert expected_dump_id == dump_id
+            assert expected_value_triple[0] == external_id
+            assert expected_value_triple[1] == property_id
+            assert external_value in expected_value_triple[2]
+            written_rows.append(external_value)
+    result_mock.write_external_values = write_external_values_mock
 
     gnd_converter.write_external_data(expected_dump_id, None, result_mock)
+
+    assert expected_value_triple[2] == written_rows
+
+
+def test_write_external_data_incremental(tmpdir):
+    with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+        dump = dump_file.read()
+    records = dict((record_id, record) for record, record_id in
+                   re.findall(r"(\s*<record.*?\(DE-588\)(.*?)<.*?</record>)", dump,
+                              re.DOTALL))
+    previous_dump = dump.replace(records["4000003-7"], "")
+    current_dump = dump.replace(records["4000001-0"], "").replace(
+        "Cambridge", "Oxford")
+    incremental_directory = str(tmpdir.join("incremental"))
+
+    previous_delta = convert_incrementally(previous_dump, incremental_directory)[1]
+    actual_values, actual_delta = convert_incrementally(current_dump,
+                                                        incremental_directory)
+    unchanged_values, unchanged_delta = convert_incrementally(current_dump,
+                                                              incremental_directory)
+
+    gnd_converter = GndDumpConverter(True)
+    result_writer = ResultWriter(StringIO(), StringIO())
+    gnd_converter.write_external_data("GND", StringIO(current_dump), result_writer)
+    expected_values = result_writer.external_values_file.getvalue()
+    assert "Oxford" in expected_values
+    assert expected_values == actual_values
+    assert expected_values == unchanged_values
+    assert 5 == len(previous_delta)
+    assert set(["added"]) == set(change for _, _, change in previous_delta)
+    assert [
+        ["GND", "119033364", "changed"],
+        ["GND", "4000003-7", "added"],
+        ["GND", "4000001-0", "removed"]
+    ] == actual_delta
+    assert [] == unchanged_delta
+    assert ["GND.index", "GND.rows"] == sorted(os.listdir(incremental_directory))
+
+
+def test_write_external_data_incremental_changed_mapping(tmpdir):
+    with open_test_file("testdata/gnd_dump_mixed.xml") as dump_file:
+        dump = dump_file.read()
+    incremental_directory = str(tmpdir)
+    convert_incrementally(dump, incremental_directory)
+
+    gnd_converter = GndDumpConverter(True, incremental_directory=incremental_directory)
+    gnd_converter.xml_dump_converter.compiled_mapping.fingerprint = "abcdefgh"
+    result_writer = ResultWriter(StringIO(), StringIO(), delta_file=StringIO())
+    gnd_converter.write_external_data("GND", StringIO(dump), result_writer)
+
+    delta = list(csv.reader(StringIO(result_writer.delta_file.getvalue())))
+    assert 6 == len(delta)
+    assert set(["added"]) == set(change for _, _, change in delta)
+
+
+def convert_incrementally(dump, incremental_directory):
+    """
+    Converts given dump in incremental mode.
+    :param dump: Content of the dump.
+    :param incremental_directory: Directory of the record index.
+    :return: External values as csv string and rows of delta file.
+    """
+    gnd_converter = GndDumpConverter(True, incremental_directory=incremental_directory)
+    result_writer = ResultWriter(StringIO(), StringIO(), delta_file=StringIO())
+    gnd_converter.write_external_data("GND", StringIO(dump), result_writer)
+    delta = list(csv.reader(StringIO(result_writer.delta_file.getvalue())))
+
+    return result_writer.external_values_file.getvalue(), delta
+
+
+def test_lint_mapping():
+    gnd_converter = GndDumpConverter(True)
+    linter, issues = gnd_converter.lint_mapping(
+        get_test_file_path("testdata/gnd_dump_mixed.xml"), 4)
+
+    assert 4 == linter.sample_records
+    unnamespaced_labels = [label for severity, label, path, message in issues
+                           if message.startswith("Element names without namespace prefix")]
+    assert ["P106", "P39, P410"] == unnamespaced_labels
+    assert ("info", "P569, P570") in [issue[:2] for issue in issues]
+
+
+def test_lint_mapping_streaming():
+    gnd_converter = GndDumpConverter(True)
+    def stream_dump_mock(file_prefix):
+        return open_test_file("testdata/gnd_dump.xml.gz"), None
+    gnd_converter.stream_dump = stream_dump_mock
+
+    linter, _ = gnd_converter.lint_mapping(sample_records=2)
+
+    assert 2 * len(gnd_converter.FILE_PREFIXES) == linter.sample_records
+
+
+def test_lint_mapping_static():
+    gnd_converter = GndDumpConverter(True)
+    gnd_converter.stream_dump = None
+    linter, issues = gnd_converter.lint_mapping(sample_records=0)
+
+    assert 0 == linter.sample_records
+    assert issues
+
+
+def get_cacheable_mapping():
+    """
+    Copies the property mapping of GND and declares all entries with a
+    formatter cacheable, since the mapping itself declares none.
+    :return: Copy of the property mapping.
+    """
+    cacheable_mapping = {}
+    for property_id, entries in propertymappings.mapping.iteritems():
+        cacheable_mapping[property_id] = [dict(entry, cacheable="formatter" in entry)
+                                          for entry in entries]
+
+    return cacheable_mapping
+
+
+def process_dump(xml_dump_converter, dump_file):
+    """
+    Processes given dump and returns sorted triples of entity id,
+    property id and single external value.
+    :param xml_dump_converter: XmlDumpConverter instance.
+    :param dump_file: File object of the dump.
+    :return: Sorted list of triples.
+    """
+    values = []
+    for entity_id, property_id, external_values in xml_dump_converter.process_dump(dump_file):
+        for external_value in external_values:
+            values.append((entity_id, property_id, external_value))
+
+    return sorted(values)
+
+
+def open_dump_file(file_path):
+    """
+    Opens a dump containing test data, that may be compressed with gzip.
+    :param file_path: Relative file path.
+    :return: Opened file object.
+    """
+    if file_path.endswith(".gz"):
+        return gzip.open(get_test_file_path(file_path), "rb")
+
+    return open_test_file(file_path)
+
+
+def open_test_file(file_path, mode="rb"):
+    """
+    Opens a file containing test data by specifying a relative file path.
+    :param file_path: Relative file path.
+    :param mode: Mode in which file should be opened.
+    :return: Opened file object.
+    """
+    return open(get_test_file_path(file_path), mode)
+
+
+def get_test_file_path(file_path):
+    """
+    Gets absolute path of a file containing test data.
+    :param file_path: Relative file path.
+    :return: Absolute file path.
+    """
+    script_dir = os.path.dirname(__file__)
+    return os.path.join(script_dir, file_path)
@@ -0,0 +1,186 @@
+"""Contains test for CompiledPropertyMapping class"""
+import pytest
+from lxml import etree
+
+from dumpconverter.dataformatconverters.CompiledPropertyMapping import CompiledPropertyMapping
+
+
+NAMESPACES = {
+    "foo": "http://www.foo.com"
+}
+
+
+def test_compile_mapping():
+    formatter = lambda x: x
+    property_mapping = {
+        "P1": [
+            {
+                "value_paths": ["foo:foo", "foo:bar"],
+                "formatter": formatter
+            }
+        ]
+    }
+    compiled_mapping = CompiledPropertyMapping(property_mapping, NAMESPACES)
+
+    assert 1 == len(compiled_mapping.properties)
+    property_id, mappings = compiled_mapping.properties[0]
+    assert "P1" == property_id
+    assert formatter == mappings[0]["formatter"]
+    for value_path in mappings[0]["value_paths"]:
+        assert isinstance(value_path, etree.XPath)
+    assert ["foo:foo", "foo:bar"] == property_mapping["P1"][0]["value_paths"]
+
+
+@pytest.mark.parametrize(["formatter_cache_size", "expected_caches"], [
+    (10, 1),
+    (0, 0)
+])
+def test_compile_cacheable_mapping(formatter_cache_size, expected_caches):
+    formatter = lambda x: x.upper()
+    property_mapping = {
+        "P1": [
+            {
+                "value_paths": ["foo:foo"],
+                "formatter": formatter,
+                "cacheable": True
+            },
+            {
+                "value_paths": ["foo:bar"],
+                "formatter": formatter
+            }
+        ]
+    }
+    compiled_mapping = CompiledPropertyMapping(
+        property_mapping, NAMESPACES, formatter_cache_size=formatter_cache_size)
+
+    mappings = compiled_mapping.properties[0][1]
+    assert expected_caches == len(compiled_mapping.formatter_caches)
+    assert formatter == mappings[1]["formatter"]
+    assert "FOO" == mappings[0]["formatter"]("foo")
+    assert "FOO" == mappings[0]["formatter"]("foo")
+    if expected_caches:
+        assert {"P1": [1, 1]} == compiled_mapping.get_formatter_cache_counters()
+
+        cache_counters = compiled_mapping.pop_formatter_cache_counters()
+        assert [(1, 1)] == cache_counters
+        assert {"P1": [0, 0]} == compiled_mapping.get_formatter_cache_counters()
+
+        compiled_mapping.add_formatter_cache_counters(cache_counters)
+        compiled_mapping.add_formatter_cache_counters(cache_counters)
+        assert {"P1": [2, 2]} == compiled_mapping.get_formatter_cache_counters()
+
+
+def test_compile_xpath_shares_identical_paths():
+    compiled_mapping = CompiledPropertyMapping(None, NAMESPACES)
+    xpath = compiled_mapping.compile_xpath("foo:foo/text()")
+
+    assert xpath is compiled_mapping.compile_xpath("foo:foo/text()")
+    assert xpath is not compiled_mapping.compile_xpath("foo:bar/text()")
+    element = etree.fromstring('<e xmlns="http://www.foo.com"><foo>bar</foo></e>')
+    assert ["bar"] == xpath(element)
+
+
+@pytest.mark.parametrize("property_mapping", [None, {}])
+def test_compile_empty_mapping(property_mapping):
+    compiled_mapping = CompiledPropertyMapping(property_mapping)
+
+    assert [] == compiled_mapping.properties
+
+
+@pytest.mark.parametrize(["entity", "expected_properties"], [
+    (
+        '<e xmlns="http://www.foo.com"><type>p</type></e>',
+        [("P1", 2), ("P2", 1)]
+    ),
+    (
+        '<e xmlns="http://www.foo.com"><type>g</type></e>',
+        [("P1", 1), ("P3", 1)]
+    ),
+    (
+        '<e xmlns="http://www.foo.com"><type>p</type><type>g</type></e>',
+        [("P1", 2), ("P2", 1), ("P3", 1)]
+    ),
+    (
+        '<e xmlns="http://www.foo.com"><type>x</type></e>',
+        [("P1", 1)]
+    ),
+    (
+        '<e xmlns="http://www.foo.com"></e>',
+        [("P1", 1)]
+    )
+])
+def test_get_properties(entity, expected_properties):
+    property_mapping = {
+        "P1": [
+            {"value_paths": ["foo:foo"]},
+            {"value_paths": ["foo:bar"], "discriminator": "p"}
+        ],
+        "P2": [
+            {"value_paths": ["foo:foo"], "discriminator": "p"}
+        ],
+        "P3": [
+            {"value_paths": ["foo:foo"], "discriminator": "g"}
+        ]
+    }
+    compiled_mapping = CompiledPropertyMapping(property_mapping, NAMESPACES,
+                                               "foo:type/text()")
+    properties = compiled_mapping.get_properties(etree.fromstring(entity))
+    actual_properties = [(property_id, len(mappings))
+                         for property_id, mappings in properties]
+
+    assert sorted(expected_properties) == sorted(actual_properties)
+
+
+def test_get_properties_without_discriminator():
+    property_mapping = {
+        "P1": [
+            {"value_paths": ["foo:bar"], "discriminator": "p"}
+        ]
+    }
+    compiled_mapping = CompiledPropertyMapping(property_mapping, NAMESPACES)
+    entity = etree.fromstring('<e xmlns="http://www.foo.com"/>')
+
+    assert compiled_mapping.properties == compiled_mapping.get_properties(entity)
+
+
+@pytest.mark.parametrize(["path", "expected_path"], [
+    ("foo:foo/text()", "foo:foo/text()"),
+    ("foo:foo//foo:bar", "foo:foo//foo:bar"),
+    ("foo:foo[@code='a//b']", "foo:foo[@code='a//b']"),
+    ("//foo:foo", "ancestor-or-self::node()[last()]//foo:foo"),
+    (
+        "foo:foo[@code='a' and //foo:bar='p']",
+        "foo:foo[@code='a' and ancestor-or-self::node()[last()]//foo:bar='p']"
+    ),
+    (
+        "foo:foo | //foo:bar",
+        "foo:foo | ancestor-or-self::node()[last()]//foo:bar"
+    ),
+    (
+        "foo:a[contains(., ', //x')]/text()",
+        "foo:a[contains(., ', //x')]/text()"
+    ),
+    (
+        "foo:a[contains(., \"(//x\") or //foo:b='//c']",
+        "foo:a[contains(., \"(//x\") or ancestor-or-self::node()[last()]//foo:b='//c']"
+    )
+])
+def test_scope_to_entity(path, expected_path):
+    compiled_mapping = CompiledPropertyMapping(None, NAMESPACES)
+
+    assert expected_path == compiled_mapping.scope_to_entity(path)
+
+
+def test_compile_xpath_scoped_to_entity():
+    root = etree.fromstring('<c xmlns="http://www.foo.com">'
+                            '<e><foo>1</foo><type>u</type></e>'
+                            '<e><foo>2</foo><type>p</type></e></c>')
+    entity_element = root[0]
+    root.remove(entity_element)
+    compiled_mapping = CompiledPropertyMapping(None, NAMESPACES)
+
+    xpath = compiled_mapping.compile_xpath("//foo:foo/text()")
+    assert ["1"] == xpath(entity_element)
+    xpath = compiled_mapping.compile_xpath("foo:foo[//foo:type='p']/text()")
+    assert [] == xpath(entity_element)
+    assert ["2"] == xpath(root[0])
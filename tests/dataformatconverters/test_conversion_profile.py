@@ -0,0 +1,73 @@
+"""Contains test for ConversionProfile class"""
+import json
+
+from dumpconverter.dataformatconverters.ConversionProfile import ConversionProfile
+
+
+def test_add():
+    profile = ConversionProfile()
+    profile.add("properties", "P1", 1.5)
+    profile.add("properties", "P1", 0.5)
+    profile.add("stages", "parsing", 2.0, 10)
+
+    assert {
+        "stages": {"parsing": [2.0, 10]},
+        "properties": {"P1": [2.0, 2]},
+        "mappings": {}
+    } == profile.timings
+
+
+def test_pop_timings():
+    profile = ConversionProfile()
+    profile.add("mappings", "P1[0]", 1.0)
+
+    timings = profile.pop_timings()
+
+    assert {"P1[0]": [1.0, 1]} == timings["mappings"]
+    assert {} == profile.timings["mappings"]
+
+
+def test_add_timings():
+    profile = ConversionProfile()
+    profile.add("properties", "P1", 1.0)
+    other_profile = ConversionProfile()
+    other_profile.add("properties", "P1", 2.0, 3)
+    other_profile.add("properties", "P2", 0.5)
+
+    profile.add_timings(other_profile.pop_timings())
+
+    assert {"P1": [3.0, 4], "P2": [0.5, 1]} == profile.timings["properties"]
+
+
+def test_print_report(capsys):
+    profile = ConversionProfile()
+    profile.add("stages", "total", 4.0)
+    profile.add("properties", "P1", 1.0, 2)
+    profile.add("properties", "P2", 2.0, 2)
+    profile.add("properties", "P3", 0.5, 2)
+
+    profile.print_report(limit=2)
+    out, err = capsys.readouterr()
+
+    assert [
+        "Profile of stages:",
+        "  total                         4.000 s          1 calls  100.0%",
+        "Profile of properties:",
+        "  P2                            2.000 s          2 calls   50.0%",
+        "  P1                            1.000 s          2 calls   25.0%"
+    ] == out.splitlines()
+
+
+def test_write_json(tmpdir):
+    profile = ConversionProfile()
+    profile.add("properties", "P1", 1.0, 2)
+    json_path = str(tmpdir.join("profile.json"))
+
+    profile.write_json(json_path)
+
+    with open(json_path) as json_file:
+        assert {
+            "stages": {},
+            "properties": {"P1": {"seconds": 1.0, "calls": 2}},
+            "mappings": {}
+        } == json.load(json_file)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Contains test for FieldPathParser class"""
+import pytest
+
+from dumpconverter.dataformatconverters.FieldPathParser import FieldPathParser
+from dumpconverter.dataformatconverters.StreamedElement import StreamedElement
+
+
+NAMESPACES = {"ns": "info:srw/schema/1/marcxml-v1.1-light"}
+DATAFIELD = "{info:srw/schema/1/marcxml-v1.1-light}datafield"
+SUBFIELD = "{info:srw/schema/1/marcxml-v1.1-light}subfield"
+
+
+@pytest.mark.parametrize(["path", "expected_attributes"], [
+    (
+        "ns:controlfield[@tag='001']/text()",
+        {
+            "field_tag": "{info:srw/schema/1/marcxml-v1.1-light}controlfield",
+            "field_condition": ("attribute", "tag", "001"),
+            "value_tag": None,
+            "selects_text": True,
+            "prefix": None
+        }
+    ),
+    (
+        "ns:datafield[@tag='100']/ns:subfield[@code='a']/text()",
+        {
+            "field_tag": DATAFIELD,
+            "field_condition": ("attribute", "tag", "100"),
+            "value_tag": SUBFIELD,
+            "value_condition": ("attribute", "code", "a"),
+            "selects_text": True
+        }
+    ),
+    (
+        "ns:datafield[@tag='550' and ns:subfield[@code='4']='obal']/ns:subfield[@code='a']/text()",
+        {
+            "field_condition": ("and", [
+                ("attribute", "tag", "550"),
+                ("child", SUBFIELD, ("attribute", "code", "4"), "obal")
+            ])
+        }
+    ),
+    (
+        "ns:datafield[@tag='024' and (ns:subfield[@code='2']='viaf' or "
+        "ns:subfield[@code='2']=\"isni\")]/ns:subfield[@code='0']/text()",
+        {
+            "field_condition": ("and", [
+                ("attribute", "tag", "024"),
+                ("or", [
+                    ("child", SUBFIELD, ("attribute", "code", "2"), "viaf"),
+                    ("child", SUBFIELD, ("attribute", "code", "2"), "isni")
+                ])
+            ])
+        }
+    ),
+    (
+        "ns:datafield[@tag='035']/ns:subfield[@code='a' and starts-with(text(), '(DE-588)')]/text()",
+        {
+            "value_condition": ("and", [
+                ("attribute", "code", "a"),
+                ("starts-with", "(DE-588)")
+            ])
+        }
+    ),
+    (
+        "substring-after(ns:datafield[@tag='035']/ns:subfield[@code='a'], '(OCoLC)')",
+        {
+            "value_tag": SUBFIELD,
+            "selects_text": False,
+            "prefix": "(OCoLC)"
+        }
+    ),
+    (
+        "ns:datafield[@tag='100']/ns:subfield[@code='a']='Adams'",
+        None
+    ),
+    (
+        "ns:datafield[@tag='100']/ns:subfield[@code='a']",
+        None
+    ),
+    (
+        "//ns:datafield[@tag='100']/ns:subfield[@code='a']/text()",
+        None
+    ),
+    (
+        "ns:datafield[1]/ns:subfield/text()",
+        None
+    ),
+    (
+        "ns:datafield/ns:subfield/ns:foo/text()",
+        None
+    ),
+    (
+        "ns:datafield[@xml:lang='de']/text()",
+        None
+    ),
+    (
+        "ns:datafield/ns:subfield[ns:foo='bar']/text()",
+        None
+    ),
+    (
+        "foo:datafield/text()",
+        None
+    ),
+    (
+        "ns:datafield/@tag",
+        None
+    ),
+    (
+        "count(ns:datafield)",
+        None
+    ),
+    (
+        "ns:datafield[@tag='100'",
+        None
+    )
+])
+def test_compile(path, expected_attributes):
+    parser = FieldPathParser(NAMESPACES)
+    field_path = parser.compile(path)
+
+    if expected_attributes is None:
+        assert field_path is None
+    else:
+        assert path == field_path.path
+        for name, expected_value in expected_attributes.iteritems():
+            assert expected_value == getattr(field_path, name)
+
+
+def test_compile_unicode_literal():
+    parser = FieldPathParser(NAMESPACES)
+    field_path = parser.compile("ns:datafield[ns:subfield[@code='i']='Beruf ä']/text()")
+
+    assert u"Beruf ä" == field_path.field_condition[3]
+
+
+@pytest.mark.parametrize(["path", "expected_result"], [
+    (
+        "ns:datafield[@tag='100']/ns:subfield[@code='a']/text()",
+        ["Adams", "Douglas"]
+    ),
+    (
+        "ns:datafield[@tag='100']/ns:subfield[@code='b']/text()",
+        []
+    ),
+    (
+        "ns:datafield[@tag='100']/text()",
+        ["\n", "\n"]
+    ),
+    (
+        "ns:datafield[@tag='100' and ns:subfield[@code='4']='obal']/ns:subfield[@code='a']/text()",
+        []
+    ),
+    (
+        "ns:datafield[ns:subfield[@code='a']='Adams' or @tag='400']/ns:subfield[@code='4']/text()",
+        ["aut"]
+    ),
+    (
+        "ns:datafield/ns:subfield[starts-with(text(), 'Do')]/text()",
+        ["Douglas"]
+    ),
+    (
+        "substring-after(ns:datafield/ns:subfield[@code='a'], 'Ad')",
+        "ams"
+    ),
+    (
+        "substring-after(ns:datafield/ns:subfield[@code='a'], 'Do')",
+        ""
+    ),
+    (
+        "substring-after(ns:datafield/ns:subfield[@code='c'], 'Do')",
+        ""
+    )
+])
+def test_evaluate(path, expected_result):
+    field = StreamedElement(DATAFIELD, {"tag": "100"})
+    field.texts = ["\n", "\n"]
+    for code, text in [("a", "Adams"), ("4", "aut"), ("a", "Douglas")]:
+        subfield = StreamedElement(SUBFIELD, {"code": code})
+        subfield.texts = [text]
+        subfield.parts = [text]
+        field.children.append(subfield)
+
+    parser = FieldPathParser(NAMESPACES)
+    field_path = parser.compile(path)
+    values = []
+    field_path.select(field, values)
+
+    assert expected_result == field_path.get_result(values)
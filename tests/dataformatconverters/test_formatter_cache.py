@@ -0,0 +1,72 @@
+"""Contains test for FormatterCache class"""
+import pytest
+from mock import Mock
+
+from dumpconverter.dataformatconverters.FormatterCache import FormatterCache
+
+
+def test_format():
+    formatter = Mock(side_effect=lambda x, y: x + y)
+    formatter_cache = FormatterCache(formatter)
+
+    assert "foobar" == formatter_cache.format("foo", "bar")
+    assert "foobar" == formatter_cache.format("foo", "bar")
+    assert "fubar" == formatter_cache.format("fu", "bar")
+    assert "foobar" == formatter_cache.format("foo", "bar")
+
+    assert 2 == formatter.call_count
+    assert 2 == formatter_cache.hits
+    assert 2 == formatter_cache.misses
+
+
+def test_format_caches_none():
+    formatter = Mock(return_value=None)
+    formatter_cache = FormatterCache(formatter)
+
+    assert formatter_cache.format("foo") is None
+    assert formatter_cache.format("foo") is None
+    assert 1 == formatter.call_count
+
+
+def test_format_does_not_cache_errors():
+    formatter = Mock(side_effect=ValueError)
+    formatter_cache = FormatterCache(formatter)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            formatter_cache.format("foo")
+    assert 2 == formatter.call_count
+    assert 0 == len(formatter_cache)
+
+
+def test_format_bounded():
+    formatter = Mock(side_effect=lambda x: x)
+    formatter_cache = FormatterCache(formatter, 4)
+
+    for value in range(100):
+        formatter_cache.format(value)
+        assert len(formatter_cache) <= 4
+
+
+def test_format_keeps_recently_used():
+    formatter = Mock(side_effect=lambda x: x)
+    formatter_cache = FormatterCache(formatter, 4)
+
+    for value in range(10):
+        formatter_cache.format("foo")
+        formatter_cache.format(value)
+
+    assert 11 == formatter.call_count
+    assert 9 == formatter_cache.hits
+
+
+def test_pop_counters():
+    formatter_cache = FormatterCache(lambda x: x)
+    formatter_cache.format("foo")
+    formatter_cache.format("foo")
+
+    assert (1, 1) == formatter_cache.pop_counters()
+    assert (0, 0) == formatter_cache.pop_counters()
+
+    formatter_cache.add_counters(3, 4)
+    assert (3, 4) == (formatter_cache.hits, formatter_cache.misses)
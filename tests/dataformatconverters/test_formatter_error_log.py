@@ -0,0 +1,51 @@
+"""Contains test for FormatterErrorLog class"""
+import pytest
+
+from dumpconverter.dataformatconverters.FormatterErrorLog import FormatterErrorLog
+from dumpconverter.exceptions.FormatterError import FormatterError
+
+
+def test_add_error():
+    error_log = FormatterErrorLog(sample_size=2)
+    for entity_id in ("Q1", "Q2", "Q3"):
+        error_log.add_error("P1", entity_id, ["foo"], ValueError("bar"))
+    error_log.add_error("P2", "Q1", ["fu"], IndexError())
+
+    assert {"P1": 3, "P2": 1} == error_log.counts
+    assert [
+        ("Q1", ("foo",), "ValueError: bar"),
+        ("Q2", ("foo",), "ValueError: bar")
+    ] == error_log.samples["P1"]
+    assert [("Q1", ("fu",), "IndexError: ")] == error_log.samples["P2"]
+
+
+def test_add_error_strict():
+    error_log = FormatterErrorLog(strict=True)
+
+    with pytest.raises(FormatterError) as exception_info:
+        error_log.add_error("P1", "Q1", ["foo"], ValueError("bar"))
+    assert "P1" == exception_info.value.property_id
+    assert "ValueError: bar" in str(exception_info.value)
+
+
+def test_pop_and_add_errors():
+    worker_error_log = FormatterErrorLog(sample_size=2)
+    worker_error_log.add_error("P1", "Q1", ["foo"], ValueError("bar"))
+    worker_error_log.add_error("P1", "Q2", ["foo"], ValueError("bar"))
+    error_log = FormatterErrorLog(sample_size=2)
+    error_log.add_error("P1", "Q3", ["foo"], ValueError("bar"))
+
+    error_log.add_errors(*worker_error_log.pop_errors())
+
+    assert {} == worker_error_log.counts
+    assert {"P1": 3} == error_log.counts
+    assert ["Q3", "Q1"] == [sample[0] for sample in error_log.samples["P1"]]
+
+
+def test_print_errors(capsys):
+    error_log = FormatterErrorLog()
+    error_log.add_error("P1", "Q1", ["foo"], ValueError("bar"))
+    error_log.print_errors()
+
+    out, _ = capsys.readouterr()
+    assert "Formatter of P1 failed 1 times, e.g.:\n  Q1 ['foo']: ValueError: bar\n" == out
@@ -0,0 +1,193 @@
+"""Contains test for MappingLinter class"""
+import pytest
+from StringIO import StringIO
+
+from dumpconverter.dataformatconverters.MappingLinter import MappingLinter
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+
+
+DUMP = """<?xml version="1.0" encoding="UTF-8"?>
+<collection xmlns="http://www.loc.gov/MARC21/slim">
+<record>
+  <controlfield tag="001">100</controlfield>
+  <datafield tag="079"><subfield code="b">p</subfield></datafield>
+  <datafield tag="100"><subfield code="a">Adams, Douglas</subfield></datafield>
+</record>
+<record>
+  <controlfield tag="001">200</controlfield>
+  <datafield tag="079"><subfield code="b">p</subfield></datafield>
+  <datafield tag="375"><subfield code="a">1</subfield></datafield>
+</record>
+<record>
+  <controlfield tag="001">300</controlfield>
+  <datafield tag="079"><subfield code="b">g</subfield></datafield>
+  <datafield tag="151"><subfield code="a">Berlin</subfield></datafield>
+</record>
+</collection>"""
+
+NAME_PATH = "ns:datafield[@tag='100']/ns:subfield[@code='a']/text()"
+GENDER_PATH = "ns:datafield[@tag='375']/ns:subfield[@code='a']/text()"
+PLACE_PATH = "ns:datafield[@tag='151']/ns:subfield[@code='a']/text()"
+UNNAMESPACED_PATH = "ns:datafield[@tag='550' and subfield[@code='i']='Beruf']/subfield[@code='a']/text()"
+GLOBAL_PATH = "//ns:datafield[@tag='100']/ns:subfield[@code='a']/text()"
+
+MAPPING = {
+    "P1": [
+        {
+            "value_paths": [NAME_PATH],
+            "discriminator": "p"
+        },
+        {
+            "value_paths": [NAME_PATH],
+            "discriminator": "p"
+        }
+    ],
+    "P2": [
+        {
+            "value_paths": [NAME_PATH, GENDER_PATH],
+            "discriminator": "p"
+        }
+    ],
+    "P3": [
+        {
+            "value_paths": [UNNAMESPACED_PATH],
+            "discriminator": "p"
+        }
+    ],
+    "P4": [
+        {
+            "value_paths": [GLOBAL_PATH],
+            "discriminator": "w"
+        }
+    ],
+    "P5": [
+        {
+            "value_paths": [PLACE_PATH],
+            "discriminator": "g"
+        }
+    ]
+}
+
+
+@pytest.mark.parametrize(["path", "expected_names"], [
+    (
+        "ns:datafield[@tag='100']/ns:subfield[@code='a']/text()",
+        []
+    ),
+    (
+        "ns:datafield[@tag='550' and (subfield[@code='i']='Beruf' or subfield[@code='i']='x')]/subfield[@code='a']/text()",
+        ["subfield"]
+    ),
+    (
+        "substring-after(datafield[starts-with(./text(), 'and')], '(DE-588)')",
+        ["datafield"]
+    ),
+    (
+        "ns:datafield[position() mod 2 = 1 and @tag div 2 > 1]/attribute::code",
+        []
+    ),
+    (
+        "ns:datafield/and/or/child::mod | */ns:*/node()",
+        ["and", "or", "mod"]
+    )
+])
+def test_get_unnamespaced_names(path, expected_names):
+    linter = MappingLinter(create_dump_converter())
+
+    assert expected_names == linter.get_unnamespaced_names(path)
+
+
+def test_check():
+    linter = MappingLinter(create_dump_converter(), record_types=("p", "g"))
+    issues = linter.check()
+
+    assert [
+        ("error", "P3", UNNAMESPACED_PATH,
+         "Element names without namespace prefix never match: subfield"),
+        ("error", "P4", GLOBAL_PATH, "Unreachable: no records of type 'w' in the dumps"),
+        ("warning", "P1", NAME_PATH, "Duplicate mapping entry"),
+        ("warning", "P4", GLOBAL_PATH, "Document-global // scans all descendants of a record"),
+        ("info", "P1, P2", NAME_PATH, "Shared by several properties and evaluated once per record")
+    ] == issues
+
+
+@pytest.mark.parametrize(["path", "expected_severities"], [
+    (
+        "ns:datafield[",
+        ["error"]
+    ),
+    (
+        "foo:datafield/text()",
+        ["error"]
+    ),
+    (
+        "ns:datafield[//ns:subfield='a']/text()",
+        ["warning"]
+    ),
+    (
+        "ns:datafield//ns:subfield/text()",
+        []
+    )
+])
+def test_check_path(path, expected_severities):
+    linter = MappingLinter(create_dump_converter())
+
+    assert expected_severities == [severity for severity, _ in linter.check_path(path)]
+
+
+def test_check_without_discriminator_path():
+    linter = MappingLinter(create_dump_converter(discriminator_path=None))
+    issues = linter.check()
+
+    assert ("warning", "P5", PLACE_PATH,
+            "Discriminator 'g' is ignored without discriminator path") in issues
+
+
+def test_evaluate_sample():
+    linter = MappingLinter(create_dump_converter())
+    linter.evaluate_sample(StringIO(DUMP), 10)
+    linter.evaluate_sample(StringIO(DUMP), 2)
+
+    assert 5 == linter.sample_records
+    assert {"p": 4, "g": 1} == linter.sample_record_types
+    assert [4, 2] == linter.path_statistics[NAME_PATH][:2]
+    assert [4, 0] == linter.path_statistics[UNNAMESPACED_PATH][:2]
+    assert [1, 1] == linter.path_statistics[PLACE_PATH][:2]
+    assert [5, 5] == linter.path_statistics["ns:controlfield[@tag='001']/text()"][:2]
+    assert GLOBAL_PATH not in linter.path_statistics
+
+    assert [
+        ("warning", "P3", UNNAMESPACED_PATH, "Never matched in 4 sample records"),
+        ("info", "P4", GLOBAL_PATH, "No sample records of type 'w'")
+    ] == linter.check_sample()
+
+    statistics = linter.get_sample_statistics()
+    assert sorted(statistics, key=lambda row: -row[2] * row[4]) == statistics
+    assert ("P1, P2", NAME_PATH, 4, 2) == [row for row in statistics
+                                          if row[1] == NAME_PATH][0][:4]
+
+
+def test_print_report(capsys):
+    linter = MappingLinter(create_dump_converter())
+    linter.print_report([])
+    output, _ = capsys.readouterr()
+    assert "No issues found.\n" == output
+
+    linter.evaluate_sample(StringIO(DUMP), 10)
+    linter.print_report(linter.check_sample())
+    output, _ = capsys.readouterr()
+    assert "Never matched in 2 sample records" in output
+    assert "Paths evaluated on 3 sample records:" in output
+    assert "  P1, P2                  2        1   50.0%" in output
+
+
+def create_dump_converter(discriminator_path="ns:datafield[@tag='079']/ns:subfield[@code='b']/text()"):
+    """
+    Creates XmlDumpConverter for the test dump.
+    :param discriminator_path: XPath to retrieve the type of an entity.
+    :return: XmlDumpConverter instance.
+    """
+    return XmlDumpConverter("ns:collection/ns:record",
+                            "ns:controlfield[@tag='001']/text()",
+                            MAPPING, {"ns": "http://www.loc.gov/MARC21/slim"},
+                            is_quiet=True, discriminator_path=discriminator_path)
@@ -0,0 +1,86 @@
+"""Contains test for ProfilingXmlDumpConverter class"""
+import os
+
+import pytest
+
+from dumpconverter.dataformatconverters.ProfilingXmlDumpConverter import ProfilingXmlDumpConverter
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+
+
+PROPERTY_MAPPING = {
+    "P1": [
+        {
+            "value_paths": ["foo:title/text()"]
+        }
+    ],
+    "P2": [
+        {
+            "value_paths": ["foo:title/text()"],
+            "formatter": lambda title: title.upper()
+        },
+        {
+            "value_paths": ["foo:id/text()"]
+        }
+    ]
+}
+
+
+def create_dump_converter(converter_class, **kwargs):
+    return converter_class("foo:element/foo:subelement", "foo:id/text()",
+                           PROPERTY_MAPPING, {"foo": "http://www.foo.com"},
+                           is_quiet=True, **kwargs)
+
+
+def process_test_dump(xml_converter):
+    dump_path = os.path.join(os.path.dirname(__file__), "testdata", "xml_dump.xml")
+    with open(dump_path, "rb") as dump_file:
+        return list(xml_converter.process_dump(dump_file))
+
+
+@pytest.mark.parametrize(["workers", "filter_tags"], [
+    (1, True),
+    (1, False),
+    (2, True)
+])
+def test_process_dump(workers, filter_tags):
+    expected_result = process_test_dump(create_dump_converter(XmlDumpConverter))
+    xml_converter = create_dump_converter(ProfilingXmlDumpConverter, workers=workers,
+                                          batch_size=1, filter_tags=filter_tags)
+
+    actual_result = process_test_dump(xml_converter)
+
+    assert expected_result == actual_result
+    timings = xml_converter.profile.timings
+    assert ["P1", "P2"] == sorted(timings["properties"])
+    assert 3 == timings["properties"]["P2"][1]
+    assert ["P1[0]", "P2[0]", "P2[1]"] == sorted(timings["mappings"])
+    assert 3 == timings["mappings"]["P2[1]"][1]
+    assert 3 == timings["stages"]["id_extraction"][1]
+    assert 3 == timings["stages"]["formatting"][1]
+    assert len(actual_result) == timings["stages"]["writing"][1]
+    assert 1 == timings["stages"]["total"][1]
+    assert timings["stages"]["parsing"][0] <= timings["stages"]["total"][0]
+    assert "clean_up_references" in timings["stages"]
+
+
+def test_process_dump_stream_engine():
+    expected_result = process_test_dump(create_dump_converter(XmlDumpConverter))
+    xml_converter = create_dump_converter(ProfilingXmlDumpConverter, engine="stream")
+
+    actual_result = process_test_dump(xml_converter)
+
+    assert expected_result == actual_result
+    timings = xml_converter.profile.timings
+    assert ["P1", "P2"] == sorted(timings["properties"])
+    assert 3 == timings["properties"]["P2"][1]
+    assert ["P1[0]", "P2[0]", "P2[1]"] == sorted(timings["mappings"])
+    assert 3 == timings["mappings"]["P2[1]"][1]
+    assert 3 == timings["stages"]["formatting"][1]
+    assert 1 == timings["stages"]["total"][1]
+
+
+def test_process_entity_inherited():
+    # Only the steps are timed, so that changes of the base reach profiled runs
+    assert "process_entity" not in vars(ProfilingXmlDumpConverter)
+    assert "apply_property" in vars(ProfilingXmlDumpConverter)
+    assert "apply_mapping" in vars(ProfilingXmlDumpConverter)
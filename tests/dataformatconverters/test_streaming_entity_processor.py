@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Contains test for StreamingEntityProcessor class"""
+import pytest
+from StringIO import StringIO
+
+from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+
+
+DUMP = """<?xml version="1.0" encoding="UTF-8"?>
+<collection xmlns="info:srw/schema/1/marcxml-v1.1-light">
+<record>
+  <controlfield tag="001">100</controlfield>
+  <datafield tag="079"><subfield code="b">p</subfield></datafield>
+  <datafield tag="100"><subfield code="a">Adams, <!-- comment -->Douglas</subfield>
+    <subfield code="d">1952-2001</subfield></datafield>
+  <datafield tag="035"><subfield code="a">(OCoLC)12345</subfield></datafield>
+  <datafield tag="035"><subfield code="a">(DE-588)100</subfield></datafield>
+  <datafield tag="550"><subfield code="a">Schriftsteller</subfield>
+    <subfield code="4">berc</subfield><subfield code="i">Beruf</subfield></datafield>
+  <datafield tag="550"><subfield code="a">M&#xFC;nchen</subfield>
+    <subfield code="4">obal</subfield></datafield>
+  <datafield tag="670"><subfield code="a">Nested <i>text</i> value</subfield></datafield>
+  <datafield tag="999"><subfield code="a">ignored</subfield></datafield>
+</record>
+<record>
+  <controlfield tag="001">200</controlfield>
+  <datafield tag="079"><subfield code="b">g</subfield></datafield>
+  <datafield tag="151"><subfield code="a">Berlin</subfield></datafield>
+  <datafield tag="035"><subfield code="a">(OCoLC)67890</subfield></datafield>
+  <datafield tag="550"><subfield code="a">Stadt</subfield><subfield code="a"></subfield>
+    <subfield code="4">obin</subfield></datafield>
+</record>
+<record>
+  <datafield tag="100"><subfield code="a">Record without id</subfield></datafield>
+</record>
+<other><record><controlfield tag="001">300</controlfield></record></other>
+</collection>"""
+
+NAMESPACES = {"ns": "info:srw/schema/1/marcxml-v1.1-light"}
+
+MAPPING = {
+    "P1": [
+        {
+            "value_paths": ["ns:datafield[@tag='100']/ns:subfield[@code='a']/text()"],
+            "discriminator": "p"
+        },
+        {
+            "value_paths": ["ns:datafield[@tag='151']/ns:subfield[@code='a']/text()"],
+            "discriminator": "g"
+        }
+    ],
+    "P2": [
+        {
+            "value_paths": [
+                "ns:datafield[@tag='100']/ns:subfield[@code='a']/text()",
+                "ns:datafield[@tag='100']/ns:subfield[@code='d']/text()"
+            ],
+            "formatter": lambda name, dates: u"{0} ({1})".format(name, dates)
+        }
+    ],
+    "P3": [
+        {
+            "value_paths": ["substring-after(ns:datafield[@tag='035']/ns:subfield[@code='a'], '(OCoLC)')"]
+        }
+    ],
+    "P4": [
+        {
+            "value_paths": ["ns:datafield[@tag='035']/ns:subfield[@code='a' and starts-with(text(), '(DE-588)')]/text()"]
+        }
+    ],
+    "P5": [
+        {
+            "value_paths": ["ns:datafield[@tag='550' and (ns:subfield[@code='4']='obal' or ns:subfield[@code='i']='Beruf')]/ns:subfield[@code='a']/text()"]
+        }
+    ],
+    "P6": [
+        {
+            "value_paths": ["ns:datafield[@tag='670']/ns:subfield[@code='a']"]
+        }
+    ],
+    "P7": [
+        {
+            "value_paths": ["ns:datafield[@tag='550'][ns:subfield[@code='a'] != '']/ns:subfield[@code='4']/text()"]
+        }
+    ]
+}
+
+
+def test_process_dump():
+    expected_values = process_dump("xpath")
+    actual_values = process_dump("stream")
+
+    assert expected_values == actual_values
+    assert ("100", "P1", ["Adams, ", "Douglas"]) in actual_values
+    assert ("100", "P5", ["M\xc3\xbcnchen", "Schriftsteller"]) in actual_values
+    assert ("200", "P1", ["Berlin"]) in actual_values
+    assert "300" not in [entity_id for entity_id, _, _ in actual_values]
+
+
+@pytest.mark.parametrize(["mapping", "expected_needs_element"], [
+    (
+        MAPPING,
+        True
+    ),
+    (
+        dict((property_id, mappings) for property_id, mappings in MAPPING.iteritems()
+             if property_id not in ("P6", "P7")),
+        False
+    )
+])
+def test_needs_element(mapping, expected_needs_element):
+    xml_converter = create_dump_converter(mapping)
+    streaming_processor = xml_converter.streaming_processor
+
+    assert expected_needs_element == streaming_processor.needs_element
+    assert (None in streaming_processor.mapping_paths.values()) == expected_needs_element
+
+
+def test_build_field_index():
+    xml_converter = create_dump_converter(MAPPING)
+    streaming_processor = xml_converter.streaming_processor
+    datafield = "{info:srw/schema/1/marcxml-v1.1-light}datafield"
+    key_attribute, keyed_paths, unkeyed_paths = streaming_processor.field_index[datafield]
+
+    assert "tag" == key_attribute
+    assert ["035", "079", "100", "151", "550"] == sorted(keyed_paths.keys())
+    assert 2 == len(keyed_paths["035"])
+    assert [] == unkeyed_paths
+
+
+def test_shared_field_paths():
+    xml_converter = create_dump_converter(MAPPING)
+    mapping_paths = xml_converter.streaming_processor.mapping_paths
+    properties = dict(xml_converter.compiled_mapping.properties)
+    p1_paths = mapping_paths[id(properties["P1"][0])]
+    p2_paths = mapping_paths[id(properties["P2"][0])]
+
+    assert p1_paths[0] is p2_paths[0]
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        create_dump_converter(MAPPING, engine="foo")
+
+
+def process_dump(engine):
+    """
+    Processes the test dump with given engine.
+    :param engine: Engine applying the mapping.
+    :return: Sorted triples of entity id, property id and sorted values.
+    """
+    xml_converter = create_dump_converter(MAPPING, engine=engine)
+    dump_file = StringIO(DUMP)
+
+    return sorted((entity_id, property_id, sorted(values))
+                  for entity_id, property_id, values in xml_converter.process_dump(dump_file))
+
+
+def create_dump_converter(mapping, engine="stream"):
+    """
+    Creates XmlDumpConverter for the test dump.
+    :param mapping: Property mapping.
+    :param engine: Engine applying the mapping.
+    :return: XmlDumpConverter instance.
+    """
+    return XmlDumpConverter("ns:collection/ns:record",
+                            "ns:controlfield[@tag='001']/text()",
+                            mapping, NAMESPACES, is_quiet=True,
+                            discriminator_path="ns:datafield[@tag='079']/ns:subfield[@code='b']/text()",
+                            engine=engine)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Contains test for TextNormalizer class"""
+import unicodedata
+
+import pytest
+
+from dumpconverter.dataformatconverters.TextNormalizer import TextNormalizer
+
+
+@pytest.mark.parametrize(["value", "expected_value"], [
+    (
+        "foobar",
+        "foobar"
+    ),
+    (
+        "foo\tbar\x7f\n",
+        "foobar"
+    ),
+    (
+        u"foobar",
+        "foobar"
+    ),
+    (
+        unichr(152) + u"foobar" + unichr(156),
+        "foobar"
+    ),
+    (
+        u"füübar",
+        "füübar"
+    ),
+    (
+        "füübar",
+        "füübar"
+    ),
+    (
+        u"fu\u0308u\u0308bar",
+        "füübar"
+    ),
+    (
+        u"foo\u200bbar\ue000\U0001d11e",
+        "foobar\xf0\x9d\x84\x9e"
+    ),
+    (
+        u"Fu\u0308rth\u0378",
+        "Fürth"
+    )
+])
+def test_normalize(value, expected_value):
+    text_normalizer = TextNormalizer()
+    actual_value = text_normalizer.normalize(value)
+
+    assert expected_value == actual_value
+    assert isinstance(actual_value, str)
+
+
+@pytest.mark.parametrize(["normalization_form", "value", "expected_value"], [
+    (
+        "NFD",
+        u"für",
+        "fu\xcc\x88r"
+    ),
+    (
+        "NFKC",
+        u"\ufb01x",
+        "fix"
+    ),
+    (
+        None,
+        u"fu\u0308r",
+        "fu\xcc\x88r"
+    )
+])
+def test_normalize_form(normalization_form, value, expected_value):
+    text_normalizer = TextNormalizer(normalization_form)
+
+    assert expected_value == text_normalizer.normalize(value)
+
+
+def test_normalize_equals_category_filter():
+    text_normalizer = TextNormalizer()
+    for code_point in xrange(0x3000):
+        for value in (unichr(code_point), u"a" + unichr(code_point) + u"\u0301"):
+            value = unicodedata.normalize("NFC", value)
+            expected_value = u"".join(ch for ch in value
+                                      if unicodedata.category(ch)[0] != "C")
+
+            assert expected_value.encode("utf-8") == text_normalizer.normalize(value)
+
+
+def test_get_unprintable_ranges():
+    ranges = TextNormalizer.get_unprintable_ranges()
+
+    assert (0x0, 0x1f) == ranges[0]
+    assert (0x7f, 0x9f) == ranges[1]
+    assert all(start <= end for start, end in ranges)
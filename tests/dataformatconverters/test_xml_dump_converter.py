@@ -4,7 +4,47 @@ import os
 import pytest
 from lxml import etree, objectify
 
+from dumpconverter.dataformatconverters.CompiledPropertyMapping import CompiledPropertyMapping
+from dumpconverter.dataformatconverters.TextNormalizer import TextNormalizer
 from dumpconverter.dataformatconverters.XmlDumpConverter import XmlDumpConverter
+from dumpconverter.exceptions.FormatterError import FormatterError
+
+
+class SyntheticDump:
+    """
+    File object of a dump, whose entities are generated while it is read,
+    so that large dumps do not need to be held in memory. Entities are
+    interleaved with comments and other elements.
+    """
+    def __init__(self, entities):
+        self.chunks = self.generate_chunks(entities)
+        self.buffer = ""
+        self.position = 0
+
+    @staticmethod
+    def generate_chunks(entities):
+        yield '<?xml version="1.0"?>\n<foo:element xmlns:foo="http://www.foo.com">'
+        for index in xrange(entities):
+            yield ('<foo:subelement id="{0}"><foo:foo>value {0}</foo:foo>'
+                   '<foo:title>title</foo:title></foo:subelement>'
+                   '<!-- entity {0} --><foo:other><foo:foo>noise</foo:foo>'
+                   '</foo:other><?pi entity {0}?>\n').format(index)
+        yield '</foo:element>'
+
+    def read(self, size=-1):
+        for chunk in self.chunks:
+            self.buffer += chunk
+            if 0 <= size <= len(self.buffer):
+                break
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        self.position += len(data)
+
+        return data
+
+    def tell(self):
+        return self.position
 
 
 @pytest.mark.parametrize(["entities_path", "expected_path"], [
@@ -33,9 +73,10 @@ def test_apply_namespaces(entities_path, expected_path):
     assert expected_path == actual_path
 
 
-def test_process_dump():
+@pytest.mark.parametrize("filter_tags", [True, False])
+def test_process_dump(filter_tags):
     with open_test_file("testdata/xml_dump.xml") as dump_file:
-        xml_converter = create_dump_converter()
+        xml_converter = create_dump_converter(filter_tags=filter_tags)
         def process_entity_mock(xml_entity):
             yield xml_entity
         xml_converter.process_entity = process_entity_mock
@@ -54,6 +95,176 @@ def test_process_dump():
         assert expected_result == actual_result
 
 
+@pytest.mark.parametrize("filter_tags", [True, False])
+def test_process_dump_constant_memory(filter_tags):
+    xml_converter = create_dump_converter(filter_tags=filter_tags,
+                                          is_quiet=True)
+    live_elements = []
+    def process_entity_mock(xml_entity):
+        live_elements.append(xml_converter.count_live_elements())
+        yield xml_entity.get("id")
+    xml_converter.process_entity = process_entity_mock
+
+    actual_result = list(xml_converter.process_dump(SyntheticDump(20000)))
+
+    assert [str(index) for index in xrange(20000)] == actual_result
+    # Only elements, that the parser has read ahead, are left in memory
+    assert max(live_elements) == max(live_elements[:100]) < 2000
+
+
+def test_process_dump_memory_ceiling():
+    # Without cleaning up, all nodes of the dump stay below its root
+    xml_converter = create_dump_converter(filter_tags=False, is_quiet=True)
+    live_elements = []
+    def process_entity_mock(xml_entity):
+        if int(xml_entity.get("id")) % 1000 == 0:
+            live_elements.append(xml_converter.count_live_elements())
+        return iter(())
+    xml_converter.process_entity = process_entity_mock
+
+    for _ in xml_converter.process_dump(SyntheticDump(200000)):
+        pass
+
+    assert 200 == len(live_elements)
+    assert max(live_elements) < 2000
+
+
+@pytest.mark.parametrize(["xml", "expected_xml"], [
+    (
+        "<a><b/><!-- c --><d/><?e?><f><g/><h><i/><j/></h></f><k/></a>",
+        "<a><f><h><j/></h></f><k/></a>"
+    ),
+    (
+        "<a><b/><c/><d><e/><f/><g/><h/><i/><j/></d></a>",
+        "<a><d><j/></d></a>"
+    ),
+    (
+        "<a><j/><b/></a>",
+        "<a><j/><b/></a>"
+    )
+])
+def test_release_preceding_elements(xml, expected_xml):
+    document_root = etree.fromstring(xml)
+    element = document_root.xpath("//j")[0]
+
+    XmlDumpConverter.release_preceding_elements(element)
+
+    assert expected_xml == etree.tostring(document_root)
+
+
+def test_get_memory_status():
+    xml_converter = create_dump_converter()
+    xml_converter.document_root = etree.fromstring("<a><b/><!-- c --></a>")
+
+    status = xml_converter.get_memory_status()
+
+    assert status.startswith("RSS ")
+    assert status.endswith(" | 2 live elements")
+
+
+def test_unprintable_patterns_built_on_creation(monkeypatch):
+    monkeypatch.setattr(TextNormalizer, "unprintable_patterns", None)
+    xml_converter = create_dump_converter()
+    assert TextNormalizer.unprintable_patterns is not None
+
+    def get_unprintable_ranges_mock():
+        raise AssertionError("Patterns are built during processing")
+    monkeypatch.setattr(TextNormalizer, "get_unprintable_ranges",
+                        staticmethod(get_unprintable_ranges_mock))
+    assert "f\xc3\xbcr" == xml_converter.text_normalizer.normalize(u"f\xfcr\u200b")
+
+
+@pytest.mark.parametrize("filter_tags", [True, False])
+def test_process_dump_entity_ids(filter_tags):
+    with open_test_file("testdata/xml_dump.xml") as dump_file:
+        xml_converter = create_dump_converter(filter_tags=filter_tags)
+        xml_converter.entity_id_xpath = etree.XPath(
+            "foo:id/text()", namespaces=xml_converter.namespaces)
+        def process_entity_mock(xml_entity):
+            assert xml_entity.getparent() is None
+            yield xml_converter.extract_entity_id(xml_entity)
+        xml_converter.process_entity = process_entity_mock
+
+        actual_result = list(xml_converter.process_dump(dump_file))
+
+        assert ["119033364", "492198073", "728871632"] == actual_result
+
+
+def test_process_dump_parallel():
+    with open_test_file("testdata/xml_dump.xml") as dump_file:
+        xml_converter = create_dump_converter(workers=2, batch_size=2)
+        xml_converter.entity_id_xpath = etree.XPath(
+            "foo:id/text()", namespaces=xml_converter.namespaces)
+        def process_entity_mock(xml_entity):
+            yield xml_converter.extract_entity_id(xml_entity), os.getpid()
+        xml_converter.process_entity = process_entity_mock
+
+        actual_result = list(xml_converter.process_dump(dump_file))
+
+        assert ["119033364", "492198073", "728871632"] == \
+            [entity_id for entity_id, pid in actual_result]
+        assert os.getpid() not in [pid for entity_id, pid in actual_result]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_dump_formatter_errors(workers):
+    def formatter(entity_id):
+        if entity_id.startswith("4"):
+            raise ValueError(entity_id)
+        return entity_id
+    property_mapping = {
+        "P1": [
+            {
+                "value_paths": ["foo:id/text()"],
+                "formatter": formatter
+            }
+        ]
+    }
+    with open_test_file("testdata/xml_dump.xml") as dump_file:
+        xml_converter = create_dump_converter(workers=workers, batch_size=1)
+        xml_converter.compiled_mapping = CompiledPropertyMapping(
+            property_mapping, xml_converter.namespaces)
+        xml_converter.entity_id_xpath = xml_converter.compiled_mapping.compile_xpath(
+            "foo:id/text()")
+
+        actual_result = list(xml_converter.process_dump(dump_file))
+
+        assert [
+            ("119033364", "P1", ["119033364"]),
+            ("728871632", "P1", ["728871632"])
+        ] == actual_result
+        assert {"P1": 1} == xml_converter.formatter_error_log.counts
+        assert [("492198073", ("492198073",), "ValueError: 492198073")] == \
+            xml_converter.formatter_error_log.samples["P1"]
+
+
+@pytest.mark.parametrize(["xml", "expected_result"], [
+    (
+        '<element xmlns="http://www.foo.com"><subelement/></element>',
+        True
+    ),
+    (
+        '<element xmlns="http://www.foo.com"><foo><subelement/></foo></element>',
+        False
+    ),
+    (
+        '<foo xmlns="http://www.foo.com"><element><subelement/></element></foo>',
+        False
+    ),
+    (
+        '<element xmlns="http://www.foo.com"><subelement><subelement/></subelement></element>',
+        False
+    )
+])
+def test_is_entity_element(xml, expected_result):
+    xml_converter = create_dump_converter()
+    root = etree.fromstring(xml)
+    element = root.xpath("//foo:subelement",
+                         namespaces=xml_converter.namespaces)[-1]
+
+    assert expected_result == xml_converter.is_entity_element(element)
+
+
 @pytest.mark.parametrize(["entity_file_path", "expected_values"], [
     (
         "testdata/xml_entity_valid.xml",
@@ -136,31 +347,44 @@ def test_get_affected_values(entity_file_path, value_paths, expected_values):
     with open_test_file(entity_file_path) as dump_file:
         entity_element = etree.parse(dump_file)
         xml_converter = create_dump_converter()
-        actual_values = xml_converter.get_affected_values(entity_element,
-                                                           value_paths)
+        compile_xpath = xml_converter.compiled_mapping.compile_xpath
+        actual_values = xml_converter.get_affected_values(
+            entity_element,
+            map(compile_xpath, value_paths))
 
         assert expected_values == actual_values
 
 
-@pytest.mark.parametrize(["value", "expected_value"], [
-    (
-        u"foobar",
-        u"foobar"
-    ),
-    (
-        unichr(152) + u"foobar" + unichr(156),
-        u"foobar"
-    ),
-    (
-        u"füübar",
-        u"füübar"
-    )
-])
-def test_remove_control_characters(value, expected_value):
+def test_process_entity_shared_paths():
+    with open_test_file("testdata/xml_entity_valid.xml") as dump_file:
+        entity_element = etree.parse(dump_file)
     xml_converter = create_dump_converter()
-    actual_value = xml_converter.remove_unprintable_characters(value)
+    list(xml_converter.process_entity(entity_element))
+    list(xml_converter.process_entity(entity_element))
+
+    # foo:foo and foo:fubar are used by two mappings each
+    assert 10 == xml_converter.path_evaluations
+    assert 4 == xml_converter.saved_path_evaluations
+    assert (10, 4) == xml_converter.pop_statistics()[2]
+    assert 0 == xml_converter.saved_path_evaluations
 
-    assert expected_value == actual_value
+
+def test_get_affected_values_shared_paths():
+    with open_test_file("testdata/xml_entity_valid.xml") as dump_file:
+        entity_element = etree.parse(dump_file)
+    xml_converter = create_dump_converter()
+    compile_xpath = xml_converter.compiled_mapping.compile_xpath
+    path_results = {compile_xpath("foo:fubar"): ["21"]}
+    actual_values = xml_converter.get_affected_values(
+        entity_element,
+        [compile_xpath("foo:foo"), compile_xpath("foo:fubar")],
+        path_results)
+
+    assert [["foobar", "21"]] == actual_values
+    assert ["foobar"] == [element.text for element in
+                          path_results[compile_xpath("foo:foo")]]
+    assert 1 == xml_converter.path_evaluations
+    assert 1 == xml_converter.saved_path_evaluations
 
 
 @pytest.mark.parametrize(["formatter", "values", "expected_values"], [
@@ -179,38 +403,69 @@ def test_remove_control_characters(value, expected_value):
             ["fu"]
         ],
         []
-    )
-])
-def test_run_formatter(formatter, values, expected_values):
-    actual_values = XmlDumpConverter.run_formatter(formatter, values)
-
-    assert expected_values == actual_values
-
-
-@pytest.mark.parametrize(["formatter", "values", "expected_value"], [
+    ),
     (
-        lambda x: x,
-        ["foo"],
-        "foo"
+        lambda x, y=None: x,
+        [
+            ["foo"],
+            ["fu", "bar"]
+        ],
+        ["foo", "fu"]
     ),
     (
-        lambda x, y: x+y,
-        ["foo", "bar"],
-        "foobar"
+        lambda x: None,
+        [
+            ["foo"]
+        ],
+        []
     )
 ])
-def test_formatter_wrapper(formatter, values, expected_value):
-    actual_value = XmlDumpConverter.formatter_wrapper(
-        formatter,
-        values
-    )
+def test_run_formatter(formatter, values, expected_values):
+    xml_converter = create_dump_converter()
+    mapping = xml_converter.compiled_mapping.compile_mapping({
+        "value_paths": [],
+        "formatter": formatter
+    })
+    actual_values = xml_converter.run_formatter("P1", "Q1", mapping, values)
 
-    assert actual_value == expected_value
+    assert expected_values == actual_values
+    assert {} == xml_converter.formatter_error_log.counts
 
 
-def create_dump_converter():
+def test_run_formatter_error():
+    xml_converter = create_dump_converter()
+    mapping = xml_converter.compiled_mapping.compile_mapping({
+        "value_paths": [],
+        "formatter": lambda x: x.split("-")[1]
+    })
+    values = [["foo-bar"], ["foo"], ["fu"]]
+    actual_values = xml_converter.run_formatter("P1", "Q1", mapping, values)
+
+    assert ["bar"] == actual_values
+    assert {"P1": 2} == xml_converter.formatter_error_log.counts
+    assert [
+        ("Q1", ("foo",), "IndexError: list index out of range"),
+        ("Q1", ("fu",), "IndexError: list index out of range")
+    ] == xml_converter.formatter_error_log.samples["P1"]
+
+
+def test_run_formatter_strict():
+    xml_converter = create_dump_converter(strict=True)
+    mapping = xml_converter.compiled_mapping.compile_mapping({
+        "value_paths": [],
+        "formatter": lambda x: x.split("-")[1]
+    })
+
+    with pytest.raises(FormatterError) as exception_info:
+        xml_converter.run_formatter("P1", "Q1", mapping, [["foo-bar"], ["foo"]])
+    assert "P1" == exception_info.value.property_id
+    assert "Q1" == exception_info.value.entity_id
+
+
+def create_dump_converter(**kwargs):
     """
     Creates xml dump converter instance for testing.
+    :param kwargs: Additional arguments for XmlDumpConverter.
     :return: Instance of XmlDumpConverter.
     """
     property_mapping = {
@@ -258,7 +513,8 @@ def create_dump_converter():
         entities_path,
         entity_id_path,
         property_mapping,
-        namespaces
+        namespaces,
+        **kwargs
     )
 
     return xml_converter
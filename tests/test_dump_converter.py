@@ -37,6 +37,16 @@ def test_execute_unknown():
     assert converter.execute() is False
 
 
+def test_result_writer():
+    result_writer = Mock()
+    converter = DumpConverter(None, None, result_writer=result_writer)
+    converter.DATABASES = {}
+
+    assert result_writer is converter.result_writer
+    assert converter.execute() is True
+    assert result_writer.flush.called
+
+
 def test_run_converter():
     converter_foo, execute_mock_foo = mock_converter()
     converter_bar, execute_mock_bar = mock_converter()
@@ -100,3 +110,41 @@ def mock_converter():
     converter_wrapper.return_value = converter_mock
 
     return converter_wrapper, execute_mock
+
+
+@pytest.mark.parametrize(["database", "issues", "expected_result"], [
+    (
+        "foo",
+        [],
+        True
+    ),
+    (
+        None,
+        [("warning", "P1", "foo:bar", "Never matched in 1 sample records")],
+        True
+    ),
+    (
+        "foo",
+        [("error", "P1", "bar", "Element names without namespace prefix never match: bar")],
+        False
+    ),
+    (
+        "crap",
+        [],
+        False
+    )
+])
+def test_lint(database, issues, expected_result):
+    linter_mock = Mock()
+    linter_mock.ERROR = "error"
+    converter_mock = Mock()
+    converter_mock.lint_mapping.return_value = linter_mock, issues
+    converter_wrapper = Mock(return_value=converter_mock)
+
+    with patch.object(DumpConverter, "DATABASES", {"foo": {"converter": converter_wrapper}}):
+        actual_result = DumpConverter.lint(database, "sample.xml", 10)
+
+    assert expected_result == actual_result
+    if database != "crap":
+        converter_mock.lint_mapping.assert_called_once_with("sample.xml", 10)
+        linter_mock.print_report.assert_called_once_with(issues)
@@ -0,0 +1,57 @@
+"""Contains test for compressionutils package"""
+import gzip
+
+import pytest
+
+from dumpconverter.utils import compressionutils
+
+
+@pytest.mark.parametrize(["path", "expected_compression"], [
+    ("external_values.csv", None),
+    ("external_values.csv.gz", "gzip"),
+    ("external_values.csv.GZ", "gzip"),
+    ("external_values.csv.bz2", "bz2"),
+    ("external_values.csv.xz", "xz"),
+    ("external_values.csv.zst", "zstd"),
+    ("external_values", None)
+])
+def test_get_compression(path, expected_compression):
+    assert expected_compression == compressionutils.get_compression(path)
+
+
+def test_get_available_compressions():
+    available_compressions = compressionutils.get_available_compressions()
+
+    assert "gzip" in available_compressions
+    assert "bz2" in available_compressions
+    assert ("xz" in available_compressions) == (compressionutils.lzma is not None)
+
+
+@pytest.mark.parametrize("level", [None, 1, 9])
+def test_open_compressed_file(tmpdir, level):
+    path = str(tmpdir.join("output.gz"))
+    compressed_file = compressionutils.open_compressed_file(path, "gzip", level)
+    compressed_file.write("foobar")
+    compressed_file.close()
+
+    assert "foobar" == gzip.open(path).read()
+
+
+def test_open_compressed_file_unknown(tmpdir):
+    with pytest.raises(ValueError):
+        compressionutils.open_compressed_file(str(tmpdir.join("output")), "foobar")
+
+
+@pytest.mark.parametrize("file_name", ["input.xml", "input.xml.gz", "input.xml.bz2"])
+def test_open_decompressed_file(tmpdir, file_name):
+    path = str(tmpdir.join(file_name))
+    compression = compressionutils.get_compression(path)
+    if compression is None:
+        output_file = open(path, "wb")
+    else:
+        output_file = compressionutils.open_compressed_file(path, compression)
+    output_file.write("foobar")
+    output_file.close()
+
+    with compressionutils.open_decompressed_file(path) as input_file:
+        assert "foobar" == input_file.read()
@@ -31,12 +31,24 @@ def test_print_progress(message, current_bytes, total_bytes, expected_output, ca
     assert "\r\x1b[K" + expected_output == str(out)
 
 
+def test_print_status(capsys):
+    consoleutils.print_status("Status")
+    out, err = capsys.readouterr()
+
+    assert "\r\x1b[KStatus" == str(out)
+
+
 @pytest.mark.parametrize(["bytes_count", "precision", "expected_output"], [
     (
         0,
         2,
         "0 B"
     ),
+    (
+        0.5,
+        2,
+        "0.5 B"
+    ),
     (
         42,
         2,
@@ -81,4 +93,15 @@ def test_print_progress(message, current_bytes, total_bytes, expected_output, ca
 def test_format_bytes(bytes_count, precision, expected_output):
     actual_output = consoleutils.format_bytes(bytes_count, precision)
 
-    assert expected_output == actual_output
\ No newline at end of file
+    assert expected_output == actual_output
+
+
+@pytest.mark.parametrize(["seconds", "expected_output"], [
+    (0, "0:00:00"),
+    (59.6, "0:01:00"),
+    (61, "0:01:01"),
+    (3600, "1:00:00"),
+    (90061, "25:01:01")
+])
+def test_format_duration(seconds, expected_output):
+    assert expected_output == consoleutils.format_duration(seconds)
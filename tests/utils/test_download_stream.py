@@ -0,0 +1,65 @@
+"""Contains test for DownloadStream class"""
+from StringIO import StringIO
+
+import pytest
+
+from dumpconverter.exceptions.DownloadError import DownloadError
+from dumpconverter.utils.DownloadStream import DownloadStream
+
+
+class ResponseMock:
+    def __init__(self, data, error_after=None):
+        self.fileobj = StringIO(data)
+        self.error_after = error_after
+        self.is_closed = False
+
+    def read(self, size=-1):
+        if self.error_after is not None and self.fileobj.tell() >= self.error_after:
+            raise IOError("Connection reset")
+        return self.fileobj.read(size)
+
+    def close(self):
+        self.is_closed = True
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 65536])
+def test_read(chunk_size):
+    data = "foobar" * 100
+    cache_file = StringIO()
+    download_stream = DownloadStream(ResponseMock(data), len(data), cache_file,
+                                     chunk_size, max_buffered_chunks=2)
+
+    assert "foo" == download_stream.read(3)
+    assert 3 == download_stream.tell()
+    assert data[3:] == download_stream.read()
+    assert "" == download_stream.read(3)
+    assert len(data) == download_stream.finish()
+    assert data == cache_file.getvalue()
+
+
+def test_finish():
+    data = "foobar" * 1000
+    download_stream = DownloadStream(ResponseMock(data), chunk_size=10)
+    download_stream.read(3)
+
+    assert len(data) == download_stream.finish()
+
+
+def test_read_error():
+    download_stream = DownloadStream(ResponseMock("foobar", error_after=3),
+                                     chunk_size=3)
+
+    assert "foo" == download_stream.read(3)
+    with pytest.raises(DownloadError):
+        download_stream.read(3)
+
+
+def test_close():
+    response = ResponseMock("foobar" * 1000)
+    download_stream = DownloadStream(response, chunk_size=1,
+                                     max_buffered_chunks=1)
+    download_stream.read(1)
+    download_stream.close()
+
+    assert response.is_closed
+    assert not download_stream.reader_thread.is_alive()
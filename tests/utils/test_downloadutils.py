@@ -1,4 +1,6 @@
 """Contains test for downloadutils package"""
+import os
+import socket
 import pytest
 from tempfile import TemporaryFile
 
@@ -29,4 +31,78 @@ def test_download_file(url, expected_content):
 def test_download_dump_error(url):
     with pytest.raises(DownloadError.DownloadError):
         downloaded_file = TemporaryFile()
-        downloadutils.download_file(url, downloaded_file, is_quiet=True)
\ No newline at end of file
+        downloadutils.download_file(url, downloaded_file, is_quiet=True)
+
+def test_open_stream(http_server):
+    url = http_server + "/dataformatconverters/testdata/xml_dump.xml"
+    with open(os.path.join(os.path.dirname(__file__), "..", "dataformatconverters",
+                           "testdata", "xml_dump.xml"), "rb") as expected_file:
+        expected_content = expected_file.read()
+
+    download_stream = downloadutils.open_stream(url)
+
+    assert len(expected_content) == download_stream.total_bytes
+    assert expected_content == download_stream.read()
+    download_stream.close()
+
+
+def test_open_stream_error(http_server):
+    with pytest.raises(DownloadError.DownloadError) as exception_info:
+        downloadutils.open_stream(http_server + "/foobar")
+
+    assert 404 == exception_info.value.status_code
+
+
+def test_open_url_headers(http_server):
+    url = http_server + "/dataformatconverters/testdata/xml_dump.xml"
+
+    response = downloadutils.open_url(url, {"Range": "bytes=5-9"}, (200, 206))
+
+    assert 206 == response.getcode()
+    assert 5 == downloadutils.get_content_length(response)
+    first_byte, last_byte, total_bytes = downloadutils.get_content_range(response)
+    assert (5, 9) == (first_byte, last_byte)
+    assert total_bytes > 9
+    response.close()
+
+
+@pytest.mark.parametrize(["exception", "expected_result"], [
+    (DownloadError.DownloadError(), True),
+    (DownloadError.DownloadError(503), True),
+    (DownloadError.DownloadError(404), False),
+    (DownloadError.DownloadError(500), False),
+    (socket.timeout(), True),
+    (ValueError(), False)
+])
+def test_is_retryable(exception, expected_result):
+    assert expected_result == downloadutils.is_retryable(exception)
+
+
+def test_retry():
+    delays = []
+    results = iter([DownloadError.DownloadError(503), socket.timeout(), "foobar"])
+    def function():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert "foobar" == downloadutils.retry(function, backoff_seconds=2,
+                                           is_quiet=True, sleep=delays.append)
+    assert [2, 4] == delays
+
+
+@pytest.mark.parametrize(["error", "expected_attempts"], [
+    (DownloadError.DownloadError(503), 3),
+    (DownloadError.DownloadError(404), 1)
+])
+def test_retry_error(error, expected_attempts):
+    attempts = []
+    def function():
+        attempts.append(1)
+        raise error
+
+    with pytest.raises(DownloadError.DownloadError):
+        downloadutils.retry(function, max_attempts=3, is_quiet=True,
+                            sleep=lambda delay: None)
+    assert expected_attempts == len(attempts)
@@ -0,0 +1,144 @@
+"""Contains test for DumpCache class"""
+import os
+
+import pytest
+from mock import patch
+
+from dumpconverter.exceptions.DownloadError import DownloadError
+from dumpconverter.utils.DumpCache import DumpCache
+from dumpconverter.utils.SegmentedDownload import SegmentedDownload
+
+
+DUMP_PATH = "/databaseconverters/testdata/gnd_dump.xml.gz"
+
+
+def read_test_dump():
+    test_dump_path = os.path.join(os.path.dirname(__file__), "..", "databaseconverters",
+                                  "testdata", "gnd_dump.xml.gz")
+    with open(test_dump_path, "rb") as test_dump_file:
+        return test_dump_file.read()
+
+
+def test_fetch(http_server, http_requests, tmpdir):
+    url = http_server + DUMP_PATH
+    expected_content = read_test_dump()
+    dump_cache = DumpCache(str(tmpdir.join("cache")), is_quiet=True)
+
+    first_path, first_size = dump_cache.fetch(url)
+    second_path, second_size = dump_cache.fetch(url)
+
+    assert first_path == second_path
+    assert len(expected_content) == first_size == second_size
+    with open(first_path, "rb") as dump_file:
+        assert expected_content == dump_file.read()
+    assert 2 == len(http_requests)
+    assert "if-none-match" not in http_requests[0][1]
+    assert "if-none-match" in http_requests[1][1]
+    assert [".dump", ".json"] == sorted(os.path.splitext(file_name)[1] for file_name
+                                        in os.listdir(dump_cache.directory))
+
+
+def test_fetch_changed(http_server, http_requests, tmpdir):
+    url = http_server + DUMP_PATH
+    dump_cache = DumpCache(str(tmpdir), is_quiet=True)
+    dump_cache.write_metadata(url, {"url": url, "etag": '"outdated"',
+                                    "last_modified": None, "complete": True})
+    with open(dump_cache.get_path(url, ".dump"), "wb") as dump_file:
+        dump_file.write("outdated")
+
+    dump_path, dump_size = dump_cache.fetch(url)
+
+    assert len(read_test_dump()) == dump_size
+    assert dump_size == os.path.getsize(dump_path)
+    assert '"outdated"' == http_requests[0][1]["if-none-match"]
+    assert dump_cache.read_metadata(url)["etag"] != '"outdated"'
+
+
+def test_fetch_resume(http_server, http_requests, tmpdir):
+    expected_content = read_test_dump()
+    truncate = len(expected_content) // 3
+    url = http_server + DUMP_PATH + "?truncate={0}".format(truncate)
+    dump_cache = DumpCache(str(tmpdir), is_quiet=True, backoff_seconds=0)
+
+    dump_path, dump_size = dump_cache.fetch(url)
+
+    with open(dump_path, "rb") as dump_file:
+        assert expected_content == dump_file.read()
+    assert 2 == len(http_requests)
+    assert "range" not in http_requests[0][1]
+    assert "bytes={0}-".format(truncate) == http_requests[1][1]["range"]
+
+
+def test_fetch_interrupted(http_server, http_requests, tmpdir):
+    expected_content = read_test_dump()
+    truncate = len(expected_content) // 2
+    url = http_server + DUMP_PATH + "?truncate={0}".format(truncate)
+    dump_cache = DumpCache(str(tmpdir), is_quiet=True, max_attempts=1)
+
+    with pytest.raises(DownloadError):
+        dump_cache.fetch(url)
+    assert truncate == os.path.getsize(dump_cache.get_path(url, ".part"))
+    assert not os.path.exists(dump_cache.get_path(url, ".dump"))
+
+    # A later run resumes the partial download
+    dump_path, dump_size = dump_cache.fetch(url)
+
+    assert len(expected_content) == dump_size
+    assert "bytes={0}-".format(truncate) == http_requests[-1][1]["range"]
+
+
+def test_fetch_invalid_part(http_server, tmpdir):
+    url = http_server + DUMP_PATH
+    expected_content = read_test_dump()
+    dump_cache = DumpCache(str(tmpdir), is_quiet=True, backoff_seconds=0)
+    dump_cache.write_metadata(url, {"url": url, "etag": '"outdated"',
+                                    "last_modified": None, "complete": False})
+    with open(dump_cache.get_path(url, ".part"), "wb") as part_file:
+        part_file.write("outdated")
+
+    dump_path, dump_size = dump_cache.fetch(url)
+
+    # If-Range does not match, so the whole dump is sent again
+    with open(dump_path, "rb") as dump_file:
+        assert expected_content == dump_file.read()
+
+
+def test_fetch_retry(http_server, http_requests, tmpdir):
+    url = http_server + DUMP_PATH + "?fail=2"
+    dump_cache = DumpCache(str(tmpdir), is_quiet=True, backoff_seconds=0)
+
+    dump_path, dump_size = dump_cache.fetch(url)
+
+    assert len(read_test_dump()) == dump_size
+    assert 3 == len(http_requests)
+
+
+def test_fetch_error(http_server, http_requests, tmpdir):
+    dump_cache = DumpCache(str(tmpdir), is_quiet=True, backoff_seconds=0)
+
+    with pytest.raises(DownloadError) as exception_info:
+        dump_cache.fetch(http_server + "/foobar")
+
+    assert 404 == exception_info.value.status_code
+    assert 1 == len(http_requests)
+
+
+@patch.object(SegmentedDownload, "MIN_SEGMENT_SIZE", 100)
+def test_fetch_segmented(http_server, http_requests, tmpdir):
+    expected_content = read_test_dump()
+    url = http_server + DUMP_PATH + "?truncate=1000"
+    dump_cache = DumpCache(str(tmpdir), is_quiet=True, max_attempts=1, connections=2)
+
+    with pytest.raises(DownloadError):
+        dump_cache.fetch(url)
+    assert [[1000, len(expected_content)]] == dump_cache.read_metadata(url)["segments"]
+    assert len(expected_content) == os.path.getsize(dump_cache.get_path(url, ".part"))
+
+    # A later run resumes the remaining segments
+    dump_path, dump_size = dump_cache.fetch(url)
+
+    with open(dump_path, "rb") as dump_file:
+        assert expected_content == dump_file.read()
+    assert "segments" not in dump_cache.read_metadata(url)
+    assert "bytes=1000-" == http_requests[-2][1]["range"]
+    assert "bytes=1000-1636" == http_requests[-1][1]["range"]
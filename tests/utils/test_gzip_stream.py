@@ -0,0 +1,47 @@
+"""Contains test for GzipStream class"""
+import gzip
+from StringIO import StringIO
+
+import pytest
+
+from dumpconverter.utils.GzipStream import GzipStream
+
+
+class NonSeekableFile:
+    def __init__(self, data):
+        self.fileobj = StringIO(data)
+
+    def read(self, size=-1):
+        return self.fileobj.read(size)
+
+
+def compress(data):
+    compressed_file = StringIO()
+    gzip_file = gzip.GzipFile(mode="wb", fileobj=compressed_file)
+    gzip_file.write(data)
+    gzip_file.close()
+
+    return compressed_file.getvalue()
+
+
+@pytest.mark.parametrize(["compressed_data", "expected_data"], [
+    (compress(""), ""),
+    (compress("foobar" * 10000), "foobar" * 10000),
+    (compress("foo") + compress("bar"), "foobar"),
+    (compress("foobar") + "\0" * 16, "foobar")
+])
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+def test_read(compressed_data, expected_data, chunk_size):
+    gzip_stream = GzipStream(NonSeekableFile(compressed_data), chunk_size)
+
+    assert expected_data == gzip_stream.read()
+    assert "" == gzip_stream.read()
+
+
+def test_read_size():
+    gzip_stream = GzipStream(NonSeekableFile(compress("foobar")), 2)
+
+    assert "foo" == gzip_stream.read(3)
+    assert "ba" == gzip_stream.read(2)
+    assert "r" == gzip_stream.read(3)
+    assert "" == gzip_stream.read(3)
@@ -0,0 +1,20 @@
+"""Contains test for memoryutils"""
+from dumpconverter.utils import memoryutils
+
+
+def test_get_rss():
+    rss = memoryutils.get_rss()
+    allocated = "x" * (64 * 1024 * 1024)
+
+    assert 0 < rss < memoryutils.get_rss()
+    assert len(allocated) > 0
+
+
+def test_get_rss_without_proc(monkeypatch):
+    monkeypatch.setattr(memoryutils, "STATM_PATH", "/nonexistent/statm")
+
+    assert memoryutils.get_peak_rss() == memoryutils.get_rss()
+
+
+def test_get_peak_rss():
+    assert memoryutils.get_peak_rss() >= memoryutils.get_rss() > 0
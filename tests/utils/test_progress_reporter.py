@@ -0,0 +1,116 @@
+"""Contains test for ProgressReporter class"""
+import pytest
+
+from dumpconverter.utils.ProgressReporter import ProgressReporter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.now
+
+
+def test_advance_throttled_by_time(capsys):
+    clock = FakeClock()
+    reporter = ProgressReporter("Progress...{0}", clock=clock, min_interval=1)
+
+    reporter.advance(bytes_count=1024)
+    clock.now = 0.5
+    reporter.advance(bytes_count=1024)
+    out, err = capsys.readouterr()
+    assert "" == out
+
+    clock.now = 1.0
+    reporter.advance(bytes_count=1024)
+    out, err = capsys.readouterr()
+    assert "\r\x1b[KProgress...3.0 KB | 3.0 KB/s" == out
+    assert 3072 == reporter.bytes
+
+
+def test_advance_throttled_by_count():
+    clock = FakeClock()
+    reporter = ProgressReporter("Progress...{0}", clock=clock,
+                                check_interval=100, is_quiet=True)
+    calls_after_init = clock.calls
+
+    for _ in xrange(250):
+        reporter.advance(records=1)
+
+    assert 2 == clock.calls - calls_after_init
+    assert 250 == reporter.records
+
+
+@pytest.mark.parametrize(["total_bytes", "records", "position", "expected_status"], [
+    (
+        None,
+        0,
+        2048,
+        "Progress...2.0 KB | 1.0 KB/s"
+    ),
+    (
+        4096,
+        0,
+        2048,
+        "Progress...50.0% | 1.0 KB/s | ETA 0:00:02"
+    ),
+    (
+        4096,
+        10,
+        4096,
+        "Progress...100.0% | 5 records/s | 2.0 KB/s | ETA 0:00:00"
+    )
+])
+def test_get_status(total_bytes, records, position, expected_status):
+    clock = FakeClock()
+    reporter = ProgressReporter("Progress...{0}", total_bytes,
+                                position_function=lambda: position,
+                                clock=clock)
+    reporter.records = records
+    clock.now = 2.0
+
+    assert expected_status == reporter.get_status()
+
+
+def test_get_status_start_position():
+    clock = FakeClock()
+    reporter = ProgressReporter("Progress...{0}", 4096, clock=clock,
+                                start_position=2048)
+    reporter.advance(bytes_count=1024)
+    clock.now = 1.0
+
+    assert "Progress...75.0% | 1.0 KB/s | ETA 0:00:01" == reporter.get_status()
+
+
+def test_get_status_details():
+    clock = FakeClock()
+    reporter = ProgressReporter("Progress...{0}", clock=clock)
+    reporter.add_details(lambda: "RSS 1.0 MB")
+    reporter.add_details(lambda: None)
+    reporter.advance(bytes_count=1024)
+    clock.now = 1.0
+
+    assert "Progress...1.0 KB | 1.0 KB/s | RSS 1.0 MB" == reporter.get_status()
+
+
+def test_finish(capsys):
+    clock = FakeClock()
+    reporter = ProgressReporter("Progress...{0}", clock=clock)
+    reporter.advance(bytes_count=512)
+    clock.now = 1.0
+    reporter.finish()
+    out, err = capsys.readouterr()
+
+    assert "\r\x1b[KProgress...512.0 B | 512.0 B/s\n" == out
+
+
+def test_finish_quiet(capsys):
+    reporter = ProgressReporter("Progress...{0}", is_quiet=True)
+    reporter.advance(bytes_count=512)
+    reporter.finish()
+    out, err = capsys.readouterr()
+
+    assert "" == out
@@ -0,0 +1,33 @@
+"""Contains test for ReadBuffer class"""
+import pytest
+
+from dumpconverter.utils.ReadBuffer import ReadBuffer
+
+
+@pytest.mark.parametrize(["chunks", "sizes", "expected_data"], [
+    ([], [3, -1], ["", ""]),
+    (["foo", "bar"], [-1, 3], ["foobar", ""]),
+    (["foo", "bar"], [2, 2, 2, 2], ["fo", "ob", "ar", ""]),
+    (["foobar"], [0, 10], ["", "foobar"])
+])
+def test_read(chunks, sizes, expected_data):
+    read_buffer = ReadBuffer()
+    for chunk in chunks:
+        read_buffer.append(chunk)
+
+    assert expected_data == [read_buffer.read(size) for size in sizes]
+    assert 0 == len(read_buffer)
+
+
+def test_read_interleaved():
+    read_buffer = ReadBuffer()
+    data = []
+    for index in xrange(1000):
+        read_buffer.append("{0:04d}".format(index))
+        data.append(read_buffer.read(3))
+        # Consumed bytes are removed, once they exceed half of the buffer
+        assert len(read_buffer.data) <= 2 * len(read_buffer)
+    data.append(read_buffer.read())
+
+    assert "".join("{0:04d}".format(index) for index in xrange(1000)) == "".join(data)
+    assert str == type(data[0])
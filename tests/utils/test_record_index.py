@@ -0,0 +1,85 @@
+"""Contains test for RecordIndex class"""
+import pytest
+
+from dumpconverter.utils.RecordIndex import RecordIndex
+from dumpconverter.writer.RecordIndexWriter import RecordIndexWriter
+
+
+FINGERPRINT = "abcdefgh"
+
+
+def write_index(tmpdir, records, fingerprint=FINGERPRINT):
+    """
+    Writes index of given records.
+    :param tmpdir: Directory of the index.
+    :param records: List of tuples of record id, content hash and rows.
+    :param fingerprint: Fingerprint of the mapping.
+    :return: Paths of index and data file.
+    """
+    index_path = str(tmpdir.join("dump.index"))
+    data_path = str(tmpdir.join("dump.rows"))
+    index_writer = RecordIndexWriter(index_path, data_path, fingerprint)
+    for record_id, content_hash, rows in records:
+        index_writer.add(record_id, content_hash, rows)
+    index_writer.close()
+
+    return index_path, data_path
+
+
+@pytest.mark.parametrize("record_count", [1, 3, 100])
+def test_find(tmpdir, record_count):
+    records = [("id{0}".format(index), "hash{0:04d}".format(index),
+                "row{0}\r\n".format(index) * (index % 3))
+               for index in range(record_count)]
+    record_index = RecordIndex.open(*write_index(tmpdir, records),
+                                    fingerprint=FINGERPRINT)
+
+    for record_id, content_hash, rows in records:
+        slot = record_index.find(record_id)
+        assert slot is not None
+        assert content_hash == record_index.get_content_hash(slot)
+        assert rows == record_index.read_rows(slot)
+    assert record_index.find("foobar") is None
+    record_index.close()
+
+
+def test_find_empty(tmpdir):
+    record_index = RecordIndex.open(*write_index(tmpdir, []),
+                                    fingerprint=FINGERPRINT)
+
+    assert 0 == record_index.slot_count
+    assert record_index.find("foobar") is None
+    assert [] == list(record_index.get_unseen_ids())
+    record_index.close()
+
+
+def test_get_unseen_ids(tmpdir):
+    records = [(record_id, "12345678", "") for record_id in ("foo", "bar", "baz")]
+    record_index = RecordIndex.open(*write_index(tmpdir, records),
+                                    fingerprint=FINGERPRINT)
+    record_index.mark_seen(record_index.find("bar"))
+
+    assert ["baz", "foo"] == sorted(record_index.get_unseen_ids())
+    record_index.close()
+
+
+def test_open_missing(tmpdir):
+    assert RecordIndex.open(str(tmpdir.join("dump.index")),
+                            str(tmpdir.join("dump.rows")),
+                            FINGERPRINT) is None
+
+
+def test_open_other_fingerprint(tmpdir):
+    paths = write_index(tmpdir, [("foo", "12345678", "")])
+
+    assert RecordIndex.open(*paths, fingerprint="hgfedcba") is None
+
+
+def test_open_invalid(tmpdir):
+    index_path = tmpdir.join("dump.index")
+    index_path.write("foobar" * 10)
+    data_path = tmpdir.join("dump.rows")
+    data_path.write("")
+
+    with pytest.raises(ValueError):
+        RecordIndex(str(index_path), str(data_path), FINGERPRINT)
@@ -0,0 +1,109 @@
+"""Contains test for SegmentedDownload class"""
+import os
+from tempfile import TemporaryFile
+
+import pytest
+from mock import patch
+
+from dumpconverter.exceptions.DownloadError import DownloadError
+from dumpconverter.utils.SegmentedDownload import SegmentedDownload
+
+
+DUMP_PATH = "/databaseconverters/testdata/gnd_dump.xml.gz"
+
+
+def read_test_dump():
+    test_dump_path = os.path.join(os.path.dirname(__file__), "..", "databaseconverters",
+                                  "testdata", "gnd_dump.xml.gz")
+    with open(test_dump_path, "rb") as test_dump_file:
+        return test_dump_file.read()
+
+
+@pytest.mark.parametrize(["total_bytes", "connections", "expected_segments"], [
+    (1000, 4, [[0, 250], [250, 500], [500, 750], [750, 1000]]),
+    (1000, 3, [[0, 333], [333, 666], [666, 1000]]),
+    (250, 4, [[0, 125], [125, 250]]),
+    (50, 4, [[0, 50]])
+])
+@patch.object(SegmentedDownload, "MIN_SEGMENT_SIZE", 100)
+def test_split(total_bytes, connections, expected_segments):
+    assert expected_segments == SegmentedDownload.split(total_bytes, connections)
+
+
+@patch.object(SegmentedDownload, "MIN_SEGMENT_SIZE", 100)
+def test_download_file(http_server, http_requests):
+    expected_content = read_test_dump()
+
+    with TemporaryFile() as downloaded_file:
+        file_size = SegmentedDownload.download_file(http_server + DUMP_PATH,
+                                                    downloaded_file, 4, is_quiet=True)
+
+        assert 0 == downloaded_file.tell()
+        assert len(expected_content) == file_size
+        assert expected_content == downloaded_file.read()
+    ranges = sorted(headers["range"] for path, headers in http_requests[1:])
+    assert 5 == len(http_requests)
+    assert "range" not in http_requests[0][1]
+    assert all("if-range" in headers for path, headers in http_requests[1:])
+    assert ["bytes=0-408", "bytes=1227-1636", "bytes=409-817", "bytes=818-1226"] == ranges
+
+
+@pytest.mark.parametrize("query", ["?ranges=0", ""])
+def test_download_file_single_connection(http_server, http_requests, query):
+    expected_content = read_test_dump()
+
+    with TemporaryFile() as downloaded_file:
+        file_size = SegmentedDownload.download_file(http_server + DUMP_PATH + query,
+                                                    downloaded_file, 4, is_quiet=True)
+
+        assert len(expected_content) == file_size
+        assert expected_content == downloaded_file.read()
+    assert 1 == len(http_requests)
+
+
+@patch.object(SegmentedDownload, "MIN_SEGMENT_SIZE", 100)
+def test_run_retry(http_server, http_requests):
+    expected_content = read_test_dump()
+    url = http_server + DUMP_PATH + "?truncate=1000"
+    segments = SegmentedDownload.split(len(expected_content), 2)
+
+    with TemporaryFile() as downloaded_file:
+        downloaded_file.truncate(len(expected_content))
+        segmented_download = SegmentedDownload(url, downloaded_file, len(expected_content),
+                                               segments, is_quiet=True, backoff_seconds=0)
+        segmented_download.run()
+
+        downloaded_file.seek(0)
+        assert expected_content == downloaded_file.read()
+    assert [] == segmented_download.get_remaining_segments()
+    assert "bytes=1000-1636" == http_requests[-1][1]["range"]
+
+
+def test_run_error(http_server):
+    expected_content = read_test_dump()
+    url = http_server + DUMP_PATH + "?truncate=1000"
+    segments = [[0, 818], [818, len(expected_content)]]
+
+    with TemporaryFile() as downloaded_file:
+        downloaded_file.truncate(len(expected_content))
+        segmented_download = SegmentedDownload(url, downloaded_file, len(expected_content),
+                                               segments, is_quiet=True, max_attempts=1)
+        with pytest.raises(DownloadError):
+            segmented_download.run()
+
+    assert [[1000, len(expected_content)]] == segmented_download.get_remaining_segments()
+
+
+def test_run_changed(http_server):
+    expected_content = read_test_dump()
+    segments = [[0, 818], [818, len(expected_content)]]
+
+    with TemporaryFile() as downloaded_file:
+        downloaded_file.truncate(len(expected_content))
+        segmented_download = SegmentedDownload(http_server + DUMP_PATH, downloaded_file,
+                                               len(expected_content), segments, '"outdated"',
+                                               is_quiet=True)
+        with pytest.raises(DownloadError) as exception_info:
+            segmented_download.run()
+
+    assert 200 == exception_info.value.status_code
@@ -0,0 +1,64 @@
+"""Contains tests for CompressedFileWriter class"""
+import bz2
+import gzip
+import os
+
+import pytest
+
+from dumpconverter.utils import compressionutils
+from dumpconverter.writer.CompressedFileWriter import CompressedFileWriter
+
+
+def read_compressed_file(path, compression):
+    if compression == "gzip":
+        compressed_file = gzip.open(path, "rb")
+    elif compression == "bz2":
+        compressed_file = bz2.BZ2File(path, "rb")
+    elif compression == "xz":
+        compressed_file = compressionutils.lzma.LZMAFile(path, "rb")
+    else:
+        decompressor = compressionutils.zstandard.ZstdDecompressor()
+        with open(path, "rb") as raw_file:
+            return decompressor.stream_reader(raw_file).read()
+    with compressed_file:
+        return compressed_file.read()
+
+
+@pytest.mark.parametrize("compression", compressionutils.get_available_compressions())
+@pytest.mark.parametrize("chunk_size", [1, 1024])
+def test_write(tmpdir, compression, chunk_size):
+    path = str(tmpdir.join("output"))
+    lines = ["foo,bar,P{0},baz\r\n".format(index) for index in xrange(1000)]
+    with CompressedFileWriter(path, compression, chunk_size=chunk_size,
+                              max_pending_chunks=2) as compressed_file:
+        for line in lines:
+            compressed_file.write(line)
+
+    assert "".join(lines) == read_compressed_file(path, compression)
+
+
+def test_flush(tmpdir):
+    path = str(tmpdir.join("output.gz"))
+    compressed_file = CompressedFileWriter(path, "gzip")
+    compressed_file.write("foobar")
+    compressed_file.flush()
+
+    assert compressed_file.chunks.empty()
+    compressed_file.close()
+    compressed_file.close()
+    assert "foobar" == read_compressed_file(path, "gzip")
+
+
+def test_compression_error(tmpdir):
+    path = str(tmpdir.join("output.gz"))
+    compressed_file = CompressedFileWriter(path, "gzip", chunk_size=1)
+    def write_mock(data):
+        raise IOError("No space left on device")
+    compressed_file.compressed_file.write = write_mock
+
+    compressed_file.write("foo")
+    with pytest.raises(IOError):
+        compressed_file.flush()
+    with pytest.raises(IOError):
+        compressed_file.close()
+    assert not compressed_file.compression_thread.is_alive()
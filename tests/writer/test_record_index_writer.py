@@ -0,0 +1,54 @@
+"""Contains test for RecordIndexWriter class"""
+import os
+
+import pytest
+
+from dumpconverter.utils.RecordIndex import RecordIndex
+from dumpconverter.writer.RecordIndexWriter import RecordIndexWriter
+
+
+@pytest.mark.parametrize(["record_count", "expected_slot_count"], [
+    (0, 0),
+    (1, 2),
+    (3, 4),
+    (4, 8),
+    (1000, 2048)
+])
+def test_get_slot_count(tmpdir, record_count, expected_slot_count):
+    index_writer = RecordIndexWriter(str(tmpdir.join("dump.index")),
+                                     str(tmpdir.join("dump.rows")),
+                                     "abcdefgh")
+    index_writer.record_count = record_count
+
+    assert expected_slot_count == index_writer.get_slot_count()
+    index_writer.discard()
+
+
+def test_close(tmpdir):
+    index_path = str(tmpdir.join("dump.index"))
+    data_path = str(tmpdir.join("dump.rows"))
+    index_writer = RecordIndexWriter(index_path, data_path, "abcdefgh")
+    index_writer.add("foo", "12345678", "foo,bar\r\n")
+    index_writer.add("bar", "87654321", "")
+    index_writer.add("foo", "00000000", "fu,bar\r\n")
+    index_writer.close()
+
+    assert ["dump.index", "dump.rows"] == sorted(os.listdir(str(tmpdir)))
+    assert "foofoo,bar\r\nbarfoofu,bar\r\n" == tmpdir.join("dump.rows").read()
+    record_index = RecordIndex(index_path, data_path, "abcdefgh")
+    assert record_index.is_compatible
+    assert "foo,bar\r\n" == record_index.read_rows(record_index.find("foo"))
+    assert ["bar", "foo"] == sorted(record_index.get_unseen_ids())
+    record_index.close()
+
+
+def test_discard(tmpdir):
+    tmpdir.join("dump.index").write("previous")
+    index_writer = RecordIndexWriter(str(tmpdir.join("dump.index")),
+                                     str(tmpdir.join("dump.rows")),
+                                     "abcdefgh")
+    index_writer.add("foo", "12345678", "foo,bar\r\n")
+    index_writer.discard()
+
+    assert ["dump.index"] == os.listdir(str(tmpdir))
+    assert "previous" == tmpdir.join("dump.index").read()
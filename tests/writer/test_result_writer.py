@@ -1,9 +1,15 @@
 """Contains tests for ResultWriter class"""
 import csv
+import gzip
 import json
+import os
+import shutil
+import tempfile
 import unittest
 from StringIO import StringIO
 
+from mock import Mock
+
 from dumpconverter.writer.ResultWriter import ResultWriter
 
 
@@ -52,6 +58,118 @@ class ResultWriterTest(unittest.TestCase):
         assert str(size) == actual_row_fields[6]
         assert license_item_id == actual_row_fields[7]
 
+    def test_write_external_values(self):
+        rows = [
+            ("foobar", "foobar", "P42", "foobar"),
+            ("foobar", "foobar", "P42", "foo,bar"),
+            ("foobar", "fubar", "P21", "f\"u\"bar")
+        ]
+
+        single_file = StringIO()
+        single_result = ResultWriter(single_file, StringIO())
+        for row in rows:
+            single_result.write_external_value(*row)
+
+        batched_file = StringIO()
+        batched_result = ResultWriter(batched_file, StringIO(), flush_size=2)
+        batched_result.write_external_values(rows[:1])
+        assert "" == batched_file.getvalue()
+        batched_result.write_external_values(rows[1:])
+        assert single_file.getvalue() == batched_file.getvalue()
+
+    def test_flush(self):
+        external_data_file = StringIO()
+        result = ResultWriter(external_data_file, StringIO())
+        result.write_external_values([("foo", "foo", "P1", "foo")])
+        assert "" == external_data_file.getvalue()
+
+        result.flush()
+        assert "foo,foo,P1,foo\r\n" == external_data_file.getvalue()
+
+        result.write_external_values([("bar", "bar", "P2", "bar")])
+        result.write_external_value("baz", "baz", "P3", "baz")
+        assert "foo,foo,P1,foo\r\nbar,bar,P2,bar\r\nbaz,baz,P3,baz\r\n" == \
+            external_data_file.getvalue()
+
+    def test_merge(self):
+        external_data_file = StringIO()
+        dump_information_file = StringIO()
+        result = ResultWriter(external_data_file, dump_information_file)
+        result.write_external_values([("foo", "foo", "P1", "foo")])
+        result.merge(StringIO("bar,bar,P2,bar\r\n"), StringIO("bar,Q42\r\n"))
+        result.write_external_value("baz", "baz", "P3", "baz")
+
+        assert "foo,foo,P1,foo\r\nbar,bar,P2,bar\r\nbaz,baz,P3,baz\r\n" == \
+            external_data_file.getvalue()
+        assert "bar,Q42\r\n" == dump_information_file.getvalue()
+
+    def test_open_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for file_name, compression in (("values.csv", None),
+                                           ("values.csv.gz", None),
+                                           ("values.csv", "gzip")):
+                path = os.path.join(directory, file_name)
+                external_data_file = ResultWriter.open_file(path, compression)
+                result = ResultWriter(external_data_file, StringIO())
+                result.write_external_value("foo", "foo", "P1", "foo")
+                external_data_file.close()
+
+                if compression or file_name.endswith(".gz"):
+                    actual_content = gzip.open(path).read()
+                else:
+                    actual_content = open(path, "rb").read()
+                assert "foo,foo,P1,foo\r\n" == actual_content
+        finally:
+            shutil.rmtree(directory)
+
+    def test_write_serialized_external_values(self):
+        rows = [("foo", "bar", "P1", "baz"), ("foo", "bar", "P2", "a,b")]
+        serialized_rows = ResultWriter.serialize_external_values(rows)
+
+        external_data_file = StringIO()
+        result = ResultWriter(external_data_file, StringIO())
+        result.write_external_values(rows[:1])
+        result.write_serialized_external_values(serialized_rows)
+        result.flush()
+
+        expected_file = StringIO()
+        expected_result = ResultWriter(expected_file, StringIO())
+        for row in rows[:1] + rows:
+            expected_result.write_external_value(*row)
+        assert expected_file.getvalue() == external_data_file.getvalue()
+
+    def test_write_delta(self):
+        delta_file = StringIO()
+        result = ResultWriter(StringIO(), StringIO(), delta_file=delta_file)
+        result.write_delta("foo", "bar", "added")
+        ResultWriter(StringIO(), StringIO()).write_delta("foo", "baz", "added")
+
+        assert "foo,bar,added\r\n" == delta_file.getvalue()
+
+    def test_merge_delta(self):
+        delta_file = StringIO("foo,bar,removed\r\n")
+        result = ResultWriter(StringIO(), StringIO(), delta_file=StringIO())
+        result.write_delta("foo", "baz", "added")
+        result.merge(StringIO(), StringIO(), delta_file)
+
+        assert "foo,baz,added\r\nfoo,bar,removed\r\n" == result.delta_file.getvalue()
+
+    def test_close(self):
+        external_data_file = StringIO()
+        dump_information_file = StringIO()
+        delta_file = StringIO()
+        result = ResultWriter(external_data_file, dump_information_file,
+                              delta_file=delta_file)
+        result.write_external_values([("foo", "foo", "P1", "foo")])
+        result.flush = Mock(wraps=result.flush)
+        result.close()
+
+        assert result.flush.called
+        assert external_data_file.closed
+        assert dump_information_file.closed
+        assert delta_file.closed
+
     # Returns the first line of a given csv file
     def get_first_line_csv(self, csv_file):
         original_position = csv_file.tell()
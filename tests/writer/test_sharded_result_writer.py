@@ -0,0 +1,162 @@
+"""Contains tests for ShardedResultWriter class"""
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+import pytest
+
+from dumpconverter.writer.ResultWriter import ResultWriter
+from dumpconverter.writer.ShardedResultWriter import ShardedResultWriter
+
+
+class ShardedResultWriterTest(unittest.TestCase):
+    ROWS = [("foo", str(external_id), "P{0}".format(external_id % 5), "value")
+            for external_id in xrange(100)]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "external_values.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_external_values(self):
+        result = ShardedResultWriter(self.path, StringIO(), 4, flush_size=7)
+        result.write_external_values(self.ROWS[:50])
+        for row in self.ROWS[50:]:
+            result.write_external_value(*row)
+        result.close()
+
+        shards = self.read_shards(result)
+        assert 4 == len(shards)
+        assert sorted(self.ROWS) == sorted(row for rows in shards for row in rows)
+        for shard, rows in enumerate(shards):
+            assert rows
+            assert all(shard == result.get_shard(row) for row in rows)
+            # Rows keep their order within a shard
+            assert [row for row in self.ROWS if result.get_shard(row) == shard] == rows
+
+    def test_write_manifest(self):
+        result = ShardedResultWriter(self.path, StringIO(), 3)
+        result.write_external_values(self.ROWS)
+        result.close()
+
+        with open(os.path.join(self.directory, "external_values.manifest.json")) as manifest_file:
+            manifest = json.load(manifest_file)
+        assert "external_id" == manifest["shard_key"]
+        assert manifest["compression"] is None
+        assert len(self.ROWS) == manifest["rows"]
+        assert ["external_values.000.csv", "external_values.001.csv",
+                "external_values.002.csv"] == [shard["path"] for shard in manifest["shards"]]
+        for shard, rows in zip(manifest["shards"], self.read_shards(result)):
+            assert len(rows) == shard["rows"]
+            assert os.path.getsize(os.path.join(self.directory, shard["path"])) == shard["bytes"]
+        assert not os.path.exists(result.manifest_path + ".tmp")
+
+    def test_shard_key_property_id(self):
+        result = ShardedResultWriter(self.path, StringIO(), 3, "property_id")
+        result.write_external_values(self.ROWS)
+        result.close()
+
+        for rows in self.read_shards(result):
+            external_ids = set(row[1] for row in rows)
+            for property_id in set(row[2] for row in rows):
+                assert external_ids >= set(row[1] for row in self.ROWS
+                                           if row[2] == property_id)
+
+    def test_get_shard_stable(self):
+        result = ShardedResultWriter(self.path, StringIO(), 16)
+        result.close()
+
+        assert [0, 15, 4] == [result.get_shard(("foo", external_id, "P1", "bar"))
+                              for external_id in ("118540238", u"118540238X", "4005728-8")]
+
+    def test_compressed_shards(self):
+        path = self.path + ".gz"
+        result = ShardedResultWriter(path, StringIO(), 2)
+        result.write_external_values(self.ROWS)
+        result.close()
+
+        assert "gzip" == result.get_manifest()["compression"]
+        rows = []
+        for shard_path in result.shard_paths:
+            assert shard_path.endswith(".csv.gz")
+            with gzip.open(shard_path) as shard_file:
+                rows.extend(map(tuple, csv.reader(shard_file)))
+        assert sorted(self.ROWS) == sorted(rows)
+
+    def test_merge(self):
+        partial_external_values_file = StringIO()
+        partial_result = ResultWriter(partial_external_values_file, StringIO())
+        partial_result.write_external_values(self.ROWS[:60])
+        partial_result.flush()
+        partial_external_values_file.seek(0)
+
+        dump_information_file = StringIO()
+        delta_file = StringIO()
+        dump_information_file.close = lambda: None
+        delta_file.close = lambda: None
+        result = ShardedResultWriter(self.path, dump_information_file, 2,
+                                     flush_size=10, delta_file=delta_file)
+        result.write_external_values(self.ROWS[60:])
+        result.merge(partial_external_values_file, StringIO("bar\r\n"),
+                     StringIO("bar,2,added\r\n"))
+        result.write_serialized_external_values(
+            ResultWriter.serialize_external_values(self.ROWS[:1]))
+        result.close()
+
+        assert sorted(self.ROWS + self.ROWS[:1]) == sorted(
+            row for rows in self.read_shards(result) for row in rows)
+        assert "bar\r\n" == dump_information_file.getvalue()
+        assert "bar,2,added\r\n" == delta_file.getvalue()
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            ShardedResultWriter(self.path, StringIO(), 0)
+        with pytest.raises(ValueError):
+            ShardedResultWriter(self.path, StringIO(), 2, "value")
+
+    @staticmethod
+    def read_shards(result):
+        """
+        Reads external values of all shards.
+        :param result: Closed ShardedResultWriter instance.
+        :return: List of lists of rows per shard.
+        """
+        shards = []
+        for shard_path in result.shard_paths:
+            with open(shard_path, "rb") as shard_file:
+                shards.append(map(tuple, csv.reader(shard_file)))
+
+        return shards
+
+
+@pytest.mark.parametrize(["path", "expected_paths", "expected_manifest_path"], [
+    (
+        "external_values.csv",
+        ["external_values.000.csv", "external_values.001.csv"],
+        "external_values.manifest.json"
+    ),
+    (
+        "out/external_values.csv.zst",
+        ["out/external_values.000.csv.zst", "out/external_values.001.csv.zst"],
+        "out/external_values.manifest.json"
+    ),
+    (
+        "external_values",
+        ["external_values.000", "external_values.001"],
+        "external_values.manifest.json"
+    )
+])
+def test_get_shard_paths(path, expected_paths, expected_manifest_path):
+    assert expected_paths == ShardedResultWriter.get_shard_paths(path, 2)
+    assert expected_manifest_path == ShardedResultWriter.get_manifest_path(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
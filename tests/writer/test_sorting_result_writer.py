@@ -0,0 +1,141 @@
+"""Contains tests for SortingResultWriter class"""
+import csv
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from mock import Mock
+
+from dumpconverter.writer.ResultWriter import ResultWriter
+from dumpconverter.writer.SortingResultWriter import SortingResultWriter
+
+
+class SortingResultWriterTest(unittest.TestCase):
+    ROWS = [
+        ("foo", "2", "P2", "b"),
+        ("foo", "10", "P1", "a"),
+        ("foo", "2", "P1", "a,\"b\"\r\nc"),
+        ("bar", "2", "P1", "a"),
+        ("foo", "2", "P2", "b"),
+        ("foo", "2", "P1", "a"),
+        ("foo", "10", "P1", "a")
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_external_values_in_memory(self):
+        external_values_file = StringIO()
+        result = self.create_writer(external_values_file)
+        result.write_external_values(self.ROWS[:4])
+        result.flush()
+        assert "" == external_values_file.getvalue()
+        result.write_external_values(self.ROWS[4:])
+        rows = self.close(result, external_values_file)
+
+        assert sorted(set(self.ROWS)) == rows
+        assert 0 == result.spilled_runs
+        assert 2 == result.duplicate_rows
+        assert 5 == result.written_rows
+
+    def test_write_external_values_spilled(self):
+        for merge_fan_in in (2, 3, 64):
+            external_values_file = StringIO()
+            result = self.create_writer(external_values_file, memory_budget=1,
+                                        merge_fan_in=merge_fan_in)
+            for row in self.ROWS:
+                result.write_external_value(*row)
+            assert len(self.ROWS) == result.spilled_runs
+            rows = self.close(result, external_values_file)
+
+            assert sorted(set(self.ROWS)) == rows
+            assert 2 == result.duplicate_rows
+            assert [] == result.runs
+
+    def test_spill_removes_duplicates(self):
+        result = self.create_writer(StringIO())
+        result.write_external_values(self.ROWS)
+        result.spill()
+
+        assert [] == result.pending_rows
+        assert 0 == result.pending_size
+        assert 2 == result.duplicate_rows
+        assert sorted(set(self.ROWS)) == list(result.read_run(result.runs[0]))
+
+    def test_write_serialized_external_values(self):
+        external_values_file = StringIO()
+        result = self.create_writer(external_values_file, memory_budget=1)
+        result.write_serialized_external_values(
+            ResultWriter.serialize_external_values(self.ROWS[:3]))
+        result.write_external_values(self.ROWS[3:])
+        rows = self.close(result, external_values_file)
+
+        assert sorted(set(self.ROWS)) == rows
+
+    def test_merge(self):
+        partial_external_values_file = StringIO()
+        partial_result = ResultWriter(partial_external_values_file, StringIO())
+        partial_result.write_external_values(self.ROWS[:4])
+        partial_result.flush()
+        partial_external_values_file.seek(0)
+        dump_information_file = StringIO("bar\r\n")
+        delta_file = StringIO("bar,2,added\r\n")
+
+        result_writer = Mock()
+        result = SortingResultWriter(result_writer)
+        result.write_external_values(self.ROWS[4:])
+        result.merge(partial_external_values_file, dump_information_file, delta_file)
+        result.close()
+
+        merged_files = result_writer.merge.call_args[0]
+        assert "" == merged_files[0].getvalue()
+        assert (dump_information_file, delta_file) == merged_files[1:]
+        written_rows = [row for call in result_writer.write_external_values.call_args_list
+                        for row in call[0][0]]
+        assert sorted(set(self.ROWS)) == written_rows
+        result_writer.close.assert_called_once_with()
+
+    def test_write_dump_information_and_delta(self):
+        result_writer = Mock()
+        result = SortingResultWriter(result_writer)
+        result.write_dump_information("foo", "Q42", ["P42"], "en",
+                                      "http://foo.bar", 42, "Q21")
+        result.write_delta("foo", "bar", "added")
+
+        result_writer.write_dump_information.assert_called_once_with(
+            "foo", "Q42", ["P42"], "en", "http://foo.bar", 42, "Q21")
+        result_writer.write_delta.assert_called_once_with("foo", "bar", "added")
+
+    def create_writer(self, external_values_file, **kwargs):
+        """
+        Creates SortingResultWriter, that writes to a csv ResultWriter.
+        :param external_values_file: File for output of external values.
+        :return: SortingResultWriter instance.
+        """
+        result_writer = ResultWriter(external_values_file, StringIO())
+        # Keep written values readable after the writer is closed
+        external_values_file.close = lambda: None
+
+        return SortingResultWriter(result_writer, temp_directory=self.directory,
+                                   **kwargs)
+
+    @staticmethod
+    def close(result, external_values_file):
+        """
+        Closes writer and reads the written external values.
+        :param result: SortingResultWriter instance.
+        :param external_values_file: File for output of external values.
+        :return: List of rows as tuples.
+        """
+        result.close()
+        external_values_file.seek(0)
+
+        return map(tuple, csv.reader(external_values_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
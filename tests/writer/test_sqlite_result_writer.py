@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Contains tests for SqliteResultWriter class"""
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from dumpconverter.writer.ResultWriter import ResultWriter
+from dumpconverter.writer.SqliteResultWriter import SqliteResultWriter
+
+
+class SqliteResultWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "external_values.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_external_values(self):
+        rows = [
+            ("foobar", "foobar", "P42", "foobar"),
+            ("foobar", "foobar", "P42", "foo,bar"),
+            ("foobar", "fubar", "P21", "m\xc3\xa4nnlich")
+        ]
+        result = SqliteResultWriter(self.path, flush_size=2, transaction_size=2)
+        result.write_external_values(rows[:1])
+        assert 1 == len(result.pending_rows)
+        result.write_external_values(rows[1:2])
+        assert [] == result.pending_rows
+        assert 0 == result.uncommitted_rows
+        result.write_external_value(*rows[2])
+        result.close()
+
+        assert rows == self.query("SELECT * FROM external_values ORDER BY rowid")
+
+    def test_write_dump_information(self):
+        result = SqliteResultWriter(self.path)
+        result.write_dump_information("foobar", "Q42", ["P42"], "en",
+                                      "http://foo.bar", 42, "Q21")
+        result.close()
+
+        rows = self.query("SELECT * FROM dump_information")
+        assert 1 == len(rows)
+        assert ("foobar", "Q42") == rows[0][:2]
+        assert ["P42"] == json.loads(rows[0][2])
+        assert ("en", "http://foo.bar", 42, "Q21") == rows[0][4:]
+
+    def test_write_serialized_external_values(self):
+        rows = [("foo", "bar", "P1", "baz"), ("foo", "bar", "P2", "a,\"b\"\r\nc")]
+        serialized_rows = ResultWriter.serialize_external_values(rows)
+
+        result = SqliteResultWriter(self.path)
+        result.write_external_values(rows[:1])
+        result.write_serialized_external_values(serialized_rows)
+        result.close()
+
+        assert rows[:1] + rows == self.query("SELECT * FROM external_values ORDER BY rowid")
+
+    def test_merge(self):
+        external_values_file = StringIO()
+        dump_information_file = StringIO()
+        delta_file = StringIO()
+        partial_result = ResultWriter(external_values_file, dump_information_file,
+                                      delta_file=delta_file)
+        partial_result.write_external_values([("bar", "bar", "P2", "bar")])
+        partial_result.write_dump_information("bar", "Q42", ["P42"], "en",
+                                              "http://foo.bar", None, "Q21")
+        partial_result.write_delta("bar", "bar", "added")
+        partial_result.flush()
+        for partial_file in (external_values_file, dump_information_file, delta_file):
+            partial_file.seek(0)
+
+        merged_delta_file = StringIO()
+        result = SqliteResultWriter(self.path, merged_delta_file)
+        result.write_external_values([("foo", "foo", "P1", "foo")])
+        result.merge(external_values_file, dump_information_file, delta_file)
+        result.write_external_value("baz", "baz", "P3", "baz")
+        delta = merged_delta_file.getvalue()
+        result.close()
+
+        assert [
+            ("foo", "foo", "P1", "foo"),
+            ("bar", "bar", "P2", "bar"),
+            ("baz", "baz", "P3", "baz")
+        ] == self.query("SELECT * FROM external_values ORDER BY rowid")
+        assert [("bar", None)] == self.query("SELECT dump_id, size FROM dump_information")
+        assert "bar,bar,added\r\n" == delta
+        assert merged_delta_file.closed
+
+    def test_write_delta(self):
+        delta_file = StringIO()
+        result = SqliteResultWriter(self.path, delta_file)
+        result.write_delta("foo", "bar", "added")
+
+        assert "foo,bar,added\r\n" == delta_file.getvalue()
+
+    def test_recreate_tables(self):
+        result = SqliteResultWriter(self.path)
+        result.write_external_value("foo", "foo", "P1", "foo")
+        result.close()
+        result = SqliteResultWriter(self.path)
+        result.write_external_value("bar", "bar", "P2", "bar")
+        result.close()
+
+        assert [("bar", "bar", "P2", "bar")] == self.query("SELECT * FROM external_values")
+
+    def test_create_indexes(self):
+        result = SqliteResultWriter(self.path)
+        assert [] == self.query("SELECT name FROM sqlite_master WHERE type = 'index'")
+        result.close()
+
+        assert [("dump_information_dump",), ("external_values_entity",)] == \
+            self.query("SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name")
+
+    def query(self, statement):
+        """
+        Runs query on the written database.
+        :param statement: SQL query.
+        :return: List of rows.
+        """
+        connection = sqlite3.connect(self.path)
+        connection.text_factory = str
+        try:
+            return connection.execute(statement).fetchall()
+        finally:
+            connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()